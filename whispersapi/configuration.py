@@ -0,0 +1,144 @@
+import time
+import threading
+from django.conf import settings
+from whispersapi.models import Configuration
+
+# Typed access to the values of the Configuration table, cached per process.
+#
+# All Configuration records are loaded with a single query the first time any value is needed, and each value is
+# parsed and validated the first time it is requested (falling back to the default in the settings, and emailing the
+# admins once, if the record is missing or holds the wrong type), so values can be read as often as needed
+# (e.g., once per location or per email) without querying the database.
+# The cache is cleared whenever a Configuration record is saved or deleted (see the receiver in models.py),
+# and since that only reaches the current process, other processes (e.g., the other web server workers
+# and the Celery workers) reload it once it is older than CONFIGURATION_CACHE_TIMEOUT seconds.
+
+CONFIGURATION_CACHE_TIMEOUT = 300
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def parse_text(value):
+    return value
+
+
+def parse_int(value):
+    if not value.strip().isdecimal():
+        raise ValueError(value)
+    return int(value)
+
+
+def parse_int_list(value):
+    return [parse_int(x) for x in value.split(',')]
+
+
+def parse_email_address(value):
+    if value.count('@') != 1:
+        raise ValueError(value)
+    return value.strip()
+
+
+# the name of each Configuration record, mapped to the setting holding its default value,
+# the function that parses and validates it, and the name of the type it is expected to hold
+CONFIGURATION_VALUES = {
+    'geonames_username': ('GEONAMES_USERNAME', parse_text, 'str'),
+    'geonames_api_url': ('GEONAMES_API', parse_text, 'str'),
+    'flyways_api_url': ('FLYWAYS_API', parse_text, 'str'),
+    'email_boilerplate': ('EMAIL_BOILERPLATE', parse_text, 'str'),
+    'whispers_email_address': ('EMAIL_WHISPERS', parse_email_address, 'email_address'),
+    'whispers_admin_user': ('WHISPERS_ADMIN_USER_ID', parse_int, 'int'),
+    'hfs_epi_user': ('WHISPERS_ADMIN_USER_ID', parse_int, 'int'),
+    'madison_epi_user': ('WHISPERS_ADMIN_USER_ID', parse_int, 'int'),
+    'nwhc_organization': ('NWHC_ORG_ID', parse_int, 'int'),
+    'hfs_locations': ('HFS_LOCATIONS', parse_int_list, 'int'),
+    'stale_event_periods': ('STALE_EVENT_PERIODS', parse_int_list, 'int'),
+}
+
+
+def clear_configuration_cache():
+    with _lock:
+        _cache.clear()
+
+
+def get_configuration_value(name):
+    # return the parsed value of a Configuration record, or its default if the record is missing or invalid
+    with _lock:
+        if 'loaded_at' not in _cache or time.monotonic() - _cache['loaded_at'] >= CONFIGURATION_CACHE_TIMEOUT:
+            _cache['records'] = dict(Configuration.objects.values_list('name', 'value'))
+            _cache['values'] = {}
+            _cache['loaded_at'] = time.monotonic()
+        records = _cache['records']
+        values = _cache['values']
+        if name in values:
+            return values[name]
+
+    setting_name, parse, expected_type = CONFIGURATION_VALUES[name]
+    missing = name not in records
+    wrong_type = False
+    if not missing:
+        try:
+            value = parse(records[name])
+        except ValueError:
+            wrong_type = True
+    if missing or wrong_type:
+        value = getattr(settings, setting_name)
+        try:
+            value = parse(value)
+        except (ValueError, AttributeError):
+            pass
+    # cache the value before emailing the admins, since sending the email reads the whispers_email_address value
+    values[name] = value
+
+    if missing or wrong_type:
+        from whispersapi.immediate_tasks import (send_missing_configuration_value_email,
+                                                 send_wrong_type_configuration_value_email)
+        if missing:
+            send_missing_configuration_value_email(name)
+        else:
+            send_wrong_type_configuration_value_email(name, type(records[name]).__name__, expected_type)
+    return value
+
+
+def get_geonames_username():
+    return get_configuration_value('geonames_username')
+
+
+def get_geonames_api():
+    return get_configuration_value('geonames_api_url')
+
+
+def get_flyways_api():
+    return get_configuration_value('flyways_api_url')
+
+
+def get_email_boilerplate():
+    return get_configuration_value('email_boilerplate')
+
+
+def get_whispers_email_address():
+    return get_configuration_value('whispers_email_address')
+
+
+def get_whispers_admin_user_id():
+    return get_configuration_value('whispers_admin_user')
+
+
+def get_hfs_epi_user_id():
+    return get_configuration_value('hfs_epi_user')
+
+
+def get_madison_epi_user_id():
+    return get_configuration_value('madison_epi_user')
+
+
+def get_nwhc_org_id():
+    return get_configuration_value('nwhc_organization')
+
+
+def get_hfs_locations():
+    return get_configuration_value('hfs_locations')
+
+
+def get_stale_event_periods():
+    return get_configuration_value('stale_event_periods')
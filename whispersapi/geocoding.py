@@ -0,0 +1,142 @@
+import os
+import json
+import math
+from django.conf import settings
+
+# Offline reverse geocoding: find the country, administrative level one (e.g., state),
+# and administrative level two (e.g., county) that contain a point, without calling a third party service.
+#
+# Boundaries are read once per process from the GeoJSON FeatureCollection named by the BOUNDARIES_FILE setting.
+# Every feature must be a Polygon or MultiPolygon (WGS84 longitude/latitude coordinates) whose properties hold
+# the WHISPers IDs of the area it represents, including the IDs of its parent areas, for example:
+#   {"country_id": 30, "administrative_level_one_id": 50, "administrative_level_two_id": 2939}
+# A feature may stop at any level (e.g., a country or state without counties), in which case the missing IDs
+# are null or omitted. When several features contain a point, the most specific one wins.
+#
+# Flyways are located the same way, from the GeoJSON FeatureCollection named by the FLYWAYS_FILE setting,
+# in which every feature's properties hold the WHISPers ID of its flyway, for example: {"flyway_id": 3}
+
+BOUNDARY_ID_FIELDS = ['country_id', 'administrative_level_one_id', 'administrative_level_two_id']
+FLYWAY_ID_FIELDS = ['flyway_id']
+GRID_CELL_SIZE = 1.0
+
+_indexes = {}
+
+
+def point_in_rings(longitude, latitude, rings):
+    # even-odd ray casting over all rings of a polygon, so holes (inner rings) are excluded automatically
+    inside = False
+    for ring in rings:
+        j = len(ring) - 1
+        for i in range(len(ring)):
+            xi, yi = ring[i]
+            xj, yj = ring[j]
+            if (yi > latitude) != (yj > latitude) and longitude < (xj - xi) * (latitude - yi) / (yj - yi) + xi:
+                inside = not inside
+            j = i
+    return inside
+
+
+class BoundaryIndex(object):
+    """
+    In-memory grid index of administrative boundary polygons
+    """
+
+    def __init__(self, cell_size=GRID_CELL_SIZE):
+        self.cell_size = cell_size
+        self.boundaries = []
+        self.cells = {}
+
+    def cell_range(self, low, high):
+        return range(int(math.floor(low / self.cell_size)), int(math.floor(high / self.cell_size)) + 1)
+
+    def add(self, ids, polygons):
+        # store each polygon (a list of rings of (lng, lat) pairs) with its bounding box,
+        # and register it in every grid cell its bounding box touches
+        for rings in polygons:
+            rings = [[(float(point[0]), float(point[1])) for point in ring] for ring in rings if ring]
+            if not rings:
+                continue
+            longitudes = [point[0] for point in rings[0]]
+            latitudes = [point[1] for point in rings[0]]
+            bbox = (min(longitudes), min(latitudes), max(longitudes), max(latitudes))
+            position = len(self.boundaries)
+            self.boundaries.append((bbox, rings, ids))
+            for x in self.cell_range(bbox[0], bbox[2]):
+                for y in self.cell_range(bbox[1], bbox[3]):
+                    self.cells.setdefault((x, y), []).append(position)
+
+    def locate(self, latitude, longitude):
+        # return the IDs of the most specific boundary containing the point, or None if no boundary contains it
+        latitude = float(latitude)
+        longitude = float(longitude)
+        cell = (int(math.floor(longitude / self.cell_size)), int(math.floor(latitude / self.cell_size)))
+        match = None
+        for position in self.cells.get(cell, []):
+            bbox, rings, ids = self.boundaries[position]
+            if not (bbox[0] <= longitude <= bbox[2] and bbox[1] <= latitude <= bbox[3]):
+                continue
+            if (match is None or len([i for i in ids.values() if i]) > len([i for i in match.values() if i])) \
+                    and point_in_rings(longitude, latitude, rings):
+                match = ids
+        return match
+
+    @classmethod
+    def from_geojson(cls, geojson, id_fields=BOUNDARY_ID_FIELDS, cell_size=GRID_CELL_SIZE):
+        # features without a value for the first (least specific) ID field are skipped
+        index = cls(cell_size)
+        for feature in geojson['features']:
+            properties = feature.get('properties') or {}
+            ids = {field: properties.get(field) for field in id_fields}
+            if not ids[id_fields[0]]:
+                continue
+            geometry = feature['geometry']
+            if geometry['type'] == 'Polygon':
+                index.add(ids, [geometry['coordinates']])
+            elif geometry['type'] == 'MultiPolygon':
+                index.add(ids, geometry['coordinates'])
+        return index
+
+
+def load_index(setting_name, id_fields):
+    # load the GeoJSON file named by a setting the first time it is needed (at most once per process)
+    # and return its index, or None if no file is configured or it could not be loaded
+    if setting_name not in _indexes:
+        _indexes[setting_name] = None
+        geojson_file = getattr(settings, setting_name, '')
+        if geojson_file:
+            path = os.path.join(settings.SETTINGS_DIR, geojson_file)
+            try:
+                with open(path) as f:
+                    _indexes[setting_name] = BoundaryIndex.from_geojson(json.load(f), id_fields)
+            except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+                # email admins and fall back to the third party service
+                from whispersapi.immediate_tasks import send_boundary_file_exception_email
+                send_boundary_file_exception_email(path, e)
+    return _indexes[setting_name]
+
+
+def get_boundary_index():
+    return load_index('BOUNDARIES_FILE', BOUNDARY_ID_FIELDS)
+
+
+def get_flyway_index():
+    return load_index('FLYWAYS_FILE', FLYWAY_ID_FIELDS)
+
+
+def reverse_geocode(latitude, longitude):
+    # return a dict of the country, administrative level one, and administrative level two IDs containing the point,
+    # or None if the point could not be located offline (in which case the caller may fall back to Geonames)
+    index = get_boundary_index()
+    if index is None:
+        return None
+    return index.locate(latitude, longitude)
+
+
+def locate_flyway(latitude, longitude):
+    # return the ID of the flyway containing the point, or None if no flyway contains it
+    index = get_flyway_index()
+    if index is None:
+        return None
+    location = index.locate(latitude, longitude)
+    return location['flyway_id'] if location else None
@@ -0,0 +1,151 @@
+import time
+import threading
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+# Shared client for every request WHISPers makes to a third party service (e.g., Geonames, FWS Flyways).
+#
+# Each host gets its own pooled session, every request has connect and read timeouts, and idempotent requests
+# that fail to connect or return a server error are retried a bounded number of times with backoff.
+# Each service also has a circuit breaker: after several consecutive failed requests the circuit opens
+# and requests to that service fail fast (raising ServiceUnavailableError) instead of tying up a worker,
+# until a trial request is let through after the reset timeout and succeeds.
+# Requests made while a user waits on the response (interactive=True) are not retried and have a shorter read timeout,
+# so that a slow service cannot hold a web server thread for long (mod_wsgi's request-timeout is 60 seconds).
+# The number of requests, errors, and response times of each endpoint are tracked (per process) in get_metrics(),
+# which admins can view through the third party service metrics endpoint.
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+MAX_RETRIES = 2
+INTERACTIVE_READ_TIMEOUT = 5
+INTERACTIVE_MAX_RETRIES = 0
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+POOL_MAXSIZE = 10
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 60
+
+_sessions = {}
+_breakers = {}
+_metrics = {}
+_lock = threading.Lock()
+
+
+class ServiceUnavailableError(requests.exceptions.ConnectionError):
+    """
+    Raised instead of making a request to a third party service whose circuit breaker is open
+    """
+
+
+class CircuitBreaker(object):
+    """
+    Consecutive failure counter for one third party service
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow_request(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            # once the reset timeout has passed, let a single trial request through
+            # (restarting the timeout so that other requests keep failing fast while it runs)
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        # return True if this failure opened the circuit
+        with self.lock:
+            self.failures += 1
+            if self.opened_at is not None:
+                self.opened_at = time.monotonic()
+            elif self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+def get_session(url, max_retries=MAX_RETRIES):
+    # return the session (and so the connection pool) for the host of a URL and a number of retries,
+    # creating it the first time
+    parts = urlsplit(url)
+    prefix = parts.scheme + '://' + parts.netloc
+    with _lock:
+        if (prefix, max_retries) not in _sessions:
+            retry = Retry(total=max_retries, connect=max_retries, read=max_retries, status=max_retries,
+                          backoff_factor=RETRY_BACKOFF_FACTOR, status_forcelist=RETRY_STATUSES,
+                          raise_on_status=False)
+            session = requests.Session()
+            session.mount(prefix, HTTPAdapter(pool_maxsize=POOL_MAXSIZE, max_retries=retry))
+            _sessions[(prefix, max_retries)] = session
+        return _sessions[(prefix, max_retries)]
+
+
+def get_breaker(service):
+    with _lock:
+        if service not in _breakers:
+            _breakers[service] = CircuitBreaker()
+        return _breakers[service]
+
+
+def record_metrics(service, url, seconds, error):
+    key = (service, urlsplit(url).path)
+    with _lock:
+        metrics = _metrics.setdefault(key, {'requests': 0, 'errors': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+        metrics['requests'] += 1
+        metrics['errors'] += 1 if error else 0
+        metrics['total_seconds'] += seconds
+        metrics['max_seconds'] = max(metrics['max_seconds'], seconds)
+
+
+def get_metrics():
+    # return the request count, error count, and average and maximum response times of every endpoint requested
+    with _lock:
+        return {key: dict(metrics, average_seconds=metrics['total_seconds'] / metrics['requests'])
+                for key, metrics in _metrics.items()}
+
+
+def get(service, url, params=None, timeout=None, interactive=False):
+    # make a GET request to a third party service, raising a requests exception if it fails (after any retries),
+    # or ServiceUnavailableError without making the request if the service's circuit breaker is open
+    # (set interactive to True for a request made while a user waits on the response, i.e., in a web request)
+    breaker = get_breaker(service)
+    if not breaker.allow_request():
+        raise ServiceUnavailableError(service + " is unavailable (after repeated failures), so " + url
+                                      + " was not requested.")
+    if interactive:
+        session = get_session(url, INTERACTIVE_MAX_RETRIES)
+        timeout = timeout or (CONNECT_TIMEOUT, INTERACTIVE_READ_TIMEOUT)
+    else:
+        session = get_session(url)
+        timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    start = time.monotonic()
+    try:
+        response = session.get(url, params=params, timeout=timeout, verify=settings.SSL_CERT)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        record_metrics(service, url, time.monotonic() - start, True)
+        if breaker.record_failure():
+            # email admins once when the service is taken out of use, rather than on every request that fails fast
+            from whispersapi.immediate_tasks import send_third_party_service_unavailable_email
+            send_third_party_service_unavailable_email(service, url, e, CIRCUIT_RESET_TIMEOUT)
+        raise
+    record_metrics(service, url, time.monotonic() - start, False)
+    breaker.record_success()
+    return response
@@ -1,9 +1,17 @@
 from celery import shared_task, current_task
 import re
-from datetime import datetime
+import time
+import requests
+from datetime import datetime, timedelta
 from rest_framework.settings import api_settings
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction, DatabaseError
+from django.db.models import F
+from django.db.models.functions import Now
+from simple_history.utils import bulk_create_with_history
 from whispersapi.models import *
+from whispersapi.http_client import ServiceUnavailableError
+from whispersapi.configuration import get_whispers_email_address, get_whispers_admin_user_id, get_email_boilerplate
 
 
 def jsonify_errors(data):
@@ -18,18 +26,73 @@ def jsonify_errors(data):
         return data
 
 
+# Admin alerts are queued (as AdminAlert records) rather than emailed as they happen,
+# and the queued alerts are sent to the admins in a digest by the send_admin_alert_digest task,
+# so that reporting a problem costs at most one cheap write on the request path, and a problem that recurs
+# on every request (e.g., a missing configuration value) is reported once per digest instead of once per request.
+# Each process also remembers the alerts it wrote recently, and skips the write entirely for repeats within
+# ADMIN_ALERT_DEDUPE_WINDOW seconds (so the occurrences of an alert are a lower bound).
+# The alert is only written once the caller's transaction (if any) commits, so that it is not written inside
+# a transaction that is then rolled back, and an alert is only remembered once it has been written
+# (so if the caller's transaction is rolled back, the next occurrence of the problem is still reported).
+ADMIN_ALERT_DEDUPE_WINDOW = 300
+_recent_admin_alerts = {}
+
+
+def admin_alert_recently_written(kind, key):
+    last_written = _recent_admin_alerts.get((kind, key), -ADMIN_ALERT_DEDUPE_WINDOW)
+    return time.monotonic() - last_written < ADMIN_ALERT_DEDUPE_WINDOW
+
+
+def queue_admin_alert(kind, key, subject, body):
+    if admin_alert_recently_written(kind, key):
+        return
+    transaction.on_commit(lambda: write_admin_alert(kind, key, subject, body))
+
+
+def write_admin_alert(kind, key, subject, body):
+    # (checked again, since the same alert may have been queued several times in one transaction)
+    if admin_alert_recently_written(kind, key):
+        return
+    alert_key = str(key)[:AdminAlert._meta.get_field('key').max_length]
+    subject = subject[:AdminAlert._meta.get_field('subject').max_length]
+    updated = AdminAlert.objects.filter(kind=kind, key=alert_key, sent_date__isnull=True).update(
+        occurrences=F('occurrences') + 1, last_occurred=Now())
+    if not updated:
+        AdminAlert.objects.create(kind=kind, key=alert_key, subject=subject, body=body)
+    _recent_admin_alerts[(kind, key)] = time.monotonic()
+
+
 def send_third_party_service_exception_email(third_party_service, endpoint, exception):
-    recip = get_whispers_email_address()
+    # requests that were not made because the service is unavailable were already reported when it became unavailable
+    if isinstance(exception, ServiceUnavailableError):
+        return
     subject = "WHISPERS ADMIN: Third Party Service Exception"
     body = "A request to the \"" + third_party_service + "\" third party service at \"" + endpoint + "\" raised"
     body += " an exception at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S") + "."
-    body += " Exception details: \r\n" + exception
-    notif_email = construct_notification_email(recip, subject, body, False)
-    print(notif_email.__dict__)
+    body += " Exception details: \r\n" + str(exception)
+    queue_admin_alert('third_party_service_exception', third_party_service + ' ' + endpoint, subject, body)
+
+
+def send_third_party_service_unavailable_email(third_party_service, endpoint, exception, reset_timeout):
+    subject = "WHISPERS ADMIN: Third Party Service Unavailable"
+    body = "Repeated requests to the \"" + third_party_service + "\" third party service failed, the last one at \""
+    body += endpoint + "\" at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S") + "."
+    body += " No further requests will be made to this service for " + str(reset_timeout) + " seconds"
+    body += " (and then only until one fails again). Exception details: \r\n" + str(exception)
+    queue_admin_alert('third_party_service_unavailable', third_party_service, subject, body)
+
+
+def send_boundary_file_exception_email(path, exception):
+    subject = "WHISPERS ADMIN: Boundary File Exception"
+    body = "The boundary file at \"" + path + "\" could not be loaded"
+    body += " at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S") + ","
+    body += " so the third party service it replaces will be used instead."
+    body += " Exception details: \r\n" + str(exception)
+    queue_admin_alert('boundary_file_exception', path, subject, body)
 
 
 def send_notification_template_message_keyerror_email(template_name, encountered_key, expected_keys):
-    recip = get_whispers_email_address()
     subject = "WHISPERS ADMIN: Notification Message Template KeyError"
     body = "The \"" + template_name + "\" Notification Message Template encountered a KeyError"
     body += " at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S") + ". Encountered " + str(encountered_key.args[0])
@@ -39,97 +102,53 @@ def send_notification_template_message_keyerror_email(template_name, encountered
         str_keys += ", " + str(key)
     str_keys = str_keys.replace(", ", "", 1)
     body += " [" + str_keys + "]."
-    notif_email = construct_notification_email(recip, subject, body, False)
-    print(notif_email.__dict__)
+    queue_admin_alert('notification_template_message_keyerror',
+                      template_name + ' ' + str(encountered_key.args[0]), subject, body)
 
 
 def send_missing_notification_template_message_email(task_name, template_name):
-    recip = get_whispers_email_address()
     subject = "WHISPERS ADMIN: Notification Message Template Not Found During " + task_name + " task"
     body = "The \"" + template_name + "\" Notification Message Template was not found"
     body += " at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S")
-    notif_email = construct_notification_email(recip, subject, body, False)
-    print(notif_email.__dict__)
+    queue_admin_alert('missing_notification_template_message', task_name + ' ' + template_name, subject, body)
 
 
 def send_missing_notification_cue_standard_email(user, template_name):
-    recip = get_whispers_email_address()
     subject = "WHISPERS ADMIN: Standard Notification Cue Not Found During standard_notifications task"
     body = "The \"" + template_name + "\" Standard Notification Cue was not found for user "
     body += user.first_name + " " + user.last_name + " (username " + user.username + ", ID " + str(user.id) + ")"
     body += " at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S")
-    notif_email = construct_notification_email(recip, subject, body, False)
-    print(notif_email.__dict__)
+    queue_admin_alert('missing_notification_cue_standard', str(user.id) + ' ' + template_name, subject, body)
 
 
-def send_missing_configuration_value_email(record_name, message="A default value was used instead.", whispers_email_address=None):
-    if whispers_email_address is None:
-        recip = get_whispers_email_address()
-    else:
-        recip = whispers_email_address
+def send_outgoing_email_failure_email(outgoing, exception):
+    recipients = ", ".join(outgoing.to + outgoing.cc + outgoing.bcc)
+    subject = "WHISPERS ADMIN: Email Failure"
+    body = "The email \"" + outgoing.subject + "\" (ID " + str(outgoing.id) + " in the OutgoingEmail table)"
+    body += " could not be sent to " + recipients + " after " + str(outgoing.attempts) + " attempts,"
+    body += " the last at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S") + "."
+    body += " Exception details: \r\n" + str(exception)
+    queue_admin_alert('email_failure', recipients, subject, body)
+
+
+def send_missing_configuration_value_email(record_name, message="A default value was used instead."):
     subject = "WHISPERS ADMIN: Configuration Value Not Found"
     body = "A configuration value ('" + record_name + "') was not found in the Configuration table."
     body += " Problem encountered at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S") + ". " + message
-    notif_email = construct_notification_email(recip, subject, body, False, whispers_email_address=whispers_email_address)
-    print(notif_email.__dict__)
+    queue_admin_alert('missing_configuration_value', record_name, subject, body)
 
 
 def send_wrong_type_configuration_value_email(record_name, encountered_type, expected_type,
-                                              message="A default value was used instead.", whispers_email_address=None):
-    if whispers_email_address is None:
-        recip = get_whispers_email_address()
-    else:
-        recip = whispers_email_address
+                                              message="A default value was used instead."):
     subject = "WHISPERS ADMIN: Configuration Value Wrong Type"
     body = "A configuration value ('" + record_name + "') in the Configuration table contained the wrong data type."
     body += "Encountered " + encountered_type + " when " + expected_type + " was expected."
     body += " Problem encountered at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S") + ". " + message
-    notif_email = construct_notification_email(recip, subject, body, False, whispers_email_address=whispers_email_address)
-    print(notif_email.__dict__)
-
-
-def get_whispers_admin_user_id():
-    whispers_admin_user_record = Configuration.objects.filter(name='whispers_admin_user').first()
-    if whispers_admin_user_record:
-        if whispers_admin_user_record.value.isdecimal():
-            WHISPERS_ADMIN_USER_ID = int(whispers_admin_user_record.value)
-        else:
-            WHISPERS_ADMIN_USER_ID = settings.WHISPERS_ADMIN_USER_ID
-            encountered_type = type(whispers_admin_user_record.value).__name__
-            send_wrong_type_configuration_value_email('whispers_admin_user', encountered_type, 'int')
-    else:
-        WHISPERS_ADMIN_USER_ID = settings.WHISPERS_ADMIN_USER_ID
-        send_missing_configuration_value_email('whispers_admin_user')
-    return WHISPERS_ADMIN_USER_ID
-
-
-def get_whispers_email_address():
-    whispers_email_address = Configuration.objects.filter(name='whispers_email_address').first()
-    if whispers_email_address:
-        if whispers_email_address.value.count('@') == 1:
-            EMAIL_WHISPERS = whispers_email_address.value
-        else:
-            EMAIL_WHISPERS = settings.EMAIL_WHISPERS
-            encountered_type = type(whispers_email_address.value).__name__
-            send_wrong_type_configuration_value_email('whispers_email_address', encountered_type, 'email_address', email_address=EMAIL_WHISPERS)
-    else:
-        EMAIL_WHISPERS = settings.EMAIL_WHISPERS
-        send_missing_configuration_value_email('whispers_email_address', whispers_email_address=EMAIL_WHISPERS)
-    return EMAIL_WHISPERS
-
+    queue_admin_alert('wrong_type_configuration_value', record_name, subject, body)
 
-def get_email_boilerplate():
-    email_boilerplate_record = Configuration.objects.filter(name='email_boilerplate').first()
-    if email_boilerplate_record:
-        EMAIL_BOILERPLATE = email_boilerplate_record.value
-    else:
-        EMAIL_BOILERPLATE = settings.EMAIL_BOILERPLATE
-        send_missing_configuration_value_email('email_boilerplate')
-    return EMAIL_BOILERPLATE
 
-
-def construct_notification_email(recipient_email, subject, html_body,
-                                 include_boilerplate=True, whispers_email_address=None):
+def build_notification_email(recipient_email, subject, html_body,
+                             include_boilerplate=True, whispers_email_address=None):
 
     # append the boilerplate text to the end of the email body
     if include_boilerplate:
@@ -158,70 +177,289 @@ def construct_notification_email(recipient_email, subject, html_body,
     headers = None
     email = EmailMultiAlternatives(subject, body, from_address, to_list, bcc_list, reply_to=reply_list, headers=headers)
     email.attach_alternative(html_body, "text/html")
+    return email
+
+
+# Emails are not sent by the code that creates them, but queued in the outbox (the OutgoingEmail table),
+# from which the send_queued_emails task sends them in throttled batches, retrying any that fail
+EMAIL_BATCH_SIZE = 50
+EMAIL_MAX_ATTEMPTS = 5
+EMAIL_RETRY_DELAY = 5
+
+
+def outgoing_email(email):
+    # return an (unsaved) outbox record of an email message
+    html_body = ''
+    for content, mimetype in getattr(email, 'alternatives', []):
+        if mimetype == 'text/html':
+            html_body = content
+    return OutgoingEmail(subject=email.subject, body=email.body, html_body=html_body, from_address=email.from_email,
+                         to=list(email.to), cc=list(email.cc), bcc=list(email.bcc), reply_to=list(email.reply_to))
+
+
+def queue_email(email):
+    outgoing_email(email).save()
+    return email
+
+
+def queue_emails(emails):
+    OutgoingEmail.objects.bulk_create([outgoing_email(email) for email in emails])
+    return emails
+
+
+def send_outgoing_emails(outgoing_emails, now):
+    # send a batch of outbox emails over a single connection (or outside of production and test, write them to files),
+    # and record the outcome of each, scheduling a retry with exponential backoff for each one that failed
     if settings.ENVIRONMENT in ['production', 'test']:
-        try:
-            email.send(fail_silently=False)
-        except TypeError:
-            message = "Send email failed, please contact the administrator."
-            print(jsonify_errors(message))
+        connection = get_connection(fail_silently=False)
     else:
-        print(email.__dict__)
-    return email
+        connection = get_connection('django.core.mail.backends.filebased.EmailBackend',
+                                    file_path=settings.EMAIL_FILE_PATH)
+    try:
+        for outgoing in outgoing_emails:
+            email = EmailMultiAlternatives(outgoing.subject, outgoing.body, outgoing.from_address, outgoing.to,
+                                           outgoing.bcc, cc=outgoing.cc, reply_to=outgoing.reply_to)
+            if outgoing.html_body:
+                email.attach_alternative(outgoing.html_body, "text/html")
+            outgoing.attempts += 1
+            try:
+                # (the connection is opened by the first send, and reopened by the next send after a failure)
+                connection.send_messages([email])
+                outgoing.status = 'sent'
+                outgoing.sent_date = now
+            except Exception as e:
+                connection.close()
+                outgoing.last_error = str(e)
+                if outgoing.attempts >= EMAIL_MAX_ATTEMPTS:
+                    outgoing.status = 'failed'
+                    send_outgoing_email_failure_email(outgoing, e)
+                else:
+                    outgoing.next_attempt = now + timedelta(minutes=EMAIL_RETRY_DELAY * 2 ** (outgoing.attempts - 1))
+    finally:
+        connection.close()
+    OutgoingEmail.objects.bulk_update(
+        outgoing_emails, ['status', 'attempts', 'next_attempt', 'last_error', 'sent_date'])
+
+
+def construct_notification_email(recipient_email, subject, html_body,
+                                 include_boilerplate=True, whispers_email_address=None):
+    email = build_notification_email(recipient_email, subject, html_body, include_boilerplate, whispers_email_address)
+    return queue_email(email)
+
+
+def send_notification_emails(email_to, subject, html_body):
+    # build the email to every address (reading the boilerplate and sender address only once),
+    # and queue them all with a single insert
+    whispers_email_address = get_whispers_email_address()
+    html_body += get_email_boilerplate()
+    return queue_emails(
+        [build_notification_email(recip, subject, html_body, False, whispers_email_address) for recip in email_to])
+
+
+def send_notification_problem_email(recipients, source, event_id, client_page, subject, body, send_email, email_to,
+                                    error=None):
+    # notify admins of error
+    EMAIL_WHISPERS = get_whispers_email_address()
+    new_recip = EMAIL_WHISPERS
+    new_subject = "WHISPERS ADMIN: Problem Encountered During generate_notification_task"
+    new_body = "A problem was encountered while generating a notification. No notification was created."
+    new_body += " The cause of the problem was"
+    if not recipients and not subject and not body:
+        new_body += " a null recipient list and a null subject and a null body."
+    elif not recipients and not subject:
+        new_body += " a null recipient list and a null subject."
+    elif not recipients and not body:
+        new_body += " a null recipient list and a null body."
+    elif not subject and not body:
+        new_body += " a null subject and a null body."
+    elif not recipients:
+        new_body += " a null recipient list."
+    elif not subject:
+        new_body += " a null subject."
+    elif not body:
+        new_body += " a null body."
+    elif len(subject) > Notification._meta.get_field('subject').max_length:
+        new_body += " the subject length was greater than the maximum allowed length of the subject field."
+    elif error is not None:
+        new_body += " an error while saving the notification: " + str(error)
+    new_body += " Problem encountered at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S")
+    new_body += " during task " + str(current_task.request.id)
+    new_body += "<br /><br />The intended settings of the notification were:"
+    new_body += "<br />recipients: " + str(recipients)
+    new_body += "<br />source: " + source
+    new_body += "<br />event_id: " + str(event_id)
+    new_body += "<br />client_page: " + client_page
+    new_body += "<br />subject: " + subject
+    new_body += "<br />body: " + body
+    new_body += "<br />send_email: " + str(send_email)
+    new_body += "<br />email_to: " + str(email_to)
+    construct_notification_email(new_recip, new_subject, new_body, False)
 
 
 @shared_task(name='generate_notification_task')
 def generate_notification(template_id, recipients, source, event_id, client_page, subject, body,
                           send_email=False, email_to=None):
-    if not recipients or not subject or not body:
-        # notify admins of error
-        EMAIL_WHISPERS = get_whispers_email_address()
-        new_recip = EMAIL_WHISPERS
-        new_subject = "WHISPERS ADMIN: Problem Encountered During generate_notification_task"
-        new_body = "A problem was encountered while generating a notification. No notification was created."
-        new_body += " The cause of the problem was"
-        if not recipients and not subject and not body:
-            new_body += " a null recipient list and a null subject and a null body."
-        elif not recipients and not subject:
-            new_body += " a null recipient list and a null subject."
-        elif not recipients and not body:
-            new_body += " a null recipient list and a null body."
-        elif not subject and not body:
-            new_body += " a null subject and a null body."
-        elif not recipients:
-            new_body += " a null recipient list."
-        elif not subject:
-            new_body += " a null subject."
-        elif not body:
-            new_body += " a null body."
-        elif len(subject) > Notification._meta.get_field('subject').max_length:
-            new_body += " the subject length was greater than the maximum allowed length of the subject field."
-        new_body += " Problem encountered at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S")
-        new_body += " during task " + str(current_task.request.id)
-        new_body += "<br /><br />The intended settings of the notification were:"
-        new_body += "<br />recipients: " + str(recipients)
-        new_body += "<br />source: " + source
-        new_body += "<br />event_id: " + str(event_id)
-        new_body += "<br />client_page: " + client_page
-        new_body += "<br />subject: " + subject
-        new_body += "<br />body: " + body
-        new_body += "<br />send_email: " + str(send_email)
-        new_body += "<br />email_to: " + str(email_to)
-        notif_email = construct_notification_email(new_recip, new_subject, new_body, False)
-        print(notif_email.__dict__)
-    else:
+    return generate_notifications([{
+        'template_id': template_id, 'recipients': recipients, 'source': source, 'event_id': event_id,
+        'client_page': client_page, 'subject': subject, 'body': body, 'send_email': send_email, 'email_to': email_to}])
+
+
+@shared_task(name='generate_notifications_task')
+def generate_notifications(notifications):
+    # generate many notifications, each a dict of the arguments of generate_notification, with a single task
+    #  (looking up all their templates, events, and recipients at once)
+    valid_notifications = []
+    for notification in notifications:
+        if not notification['recipients'] or not notification['subject'] or not notification['body']:
+            send_notification_problem_email(
+                notification['recipients'], notification['source'], notification['event_id'],
+                notification['client_page'], notification['subject'], notification['body'],
+                notification.get('send_email', False), notification.get('email_to', None))
+        else:
+            valid_notifications.append(notification)
+    notifications = valid_notifications
+    if notifications:
         admin = User.objects.filter(id=get_whispers_admin_user_id()).first()
-        event = Event.objects.filter(id=event_id).first()
-        # ensure no duplicate notification recipients
-        recipients = list(set(recipients))
-        for recip in recipients:
-            user = User.objects.filter(id=recip).first()
-            template = NotificationMessageTemplate.objects.filter(id=template_id).first()
-            Notification.objects.create(
-                template=template, recipient=user, source=source, event=event, read=False, client_page=client_page,
-                subject=subject, body=body, created_by=admin, modified_by=admin)
-        if send_email and email_to is not None:
-            # ensure no duplicate email recipients
-            email_to = list(set(email_to))
-            for recip in email_to:
-                construct_notification_email(recip, subject, body, True)
+        events = Event.objects.in_bulk(set(notification['event_id'] for notification in notifications))
+        templates = NotificationMessageTemplate.objects.in_bulk(
+            set(notification['template_id'] for notification in notifications))
+        users = User.objects.in_bulk(set(user_id for notification in notifications
+                                         for user_id in notification['recipients']))
+        for notification in notifications:
+            # ensure no duplicate notification recipients, and insert the notifications (with history) of each entry
+            #  at once, in a transaction (or savepoint) of their own, so that an entry that cannot be saved
+            #  is reported to the admins without losing the others
+            try:
+                create_notifications([Notification(
+                    template=templates.get(notification['template_id']), recipient=users[user_id],
+                    source=notification['source'], event=events.get(notification['event_id']), read=False,
+                    client_page=notification['client_page'], subject=notification['subject'],
+                    body=notification['body'], created_by=admin, modified_by=admin)
+                    for user_id in sorted(set(notification['recipients'])) if user_id in users], admin)
+            except DatabaseError as e:
+                send_notification_problem_email(
+                    notification['recipients'], notification['source'], notification['event_id'],
+                    notification['client_page'], notification['subject'], notification['body'],
+                    notification.get('send_email', False), notification.get('email_to', None), e)
+                continue
+            email_to = notification.get('email_to', None)
+            if notification.get('send_email', False) and email_to is not None:
+                # ensure no duplicate email recipients
+                send_notification_emails(list(set(email_to)), notification['subject'], notification['body'])
+    return True
+
+
+def generate_notification_on_commit(*args, **kwargs):
+    # queue the generate_notification task only once the current transaction (if any) is committed,
+    # so that a request that fails and is rolled back does not create notifications about records that do not exist
+    # (outside of a transaction the task is queued immediately)
+    transaction.on_commit(lambda: generate_notification.delay(*args, **kwargs))
+
+
+ENRICHMENT_MAX_RETRIES = 5
+ENRICHMENT_RETRY_DELAY = 60
+
+
+def enrich_event_location(evt_loc, evt_loc_serializer, user, first_attempt, final_attempt):
+    # fill in the missing administrative level two and the flyway of an event location and check its coordinates,
+    # returning True if the location is complete, or False if it should be tried again later
+    from whispersapi.serializers import construct_email
+    complete = True
+    data = {'country': evt_loc.country, 'administrative_level_one': evt_loc.administrative_level_one,
+            'administrative_level_two': evt_loc.administrative_level_two,
+            'latitude': evt_loc.latitude, 'longitude': evt_loc.longitude}
+
+    # check the coordinates only on the first attempt, so that the admins are not emailed again on every retry
+    if first_attempt:
+        evt_loc_serializer.verify_coordinates(data)
+
+    # fill in a missing administrative level two from the coordinates
+    # (written directly, as it would have been had it been found before the location was created)
+    if data['administrative_level_two'] is None and data['latitude'] is not None and data['longitude'] is not None:
+        if evt_loc_serializer.geonames_reverse_geocode(data):
+            if data['administrative_level_two'] is not None:
+                EventLocation.objects.filter(id=evt_loc.id).update(
+                    administrative_level_two=data['administrative_level_two'])
+        else:
+            complete = False
+
+    # auto-assign flyway for locations in the USA (exclude territories and minor outlying islands)
+    if not evt_loc.flyways.all():
+        flyway = evt_loc_serializer.determine_flyway(data['country'], data['administrative_level_one'],
+                                                     data['administrative_level_two'], data['latitude'],
+                                                     data['longitude'])
+        if flyway is not None:
+            EventLocationFlyway.objects.create(event_location=evt_loc, flyway=flyway,
+                                               created_by=user, modified_by=user)
+        else:
+            flyway_expected = evt_loc_serializer.flyway_expected(
+                data['country'], data['administrative_level_one'], data['administrative_level_two'],
+                data['latitude'], data['longitude'])
+            if flyway_expected:
+                # the flyway may not have been found because a third party service failed, so try again later
+                complete = False
+            if not flyway_expected or final_attempt:
+                # No flyway can be determined
+                # Instead of causing a validation error, email admins and let the create proceed
+                message = f"No flyway could be determined from the data submitted by the user"
+                message += f" for Event Location {evt_loc.name} (ID {evt_loc.id})"
+                message += f" in Event {evt_loc.event.event_reference} (ID {evt_loc.event.id})."
+                construct_email("WHISPERS ADMIN: No Flyway Validation Warning", message)
+    return complete
+
+
+@shared_task(name='enrich_event_locations_task', bind=True, max_retries=ENRICHMENT_MAX_RETRIES)
+def enrich_event_locations(self, event_location_ids, user_id):
+    # look up the flyway and any missing administrative level two of new event locations and check their coordinates,
+    # which are deferred to this task (queued once the locations are committed) so that creating a location does not
+    # wait on any third party services; locations that could not be completed are retried with exponential backoff,
+    # and the outcome is recorded in each location's enrichment_status
+    from whispersapi.serializers import EventLocationSerializer
+    user = User.objects.filter(id=user_id).first()
+    evt_loc_serializer = EventLocationSerializer()
+    final_attempt = self.request.retries >= self.max_retries
+    completed_ids = []
+    retry_ids = []
+    evt_locs = EventLocation.objects.filter(id__in=event_location_ids).select_related(
+        'event', 'country', 'administrative_level_one', 'administrative_level_two').prefetch_related('flyways')
+    for evt_loc in evt_locs:
+        try:
+            complete = enrich_event_location(evt_loc, evt_loc_serializer, user, not self.request.retries,
+                                             final_attempt)
+        except requests.exceptions.RequestException as e:
+            # a third party service could not be reached, so try again later
+            send_third_party_service_exception_email('Geonames/FWS Flyways', 'enrich_event_locations', str(e))
+            complete = False
+        if complete:
+            completed_ids.append(evt_loc.id)
+        else:
+            retry_ids.append(evt_loc.id)
+    EventLocation.objects.filter(id__in=completed_ids).update(enrichment_status='complete')
+
+    if retry_ids:
+        if final_attempt:
+            EventLocation.objects.filter(id__in=retry_ids).update(enrichment_status='failed')
+        else:
+            raise self.retry(args=[retry_ids, user_id], countdown=ENRICHMENT_RETRY_DELAY * 2 ** self.request.retries)
+    return True
+
+
+@shared_task(name='process_imported_events_task')
+def process_imported_events(event_ids, user_id):
+    # send the notifications for events created by a bulk import,
+    # which are deferred to this task so that the import does not wait on creating them
+    # (the flyways of the imported locations are looked up by the enrich_event_locations task)
+
+    # create real time notifications for quality check
+    for event in Event.objects.filter(id__in=event_ids, event_status__name='Quality Check Needed'):
+        event.notify_quality_check()
+
+    # create real time notifications for high impact diseases
+    spec_diags = SpeciesDiagnosis.objects.filter(
+        location_species__event_location__event__in=event_ids, diagnosis__high_impact=True).select_related(
+        'diagnosis', 'created_by', 'location_species__event_location__country',
+        'location_species__event_location__administrative_level_one',
+        'location_species__event_location__event__created_by')
+    for spec_diag in spec_diags:
+        spec_diag.notify_high_impact_diagnosis(spec_diag.location_species.event_location.event)
     return True
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from whispersapi.models import Event, LocationSpecies, SpeciesDiagnosis, LOCATION_SPECIES_AFFECTED_COUNT
+
+
+class Command(BaseCommand):
+    help = ("Compare the stored affected_count of every event to a full recalculation from its child records,"
+            " and optionally repair any mismatches.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help="Write the recalculated affected_count to events with a mismatched stored count"
+                                 " (without touching modified_date or creating history records)")
+
+    def handle(self, *args, **options):
+        # recalculate every event's affected count with one grouped aggregate query per event type
+        # If EventType = Morbidity/Mortality
+        # then Sum(Max(estimated_dead, dead) + Max(estimated_sick, sick)) from location_species table
+        # If Event Type = Surveillance then Sum(number_positive) from species_diagnosis table
+        mortality_morbidity_counts = dict(LocationSpecies.objects.filter(
+            event_location__event__event_type=1).values('event_location__event').annotate(
+            affected_count=Coalesce(Sum(LOCATION_SPECIES_AFFECTED_COUNT), 0)).values_list(
+            'event_location__event', 'affected_count').order_by())
+        surveillance_counts = dict(SpeciesDiagnosis.objects.filter(
+            location_species__event_location__event__event_type=2).values(
+            'location_species__event_location__event').annotate(
+            affected_count=Coalesce(Sum('positive_count'), 0)).values_list(
+            'location_species__event_location__event', 'affected_count').order_by())
+
+        checked_count = 0
+        mismatches = []
+        events = Event.objects.values_list('id', 'event_type', 'affected_count').order_by('id')
+        for event_id, event_type_id, stored_count in events.iterator():
+            checked_count += 1
+            if event_type_id == 1:
+                expected_count = mortality_morbidity_counts.get(event_id, 0)
+            elif event_type_id == 2:
+                expected_count = surveillance_counts.get(event_id, 0)
+            else:
+                expected_count = None
+            if stored_count != expected_count:
+                mismatches.append((event_id, stored_count, expected_count))
+                self.stdout.write("Event {}: stored affected_count {} does not match recalculated {}".format(
+                    event_id, stored_count, expected_count))
+
+        if options['fix']:
+            for event_id, stored_count, expected_count in mismatches:
+                Event.objects.filter(id=event_id).update(affected_count=expected_count)
+
+        summary = "Checked {} events, found {} mismatched affected_count values".format(checked_count, len(mismatches))
+        if options['fix'] and mismatches:
+            summary += ", all of which were repaired"
+        if mismatches and not options['fix']:
+            self.stdout.write(self.style.WARNING(summary + "."))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary + "."))
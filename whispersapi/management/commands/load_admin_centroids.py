@@ -0,0 +1,51 @@
+import csv
+from decimal import Decimal, InvalidOperation
+from django.core.management.base import BaseCommand, CommandError
+from whispersapi.models import AdministrativeLevelOne, AdministrativeLevelTwo
+
+
+class Command(BaseCommand):
+    help = ("Load the centroids of administrative level ones and twos from a CSV file, so that their locations"
+            " need no Geonames lookup. The file must have the columns administrative_level_one_id,"
+            " administrative_level_two_id, latitude, and longitude; rows with an administrative_level_two_id set"
+            " the centroid of that administrative level two, and all others that of the administrative level one.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="Path of the CSV file of centroids")
+        parser.add_argument('--missing-only', action='store_true',
+                            help="Only set the centroids of administrative levels that do not have one yet"
+                                 " (for example, to keep centroids already found with Geonames)")
+
+    def handle(self, *args, **options):
+        centroids = {AdministrativeLevelOne: {}, AdministrativeLevelTwo: {}}
+        try:
+            with open(options['file'], newline='') as f:
+                for line_number, row in enumerate(csv.DictReader(f), start=2):
+                    try:
+                        latitude = Decimal(row['latitude']).quantize(Decimal('0.000001'))
+                        longitude = Decimal(row['longitude']).quantize(Decimal('0.000001'))
+                        if row.get('administrative_level_two_id'):
+                            centroids[AdministrativeLevelTwo][int(row['administrative_level_two_id'])] = (
+                                latitude, longitude)
+                        elif row.get('administrative_level_one_id'):
+                            centroids[AdministrativeLevelOne][int(row['administrative_level_one_id'])] = (
+                                latitude, longitude)
+                    except (KeyError, TypeError, ValueError, InvalidOperation):
+                        raise CommandError("Line {} of {} is not a valid centroid.".format(
+                            line_number, options['file']))
+        except OSError as e:
+            raise CommandError("Could not read {}: {}".format(options['file'], e))
+
+        for model, model_centroids in centroids.items():
+            units = model.objects.filter(id__in=model_centroids.keys()).only(
+                'id', 'centroid_latitude', 'centroid_longitude')
+            if options['missing_only']:
+                units = units.filter(centroid_latitude=None)
+            units = list(units)
+            for unit in units:
+                unit.centroid_latitude, unit.centroid_longitude = model_centroids[unit.id]
+            # write the centroids directly (without touching modified_date or creating history records),
+            # since they are reference data loaded from a file rather than edited by users
+            model.objects.bulk_update(units, ['centroid_latitude', 'centroid_longitude'], batch_size=500)
+            self.stdout.write(self.style.SUCCESS("Loaded {} of {} {} centroids.".format(
+                len(units), len(model_centroids), model._meta.verbose_name)))
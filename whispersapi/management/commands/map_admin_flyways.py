@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from whispersapi.models import AdministrativeLevelOne, AdministrativeLevelTwo
+from whispersapi.geocoding import get_boundary_index, get_flyway_index, point_in_rings
+
+NUDGES = [(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+
+class Command(BaseCommand):
+    help = ("Map every administrative level one and two that lies entirely inside one flyway to that flyway,"
+            " using the BOUNDARIES_FILE and FLYWAYS_FILE boundaries, so that their locations need no spatial overlay.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tolerance', type=float, default=0.001,
+                            help="Distance in degrees within which a boundary vertex is considered to touch a flyway"
+                                 " (to allow for boundaries that follow flyway lines but were digitized differently)")
+
+    def handle(self, *args, **options):
+        boundary_index = get_boundary_index()
+        flyway_index = get_flyway_index()
+        if boundary_index is None or flyway_index is None:
+            raise CommandError("Both the BOUNDARIES_FILE and FLYWAYS_FILE settings must name loadable GeoJSON files.")
+        tolerance = options['tolerance']
+
+        # every vertex of every flyway boundary (including the boundaries of holes), by the grid cell containing it
+        flyway_vertices = {}
+        for bbox, rings, ids in flyway_index.boundaries:
+            for ring in rings:
+                for lng, lat in ring:
+                    cell = (flyway_index.cell_range(lng, lng)[0], flyway_index.cell_range(lat, lat)[0])
+                    flyway_vertices.setdefault(cell, []).append((lng, lat))
+
+        # the flyways a vertex could belong to are those containing the vertex or any point just around it,
+        # and a unit lies entirely inside a flyway if that flyway is a candidate for every one of its vertices
+        # and no flyway boundary passes through the unit (a flyway boundary that passes through a unit either
+        # bends inside it, leaving a flyway vertex inside the unit, or cuts it straight, leaving unit vertices
+        # on both of its sides, so checking the vertices of both is enough)
+        candidates = {AdministrativeLevelOne: {}, AdministrativeLevelTwo: {}}
+        for bbox, rings, ids in boundary_index.boundaries:
+            if ids['administrative_level_two_id']:
+                model, unit_id = AdministrativeLevelTwo, ids['administrative_level_two_id']
+            elif ids['administrative_level_one_id']:
+                model, unit_id = AdministrativeLevelOne, ids['administrative_level_one_id']
+            else:
+                continue
+            unit_flyways = candidates[model].get(unit_id)
+            for lng, lat in rings[0]:
+                vertex_flyways = set()
+                for x, y in NUDGES:
+                    location = flyway_index.locate(lat + y * tolerance, lng + x * tolerance)
+                    vertex_flyways.add(location['flyway_id'] if location else None)
+                unit_flyways = vertex_flyways if unit_flyways is None else unit_flyways & vertex_flyways
+                if not unit_flyways:
+                    break
+            if unit_flyways and self.contains_flyway_vertex(bbox, rings, flyway_index, flyway_vertices, tolerance):
+                unit_flyways = set()
+            candidates[model][unit_id] = unit_flyways
+
+        # replace all of the mappings in a single transaction,
+        # so that locations are never located while the mappings are reset or only partly rewritten
+        with transaction.atomic():
+            for model, units in candidates.items():
+                mappings = {}
+                for unit_id, unit_flyways in units.items():
+                    if len(unit_flyways) == 1 and None not in unit_flyways:
+                        mappings.setdefault(unit_flyways.pop(), []).append(unit_id)
+                # write the mappings directly (without touching modified_date or creating history records),
+                # since they are derived from the boundary files rather than edited by users
+                model.objects.exclude(flyway=None).update(flyway=None)
+                for flyway_id, unit_ids in mappings.items():
+                    model.objects.filter(id__in=unit_ids).update(flyway=flyway_id)
+                self.stdout.write(self.style.SUCCESS("Mapped {} of {} {} boundaries to a single flyway.".format(
+                    sum(len(unit_ids) for unit_ids in mappings.values()), len(units), model._meta.verbose_name)))
+
+    @staticmethod
+    def contains_flyway_vertex(bbox, rings, flyway_index, flyway_vertices, tolerance):
+        # whether any flyway vertex lies inside the unit polygon (along with every point just around it,
+        # so that the vertices of flyway lines that the unit boundary follows are not counted)
+        for x in flyway_index.cell_range(bbox[0], bbox[2]):
+            for y in flyway_index.cell_range(bbox[1], bbox[3]):
+                for lng, lat in flyway_vertices.get((x, y), []):
+                    if (bbox[0] < lng < bbox[2] and bbox[1] < lat < bbox[3]
+                            and all(point_in_rings(lng + nudge_x * tolerance, lat + nudge_y * tolerance, rings)
+                                    for nudge_x, nudge_y in NUDGES)):
+                        return True
+        return False
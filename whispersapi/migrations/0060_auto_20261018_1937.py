@@ -0,0 +1,34 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whispersapi', '0059_auto_20230523_1011'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='administrativelevelone',
+            name='flyway',
+            field=models.ForeignKey(blank=True, help_text='A foreign key integer value identifying the flyway that entirely contains this administrative level one, if any', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='administrativelevelones', to='whispersapi.Flyway'),
+        ),
+        migrations.AddField(
+            model_name='administrativeleveltwo',
+            name='flyway',
+            field=models.ForeignKey(blank=True, help_text='A foreign key integer value identifying the flyway that entirely contains this administrative level two, if any', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='administrativeleveltwos', to='whispersapi.Flyway'),
+        ),
+        migrations.AddField(
+            model_name='historicaladministrativelevelone',
+            name='flyway',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='A foreign key integer value identifying the flyway that entirely contains this administrative level one, if any', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='whispersapi.Flyway'),
+        ),
+        migrations.AddField(
+            model_name='historicaladministrativeleveltwo',
+            name='flyway',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='A foreign key integer value identifying the flyway that entirely contains this administrative level two, if any', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='whispersapi.Flyway'),
+        ),
+    ]
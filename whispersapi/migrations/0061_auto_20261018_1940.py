@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whispersapi', '0060_auto_20261018_1937'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventlocation',
+            name='enrichment_status',
+            field=models.CharField(blank=True, default='', help_text='An alphanumeric value of the status of the background look up of the flyway and any missing administrative level two for this event location (pending, complete, or failed)', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='historicaleventlocation',
+            name='enrichment_status',
+            field=models.CharField(blank=True, default='', help_text='An alphanumeric value of the status of the background look up of the flyway and any missing administrative level two for this event location (pending, complete, or failed)', max_length=16),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whispersapi', '0061_auto_20261018_1940'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='administrativelevelone',
+            name='centroid_latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text='A fixed-precision decimal number value identifying the latitude for this administrative level one', max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='administrativelevelone',
+            name='centroid_longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text='A fixed-precision decimal number value identifying the longitude for this administrative level one', max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicaladministrativelevelone',
+            name='centroid_latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text='A fixed-precision decimal number value identifying the latitude for this administrative level one', max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicaladministrativelevelone',
+            name='centroid_longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text='A fixed-precision decimal number value identifying the longitude for this administrative level one', max_digits=9, null=True),
+        ),
+    ]
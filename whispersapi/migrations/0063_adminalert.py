@@ -0,0 +1,31 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whispersapi', '0062_auto_20261018_1944'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminAlert',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(help_text='An alphanumeric value of the kind of problem this alert reports', max_length=128)),
+                ('key', models.CharField(blank=True, default='', help_text='An alphanumeric value identifying what the problem was encountered with (alerts of the same kind and key are reported once per digest)', max_length=512)),
+                ('subject', models.CharField(help_text='An alphanumeric value of the subject of this alert', max_length=128)),
+                ('body', models.TextField(blank=True, default='', help_text='An alphanumeric value of the body of this alert (as of its first occurrence)')),
+                ('occurrences', models.IntegerField(default=1, help_text='An integer value indicating the number of times this problem was reported before the alert was sent')),
+                ('first_occurred', models.DateTimeField(auto_now_add=True, help_text='The date and time this problem was first reported')),
+                ('last_occurred', models.DateTimeField(auto_now=True, help_text='The date and time this problem was last reported')),
+                ('sent_date', models.DateTimeField(blank=True, db_index=True, help_text='The date and time this alert was sent to the admins in a digest, if it has been', null=True)),
+            ],
+            options={
+                'db_table': 'whispers_adminalert',
+                'ordering': ['id'],
+            },
+        ),
+    ]
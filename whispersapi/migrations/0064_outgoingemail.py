@@ -0,0 +1,38 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:50
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whispersapi', '0063_adminalert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.TextField(blank=True, default='', help_text='An alphanumeric value of the subject of this email')),
+                ('body', models.TextField(blank=True, default='', help_text='An alphanumeric value of the plain text body of this email')),
+                ('html_body', models.TextField(blank=True, default='', help_text='An alphanumeric value of the HTML body of this email, if it has one')),
+                ('from_address', models.CharField(help_text='An alphanumeric value of the email address this email is sent from', max_length=254)),
+                ('to', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=254), default=list, help_text='A list of alphanumeric values of the email addresses this email is sent to', size=None)),
+                ('cc', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=254), blank=True, default=list, help_text='A list of alphanumeric values of the email addresses this email is copied to', size=None)),
+                ('bcc', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=254), blank=True, default=list, help_text='A list of alphanumeric values of the email addresses this email is blind copied to', size=None)),
+                ('reply_to', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=254), blank=True, default=list, help_text='A list of alphanumeric values of the email addresses replies to this email are sent to', size=None)),
+                ('status', models.CharField(db_index=True, default='pending', help_text='An alphanumeric value of the delivery status of this email (pending, sent, or failed)', max_length=16)),
+                ('attempts', models.IntegerField(default=0, help_text='An integer value indicating the number of times sending this email has been attempted')),
+                ('next_attempt', models.DateTimeField(blank=True, help_text='The date and time before which this email will not be sent again after a failed attempt', null=True)),
+                ('last_error', models.TextField(blank=True, default='', help_text='An alphanumeric value of the error of the last failed attempt to send this email')),
+                ('queued_date', models.DateTimeField(auto_now_add=True, help_text='The date and time this email was queued')),
+                ('sent_date', models.DateTimeField(blank=True, db_index=True, help_text='The date and time this email was sent', null=True)),
+            ],
+            options={
+                'db_table': 'whispers_outgoingemail',
+                'ordering': ['id'],
+            },
+        ),
+    ]
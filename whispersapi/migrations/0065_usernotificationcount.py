@@ -0,0 +1,38 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_notification_counts(apps, schema_editor):
+    """For all users with notifications, count their notifications and unread notifications."""
+    Notification = apps.get_model("whispersapi", "Notification")
+    UserNotificationCount = apps.get_model("whispersapi", "UserNotificationCount")
+    db_alias = schema_editor.connection.alias
+    counts = Notification.objects.using(db_alias).order_by().values('recipient').annotate(
+        total=models.Count('id'), unread=models.Count('id', filter=models.Q(read=False)))
+    UserNotificationCount.objects.using(db_alias).bulk_create([UserNotificationCount(
+        user_id=count['recipient'], total=count['total'], unread=count['unread']) for count in counts])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whispersapi', '0064_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserNotificationCount',
+            fields=[
+                ('user', models.OneToOneField(help_text='A foreign key integer value identifying the user whose notifications are counted', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_count', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.IntegerField(default=0, help_text='An integer value indicating the number of notifications of the user')),
+                ('unread', models.IntegerField(default=0, help_text='An integer value indicating the number of unread notifications of the user')),
+            ],
+            options={
+                'db_table': 'whispers_usernotificationcount',
+            },
+        ),
+        migrations.RunPython(populate_notification_counts, migrations.RunPython.noop)
+    ]
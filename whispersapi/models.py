@@ -1,12 +1,19 @@
-from django.db import models
+from django.db import models, transaction
+import copy
+import threading
+import time
 from datetime import date
-from django.db.models import Q
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth.models import AbstractUser
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.fields import JSONField, ArrayField
 from django.conf import settings
 from simple_history.models import HistoricalRecords
+from simple_history.utils import bulk_create_with_history
 from whispersapi.field_descriptions import *
 
 
@@ -15,48 +22,141 @@ from whispersapi.field_descriptions import *
 # For more information, see: https://docs.djangoproject.com/en/2.0/ref/contrib/auth/#user
 
 
+# the system diagnoses and the system admin user are resolved once and then cached,
+# since they are needed every time an event or event diagnosis is saved but almost never change
+# (the cache is cleared whenever a diagnosis or the system admin user is saved or deleted; see the receivers below,
+# and since that only reaches the current process, other processes (e.g., the other web server workers
+# and the Celery workers) reload it once it is older than SYSTEM_RECORDS_CACHE_TIMEOUT seconds, as with
+# the Configuration values)
+SYSTEM_DIAGNOSIS_NAMES = ['Pending', 'Undetermined']
+SYSTEM_ADMIN_USER_ID = 1
+SYSTEM_RECORDS_CACHE_TIMEOUT = 300
+_system_records_cache = {}
+_system_records_lock = threading.Lock()
+
+
+def get_system_records():
+    """Returns the IDs of the system diagnoses (by name) and of the system admin user (if it exists), cached"""
+    with _system_records_lock:
+        if ('loaded_at' not in _system_records_cache
+                or time.monotonic() - _system_records_cache['loaded_at'] >= SYSTEM_RECORDS_CACHE_TIMEOUT):
+            _system_records_cache['diagnosis_ids'] = dict(
+                Diagnosis.objects.filter(name__in=SYSTEM_DIAGNOSIS_NAMES).values_list('name', 'id'))
+            _system_records_cache['admin_user_id'] = User.objects.filter(
+                id=SYSTEM_ADMIN_USER_ID).values_list('id', flat=True).first()
+            _system_records_cache['loaded_at'] = time.monotonic()
+        return _system_records_cache['diagnosis_ids'], _system_records_cache['admin_user_id']
+
+
+def get_system_diagnosis_id(name):
+    """Returns the ID of the named system diagnosis ('Pending' or 'Undetermined'), cached"""
+    return get_system_records()[0].get(name)
+
+
+def get_system_admin_user_id():
+    """Returns the ID of the system admin user (user 1), or None if it does not exist, cached"""
+    return get_system_records()[1]
+
+
+def clear_system_records_cache():
+    with _system_records_lock:
+        _system_records_cache.clear()
+
+
+@receiver([post_save, post_delete], sender='whispersapi.Diagnosis')
+def clear_system_diagnoses_cache(sender, instance, **kwargs):
+    clear_system_records_cache()
+
+
+@receiver([post_save, post_delete], sender='whispersapi.Configuration')
+def clear_configuration_values_cache(sender, instance, **kwargs):
+    from whispersapi.configuration import clear_configuration_cache
+    clear_configuration_cache()
+
+
+@receiver([post_save, post_delete], sender='whispersapi.User')
+def clear_system_admin_user_cache(sender, instance, **kwargs):
+    if instance.id == SYSTEM_ADMIN_USER_ID:
+        clear_system_records_cache()
+
+
 def validate_event_diagnosis(event_id, user_id):
-    event = Event.objects.filter(id=event_id).first()
-    user = User.objects.filter(id=user_id).first()
-    # Check if there are "Pending" event diagnoses remaining
-    evt_diags = EventDiagnosis.objects.filter(event=event.id)
-    if len(evt_diags) > 1:
+    pending_id = get_system_diagnosis_id('Pending')
+    undetermined_id = get_system_diagnosis_id('Undetermined')
+    admin_id = get_system_admin_user_id()
+    # Determine the current state of the event diagnoses with a single query
+    event = Event.objects.filter(id=event_id).annotate(
+        diagnosis_count=Count('eventdiagnoses'),
+        pending_count=Count('eventdiagnoses', filter=Q(eventdiagnoses__diagnosis=pending_id)),
+        auto_undetermined_count=Count('eventdiagnoses', filter=Q(eventdiagnoses__diagnosis=undetermined_id,
+                                                                   eventdiagnoses__modified_by=admin_id))
+    ).values('complete', 'diagnosis_count', 'pending_count', 'auto_undetermined_count').first()
+    if not event:
+        return
+    new_diagnosis_id = None
+    if event['diagnosis_count'] > 1:
         # "Pending" is only allowed when there are no other event diagnoses and the event is not complete,
-        #  so check if there is a "Pending" and delete it
-        for evt_diag in evt_diags:
-            if evt_diag.diagnosis.name == 'Pending':
-                # this delete will NOT trigger the creation of a new event diagnosis because there are others remaining
-                evt_diag.delete()
-    elif len(evt_diags) == 1:
-        evt_diag = evt_diags[0]
+        #  so check if there is a "Pending" and delete it (there are others remaining, so nothing needs to be created)
+        if event['pending_count']:
+            EventDiagnosis.objects.filter(event=event_id, diagnosis=pending_id).delete()
+    elif event['diagnosis_count'] == 1:
         # "Pending" is only allowed when there are no other event diagnoses and the event is not complete,
         #  so check if there is a "Pending" when the event is complete and delete it, then replace with "Undetermined"
-        if evt_diag.diagnosis.name == 'Pending' and event.complete:
-            # this delete will trigger the creation of a new event diagnosis with the appropriate diagnosis
-            evt_diag.delete()
+        if event['pending_count'] and event['complete']:
+            EventDiagnosis.objects.filter(event=event_id, diagnosis=pending_id).delete()
+            new_diagnosis_id = undetermined_id
         # "Undetermined" can be set manually or automatically;
         #   if it was set automatically (modified_by was user 1 (Admin)) and event is now not complete
         #   then it needs to be replaced by "Pending"
         #   otherwise it was set manually and so can stay, regardless of event complete state
         #   (per new business rule from NWHC July 2022)
-        elif evt_diag.diagnosis.name == 'Undetermined' and not event.complete and evt_diag.modified_by.id == 1:
-            # this delete will trigger the creation of a new event diagnosis with the appropriate diagnosis
-            evt_diag.delete()
-    elif len(evt_diags) == 0:
+        elif event['auto_undetermined_count'] and not event['complete']:
+            EventDiagnosis.objects.filter(event=event_id, diagnosis=undetermined_id).delete()
+            new_diagnosis_id = pending_id
+    else:
         # If no event-level diagnosis indicated by user,
         #  then event diagnosis of "Pending" used for ongoing investigations (when "Complete"=0)
         #  and "Undetermined" used as event-level diagnosis_id if investigation is complete ("Complete"=1).
-        if not event.complete:
-            diagnosis = Diagnosis.objects.filter(name='Pending').first()
-        else:
-            diagnosis = Diagnosis.objects.filter(name='Undetermined').first()
+        new_diagnosis_id = pending_id if not event['complete'] else undetermined_id
+    if new_diagnosis_id:
         # All "Pending" and "Undetermined" must be confirmed OR some other way of coding this
         # such that we never see "Pending suspect" or "Undetermined suspect" on front end.
         # also set the modified_by to user 1 (Admin) to indicate this was automatically (not manually) created
         # (per new business rule from NWHC July 2022)
-        admin = User.objects.filter(id=1).first()
-        EventDiagnosis.objects.create(event=event, diagnosis=diagnosis, suspect=False, priority=1,
-                                      created_by=user, modified_by=admin)
+        EventDiagnosis.objects.create(event_id=event_id, diagnosis_id=new_diagnosis_id, suspect=False, priority=1,
+                                      created_by_id=user_id, modified_by_id=admin_id)
+
+
+# the affected count of a single location species row: Max(estimated_dead, dead) + Max(estimated_sick, sick)
+LOCATION_SPECIES_AFFECTED_COUNT = (Greatest(Coalesce('dead_count_estimated', 0), Coalesce('dead_count', 0))
+                                   + Greatest(Coalesce('sick_count_estimated', 0), Coalesce('sick_count', 0)))
+
+
+def location_species_affected_count(dead_count_estimated, dead_count, sick_count_estimated, sick_count):
+    # the Python equivalent of LOCATION_SPECIES_AFFECTED_COUNT, for a single row already in memory
+    return (max(dead_count_estimated or 0, dead_count or 0)
+            + max(sick_count_estimated or 0, sick_count or 0))
+
+
+def calculate_event_affected_count(event_id, event_type_id):
+    # If EventType = Morbidity/Mortality
+    # then Sum(Max(estimated_dead, dead) + Max(estimated_sick, sick)) from location_species table
+    # If Event Type = Surveillance then Sum(number_positive) from species_diagnosis table
+    # (each is calculated in the database with a single aggregate query)
+    if event_type_id == 1:
+        return LocationSpecies.objects.filter(event_location__event=event_id).aggregate(
+            affected_count=Coalesce(Sum(LOCATION_SPECIES_AFFECTED_COUNT), 0))['affected_count']
+    elif event_type_id == 2:
+        return SpeciesDiagnosis.objects.filter(location_species__event_location__event=event_id).aggregate(
+            affected_count=Coalesce(Sum('positive_count'), 0))['affected_count']
+    else:
+        return None
+
+
+def get_event_for_update(event_id):
+    # load an event with its row locked until the end of the current transaction, so that the saves of its children
+    # adjust its stored affected_count one after another, rather than each adding its change to a stale count
+    return Event.objects.select_for_update().filter(id=event_id).first()
 
 
 def partner_create_permission(request):
@@ -126,6 +226,81 @@ class HistoryModel(models.Model):
     modified_by = models.ForeignKey(settings.AUTH_USER_MODEL, models.PROTECT, null=True, blank=True, db_index=True,
                                     related_name='%(class)s_modifier', help_text='A foreign key integer identifying the user who last modified the object')
 
+    # keep track of the field values as they were loaded from (or last written to) the database
+    # to detect which fields, if any, have changed when the object is saved
+    _loaded_values = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(HistoryModel, cls).from_db(db, field_names, values)
+        instance._loaded_values = {}
+        instance._track_field_values([f for f in cls._meta.concrete_fields if f.attname in field_names])
+        return instance
+
+    def _track_field_values(self, fields):
+        for field in fields:
+            value = getattr(self, field.attname)
+            # copy mutable values (e.g., JSONField and ArrayField) so that changes made in place are detected
+            self._loaded_values[field.attname] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    def get_loaded_value(self, attname):
+        """Returns the value of a field as it was loaded from (or last written to) the database"""
+        if self._loaded_values is not None and attname in self._loaded_values:
+            return self._loaded_values[attname]
+        return getattr(self, attname)
+
+    def get_dirty_fields(self):
+        """Returns the names of the fields whose values have changed since the object was loaded or last saved"""
+        dirty_fields = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            if field.attname in self._loaded_values:
+                if getattr(self, field.attname) != self._loaded_values[field.attname]:
+                    dirty_fields.append(field.name)
+            # a deferred field that was never loaded but has since been assigned a value
+            elif field.attname in self.__dict__:
+                dirty_fields.append(field.name)
+        return dirty_fields
+
+    # override the save method to skip the database write (and the history record) entirely when no field has changed,
+    # and otherwise to only write the fields that have changed (plus modified_date, which is updated automatically)
+    # because cascading saves (e.g., parent event updates) were creating many history records with no actual changes
+    def save(self, *args, **kwargs):
+        if (not args and not self._state.adding and self._loaded_values is not None
+                and not kwargs.get('force_insert') and not kwargs.get('force_update')):
+            dirty_fields = self.get_dirty_fields()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                # only write the requested fields that have changed, plus the requested fields that are set
+                # automatically when written (e.g., modified_date, which is only set later, in pre_save)
+                dirty_fields = [name for name in dirty_fields
+                                if name in update_fields or self._meta.get_field(name).attname in update_fields]
+                if dirty_fields:
+                    dirty_fields += [field.name for field in self._meta.concrete_fields
+                                     if getattr(field, 'auto_now', False) and field.name not in dirty_fields
+                                     and (field.name in update_fields or field.attname in update_fields)]
+            elif dirty_fields:
+                dirty_fields.append('modified_date')
+            # (an empty list of update_fields means the save does nothing, not even send signals)
+            kwargs['update_fields'] = dirty_fields
+            super(HistoryModel, self).save(*args, **kwargs)
+            self._track_field_values([self._meta.get_field(name) for name in dirty_fields])
+        else:
+            super(HistoryModel, self).save(*args, **kwargs)
+            self._loaded_values = {}
+            self._track_field_values([f for f in self._meta.concrete_fields if f.attname in self.__dict__])
+
+    def refresh_from_db(self, using=None, fields=None):
+        super(HistoryModel, self).refresh_from_db(using=using, fields=fields)
+        if self._loaded_values is None:
+            self._loaded_values = {}
+        if fields is None:
+            refreshed_fields = [f for f in self._meta.concrete_fields if f.attname in self.__dict__]
+        else:
+            refreshed_fields = [f for f in self._meta.concrete_fields if f.name in fields or f.attname in fields]
+        self._track_field_values(refreshed_fields)
+
     class Meta:
         abstract = True
         default_permissions = ('add', 'change', 'delete', 'view')
@@ -322,27 +497,80 @@ class Event(PermissionsHistoryModel):
     comments = GenericRelation('Comment', related_name='events', help_text=event.comments)
     history = HistoricalRecords(inherit=True, table_name='whispershistory_event')
 
-    # keep track of "previous" event_status to detect if the value changes during save
-    __original_event_status = None
-
-    def __init__(self, *args, **kwargs):
-        super(Event, self).__init__(*args, **kwargs)
-        self.__original_event_status = self.event_status
-
     @staticmethod
     def has_create_permission(request):
         # anyone with role of Partner or above can create
         return partner_create_permission(request)
 
+    @staticmethod
+    def has_bulk_import_permission(request):
+        # anyone with role of Partner or above can create
+        return partner_create_permission(request)
+
     def has_object_update_permission(self, request):
         return determine_object_update_permission(self, request, self.id)
 
+    def get_adjusted_affected_count(self, mortality_morbidity_delta=0, surveillance_delta=0):
+        # Returns the affected_count adjusted by the change of a single child row
+        # (a location species for Morbidity/Mortality events or a species diagnosis for Surveillance events),
+        # without recalculating from all of the event's child rows, unless there is no stored count to adjust
+        # (the event must be loaded with get_event_for_update, so that no concurrent change is lost)
+        if self.event_type_id not in [1, 2]:
+            return None
+        elif self.affected_count is None:
+            return calculate_event_affected_count(self.id, self.event_type_id)
+        elif self.event_type_id == 1:
+            return self.affected_count + mortality_morbidity_delta
+        else:
+            return self.affected_count + surveillance_delta
+
+    def touch(self, modified_by, modified_date=None):
+        """Updates only the modified_by and modified_date of this event (with history), skipping all recalculation"""
+        self.modified_by = modified_by
+        if modified_date:
+            self.modified_date = modified_date
+        # deliberately skip the Event save method (but not the HistoryModel save method, which records history)
+        super(Event, self).save(update_fields=['modified_by', 'modified_date'])
+
+    def notify_quality_check(self):
+        """Creates the real time notification (and email) that this event needs a quality check"""
+        msg_tmp = NotificationMessageTemplate.objects.filter(name='Quality Check').first()
+        if not msg_tmp:
+            from whispersapi.immediate_tasks import send_missing_notification_template_message_email
+            send_missing_notification_template_message_email('event_save', 'Quality Check')
+        else:
+            try:
+                subject = msg_tmp.subject_template.format(event_id=self.id)
+            except KeyError as e:
+                from whispersapi.immediate_tasks import send_notification_template_message_keyerror_email
+                send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
+                subject = ""
+            try:
+                body = msg_tmp.body_template.format(event_id=self.id)
+            except KeyError as e:
+                from whispersapi.immediate_tasks import send_notification_template_message_keyerror_email
+                send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
+                body = ""
+            # source: system
+            source = 'system'
+            from whispersapi.configuration import get_madison_epi_user_id
+            MADISON_EPI_USER_ID = get_madison_epi_user_id()
+            # recipients: Epi staff
+            recipients = list(User.objects.filter(id=MADISON_EPI_USER_ID).values_list('id', flat=True))
+            # email forwarding: Automatic, to nwhc-epi@usgs.gov
+            email_to = list(User.objects.filter(id=MADISON_EPI_USER_ID).values_list('email', flat=True))
+            from whispersapi.immediate_tasks import generate_notification_on_commit
+            generate_notification_on_commit(msg_tmp.id, recipients, source, self.id, 'event', subject, body,
+                                            True, email_to)
+
     # override the save method to toggle quality check field when complete field changes
     # and calculate start_date, end_date, and affected_count
     # and update event diagnoses as necessary so there is always at least one
     # and send notifications if the event requires quality check
     def save(self, *args, **kwargs):
         is_new = True if self._state.adding else False
+        # the event_status before the current save process, to detect if the value changes
+        original_event_status_id = self.get_loaded_value('event_status_id')
 
         # Disable Quality check field until field "complete" =1.
         # If event reopened ("complete" = 0) then "quality_check" = null AND quality check field is disabled
@@ -368,29 +596,17 @@ class Event(PermissionsHistoryModel):
             self.end_date = None
 
         # affected_count
-        # If EventType = Morbidity/Mortality
-        # then Sum(Max(estimated_dead, dead) + Max(estimated_sick, sick)) from location_species table
-        # If Event Type = Surveillance then Sum(number_positive) from species_diagnosis table
-        event_type_id = self.event_type.id
-        if event_type_id not in [1, 2]:
+        # child location species and species diagnoses keep the affected_count current as they change
+        # (see get_adjusted_affected_count), so only fully recalculate it when the event is new,
+        # when the event type has (or may have) changed, or when there is no stored count to build on
+        if self.event_type_id not in [1, 2]:
             self.affected_count = None
-        else:
-            loc_ids = [loc['id'] for loc in locations]
-            loc_species = LocationSpecies.objects.filter(
-                event_location_id__in=loc_ids).values(
-                'id', 'dead_count_estimated', 'dead_count', 'sick_count_estimated', 'sick_count')
-            if event_type_id == 1:
-                affected_counts = [max(spec.get('dead_count_estimated') or 0, spec.get('dead_count') or 0)
-                                   + max(spec.get('sick_count_estimated') or 0, spec.get('sick_count') or 0)
-                                   for spec in loc_species]
-                self.affected_count = sum(affected_counts)
-            elif event_type_id == 2:
-                loc_species_ids = [spec['id'] for spec in loc_species]
-                species_dx_positive_counts = SpeciesDiagnosis.objects.filter(
-                    location_species_id__in=loc_species_ids).values_list('positive_count', flat=True)
-                # positive_counts = [dx.get('positive_count') or 0 for dx in species_dx]
-                self.affected_count = sum(species_dx_positive_counts) if len(
-                    species_dx_positive_counts) == 0 else None
+        elif is_new:
+            # a new event has no child rows yet
+            self.affected_count = 0
+        elif (self._loaded_values is None or 'event_type' in self.get_dirty_fields()
+              or self.affected_count is None):
+            self.affected_count = calculate_event_affected_count(self.id, self.event_type_id)
 
         super(Event, self).save(*args, **kwargs)
 
@@ -398,53 +614,14 @@ class Event(PermissionsHistoryModel):
         # trigger: Event status (event_status) is set to "Quality Check Needed"
         # NOTE: after the event status is set to "Quality Check Needed", we don't want to send out
         # multiple notifications for every subsequent save where the status is still "Quality Check Needed",
-        # so compare the current event status to __original_event_status (the status before the current save process)
+        # so compare the current event status to original_event_status_id (the status before the current save process)
         # ALSO NOTE: it is possible for the status to be set to "Quality Check Needed" during an event create,
-        # so we can't rely on the value of __original_event_status
+        # so we can't rely on the value of original_event_status_id
         if (self.event_status.name == 'Quality Check Needed'
-                and (is_new or self.event_status.id != self.__original_event_status.id)):
-            msg_tmp = NotificationMessageTemplate.objects.filter(name='Quality Check').first()
-            if not msg_tmp:
-                from whispersapi.immediate_tasks import send_missing_notification_template_message_email
-                send_missing_notification_template_message_email('event_save', 'Quality Check')
-            else:
-                try:
-                    subject = msg_tmp.subject_template.format(event_id=self.id)
-                except KeyError as e:
-                    from whispersapi.immediate_tasks import send_notification_template_message_keyerror_email
-                    send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
-                    subject = ""
-                try:
-                    body = msg_tmp.body_template.format(event_id=self.id)
-                except KeyError as e:
-                    from whispersapi.immediate_tasks import send_notification_template_message_keyerror_email
-                    send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
-                    body = ""
-                self.__original_event_status = self.event_status
-                # source: system
-                source = 'system'
-                madison_epi_user_id_record = Configuration.objects.filter(name='madison_epi_user').first()
-                if madison_epi_user_id_record:
-                    if madison_epi_user_id_record.value.isdecimal():
-                        MADISON_EPI_USER_ID = madison_epi_user_id_record.value
-                    else:
-                        MADISON_EPI_USER_ID = settings.WHISPERS_ADMIN_USER_ID
-                        encountered_type = type(madison_epi_user_id_record.value).__name__
-                        from whispersapi.immediate_tasks import send_wrong_type_configuration_value_email
-                        send_wrong_type_configuration_value_email('madison_epi_user', encountered_type, 'int')
-                else:
-                    MADISON_EPI_USER_ID = settings.WHISPERS_ADMIN_USER_ID
-                    from whispersapi.immediate_tasks import send_missing_configuration_value_email
-                    send_missing_configuration_value_email('madison_epi_user')
-                # recipients: Epi staff
-                recipients = list(User.objects.filter(id=MADISON_EPI_USER_ID).values_list('id', flat=True))
-                # email forwarding: Automatic, to nwhc-epi@usgs.gov
-                email_to = list(User.objects.filter(id=MADISON_EPI_USER_ID).values_list('email', flat=True))
-                from whispersapi.immediate_tasks import generate_notification
-                generate_notification.delay(msg_tmp.id, recipients, source, self.id, 'event', subject, body,
-                                            True, email_to)
+                and (is_new or self.event_status_id != original_event_status_id)):
+            self.notify_quality_check()
 
-        validate_event_diagnosis(self.id, self.created_by.id)
+        validate_event_diagnosis(self.id, self.created_by_id)
 
     def __str__(self):
         return str(self.id)
@@ -674,13 +851,6 @@ class EventOrganization(PermissionsHistoryModel):
     priority = models.IntegerField(null=True, help_text='An integer value indicating the event organizations priority')
     history = HistoricalRecords(inherit=True, table_name='whispershistory_eventorganization')
 
-    # keep track of "previous" priority to detect if the value changes during save
-    __original_priority = None
-
-    def __init__(self, *args, **kwargs):
-        super(EventOrganization, self).__init__(*args, **kwargs)
-        self.__original_priority = self.priority
-
     @staticmethod
     def has_create_permission(request):
         if request and 'event' in request.data:
@@ -695,21 +865,21 @@ class EventOrganization(PermissionsHistoryModel):
 
     # override the save method to update the parent event's modified_date, but only when priority was not updated
     def save(self, *args, **kwargs):
+        # the priority before the current save process, to detect if the value changes
+        original_priority = self.get_loaded_value('priority')
         super(EventOrganization, self).save(*args, **kwargs)
         # DO NOT update the parent event if only the priority field has changed
         # (code has been written elsewhere to only ever update priority field on its own,
         #  not in combination with other fields, for this exact purpose)
         # because we found that this can cause dozens or hundreds of event updates, which result in dozens or hundreds
         # of notifications and emails that are of no use and only annoy the users
-        if (self.priority == self.__original_priority
+        if (self.priority == original_priority
                 and (not self.event.modified_by or not self.event.modified_date
                      or not self.modified_by or not self.modified_date
                      or (self.event.modified_by.id != self.modified_by.id
                          or self.event.modified_date != self.modified_date))):
             event = Event.objects.filter(id=self.event.id).first()
-            event.modified_by = self.modified_by
-            event.modified_date = self.modified_date
-            event.save()
+            event.touch(self.modified_by, self.modified_date)
 
     # override the delete method to update the parent event's modified_date
     def delete(self, *args, **kwargs):
@@ -717,9 +887,7 @@ class EventOrganization(PermissionsHistoryModel):
         super(EventOrganization, self).delete(*args, **kwargs)
         if (not event.modified_by or not event.modified_date
                 or event.modified_by.id != self.modified_by.id or event.modified_date != self.modified_date):
-            event.modified_by = self.modified_by
-            event.modified_date = self.modified_date
-            event.save()
+            event.touch(self.modified_by, self.modified_date)
 
     def __str__(self):
         return str(self.id)
@@ -757,9 +925,7 @@ class EventContact(PermissionsHistoryModel):
         if (not self.event.modified_by or not self.event.modified_date
                 or self.event.modified_by.id != self.modified_by.id or self.event.modified_date != self.modified_date):
             event = Event.objects.filter(id=self.event.id).first()
-            event.modified_by = self.modified_by
-            event.modified_date = self.modified_date
-            event.save()
+            event.touch(self.modified_by, self.modified_date)
 
     # override the delete method to update the parent event's modified_date
     def delete(self, *args, **kwargs):
@@ -767,9 +933,7 @@ class EventContact(PermissionsHistoryModel):
         super(EventContact, self).delete(*args, **kwargs)
         if (not self.event.modified_by or not self.event.modified_date
                 or event.modified_by.id != self.modified_by.id or event.modified_date != self.modified_date):
-            event.modified_by = self.modified_by
-            event.modified_date = self.modified_date
-            event.save()
+            event.touch(self.modified_by, self.modified_date)
 
     def __str__(self):
         return str(self.id)
@@ -808,18 +972,12 @@ class EventLocation(PermissionsHistoryModel):
     land_ownership = models.ForeignKey('LandOwnership', models.PROTECT, null=True, related_name='eventlocations', help_text='A foreign key integer value identifying the entity that owns the land for this event location')
     contacts = models.ManyToManyField('Contact', through='EventLocationContact', related_name='eventlocations', help_text='')
     flyways = models.ManyToManyField('Flyway', through='EventLocationFlyway', related_name='eventlocations')
+    enrichment_status = models.CharField(max_length=16, blank=True, default='', help_text='An alphanumeric value of the status of the background look up of the flyway and any missing administrative level two for this event location (pending, complete, or failed)')
     gnis_name = models.CharField(max_length=256, blank=True, default='', help_text='An alphanumeric value of the GNIS name of this event location')
     gnis_id = models.CharField(max_length=256, blank=True, db_index=True, default='')
     comments = GenericRelation('Comment', related_name='eventlocations')
     history = HistoricalRecords(inherit=True, table_name='whispershistory_eventlocation')
 
-    # keep track of "previous" priority to detect if the value changes during save
-    __original_priority = None
-
-    def __init__(self, *args, **kwargs):
-        super(EventLocation, self).__init__(*args, **kwargs)
-        self.__original_priority = self.priority
-
     @staticmethod
     def has_create_permission(request):
         if request and 'event' in request.data:
@@ -832,37 +990,14 @@ class EventLocation(PermissionsHistoryModel):
         event_id = self.event.id
         return determine_object_update_permission(self, request, event_id)
 
-    def update_event_affected_count(self, event, locations):
-        # If EventType = Morbidity/Mortality
-        # then Sum(Max(estimated_dead, dead) + Max(estimated_sick, sick)) from location_species table
-        # If Event Type = Surveillance then Sum(number_positive) from species_diagnosis table
-        event_type_id = event.event_type.id
-        if event_type_id not in [1, 2]:
-            return None
-        else:
-            loc_ids = [loc['id'] for loc in locations]
-            loc_species = LocationSpecies.objects.filter(
-                event_location_id__in=loc_ids).values(
-                'id', 'dead_count_estimated', 'dead_count', 'sick_count_estimated', 'sick_count')
-            if event_type_id == 1:
-                affected_counts = [max(spec.get('dead_count_estimated') or 0, spec.get('dead_count') or 0)
-                                   + max(spec.get('sick_count_estimated') or 0, spec.get('sick_count') or 0)
-                                   for spec in loc_species]
-                return sum(affected_counts)
-            elif event_type_id == 2:
-                loc_species_ids = [spec['id'] for spec in loc_species]
-                species_dx_positive_counts = SpeciesDiagnosis.objects.filter(
-                    location_species_id__in=loc_species_ids).values_list('positive_count', flat=True)
-                # positive_counts = [dx.get('positive_count') or 0 for dx in species_dx]
-                return sum(species_dx_positive_counts) if len(species_dx_positive_counts) == 0 else None
-            else:
-                return None
-
     # override the save method to calculate the parent event's start_date, end_date, affected_count, and modified_date
+    @transaction.atomic
     def save(self, *args, **kwargs):
+        # the priority before the current save process, to detect if the value changes
+        original_priority = self.get_loaded_value('priority')
+        event = get_event_for_update(self.event_id)
         super(EventLocation, self).save(*args, **kwargs)
 
-        event = Event.objects.filter(id=self.event.id).first()
         locations = EventLocation.objects.filter(event=event.id).values('id', 'start_date', 'end_date')
 
         # start_date and end_date
@@ -881,7 +1016,8 @@ class EventLocation(PermissionsHistoryModel):
             new_end_date = None
 
         # affected_count
-        new_affected_count = self.update_event_affected_count(event, locations)
+        # (saving a location does not change any counts, it only fills in a missing count)
+        new_affected_count = event.get_adjusted_affected_count()
 
         if (event.affected_count != new_affected_count
                 or event.end_date != new_end_date or event.start_date != new_start_date):
@@ -897,7 +1033,7 @@ class EventLocation(PermissionsHistoryModel):
         #  not in combination with other fields, for this exact purpose)
         # because we found that this can cause dozens or hundreds of event updates, which result in dozens or hundreds
         # of notifications and emails that are of no use and only annoy the users
-        if (self.priority == self.__original_priority
+        if (self.priority == original_priority
                 and (not event.modified_by or not event.modified_date or not self.modified_by or not self.modified_date
                      or (event.modified_by.id != self.modified_by.id
                          or event.modified_date != self.modified_date))):
@@ -906,14 +1042,14 @@ class EventLocation(PermissionsHistoryModel):
             event.save()
 
     # override the delete method to update the parent event's modified_date and affected_count
+    @transaction.atomic
     def delete(self, *args, **kwargs):
-        event = Event.objects.filter(id=self.event.id).first()
+        event = get_event_for_update(self.event_id)
         super(EventLocation, self).delete(*args, **kwargs)
 
-        locations = EventLocation.objects.filter(event=event.id).values('id', 'start_date', 'end_date')
-
         # affected_count
-        new_affected_count = self.update_event_affected_count(event, locations)
+        # (the location's species and species diagnoses were deleted along with it, so recalculate in full)
+        new_affected_count = calculate_event_affected_count(event.id, event.event_type_id)
 
         if (event.affected_count != new_affected_count
                 or not event.modified_by or not event.modified_date
@@ -960,18 +1096,14 @@ class EventLocationContact(PermissionsHistoryModel):
                 or self.event_location.event.modified_by.id != self.modified_by.id
                 or self.event_location.event.modified_date != self.modified_date):
             event = Event.objects.filter(id=self.event_location.event.id).first()
-            event.modified_by = self.modified_by
-            event.modified_date = self.modified_date
-            event.save()
+            event.touch(self.modified_by, self.modified_date)
 
     # override the delete method to update the parent event's modified_date
     def delete(self, *args, **kwargs):
         event = Event.objects.filter(id=self.event_location.event.id).first()
         super(EventLocationContact, self).delete(*args, **kwargs)
         if not event.modified_by or not event.modified_date or event.modified_by.id != self.modified_by.id or event.modified_date != self.modified_date:
-            event.modified_by = self.modified_by
-            event.modified_date = self.modified_date
-            event.save()
+            event.touch(self.modified_by, self.modified_date)
 
     def __str__(self):
         return str(self.id)
@@ -1006,6 +1138,9 @@ class AdministrativeLevelOne(AdminPermissionsHistoryNameModel):
 
     country = models.ForeignKey('Country', models.CASCADE, related_name='administrativelevelones', help_text='A foreign key integer value identifying the country to with this administrative level one belongs')
     abbreviation = models.CharField(max_length=128, blank=True, default='', help_text='An alphanumeric value of the usual abbreviation of this administrative level one')
+    flyway = models.ForeignKey('Flyway', models.SET_NULL, null=True, blank=True, related_name='administrativelevelones', help_text='A foreign key integer value identifying the flyway that entirely contains this administrative level one, if any')
+    centroid_latitude = models.DecimalField(max_digits=8, decimal_places=6, null=True, blank=True, help_text='A fixed-precision decimal number value identifying the latitude for this administrative level one')
+    centroid_longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, help_text='A fixed-precision decimal number value identifying the longitude for this administrative level one')
     history = HistoricalRecords(inherit=True, table_name='whispershistory_administrativelevelone')
 
     def __str__(self):
@@ -1032,6 +1167,7 @@ class AdministrativeLevelTwo(AdminPermissionsHistoryModel):
     centroid_latitude = models.DecimalField(max_digits=8, decimal_places=6, null=True, blank=True, help_text='A fixed-precision decimal number value identifying the latitude for this administrative level two')
     centroid_longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, help_text='A fixed-precision decimal number value identifying the longitude for this administrative level two')
     fips_code = models.CharField(max_length=128, blank=True, default='', help_text='An alphanumeric value of the FIPS code for this administrative level two')
+    flyway = models.ForeignKey('Flyway', models.SET_NULL, null=True, blank=True, related_name='administrativeleveltwos', help_text='A foreign key integer value identifying the flyway that entirely contains this administrative level two, if any')
     history = HistoricalRecords(inherit=True, table_name='whispershistory_administrativeleveltwo')
 
     def __str__(self):
@@ -1103,18 +1239,14 @@ class EventLocationFlyway(PermissionsHistoryModel):
         if (self.event_location.event.modified_by.id != self.modified_by.id
                 or self.event_location.event.modified_date != self.modified_date):
             event = Event.objects.filter(id=self.event_location.event.id).first()
-            event.modified_by = self.modified_by
-            event.modified_date = self.modified_date
-            event.save()
+            event.touch(self.modified_by, self.modified_date)
 
     # override the delete method to update the parent event's modified_date
     def delete(self, *args, **kwargs):
         event = Event.objects.filter(id=self.event_location.event.id).first()
         super(EventLocationFlyway, self).delete(*args, **kwargs)
         if event.modified_by.id != self.modified_by.id or event.modified_date != self.modified_date:
-            event.modified_by = self.modified_by
-            event.modified_date = self.modified_date
-            event.save()
+            event.touch(self.modified_by, self.modified_date)
 
     def __str__(self):
         return str(self.id)
@@ -1165,12 +1297,20 @@ class LocationSpecies(PermissionsHistoryModel):
     sex_bias = models.ForeignKey('SexBias', models.PROTECT, null=True, related_name='locationspecies')
     history = HistoricalRecords(inherit=True, table_name='whispershistory_locationspecies')
 
-    # keep track of "previous" priority to detect if the value changes during save
-    __original_priority = None
-
-    def __init__(self, *args, **kwargs):
-        super(LocationSpecies, self).__init__(*args, **kwargs)
-        self.__original_priority = self.priority
+    @property
+    def affected_count(self):
+        """Returns the contribution of this location species to its parent event's affected_count"""
+        return location_species_affected_count(
+            self.dead_count_estimated, self.dead_count, self.sick_count_estimated, self.sick_count)
+
+    def get_original_affected_count(self):
+        """Returns the contribution of this location species to its parent event's affected_count
+        as it was loaded from (or last written to) the database, to adjust the event's count by the difference"""
+        if self._state.adding:
+            return 0
+        return location_species_affected_count(
+            self.get_loaded_value('dead_count_estimated'), self.get_loaded_value('dead_count'),
+            self.get_loaded_value('sick_count_estimated'), self.get_loaded_value('sick_count'))
 
     @staticmethod
     def has_create_permission(request):
@@ -1184,40 +1324,18 @@ class LocationSpecies(PermissionsHistoryModel):
         event_id = self.event_location.event.id
         return determine_object_update_permission(self, request, event_id)
 
-    def update_event_affected_count(self, event):
-        # If EventType = Morbidity/Mortality
-        # then Sum(Max(estimated_dead, dead) + Max(estimated_sick, sick)) from location_species table
-        # If Event Type = Surveillance then Sum(number_positive) from species_diagnosis table
-        event_type_id = event.event_type.id
-        if event_type_id not in [1, 2]:
-            return None
-        else:
-            locations = EventLocation.objects.filter(event=event.id).values('id', 'start_date', 'end_date')
-            loc_ids = [loc['id'] for loc in locations]
-            loc_species = LocationSpecies.objects.filter(
-                event_location_id__in=loc_ids).values(
-                'id', 'dead_count_estimated', 'dead_count', 'sick_count_estimated', 'sick_count')
-            if event_type_id == 1:
-                affected_counts = [max(spec.get('dead_count_estimated') or 0, spec.get('dead_count') or 0)
-                                   + max(spec.get('sick_count_estimated') or 0, spec.get('sick_count') or 0)
-                                   for spec in loc_species]
-                return sum(affected_counts)
-            elif event_type_id == 2:
-                loc_species_ids = [spec['id'] for spec in loc_species]
-                species_dx_positive_counts = SpeciesDiagnosis.objects.filter(
-                    location_species_id__in=loc_species_ids).values_list('positive_count', flat=True)
-                # positive_counts = [dx.get('positive_count') or 0 for dx in species_dx]
-                return sum(species_dx_positive_counts) if len(species_dx_positive_counts) == 0 else None
-            else:
-                return None
-
     # override the save method to calculate the parent event's affected_count and update the modified_date
+    @transaction.atomic
     def save(self, *args, **kwargs):
+        # the priority before the current save process, to detect if the value changes
+        original_priority = self.get_loaded_value('priority')
+        original_affected_count = self.get_original_affected_count()
+        event = get_event_for_update(self.event_location.event_id)
         super(LocationSpecies, self).save(*args, **kwargs)
-        event = Event.objects.filter(id=self.event_location.event.id).first()
 
         # affected_count
-        new_affected_count = self.update_event_affected_count(event)
+        new_affected_count = event.get_adjusted_affected_count(
+            mortality_morbidity_delta=self.affected_count - original_affected_count)
 
         if event.affected_count != new_affected_count:
             event.affected_count = new_affected_count
@@ -1230,7 +1348,7 @@ class LocationSpecies(PermissionsHistoryModel):
         #  not in combination with other fields, for this exact purpose)
         # because we found that this can cause dozens or hundreds of event updates, which result in dozens or hundreds
         # of notifications and emails that are of no use and only annoy the users
-        if (self.priority == self.__original_priority
+        if (self.priority == original_priority
                 and (not event.modified_by or not event.modified_date or not self.modified_by or not self.modified_date
                      or (event.modified_by.id != self.modified_by.id
                          or event.modified_date != self.modified_date))):
@@ -1239,12 +1357,21 @@ class LocationSpecies(PermissionsHistoryModel):
             event.save()
 
     # override the delete method to update the parent event's modified_date and affected_count
+    @transaction.atomic
     def delete(self, *args, **kwargs):
-        event = Event.objects.filter(id=self.event_location.event.id).first()
+        event = get_event_for_update(self.event_location.event_id)
+        if event.event_type_id == 2 and event.affected_count is not None:
+            # the species diagnoses of this location species are deleted along with it
+            surveillance_delta = -(SpeciesDiagnosis.objects.filter(location_species=self.id).aggregate(
+                positive_count=Coalesce(Sum('positive_count'), 0))['positive_count'])
+        else:
+            surveillance_delta = 0
+        original_affected_count = self.get_original_affected_count()
         super(LocationSpecies, self).delete(*args, **kwargs)
 
         # affected_count
-        new_affected_count = self.update_event_affected_count(event)
+        new_affected_count = event.get_adjusted_affected_count(
+            mortality_morbidity_delta=-original_affected_count, surveillance_delta=surveillance_delta)
 
         if (event.affected_count != new_affected_count
                 or not event.modified_by or not event.modified_date
@@ -1388,13 +1515,6 @@ class EventDiagnosis(PermissionsHistoryModel):
     priority = models.IntegerField(null=True, help_text='An integer value indicating the event diagnosis priority')
     history = HistoricalRecords(inherit=True, table_name='whispershistory_eventdiagnosis')
 
-    # keep track of "previous" priority to detect if the value changes during save
-    __original_priority = None
-
-    def __init__(self, *args, **kwargs):
-        super(EventDiagnosis, self).__init__(*args, **kwargs)
-        self.__original_priority = self.priority
-
     @staticmethod
     def has_create_permission(request):
         if request and 'event' in request.data:
@@ -1412,31 +1532,30 @@ class EventDiagnosis(PermissionsHistoryModel):
     # such that we never see "Pending suspect" or "Undetermined suspect" on front end.
     # and update the parent event's modified_date
     def save(self, *args, **kwargs):
-        if self.diagnosis.name in ['Pending', 'Undetermined']:
+        is_system_diagnosis = self.diagnosis_id in [get_system_diagnosis_id(name) for name in SYSTEM_DIAGNOSIS_NAMES]
+        if is_system_diagnosis:
             self.suspect = False
         super(EventDiagnosis, self).save(*args, **kwargs)
 
-        validate_event_diagnosis(self.event.id, self.created_by.id)
+        validate_event_diagnosis(self.event_id, self.created_by_id)
 
     # override the delete method to update the parent event's modified_date
     def delete(self, *args, **kwargs):
-        diagnosis_name = self.diagnosis.name
-        deleting_user = self.modified_by
-        event = Event.objects.filter(id=self.event.id).first()
+        is_system_diagnosis = self.diagnosis_id in [get_system_diagnosis_id(name) for name in SYSTEM_DIAGNOSIS_NAMES]
+        deleting_user_id = self.modified_by_id
+        event = Event.objects.filter(id=self.event_id).first()
 
         super(EventDiagnosis, self).delete(*args, **kwargs)
 
-        validate_event_diagnosis(event.id, deleting_user.id)
+        validate_event_diagnosis(event.id, deleting_user_id)
 
         # update the event modified_date only when the diagnosis is not Pending or Undetermined
         #  to avoid an infinite loop, since one of those two diagnoses is always created when an Event is created
         #  or updated without an already existing event diagnosis
-        if (diagnosis_name not in ['Pending', 'Undetermined']
+        if (not is_system_diagnosis
                 and (not event.modified_by or not event.modified_date
                      or event.modified_by.id != self.modified_by.id or event.modified_date != self.modified_date)):
-            event.modified_by = self.modified_by
-            event.modified_date = self.modified_date
-            event.save()
+            event.touch(self.modified_by, self.modified_date)
 
     def __str__(self):
         return str(self.diagnosis) + " suspect" if self.suspect else str(self.diagnosis)
@@ -1500,16 +1619,12 @@ class SpeciesDiagnosis(PermissionsHistoryModel):
         'Organization', through='SpeciesDiagnosisOrganization', related_name='speciesdiagnoses', help_text='A many to many releationship of organizations based on a foreign key integer value identifying an organization')
     history = HistoricalRecords(inherit=True, table_name='whispershistory_speciesdiagnosis')
 
-    # keep track of "previous" diagnosis to detect if the value changes during save
-    __original_diagnosis = None
-
-    # keep track of "previous" priority to detect if the value changes during save
-    __original_priority = None
-
-    def __init__(self, *args, **kwargs):
-        super(SpeciesDiagnosis, self).__init__(*args, **kwargs)
-        self.__original_diagnosis = self.diagnosis
-        self.__original_priority = self.priority
+    def get_original_positive_count(self):
+        """Returns the positive_count as it was loaded from (or last written to) the database,
+        to adjust the parent event's affected_count by the difference"""
+        if self._state.adding:
+            return 0
+        return self.get_loaded_value('positive_count') or 0
 
     @staticmethod
     def has_create_permission(request):
@@ -1523,36 +1638,49 @@ class SpeciesDiagnosis(PermissionsHistoryModel):
         event_id = self.location_species.event_location.event.id
         return determine_object_update_permission(self, request, event_id)
 
-    def update_event_affected_count(self, event):
-        # If EventType = Morbidity/Mortality
-        # then Sum(Max(estimated_dead, dead) + Max(estimated_sick, sick)) from location_species table
-        # If Event Type = Surveillance then Sum(number_positive) from species_diagnosis table
-        event_type_id = event.event_type.id
-        if event_type_id not in [1, 2]:
-            return None
+    def notify_high_impact_diagnosis(self, event):
+        """Creates the real time notifications (and emails) that a high impact diagnosis was used in the event"""
+        msg_tmp = NotificationMessageTemplate.objects.filter(name='High Impact Diseases').first()
+        if not msg_tmp:
+            from whispersapi.immediate_tasks import send_missing_notification_template_message_email
+            send_missing_notification_template_message_email('speciesdiagnosis_save', 'High Impact Diseases')
         else:
-            locations = EventLocation.objects.filter(event=event.id).values('id', 'start_date', 'end_date')
-            loc_ids = [loc['id'] for loc in locations]
-            loc_species = LocationSpecies.objects.filter(
-                event_location_id__in=loc_ids).values(
-                'id', 'dead_count_estimated', 'dead_count', 'sick_count_estimated', 'sick_count')
-            if event_type_id == 1:
-                affected_counts = [max(spec.get('dead_count_estimated') or 0, spec.get('dead_count') or 0)
-                                   + max(spec.get('sick_count_estimated') or 0, spec.get('sick_count') or 0)
-                                   for spec in loc_species]
-                return sum(affected_counts)
-            elif event_type_id == 2:
-                loc_species_ids = [spec['id'] for spec in loc_species]
-                species_dx_positive_counts = SpeciesDiagnosis.objects.filter(
-                    location_species_id__in=loc_species_ids).values_list('positive_count', flat=True)
-                positive_counts = [dx or 0 for dx in species_dx_positive_counts]
-                return sum(positive_counts)
-            else:
-                return None
+            evt_loc = self.location_species.event_location
+            short_evt_loc = evt_loc.administrative_level_one.name + ", " + evt_loc.country.name
+            try:
+                subject = msg_tmp.subject_template.format(
+                    species_diagnosis=self.diagnosis.name, event_location=short_evt_loc)
+            except KeyError as e:
+                from whispersapi.immediate_tasks import send_notification_template_message_keyerror_email
+                send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
+                subject = ""
+            try:
+                body = msg_tmp.body_template.format(
+                    species_diagnosis=self.diagnosis.name, event_location=short_evt_loc, event_id=event.id)
+            except KeyError as e:
+                from whispersapi.immediate_tasks import send_notification_template_message_keyerror_email
+                send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
+                body = ""
+            # source: User that adds a species diagnosis that is a reportable disease
+            source = self.created_by.username
+            from whispersapi.configuration import get_madison_epi_user_id
+            MADISON_EPI_USER_ID = get_madison_epi_user_id()
+            # recipients: WHISPers admin team, WHISPers Epi staff, event owner
+            recipients = list(User.objects.filter(Q(role__in=[1, 2]) | Q(id=MADISON_EPI_USER_ID)
+                                                  ).exclude(is_active=False).values_list('id', flat=True))
+            recipients += [event.created_by.id, ]
+            # email forwarding: Automatic, to whispers@usgs.gov, nwhc-epi@usgs.gov, event owner
+            email_to = list(User.objects.filter(Q(id=1) | Q(id=MADISON_EPI_USER_ID)
+                                                ).exclude(is_active=False).values_list('email', flat=True))
+            email_to += [event.created_by.email, ]
+            from whispersapi.immediate_tasks import generate_notification_on_commit
+            generate_notification_on_commit(msg_tmp.id, recipients, source, event.id, 'event', subject, body,
+                                            True, email_to)
 
     # override the save method to ensure that a Pending or Undetermined diagnosis is never suspect
     # and to create real time notifications for high impact diseases
     # and to update the parent event's affected_count and modified_date
+    @transaction.atomic
     def save(self, *args, **kwargs):
         is_new = False if self.id else True
 
@@ -1571,66 +1699,23 @@ class SpeciesDiagnosis(PermissionsHistoryModel):
             if self.suspect_count is None or self.suspect_count == 0:
                 self.suspect_count = 1
 
+        # the diagnosis and priority before the current save process, to detect if the values change
+        original_diagnosis_id = self.get_loaded_value('diagnosis_id')
+        original_priority = self.get_loaded_value('priority')
+        original_positive_count = self.get_original_positive_count()
+        event = get_event_for_update(self.location_species.event_location.event_id)
         super(SpeciesDiagnosis, self).save(*args, **kwargs)
-        event = Event.objects.filter(id=self.location_species.event_location.event.id).first()
 
         # create real time notifications for high impact diseases
         # trigger: creating or updating a species diagnosis with a high impact diagnosis
-        if self.diagnosis.high_impact and (is_new or (self.diagnosis.id != self.__original_diagnosis.id)):
-            msg_tmp = NotificationMessageTemplate.objects.filter(name='High Impact Diseases').first()
-            if not msg_tmp:
-                from whispersapi.immediate_tasks import send_missing_notification_template_message_email
-                send_missing_notification_template_message_email('speciesdiagnosis_save', 'High Impact Diseases')
-            else:
-                self.__original_diagnosis = self.diagnosis
-                evt_loc = self.location_species.event_location
-                short_evt_loc = evt_loc.administrative_level_one.name + ", " + evt_loc.country.name
-                try:
-                    subject = msg_tmp.subject_template.format(
-                        species_diagnosis=self.diagnosis.name, event_location=short_evt_loc)
-                except KeyError as e:
-                    from whispersapi.immediate_tasks import send_notification_template_message_keyerror_email
-                    send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
-                    subject = ""
-                try:
-                    body = msg_tmp.body_template.format(
-                        species_diagnosis=self.diagnosis.name, event_location=short_evt_loc,
-                        event_id=self.location_species.event_location.event.id)
-                except KeyError as e:
-                    from whispersapi.immediate_tasks import send_notification_template_message_keyerror_email
-                    send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
-                    body = ""
-                # source: User that adds a species diagnosis that is a reportable disease
-                source = self.created_by.username
-                madison_epi_user_id_record = Configuration.objects.filter(name='madison_epi_user').first()
-                if madison_epi_user_id_record:
-                    if madison_epi_user_id_record.value.isdecimal():
-                        MADISON_EPI_USER_ID = madison_epi_user_id_record.value
-                    else:
-                        MADISON_EPI_USER_ID = settings.WHISPERS_ADMIN_USER_ID
-                        encountered_type = type(madison_epi_user_id_record.value).__name__
-                        from whispersapi.immediate_tasks import send_wrong_type_configuration_value_email
-                        send_wrong_type_configuration_value_email('madison_epi_user', encountered_type, 'int')
-                else:
-                    MADISON_EPI_USER_ID = settings.WHISPERS_ADMIN_USER_ID
-                    from whispersapi.immediate_tasks import send_missing_configuration_value_email
-                    send_missing_configuration_value_email('madison_epi_user')
-                # recipients: WHISPers admin team, WHISPers Epi staff, event owner
-                recipients = list(User.objects.filter(Q(role__in=[1, 2]) | Q(id=MADISON_EPI_USER_ID)
-                                                      ).exclude(is_active=False).values_list('id', flat=True))
-                recipients += [event.created_by.id, ]
-                # email forwarding: Automatic, to whispers@usgs.gov, nwhc-epi@usgs.gov, event owner
-                email_to = list(User.objects.filter(Q(id=1) | Q(id=MADISON_EPI_USER_ID)
-                                                    ).exclude(is_active=False).values_list('email', flat=True))
-                email_to += [event.created_by.email, ]
-                from whispersapi.immediate_tasks import generate_notification
-                generate_notification.delay(msg_tmp.id, recipients, source, event.id, 'event', subject, body,
-                                            True, email_to)
+        if self.diagnosis.high_impact and (is_new or (self.diagnosis_id != original_diagnosis_id)):
+            self.notify_high_impact_diagnosis(event)
 
         diagnosis = self.diagnosis
 
         # affected_count
-        new_affected_count = self.update_event_affected_count(event)
+        new_affected_count = event.get_adjusted_affected_count(
+            surveillance_delta=(self.positive_count or 0) - original_positive_count)
 
         if event.affected_count != new_affected_count:
             event.affected_count = new_affected_count
@@ -1643,7 +1728,7 @@ class SpeciesDiagnosis(PermissionsHistoryModel):
         #  not in combination with other fields, for this exact purpose)
         # because we found that this can cause dozens or hundreds of event updates, which result in dozens or hundreds
         # of notifications and emails that are of no use and only annoy the users
-        if (self.priority == self.__original_priority
+        if (self.priority == original_priority
                 and (not event.modified_by or not event.modified_date or not self.modified_by or not self.modified_date
                      or (event.modified_by.id != self.modified_by.id
                          or event.modified_date != self.modified_date))):
@@ -1677,9 +1762,11 @@ class SpeciesDiagnosis(PermissionsHistoryModel):
     # override the delete method to ensure that when all speciesdiagnoses with a particular diagnosis are deleted,
     # then eventdiagnosis of same diagnosis for this parent event needs to be deleted as well
     # and update the parent event's modified_date and affected_count
+    @transaction.atomic
     def delete(self, *args, **kwargs):
-        event = Event.objects.filter(id=self.location_species.event_location.event.id).first()
+        event = get_event_for_update(self.location_species.event_location.event_id)
         diagnosis = self.diagnosis
+        original_positive_count = self.get_original_positive_count()
         super(SpeciesDiagnosis, self).delete(*args, **kwargs)
 
         same_speciesdiagnoses_diagnosis = SpeciesDiagnosis.objects.filter(
@@ -1700,16 +1787,16 @@ class SpeciesDiagnosis(PermissionsHistoryModel):
                 event=event, diagnosis=new_diagnosis, suspect=False, priority=1,
                 created_by=self.created_by, modified_by=self.modified_by)
 
-            # affected_count
-            new_affected_count = self.update_event_affected_count(event)
+        # affected_count
+        new_affected_count = event.get_adjusted_affected_count(surveillance_delta=-original_positive_count)
 
-            if (event.affected_count != new_affected_count
-                    or not event.modified_by or not event.modified_date
-                    or event.modified_by.id != self.modified_by.id or event.modified_date != self.modified_date):
-                event.affected_count = new_affected_count
-                event.modified_by = self.modified_by
-                event.modified_date = self.modified_date
-                event.save()
+        if (event.affected_count != new_affected_count
+                or not event.modified_by or not event.modified_date
+                or event.modified_by.id != self.modified_by.id or event.modified_date != self.modified_date):
+            event.affected_count = new_affected_count
+            event.modified_by = self.modified_by
+            event.modified_date = self.modified_date
+            event.save()
 
     def __str__(self):
         return str(self.diagnosis) + " suspect" if self.suspect else str(self.diagnosis)
@@ -1751,9 +1838,7 @@ class SpeciesDiagnosisOrganization(PermissionsHistoryModel):
                 or self.species_diagnosis.location_species.event_location.event.modified_by.id != self.modified_by.id
                 or self.species_diagnosis.location_species.event_location.event.modified_date != self.modified_date):
             event = Event.objects.filter(id=self.species_diagnosis.location_species.event_location.event.id).first()
-            event.modified_by = self.modified_by
-            event.modified_date = self.modified_date
-            event.save()
+            event.touch(self.modified_by, self.modified_date)
 
     # override the delete method to update the parent event's modified_date
     def delete(self, *args, **kwargs):
@@ -1761,9 +1846,7 @@ class SpeciesDiagnosisOrganization(PermissionsHistoryModel):
         super(SpeciesDiagnosisOrganization, self).delete(*args, **kwargs)
         if (not event.modified_by or not event.modified_date
                 or event.modified_by.id != self.modified_by.id or event.modified_date != self.modified_date):
-            event.modified_by = self.modified_by
-            event.modified_date = self.modified_date
-            event.save()
+            event.touch(self.modified_by, self.modified_date)
 
     def __str__(self):
         return str(self.id)
@@ -1879,9 +1962,9 @@ class ServiceRequest(PermissionsHistoryModel):
                     recipients.append(self.event.created_by.id)
                     email_to.append(self.event.created_by.email)
                 if recipients and email_to:
-                    from whispersapi.immediate_tasks import generate_notification
-                    generate_notification.delay(msg_tmp.id, recipients, source, event_id, 'event', subject, body,
-                                                True, email_to)
+                    from whispersapi.immediate_tasks import generate_notification_on_commit
+                    generate_notification_on_commit(msg_tmp.id, recipients, source, event_id, 'event', subject, body,
+                                                    True, email_to)
                 else:
                     # No recipients are active users
                     # Instead of causing a validation error, email admins and let the create proceed
@@ -1996,6 +2079,83 @@ class Notification(PermissionsHistoryModel):
         ordering = ['-id']
 
 
+class UserNotificationCount(models.Model):
+    """
+    Number of notifications (and unread notifications) of a user, kept up to date as notifications are created,
+    read, and deleted, so that they do not have to be counted every time the client shows them
+    """
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, models.CASCADE, primary_key=True, related_name='notification_count', help_text='A foreign key integer value identifying the user whose notifications are counted')
+    total = models.IntegerField(default=0, help_text='An integer value indicating the number of notifications of the user')
+    unread = models.IntegerField(default=0, help_text='An integer value indicating the number of unread notifications of the user')
+
+    def __str__(self):
+        return str(self.user_id)
+
+    class Meta:
+        db_table = "whispers_usernotificationcount"
+
+
+# Notifications must be created, marked read or unread, and deleted with the functions below (or the counts adjusted
+# with adjust_notification_counts), so that the notification counts of their recipients stay up to date
+# (any counts that drift anyway, e.g., when the notifications of a deleted event are deleted with it,
+# are repaired by the reconcile_notification_counts task)
+def adjust_notification_counts(changes):
+    """Adds changes to the notification counts of users, given as (total, unread) tuples keyed by user ID"""
+    changes = {user_id: change for user_id, change in changes.items() if change != (0, 0)}
+    if not changes:
+        return
+    UserNotificationCount.objects.bulk_create(
+        [UserNotificationCount(user_id=user_id) for user_id in changes], ignore_conflicts=True)
+    # update all the users with the same change at once
+    users_by_change = {}
+    for user_id, change in changes.items():
+        users_by_change.setdefault(change, []).append(user_id)
+    for (total, unread), user_ids in users_by_change.items():
+        UserNotificationCount.objects.filter(user_id__in=user_ids).update(
+            total=F('total') + total, unread=F('unread') + unread)
+
+
+def count_notifications_by_recipient(queryset):
+    """Returns the number of notifications (and unread notifications) in a queryset, keyed by recipient user ID"""
+    counts = queryset.order_by().values('recipient').annotate(
+        total=Count('id'), unread=Count('id', filter=Q(read=False))).values_list('recipient', 'total', 'unread')
+    return {recipient: (total, unread) for recipient, total, unread in counts}
+
+
+def create_notifications(notifications, user=None):
+    """Creates notifications (with history) in bulk, and increments the notification counts of their recipients"""
+    with transaction.atomic():
+        notifications = bulk_create_with_history(notifications, Notification, default_user=user)
+        changes = {}
+        for notification in notifications:
+            total, unread = changes.get(notification.recipient_id, (0, 0))
+            changes[notification.recipient_id] = (total + 1, unread + (0 if notification.read else 1))
+        adjust_notification_counts(changes)
+    return notifications
+
+
+def set_notifications_read(queryset, read):
+    """Marks the notifications in a queryset read or unread, and adjusts the unread counts of their recipients"""
+    with transaction.atomic():
+        queryset = queryset.filter(read=not read)
+        counts = count_notifications_by_recipient(queryset)
+        queryset.update(read=read)
+        adjust_notification_counts(
+            {recipient: (0, -total if read else total) for recipient, (total, unread) in counts.items()})
+    return sum(total for total, unread in counts.values())
+
+
+def delete_notifications(queryset):
+    """Deletes the notifications in a queryset, and decrements the notification counts of their recipients"""
+    with transaction.atomic():
+        counts = count_notifications_by_recipient(queryset)
+        queryset.delete()
+        adjust_notification_counts(
+            {recipient: (-total, -unread) for recipient, (total, unread) in counts.items()})
+    return sum(total for total, unread in counts.values())
+
+
 class NotificationMessageTemplate(AdminPermissionsHistoryModel):
 
     name = models.CharField(max_length=128, unique=True, help_text='An alphanumeric value of the name of this notification')
@@ -2237,9 +2397,7 @@ class Comment(PermissionsHistoryModel):
             event = EventLocation.objects.filter(pk=self.object_id).first().event
         if event and (not event.modified_by or not event.modified_date
                       or event.modified_by.id != self.modified_by.id or event.modified_date != self.modified_date):
-            event.modified_by = self.modified_by
-            event.modified_date = self.modified_date
-            event.save()
+            event.touch(self.modified_by, self.modified_date)
 
     # override the delete method to update the parent event's modified_date (if applicable)
     def delete(self, *args, **kwargs):
@@ -2253,9 +2411,7 @@ class Comment(PermissionsHistoryModel):
 
         if event and (not event.modified_by or not event.modified_date
                       or event.modified_by.id != self.modified_by.id or event.modified_date != self.modified_date):
-            event.modified_by = self.modified_by
-            event.modified_date = self.modified_date
-            event.save()
+            event.touch(self.modified_by, self.modified_date)
 
     def __str__(self):
         return str(self.id)
@@ -2323,6 +2479,56 @@ class Configuration(AdminPermissionsHistoryNameModel):
         ordering = ['id']
 
 
+class AdminAlert(models.Model):
+    """
+    Alert for the WHISPers admins, queued to be sent in the next admin alert digest
+    """
+
+    kind = models.CharField(max_length=128, help_text='An alphanumeric value of the kind of problem this alert reports')
+    key = models.CharField(max_length=512, blank=True, default='', help_text='An alphanumeric value identifying what the problem was encountered with (alerts of the same kind and key are reported once per digest)')
+    subject = models.CharField(max_length=128, help_text='An alphanumeric value of the subject of this alert')
+    body = models.TextField(blank=True, default='', help_text='An alphanumeric value of the body of this alert (as of its first occurrence)')
+    occurrences = models.IntegerField(default=1, help_text='An integer value indicating the number of times this problem was reported before the alert was sent')
+    first_occurred = models.DateTimeField(auto_now_add=True, help_text='The date and time this problem was first reported')
+    last_occurred = models.DateTimeField(auto_now=True, help_text='The date and time this problem was last reported')
+    sent_date = models.DateTimeField(null=True, blank=True, db_index=True, help_text='The date and time this alert was sent to the admins in a digest, if it has been')
+
+    def __str__(self):
+        return str(self.subject)
+
+    class Meta:
+        db_table = "whispers_adminalert"
+        ordering = ['id']
+
+
+class OutgoingEmail(models.Model):
+    """
+    Email queued in the outbox, to be sent by the send_queued_emails task
+    """
+
+    subject = models.TextField(blank=True, default='', help_text='An alphanumeric value of the subject of this email')
+    body = models.TextField(blank=True, default='', help_text='An alphanumeric value of the plain text body of this email')
+    html_body = models.TextField(blank=True, default='', help_text='An alphanumeric value of the HTML body of this email, if it has one')
+    from_address = models.CharField(max_length=254, help_text='An alphanumeric value of the email address this email is sent from')
+    to = ArrayField(models.CharField(max_length=254), default=list, help_text='A list of alphanumeric values of the email addresses this email is sent to')
+    cc = ArrayField(models.CharField(max_length=254), default=list, blank=True, help_text='A list of alphanumeric values of the email addresses this email is copied to')
+    bcc = ArrayField(models.CharField(max_length=254), default=list, blank=True, help_text='A list of alphanumeric values of the email addresses this email is blind copied to')
+    reply_to = ArrayField(models.CharField(max_length=254), default=list, blank=True, help_text='A list of alphanumeric values of the email addresses replies to this email are sent to')
+    status = models.CharField(max_length=16, default='pending', db_index=True, help_text='An alphanumeric value of the delivery status of this email (pending, sent, or failed)')
+    attempts = models.IntegerField(default=0, help_text='An integer value indicating the number of times sending this email has been attempted')
+    next_attempt = models.DateTimeField(null=True, blank=True, help_text='The date and time before which this email will not be sent again after a failed attempt')
+    last_error = models.TextField(blank=True, default='', help_text='An alphanumeric value of the error of the last failed attempt to send this email')
+    queued_date = models.DateTimeField(auto_now_add=True, help_text='The date and time this email was queued')
+    sent_date = models.DateTimeField(null=True, blank=True, db_index=True, help_text='The date and time this email was sent')
+
+    def __str__(self):
+        return str(self.subject)
+
+    class Meta:
+        db_table = "whispers_outgoingemail"
+        ordering = ['id']
+
+
 ######
 #
 #  Users
@@ -2626,9 +2832,9 @@ class EventReadUser(PermissionsHistoryModel):
                 recipients = [self.user.id, ]
                 # email forwarding: Automatic, to user that was made a collaborator.
                 email_to = [self.user.email, ]
-                from whispersapi.immediate_tasks import generate_notification
-                generate_notification.delay(msg_tmp.id, recipients, source, event_id, 'event', subject, body,
-                                            True, email_to)
+                from whispersapi.immediate_tasks import generate_notification_on_commit
+                generate_notification_on_commit(msg_tmp.id, recipients, source, event_id, 'event', subject, body,
+                                                True, email_to)
 
     def __str__(self):
         return str(self.id)
@@ -2712,9 +2918,9 @@ class EventWriteUser(PermissionsHistoryModel):
                 recipients = [self.user.id, ]
                 # email forwarding: Automatic, to user that was made a collaborator.
                 email_to = [self.user.email, ]
-                from whispersapi.immediate_tasks import generate_notification
-                generate_notification.delay(msg_tmp.id, recipients, source, event_id, 'event', subject, body,
-                                            True, email_to)
+                from whispersapi.immediate_tasks import generate_notification_on_commit
+                generate_notification_on_commit(msg_tmp.id, recipients, source, event_id, 'event', subject, body,
+                                                True, email_to)
 
     def __str__(self):
         return str(self.id)
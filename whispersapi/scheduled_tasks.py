@@ -1,10 +1,17 @@
+from collections import OrderedDict, defaultdict
+from bisect import bisect_left, bisect_right
 from pytz import timezone
 from celery import shared_task
 from celery.exceptions import SoftTimeLimitExceeded
-from django.db.models import Count
+from celery.utils.log import get_task_logger
+from django.db import connection
 from whispersapi.serializers import *
 from whispersapi.models import *
 from whispersapi.immediate_tasks import *
+from whispersapi.configuration import (get_whispers_email_address, get_nwhc_org_id, get_madison_epi_user_id,
+                                       get_stale_event_periods)
+
+logger = get_task_logger(__name__)
 
 
 # This class is intended to prevent potential bugs caused by accessing the wrong indexes in a list
@@ -25,19 +32,9 @@ class NotificationDetails:
         self.org_name = org_name
 
 
-def get_nwhc_org_id():
-    nwhc_org_record = Configuration.objects.filter(name='nwhc_organization').first()
-    if nwhc_org_record:
-        if nwhc_org_record.value.isdecimal():
-            NWHC_ORG_ID = int(nwhc_org_record.value)
-        else:
-            NWHC_ORG_ID = settings.NWHC_ORG_ID
-            encountered_type = type(nwhc_org_record.value).__name__
-            send_wrong_type_configuration_value_email('nwhc_organization', encountered_type, 'int')
-    else:
-        NWHC_ORG_ID = settings.NWHC_ORG_ID
-        send_missing_configuration_value_email('nwhc_organization')
-    return NWHC_ORG_ID
+# the minimum number of minutes between admin alert digests, and the maximum number of alerts included in one
+ADMIN_ALERT_DIGEST_INTERVAL = 60
+ADMIN_ALERT_DIGEST_MAX_ALERTS = 100
 
 
 def get_yesterday():
@@ -70,8 +67,8 @@ def get_change_info(history_record, model_name):
         name = history_record.contact.first_name + " " + history_record.contact.last_name
         details = "<br />An Event Contact was {}: {}".format(alt_action, name)
     elif model_name == 'event_location':
-        name = history_record.administrative_level_two.name
-        name += ", " + history_record.administrative_level_one.abbreviation + ", " + history_record.country.abbreviation
+        name = history_record.administrative_level_two.name + ", " if history_record.administrative_level_two else ""
+        name += history_record.administrative_level_one.abbreviation + ", " + history_record.country.abbreviation
         details = "<br />An {} was {}: {}".format(model, action, name)
     elif model_name == 'event_location_comment':
         details = "<br />An {} was {}: {}".format(model, action, history_record.comment)
@@ -94,440 +91,335 @@ def get_change_info(history_record, model_name):
     return details.rstrip()
 
 
-def get_changes(history, source_id, yesterday, model_name, source_type, cue_user):
-    yesterday_date = datetime.strptime(yesterday, '%Y-%m-%d').date()
-    changes = ""
-    NWHC_OG_ID = get_nwhc_org_id()
-
-    if len(history) == 0:
-        # no history records for the model, so ignore
-        pass
-    elif len(history) == 1:
-        # only one history record for the model
-        h = history[0]
-        # only include creates made yesterday by the source user (or org)
-        #  (a single history record can only ever be a create, but better to be safe by being explicit)
-        h_id = h.history_user.id if source_type == 'user' else h.history_user.organization.id
-        if h.history_date.date() == yesterday_date and h_id == source_id and h.history_type in ['+', '-']:
-            # check permissions for comments and contacts (visible to privileged users only!)
-            check_permissions = False
-            event = None
-            if model_name == 'event_comment':
-                check_permissions = True
-                event = Event.objects.filter(id=h.object_id).first()
-            elif model_name == 'event_location_comment':
-                check_permissions = True
-                event_location = EventLocation.objects.filter(id=h.object_id).first()
-                event = Event.objects.filter(id=event_location.event_id).first()
-            elif model_name == 'event_contact':
-                check_permissions = True
-                event = Event.objects.filter(id=h.event_id).first()
-            elif model_name == 'event_location_contact':
-                check_permissions = True
-                event_location = EventLocation.objects.filter(id=h.event_location_id).first()
-                event = Event.objects.filter(id=event_location.event_id).first()
-            if check_permissions and not (cue_user.role.is_superadmin or cue_user.role.is_admin
-                                          or cue_user.id == event.created_by.id
-                                          or cue_user.organization.id == event.created_by.organization.id
-                                          or cue_user.organization.id in event.created_by.parent_organizations
-                                          or cue_user.id in list(User.objects.filter(
-                        Q(writeevents__in=[event.id]) | Q(readevents__in=[event.id])
-                    ).values_list('id', flat=True))):
-                pass
-            elif model_name == 'event_group_comment':
-                if not (cue_user.role.is_superadmin or cue_user.role.is_admin
-                          or cue_user.organization.id == NWHC_OG_ID):
-                    # Event Group comments visible only to NWHC staff
-                    pass
-            else:
-                changes += get_change_info(h, model_name)
-    else:
-        # more than one history record for the model
-        for h in history:
-            # only include changes made yesterday
-            # NOTE: for some reason, the simple_history module is not reading the timezone of the history_date field,
-            #  even tho the project settings have USE_TZ=True and TIME_ZONE='America/Chicago' (UTC-6)
-            #  and the simple_history maintainers say that's all that's necessary for the module to recognize timezone
-            #  (see https://github.com/jazzband/django-simple-history/issues/175)
-            #  and we can see the history tables are clearly storing datetimes with timezone info,
-            #  (e.g., '2021-12-20 21:04:01.232116-06'), so in order for the date math to work correctly here,
-            #  the history_date needs a timezone adjustment, using pytz.timezone() and the standard astimezone() methods
-            tz = timezone(settings.TIME_ZONE)
-            history_datetime = h.history_date.astimezone(tz)
-            if not history_datetime.date() == yesterday_date:
-                # no changes from yesterday found, so move on
-                continue
-            else:
-                # only include changes made by this particular updater (source)
-                h_id = h.history_user.id if source_type == 'user' else h.history_user.organization.id
-                if not h_id == source_id:
-                    # keep the loop going in case changes made by this updater are interspersed among other changes
-                    continue
-                else:
-                    # check permissions for comments and event contacts (visible to privileged users only!)
-                    check_permissions = False
-                    event = None
-                    if model_name == 'event_comment':
-                        check_permissions = True
-                        event = Event.objects.filter(id=h.object_id).first()
-                    elif model_name == 'event_location_comment':
-                        check_permissions = True
-                        event_location = EventLocation.objects.filter(id=h.object_id).first()
-                        event = Event.objects.filter(id=event_location.event_id).first()
-                    elif model_name == 'event_contact':
-                        check_permissions = True
-                        event = Event.objects.filter(id=h.event_id).first()
-                    elif model_name == 'event_location_contact':
-                        check_permissions = True
-                        event_location = EventLocation.objects.filter(id=h.event_location_id).first()
-                        event = Event.objects.filter(id=event_location.event_id).first()
-                    if check_permissions and not (cue_user.role.is_superadmin or cue_user.role.is_admin
-                                                  or cue_user.id == event.created_by.id
-                                                  or cue_user.organization.id == event.created_by.organization.id
-                                                  or cue_user.organization.id in event.created_by.parent_organizations
-                                                  or cue_user.id in list(User.objects.filter(
-                                Q(writeevents__in=[event.id]) | Q(readevents__in=[event.id])
-                            ).values_list('id', flat=True))):
-                        # keep the loop going in case changes made by this updater are interspersed among other changes
-                        continue
-                    elif model_name == 'event_group_comment':
-                        if not (cue_user.role.is_superadmin or cue_user.role.is_admin
-                                or cue_user.organization.id == NWHC_OG_ID):
-                            # Event Group comments visible only to NWHC staff
-                            # keep loop going in case changes made by this updater are interspersed among other changes
-                            continue
-                    # process object creates and deletes (and legacy data) differently,
-                    #  since there is no earlier record to diff against for changes
-                    if h.history_type in ['+', '-'] or h.prev_record is None:
-                        changes += get_change_info(h, model_name)
-                    else:
-                        delta = h.diff_against(h.prev_record)
-                        for change in delta.changes:
-                            fld = change.field
-
-                            # ignore automatically calculated fields (non-editable by user)
-                            if fld in ['priority', 'created_by', 'modified_by', 'created_date', 'modified_date',
-                                       'id', 'event', 'event_location', 'location_species', 'species_diagnosis']:
-                                continue
-                            # substitute related object names for foreign key IDs
-                            elif model_name == 'event':
-                                if fld == 'event_type':
-                                    change.new = EventType.objects.get(id=change.new) if change.new else change.new
-                                    change.old = EventType.objects.get(id=change.old) if change.old else change.old
-                                elif fld == 'event_reference':
-                                    # check permissions (visible to privileged users only!)
-                                    if (cue_user.id == h.created_by.id
-                                            or cue_user.organization.id == h.created_by.organization.id
-                                            or cue_user.organization.id in h.created_by.parent_organizations
-                                            or cue_user.id in list(User.objects.filter(
-                                                Q(writeevents__in=[h.id]) | Q(readevents__in=[h.id])
-                                            ).values_list('id', flat=True))):
-                                        change.new = "\"\"" if change.new == '' else change.new
-                                        change.old = "\"\"" if change.old == '' else change.old
-                                    else:
-                                        continue
-                                elif fld == 'staff':
-                                    # check permissions (visible to NWHC only!)
-                                    if cue_user.organization.id == NWHC_OG_ID:
-                                        change.new = Staff.objects.get(id=change.new) if change.new else change.new
-                                        change.old = Staff.objects.get(id=change.old) if change.old else change.old
-                                    else:
-                                        continue
-                                elif fld == 'event_status':
-                                    # check permissions (visible to NWHC only!)
-                                    if cue_user.organization.id == NWHC_OG_ID:
-                                        chg = change
-                                        change.new = EventStatus.objects.get(id=chg.new) if chg.new else chg.new
-                                        change.old = EventStatus.objects.get(id=chg.old) if chg.old else chg.old
-                                    else:
-                                        continue
-                                elif fld == 'quality_check':
-                                    # check permissions (visible to NWHC only!)
-                                    if cue_user.organization.id == NWHC_OG_ID:
-                                        change.new = "\"\"" if change.new == '' else change.new
-                                        change.old = "\"\"" if change.old == '' else change.old
-                                    else:
-                                        continue
-                                elif fld == 'legal_status':
-                                    # check permissions (visible to NWHC only!)
-                                    if cue_user.organization.id == NWHC_OG_ID:
-                                        chg = change
-                                        change.new = LegalStatus.objects.get(id=chg.new) if chg.new else chg.new
-                                        change.old = LegalStatus.objects.get(id=chg.old) if chg.old else chg.old
-                                    else:
-                                        continue
-                                elif fld == 'legal_number':
-                                    # check permissions (visible to NWHC only!)
-                                    if cue_user.organization.id == NWHC_OG_ID:
-                                        change.new = "\"\"" if change.new == '' else change.new
-                                        change.old = "\"\"" if change.old == '' else change.old
-                                    else:
-                                        continue
-                                elif fld == 'public':
-                                    # check permissions (visible to privileged users only!)
-                                    if (cue_user.id == h.created_by.id
-                                            or cue_user.organization.id == h.created_by.organization.id
-                                            or cue_user.organization.id in h.created_by.parent_organizations
-                                            or cue_user.id in list(User.objects.filter(
-                                                Q(writeevents__in=[h.id]) | Q(readevents__in=[h.id])
-                                            ).values_list('id', flat=True))):
-                                        change.new = "\"\"" if change.new == '' else change.new
-                                        change.old = "\"\"" if change.old == '' else change.old
-                                    else:
-                                        continue
-                            elif model_name == 'event_location':
-                                if fld == 'name':
-                                    # check permissions (visible to privileged users only!)
-                                    if (cue_user.id == h.created_by.id
-                                            or cue_user.organization.id == h.created_by.organization.id
-                                            or cue_user.organization.id in h.created_by.parent_organizations
-                                            or cue_user.id in list(User.objects.filter(
-                                                Q(writeevents__in=[h.event.id]) | Q(readevents__in=[h.event.id])
-                                            ).values_list('id', flat=True))):
-                                        change.new = "\"\"" if change.new == '' else change.new
-                                        change.old = "\"\"" if change.old == '' else change.old
-                                    else:
-                                        continue
-                                elif fld == 'country':
-                                    change.new = Country.objects.get(id=change.new) if change.new else change.new
-                                    change.old = Country.objects.get(id=change.old) if change.old else change.old
-                                elif fld == 'administrative_level_one':
-                                    chg = change
-                                    change.new = AdministrativeLevelOne.objects.get(id=chg.new) if chg.new else chg.new
-                                    change.old = AdministrativeLevelOne.objects.get(id=chg.old) if chg.old else chg.old
-                                    # substitute locality name if applicable
-                                    locality = AdministrativeLevelLocality.objects.filter(country=h.country).first()
-                                    if locality and locality.admin_level_one_name:
-                                        change.field = locality.admin_level_one_name
-                                elif fld == 'administrative_level_two':
-                                    chg = change
-                                    change.new = AdministrativeLevelTwo.objects.get(id=chg.new) if chg.new else chg.new
-                                    change.old = AdministrativeLevelTwo.objects.get(id=chg.old) if chg.old else chg.old
-                                    # substitute locality name if applicable
-                                    locality = AdministrativeLevelLocality.objects.filter(country=h.country).first()
-                                    if locality and locality.admin_level_two_name:
-                                        change.field = locality.admin_level_two_name
-                                elif fld == 'latitude':
-                                    # check permissions (visible to privileged users only!)
-                                    if (cue_user.id == h.created_by.id
-                                            or cue_user.organization.id == h.created_by.organization.id
-                                            or cue_user.organization.id in h.created_by.parent_organizations
-                                            or cue_user.id in list(User.objects.filter(
-                                                Q(writeevents__in=[h.event.id]) | Q(readevents__in=[h.event.id])
-                                            ).values_list('id', flat=True))):
-                                        change.new = "\"\"" if change.new == '' else change.new
-                                        change.old = "\"\"" if change.old == '' else change.old
-                                    else:
-                                        continue
-                                elif fld == 'longitude':
-                                    # check permissions (visible to privileged users only!)
-                                    if (cue_user.id == h.created_by.id
-                                            or cue_user.organization.id == h.created_by.organization.id
-                                            or cue_user.organization.id in h.created_by.parent_organizations
-                                            or cue_user.id in list(User.objects.filter(
-                                                Q(writeevents__in=[h.event.id]) | Q(readevents__in=[h.event.id])
-                                            ).values_list('id', flat=True))):
-                                        change.new = "\"\"" if change.new == '' else change.new
-                                        change.old = "\"\"" if change.old == '' else change.old
-                                    else:
-                                        continue
-                                elif fld == 'land_ownership':
-                                    # check permissions (visible to privileged users only!)
-                                    if (cue_user.id == h.created_by.id
-                                            or cue_user.organization.id == h.created_by.organization.id
-                                            or cue_user.organization.id in h.created_by.parent_organizations
-                                            or cue_user.id in list(User.objects.filter(
-                                                Q(writeevents__in=[h.event.id]) | Q(readevents__in=[h.event.id])
-                                            ).values_list('id', flat=True))):
-                                        chg = change
-                                        change.new = LandOwnership.objects.get(id=chg.new) if chg.new else chg.new
-                                        change.old = LandOwnership.objects.get(id=chg.old) if chg.old else chg.old
-                                    else:
-                                        continue
-                                elif fld == 'gnis_name':
-                                    # check permissions (visible to privileged users only!)
-                                    if (cue_user.id == h.created_by.id
-                                            or cue_user.organization.id == h.created_by.organization.id
-                                            or cue_user.organization.id in h.created_by.parent_organizations
-                                            or cue_user.id in list(User.objects.filter(
-                                                Q(writeevents__in=[h.event.id]) | Q(readevents__in=[h.event.id])
-                                            ).values_list('id', flat=True))):
-                                        change.new = "\"\"" if change.new == '' else change.new
-                                        change.old = "\"\"" if change.old == '' else change.old
-                                    else:
-                                        continue
-                                elif fld == 'gnis_id':
-                                    # check permissions (visible to privileged users only!)
-                                    if (cue_user.id == h.created_by.id
-                                            or cue_user.organization.id == h.created_by.organization.id
-                                            or cue_user.organization.id in h.created_by.parent_organizations
-                                            or cue_user.id in list(User.objects.filter(
-                                                Q(writeevents__in=[h.event.id]) | Q(readevents__in=[h.event.id])
-                                            ).values_list('id', flat=True))):
-                                        change.new = "\"\"" if change.new == '' else change.new
-                                        change.old = "\"\"" if change.old == '' else change.old
-                                    else:
-                                        continue
-                            elif model_name == 'location_species':
-                                if fld == 'species':
-                                    change.new = Species.objects.get(id=change.new) if change.new else change.new
-                                    change.old = Species.objects.get(id=change.old) if change.old else change.old
-                                elif fld == 'age_bias':
-                                    change.new = AgeBias.objects.get(id=change.new) if change.new else change.new
-                                    change.old = AgeBias.objects.get(id=change.old) if change.old else change.old
-                                elif fld == 'sex_bias':
-                                    change.new = SexBias.objects.get(id=change.new) if change.new else change.new
-                                    change.old = SexBias.objects.get(id=change.old) if change.old else change.old
-                            elif model_name == 'species_diagnosis':
-                                if fld == 'diagnosis':
-                                    change.new = Diagnosis.objects.get(id=change.new) if change.new else change.new
-                                    change.old = Diagnosis.objects.get(id=change.old) if change.old else change.old
-                                if fld == 'cause':
-                                    # check permissions (visible to privileged users only!)
-                                    event_id = h.location_species.event_location.event.id
-                                    if (cue_user.id == h.created_by.id
-                                            or cue_user.organization.id == h.created_by.organization.id
-                                            or cue_user.organization.id in h.created_by.parent_organizations
-                                            or cue_user.id in list(User.objects.filter(
-                                                Q(writeevents__in=[event_id]) | Q(readevents__in=[event_id])
-                                            ).values_list('id', flat=True))):
-                                        chg = change
-                                        change.new = DiagnosisCause.objects.get(id=chg.new) if chg.new else chg.new
-                                        change.old = DiagnosisCause.objects.get(id=chg.old) if chg.old else chg.old
-                                    else:
-                                        continue
-                                if fld == 'basis':
-                                    # check permissions (visible to privileged users only!)
-                                    event_id = h.location_species.event_location.event.id
-                                    if (cue_user.id == h.created_by.id
-                                            or cue_user.organization.id == h.created_by.organization.id
-                                            or cue_user.organization.id in h.created_by.parent_organizations
-                                            or cue_user.id in list(User.objects.filter(
-                                                Q(writeevents__in=[event_id]) | Q(readevents__in=[event_id])
-                                            ).values_list('id', flat=True))):
-                                        chg = change
-                                        change.new = DiagnosisBasis.objects.get(id=chg.new) if chg.new else chg.new
-                                        change.old = DiagnosisBasis.objects.get(id=chg.old) if chg.old else chg.old
-                                    else:
-                                        continue
-
-                            # substitute a two double quotation marks for empty string to avoid confusing the recipient
-                            # (an empty string in the notification or email looks like the value is missing,
-                            # not like what the value actually is (a string without content),
-                            # and might make them think that there is a bug in the code)
-                            change.new = "\"\"" if change.new == '' else change.new
-                            change.old = "\"\"" if change.old == '' else change.old
-
-                            # format the change into an update string item
-                            model = " ".join([part.capitalize() for part in model_name.split('_')])
-                            field = change.field.replace('_', ' ')
-                            changes += "<br />{} {} changed from {} to {}".format(model, field, change.old, change.new)
-
+# automatically calculated fields (non-editable by user), whose changes are not reported
+HISTORY_IGNORED_FIELDS = ['priority', 'created_by', 'modified_by', 'created_date', 'modified_date',
+                          'id', 'event', 'event_location', 'location_species', 'species_diagnosis']
+
+# foreign key fields of each model whose changes are reported with the names of the related objects instead of IDs
+HISTORY_NAMED_FIELDS = {
+    'event': {'event_type': EventType, 'staff': Staff, 'event_status': EventStatus, 'legal_status': LegalStatus},
+    'event_location': {'country': Country, 'administrative_level_one': AdministrativeLevelOne,
+                       'administrative_level_two': AdministrativeLevelTwo, 'land_ownership': LandOwnership},
+    'location_species': {'species': Species, 'age_bias': AgeBias, 'sex_bias': SexBias},
+    'species_diagnosis': {'diagnosis': Diagnosis, 'cause': DiagnosisCause, 'basis': DiagnosisBasis},
+}
+
+# event location fields whose changes are labeled with the locality name of the field (if any) in their country
+HISTORY_LOCALITY_FIELDS = {'administrative_level_one': 'admin_level_one_name',
+                           'administrative_level_two': 'admin_level_two_name'}
+
+# fields of each model whose changes are visible to privileged users only
+#  (the record creator, users of the creator's organization or its parent organizations, and event collaborators)
+HISTORY_PRIVILEGED_FIELDS = {
+    'event': ['event_reference', 'public'],
+    'event_location': ['name', 'latitude', 'longitude', 'land_ownership', 'gnis_name', 'gnis_id'],
+    'species_diagnosis': ['cause', 'basis'],
+}
+
+# fields of each model whose changes are visible to NWHC users only
+HISTORY_NWHC_FIELDS = {
+    'event': ['staff', 'event_status', 'quality_check', 'legal_status', 'legal_number'],
+}
+
+# models whose records are visible to admins and privileged users only (privileged relative to the event creator)
+HISTORY_PRIVILEGED_MODELS = ['event_comment', 'event_location_comment', 'event_contact', 'event_location_contact']
+
+
+def get_history_diff(model, history_record, prev_record):
+    # return the (field, old value, new value) of each field changed between two history records of a model,
+    #  compared as the simple_history diff_against method compares them (but without the many to many fields,
+    #  which it reads from the current record for both history records, so they never differ)
+    changes = []
+    for field in model._meta.concrete_fields:
+        if field.editable:
+            old_value = getattr(prev_record, field.attname)
+            new_value = getattr(history_record, field.attname)
+            if old_value != new_value:
+                changes.append((field.name, old_value, new_value))
     return changes
 
 
-def get_updates(event, source_id, yesterday, source_type, cue_user):
-    # get changes from the event and its children (event comments, event diagnoses, event groups,
-    #  event group comments, event locations, event location comments, event location contacts,
-    #  event location flyways, location species, species diagnoses, species diagnosis organizations)
-    updates = ""
-
-    # event
-    event_history = Event.history.filter(id=event.id).order_by('-id', '-history_id')
-    updates += get_changes(event_history, source_id, yesterday, 'event', source_type, cue_user)
-
-    # event comments
-    event_content_type = ContentType.objects.filter(model='event').first()
-    event_comment_history = Comment.history.filter(
-        object_id=event.id, content_type=event_content_type.id, modified_date=event.modified_date).order_by('-id')
-    updates += get_changes(event_comment_history, source_id, yesterday, 'event_comment', source_type, cue_user)
-
-    # event diagnoses
-    event_diagnosis_history = EventDiagnosis.history.filter(event=event.id).order_by('-id', '-history_id')
-    updates += get_changes(event_diagnosis_history, source_id, yesterday, 'event_diagnosis', source_type, cue_user)
-
-    # get distinct event group IDs to ensure each event group's children are each only processed once
-    event_group_ids = list(set(EventEventGroup.objects.filter(event_id=event.id).values_list('id', flat=True)))
-    for event_group_id in event_group_ids:
-
-        # event groups
-        event_group_history = EventGroup.history.filter(id=event_group_id).order_by('-id', '-history_id')
-        updates += get_changes(event_group_history, source_id, yesterday, 'event_group', source_type, cue_user)
-
-        # event group comments
+class EventChanges:
+    """
+    The changes made yesterday to a set of events and their children (event comments, event diagnoses, event groups,
+    event group comments, event locations, event location comments, event location contacts, event location flyways,
+    location species, species diagnoses, species diagnosis organizations), read with one query per history table
+    and described once per event, so that the updates by each source visible to each user are only a filter away
+    """
+
+    def __init__(self, events, yesterday):
+        self.yesterday_date = datetime.strptime(yesterday, '%Y-%m-%d').date()
+        self.nwhc_org_id = get_nwhc_org_id()
+        self.events = {event.id: event for event in events}
+        # the changes of each event, as lists of (source user ID, source organization ID, visibility,
+        #  ID of the creator privileged users are relative to, description), in the order they are reported
+        self.changes = {}
+        # the foreign key IDs whose names are needed by each model, resolved with one query per model,
+        #  and the countries whose administrative level localities are needed
+        self.named_ids = defaultdict(set)
+        self.names = {}
+        self.locality_country_ids = set()
+        self.localities = {}
+        if not self.events:
+            return
+        event_ids = list(self.events.keys())
+
+        # the IDs of the current children of the events, whose own children are reported
+        #  (event groups are looked up by the IDs of their links to the events, as they have always been)
+        event_group_ids = self.get_child_ids(EventEventGroup.objects.filter(event__in=event_ids), 'event_id')
+        all_event_group_ids = [x for ids in event_group_ids.values() for x in ids]
+        event_location_ids = self.get_child_ids(EventLocation.objects.filter(event__in=event_ids), 'event_id')
+        all_event_location_ids = [x for ids in event_location_ids.values() for x in ids]
+        location_species_ids = self.get_child_ids(
+            LocationSpecies.objects.filter(event_location__in=all_event_location_ids), 'event_location_id')
+        all_location_species_ids = [x for ids in location_species_ids.values() for x in ids]
+        species_diagnosis_ids = self.get_child_ids(
+            SpeciesDiagnosis.objects.filter(location_species__in=all_location_species_ids), 'location_species_id')
+        all_species_diagnosis_ids = [x for ids in species_diagnosis_ids.values() for x in ids]
+
+        # the history of the events and their children, grouped by their parents
+        event_history = self.get_history(Event.history.filter(id__in=event_ids), 'id')
+        event_diagnosis_history = self.get_history(
+            EventDiagnosis.history.filter(event__in=event_ids).select_related('diagnosis'), 'event_id')
+        event_group_history = self.get_history(EventGroup.history.filter(id__in=all_event_group_ids), 'id')
+        event_organization_history = self.get_history(
+            EventOrganization.history.filter(event__in=event_ids).select_related('organization'), 'event_id')
+        event_contact_history = self.get_history(
+            EventContact.history.filter(event__in=event_ids).select_related('contact'), 'event_id')
+        event_location_history = self.get_history(EventLocation.history.filter(event__in=event_ids).select_related(
+            'administrative_level_two', 'administrative_level_one', 'country'), 'event_id')
+        event_location_contact_history = self.get_history(EventLocationContact.history.filter(
+            event_location__in=all_event_location_ids).select_related('contact'), 'event_location_id')
+        event_location_flyway_history = self.get_history(EventLocationFlyway.history.filter(
+            event_location__in=all_event_location_ids).select_related('flyway'), 'event_location_id')
+        location_species_history = self.get_history(LocationSpecies.history.filter(
+            event_location__in=all_event_location_ids).select_related('species'), 'event_location_id')
+        species_diagnosis_history = self.get_history(SpeciesDiagnosis.history.filter(
+            location_species__in=all_location_species_ids).select_related('diagnosis'), 'location_species_id')
+        species_diagnosis_organization_history = self.get_history(SpeciesDiagnosisOrganization.history.filter(
+            species_diagnosis__in=all_species_diagnosis_ids).select_related('organization'), 'species_diagnosis_id')
+
+        # comments are read in full (to find the previous record of each), but only those modified on the same date
+        #  as their event are reported
+        event_content_type = ContentType.objects.filter(model='event').first()
         event_group_content_type = ContentType.objects.filter(model='eventgroup').first()
-        event_group_comment_history = Comment.history.filter(
-            object_id=event_group_id, content_type=event_group_content_type.id, modified_date=event.modified_date
-        ).order_by('-id', '-history_id')
-        updates += get_changes(
-            event_group_comment_history, source_id, yesterday, 'event_group_comment', source_type, cue_user)
-
-    # event organizations
-    event_organization_history = EventOrganization.history.filter(event=event.id).order_by('-id', '-history_id')
-    updates += get_changes(event_organization_history, source_id, yesterday, 'event_organization', source_type, cue_user)
-
-    # event contacts
-    event_contact_history = EventContact.history.filter(event=event.id).order_by('-id', '-history_id')
-    updates += get_changes(event_contact_history, source_id, yesterday, 'event_contact', source_type, cue_user)
-
-    # event locations
-    event_location_history = EventLocation.history.filter(event=event.id).order_by('-id', '-history_id')
-    updates += get_changes(event_location_history, source_id, yesterday, 'event_location', source_type, cue_user)
+        event_location_content_type = ContentType.objects.filter(model='eventlocation').first()
+        comment_history = self.get_history(Comment.history.filter(
+            Q(content_type=event_content_type.id, object_id__in=event_ids)
+            | Q(content_type=event_group_content_type.id, object_id__in=all_event_group_ids)
+            | Q(content_type=event_location_content_type.id, object_id__in=all_event_location_ids)
+        ), 'content_type_id', 'object_id')
+
+        for event in self.events.values():
+            history_groups = [
+                ('event', event_history.get(event.id, [])),
+                ('event_comment', self.get_comment_history(comment_history, event_content_type, event.id, event)),
+                ('event_diagnosis', event_diagnosis_history.get(event.id, [])),
+            ]
+            for event_group_id in event_group_ids[event.id]:
+                history_groups.append(('event_group', event_group_history.get(event_group_id, [])))
+                history_groups.append(('event_group_comment', self.get_comment_history(
+                    comment_history, event_group_content_type, event_group_id, event)))
+            history_groups.append(('event_organization', event_organization_history.get(event.id, [])))
+            history_groups.append(('event_contact', event_contact_history.get(event.id, [])))
+            history_groups.append(('event_location', event_location_history.get(event.id, [])))
+            for event_location_id in event_location_ids[event.id]:
+                history_groups.append(('event_location_comment', self.get_comment_history(
+                    comment_history, event_location_content_type, event_location_id, event)))
+                history_groups.append(
+                    ('event_location_contact', event_location_contact_history.get(event_location_id, [])))
+                history_groups.append(
+                    ('event_location_flyway', event_location_flyway_history.get(event_location_id, [])))
+                history_groups.append(('location_species', location_species_history.get(event_location_id, [])))
+                for location_species_id in location_species_ids[event_location_id]:
+                    history_groups.append(
+                        ('species_diagnosis', species_diagnosis_history.get(location_species_id, [])))
+                    for species_diagnosis_id in species_diagnosis_ids[location_species_id]:
+                        history_groups.append(('species_diagnosis_organization',
+                                               species_diagnosis_organization_history.get(species_diagnosis_id, [])))
+
+            self.changes[event.id] = []
+            for model_name, history in history_groups:
+                self.changes[event.id].extend(self.get_changes(event, history, model_name))
+
+        # substitute the names of related objects for the foreign key IDs of changed fields
+        #  (and the locality names of administrative levels, preferring the first locality of a country)
+        self.names = {model: model.objects.in_bulk(ids) for model, ids in self.named_ids.items()}
+        for locality in AdministrativeLevelLocality.objects.filter(
+                country__in=self.locality_country_ids).order_by('-id'):
+            self.localities[locality.country_id] = locality
+        for event_changes in self.changes.values():
+            for i, change in enumerate(event_changes):
+                if not isinstance(change[-1], str):
+                    event_changes[i] = change[:-1] + (self.describe_field_change(*change[-1]),)
+
+        # the organizations and collaborators that privileged users are determined by
+        creator_ids = set(event.created_by_id for event in self.events.values())
+        creator_ids |= set(change[3] for event_changes in self.changes.values() for change in event_changes)
+        creator_ids.discard(None)
+        self.user_organization_ids = dict(User.objects.filter(id__in=creator_ids).values_list('id', 'organization_id'))
+        self.parent_organization_ids = dict(Organization.objects.values_list('id', 'parent_organization_id'))
+        self.collaborator_ids = defaultdict(set)
+        for through_model in [EventReadUser, EventWriteUser]:
+            for event_id, user_id in through_model.objects.filter(event__in=event_ids).values_list(
+                    'event_id', 'user_id'):
+                self.collaborator_ids[event_id].add(user_id)
+
+    @staticmethod
+    def get_child_ids(queryset, parent_field):
+        child_ids = defaultdict(list)
+        for parent_id, child_id in queryset.order_by('id').values_list(parent_field, 'id'):
+            child_ids[parent_id].append(child_id)
+        return child_ids
+
+    @staticmethod
+    def get_comment_history(comment_history, content_type, object_id, event):
+        return [h for h in comment_history.get((content_type.id, object_id), [])
+                if h.modified_date == event.modified_date]
+
+    @staticmethod
+    def get_history(queryset, *parent_fields):
+        # return the history records of the queryset grouped by the values of the parent fields (newest first),
+        #  each with its previous record (the latest one of the same object that is older, as in simple_history)
+        history = defaultdict(list)
+        object_history = defaultdict(list)
+        for h in queryset.select_related('history_user').order_by('-id', '-history_id'):
+            key = getattr(h, parent_fields[0]) if len(parent_fields) == 1 else tuple(
+                getattr(h, parent_field) for parent_field in parent_fields)
+            history[key].append(h)
+            object_history[h.id].append(h)
+        for records in object_history.values():
+            records.sort(key=lambda record: record.history_date)
+            prev_record = None
+            for i, h in enumerate(records):
+                if i > 0 and records[i - 1].history_date < h.history_date:
+                    prev_record = records[i - 1]
+                h.prev = prev_record
+        return history
+
+    def get_changes(self, event, history, model_name):
+        # return the changes described by the history records of a model, without regard to source or user
+        changes = []
+        model = history[0].instance_type if history else None
+
+        if len(history) == 0:
+            # no history records for the model, so ignore
+            pass
+        elif len(history) == 1:
+            # only one history record for the model
+            h = history[0]
+            # only include creates made yesterday
+            #  (a single history record can only ever be a create, but better to be safe by being explicit)
+            # NOTE: unlike with more records (below), the date of a single record is not adjusted for the timezone
+            if h.history_date.date() == self.yesterday_date and h.history_type in ['+', '-']:
+                # comments and contacts are visible to privileged users only,
+                #  and a single Event Group comment has never been reported
+                if model_name in HISTORY_PRIVILEGED_MODELS:
+                    changes.append(self.get_change(h, 'privileged_or_admin', event.created_by_id,
+                                                   get_change_info(h, model_name)))
+                elif model_name != 'event_group_comment':
+                    changes.append(self.get_change(h, None, None, get_change_info(h, model_name)))
+        else:
+            # more than one history record for the model
+            # NOTE: simple_history does not read the timezone of the history_date field (see
+            #  https://github.com/jazzband/django-simple-history/issues/175), so it is adjusted to the project timezone
+            tz = timezone(settings.TIME_ZONE)
+            for h in history:
+                # only include changes made yesterday
+                if h.history_date.astimezone(tz).date() != self.yesterday_date:
+                    continue
+                # comments and event contacts are visible to privileged users only,
+                #  and Event Group comments to NWHC staff only
+                visibility = None
+                if model_name in HISTORY_PRIVILEGED_MODELS:
+                    visibility = 'privileged_or_admin'
+                elif model_name == 'event_group_comment':
+                    visibility = 'nwhc_or_admin'
+                # process object creates and deletes (and legacy data) differently,
+                #  since there is no earlier record to diff against for changes
+                if h.history_type in ['+', '-'] or h.prev is None:
+                    changes.append(self.get_change(h, visibility, event.created_by_id, get_change_info(h, model_name)))
+                    continue
+                for field, old, new in get_history_diff(model, h, h.prev):
+                    if field in HISTORY_IGNORED_FIELDS:
+                        continue
+                    field_visibility = visibility
+                    creator_id = event.created_by_id
+                    if field in HISTORY_PRIVILEGED_FIELDS.get(model_name, []):
+                        field_visibility = 'privileged'
+                        creator_id = h.created_by_id
+                    elif field in HISTORY_NWHC_FIELDS.get(model_name, []):
+                        field_visibility = 'nwhc'
+                    related_model = HISTORY_NAMED_FIELDS.get(model_name, {}).get(field, None)
+                    if related_model:
+                        self.named_ids[related_model] |= set(value for value in [old, new] if value)
+                    country_id = getattr(h, 'country_id', None)
+                    if model_name == 'event_location' and field in HISTORY_LOCALITY_FIELDS:
+                        self.locality_country_ids.add(country_id)
+                    # the description is completed once the names of all related objects are known
+                    changes.append(self.get_change(
+                        h, field_visibility, creator_id, (model_name, field, old, new, related_model, country_id)))
+        return changes
+
+    @staticmethod
+    def get_change(h, visibility, creator_id, description):
+        source_user = h.history_user
+        return (source_user.id if source_user else None, source_user.organization_id if source_user else None,
+                visibility, creator_id, description)
+
+    def describe_field_change(self, model_name, field, old, new, related_model, country_id):
+        if related_model:
+            names = self.names.get(related_model, {})
+            old = names.get(old, old) if old else old
+            new = names.get(new, new) if new else new
+        # substitute locality name if applicable
+        if model_name == 'event_location' and field in HISTORY_LOCALITY_FIELDS:
+            locality = self.localities.get(country_id, None)
+            if locality and getattr(locality, HISTORY_LOCALITY_FIELDS[field]):
+                field = getattr(locality, HISTORY_LOCALITY_FIELDS[field])
+
+        # substitute a two double quotation marks for empty string to avoid confusing the recipient
+        # (an empty string in the notification or email looks like the value is missing,
+        # not like what the value actually is (a string without content),
+        # and might make them think that there is a bug in the code)
+        new = "\"\"" if new == '' else new
+        old = "\"\"" if old == '' else old
+
+        # format the change into an update string item
+        model = " ".join([part.capitalize() for part in model_name.split('_')])
+        field = field.replace('_', ' ')
+        return "<br />{} {} changed from {} to {}".format(model, field, old, new)
+
+    def is_visible(self, visibility, creator_id, event, cue_user):
+        if visibility is None:
+            return True
+        is_admin = cue_user.role.is_superadmin or cue_user.role.is_admin
+        if visibility == 'nwhc':
+            return cue_user.organization_id == self.nwhc_org_id
+        if visibility == 'nwhc_or_admin':
+            return is_admin or cue_user.organization_id == self.nwhc_org_id
+        if visibility == 'privileged_or_admin' and is_admin:
+            return True
+        creator_organization_ids = get_organization_and_parent_ids(
+            self.user_organization_ids.get(creator_id, None), self.parent_organization_ids)
+        return (cue_user.id == creator_id or cue_user.organization_id in creator_organization_ids
+                or cue_user.id in self.collaborator_ids[event.id])
+
+    def get_updates(self, event, source_id, source_type, cue_user):
+        # return the description of the changes made to an event yesterday by the source (a user or an organization)
+        #  that are visible to the user
+        updates = ""
+        for user_id, organization_id, visibility, creator_id, description in self.changes.get(event.id, []):
+            if ((user_id if source_type == 'user' else organization_id) == source_id
+                    and self.is_visible(visibility, creator_id, event, cue_user)):
+                updates += description
+        return updates
 
-    # get distinct event location IDs to ensure each event location's children are each only processed once
-    event_location_ids = list(set(EventLocation.objects.filter(event=event.id).values_list('id', flat=True)))
-    for event_location_id in event_location_ids:
 
-        # event location comments
-        event_location_content_type = ContentType.objects.filter(model='eventlocation').first()
-        event_location_comment_history = Comment.history.filter(
-            object_id=event_location_id, content_type=event_location_content_type.id, modified_date=event.modified_date
-        ).order_by('-id', '-history_id')
-        updates += get_changes(
-            event_location_comment_history, source_id, yesterday, 'event_location_comment', source_type, cue_user)
-
-        # event location contacts
-        event_location_contact_history = EventLocationContact.history.filter(
-            event_location=event_location_id).order_by('-id', '-history_id')
-        updates += get_changes(
-            event_location_contact_history, source_id, yesterday, 'event_location_contact', source_type, cue_user)
-
-        # event location flyways
-        event_location_flyway_history = EventLocationFlyway.history.filter(
-            event_location=event_location_id).order_by('-id', '-history_id')
-        updates += get_changes(
-            event_location_flyway_history, source_id, yesterday, 'event_location_flyway', source_type, cue_user)
-
-        # location species
-        location_species_history = LocationSpecies.history.filter(
-            event_location=event_location_id).order_by('-id', '-history_id')
-        updates += get_changes(
-            location_species_history, source_id, yesterday, 'location_species', source_type, cue_user)
-
-        # get distinct location species IDs to ensure each location species' children are each only processed once
-        location_species_ids = list(set(LocationSpecies.objects.filter(
-            event_location=event_location_id).values_list('id', flat=True)))
-        for location_species_id in location_species_ids:
-
-            # species diagnoses
-            species_diagnosis_history = SpeciesDiagnosis.history.filter(
-                location_species=location_species_id).order_by('-id', '-history_id')
-            updates += get_changes(
-                species_diagnosis_history, source_id, yesterday, 'species_diagnosis', source_type, cue_user)
-
-            # get distinct species diagnosis IDs to ensure each species diagnosis' children are each only processed once
-            species_diagnosis_ids = list(set(SpeciesDiagnosis.objects.filter(
-                location_species=location_species_id).values_list('id', flat=True)))
-            for species_diagnosis_id in species_diagnosis_ids:
-
-                # species diagnosis organizations
-                species_diagnosis_organization_history = SpeciesDiagnosisOrganization.history.filter(
-                    species_diagnosis=species_diagnosis_id).order_by('-id', '-history_id')
-                updates += get_changes(
-                    species_diagnosis_organization_history, source_id, yesterday, 'species_diagnosis_organization',
-                    source_type, cue_user)
-
-    return updates
+def get_updates(event, source_id, yesterday, source_type, cue_user):
+    # get changes from the event and its children (see EventChanges, which should be used instead when getting
+    #  the changes of more than one event, or for more than one source or user)
+    return EventChanges([event], yesterday).get_updates(event, source_id, source_type, cue_user)
 
 
 def get_notification_details(cue, event, msg_tmp, updates, event_user):
@@ -567,263 +459,43 @@ def get_notification_details(cue, event, msg_tmp, updates, event_user):
                                subject, body, send_email, email_to, org)
 
 
-def get_event_notifications_own_new(events_created_yesterday, user):
-    notifications = []
-    msg_tmp = NotificationMessageTemplate.objects.filter(name='Your Events').first()
-    cue = NotificationCueStandard.objects.filter(standard_type__name='Own', created_by=user.id).first()
-
-    if not cue:
-        send_missing_notification_cue_standard_email(user, 'Own')
-        return []
+def get_all_events_notification_details(cue, event, msg_tmp, updates, organization_name, event_locations):
+    send_email = cue.notification_cue_preference.send_email
+    recipients = [cue.created_by.id, ]
+    email_to = [cue.created_by.email, ] if send_email else []
 
-    elif cue.notification_cue_preference.create_when_new:
-        for event in events_created_yesterday:
-            updates = "N/A"
-            notifications.append(get_notification_details(cue, event, msg_tmp, updates, event.created_by))
+    if updates == "N/A":
+        new_updated = "New"
+        created_updated = 'created'
+        event_date = event.created_date
+    else:
+        new_updated = "Updated"
+        created_updated = 'updated'
+        event_date = event.modified_date
 
-    return notifications
+    try:
+        subject = msg_tmp.subject_template.format(event_id=event.id)
+    except KeyError as e:
+        send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
+        subject = ""
+    try:
+        body = msg_tmp.body_template.format(
+            event_id=event.id, organization=organization_name, event_location=event_locations,
+            event_date=event_date, new_updated=new_updated, created_updated=created_updated, updates=updates)
+    except KeyError as e:
+        send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
+        body = ""
 
+    return NotificationDetails(msg_tmp.id, recipients, organization_name, event.id, 'event',
+                               subject, body, send_email, email_to, organization_name)
 
-def get_event_notifications_own_updated(events_updated_yesterday, yesterday, user):
-    notifications = []
-    msg_tmp = NotificationMessageTemplate.objects.filter(name='Your Events').first()
-    cue = NotificationCueStandard.objects.filter(standard_type__name='Own', created_by=user.id).first()
 
-    if not cue:
-        send_missing_notification_cue_standard_email(user, 'Own')
-        return []
-
-    elif cue.notification_cue_preference.create_when_modified:
-        for event in events_updated_yesterday:
-            # Create one notification per distinct updater (not including the creator)
-            # django_simple_history.history_type: + for create, ~ for update, and - for delete
-            event_updater_ids = list(set(
-                Event.history.filter(id=event.id, modified_date=yesterday
-                                     ).exclude(history_type='+', modified_by=event.created_by.id
-                                               ).values_list('modified_by', flat=True)))
-            event_updaters = User.objects.filter(id__in=event_updater_ids)
-            # only create notifications if there were truly updates and not just creates (exclude history_type='+')
-            if event_updater_ids:
-                for event_updater in event_updaters:
-                    updates = get_updates(event, event_updater.id, yesterday, 'user', cue.created_by)
-
-                    # only create notifications if there are update details (non-empty string)
-                    if updates:
-                        notifications.append(get_notification_details(cue, event, msg_tmp, updates, event_updater))
-
-    return notifications
-
-
-def get_event_notifications_organization_new(events_created_yesterday, user):
-    notifications = []
-    msg_tmp = NotificationMessageTemplate.objects.filter(name='Organization Events').first()
-    cue = NotificationCueStandard.objects.filter(standard_type__name='Organization', created_by=user.id).first()
-
-    if not cue:
-        send_missing_notification_cue_standard_email(user, 'Organization')
-        return []
-
-    elif cue.notification_cue_preference.create_when_new:
-        for event in events_created_yesterday:
-            updates = "N/A"
-            notifications.append(get_notification_details(cue, event, msg_tmp, updates, event.created_by))
-
-    return notifications
-
-
-def get_event_notifications_organization_updated(events_updated_yesterday, yesterday, user):
-    notifications = []
-    msg_tmp = NotificationMessageTemplate.objects.filter(name='Organization Events').first()
-    cue = NotificationCueStandard.objects.filter(standard_type__name='Organization', created_by=user.id).first()
-
-    if not cue:
-        send_missing_notification_cue_standard_email(user, 'Organization')
-        return []
-
-    elif cue.notification_cue_preference.create_when_modified:
-        for event in events_updated_yesterday:
-            # Create one notification per distinct updater (not including the creator)
-            # django_simple_history.history_type: + for create, ~ for update, and - for delete
-            event_updater_ids = list(set(
-                Event.history.filter(id=event.id, modified_date=yesterday
-                                     ).exclude(history_type='+', modified_by=event.created_by.id
-                                               ).values_list('modified_by', flat=True)))
-            event_updaters = User.objects.filter(id__in=event_updater_ids)
-            # only create notifications if there were truly updates and not just creates (exclude history_type='+')
-            if event_updaters:
-                for event_updater in event_updaters:
-                    updates = get_updates(event, event_updater.id, yesterday, 'user', cue.created_by)
-
-                    # only create notifications if there are update details (non-empty string)
-                    if updates:
-                        notifications.append(get_notification_details(cue, event, msg_tmp, updates, event_updater))
-
-    return notifications
-
-
-def get_event_notifications_collaborator_new(events_created_yesterday, user):
-    notifications = []
-    msg_tmp = NotificationMessageTemplate.objects.filter(name='Collaborator Events').first()
-    cue = NotificationCueStandard.objects.filter(standard_type__name='Collaborator', created_by=user.id).first()
-
-    if not cue:
-        send_missing_notification_cue_standard_email(user, 'Collaborator')
-        return []
-
-    elif cue.notification_cue_preference.create_when_new:
-        for event in events_created_yesterday:
-            updates = "N/A"
-            notifications.append(get_notification_details(cue, event, msg_tmp, updates, event.created_by))
-
-    return notifications
-
-
-def get_event_notifications_collaborator_updated(events_updated_yesterday, yesterday, user):
-    notifications = []
-    msg_tmp = NotificationMessageTemplate.objects.filter(name='Collaborator Events').first()
-    cue = NotificationCueStandard.objects.filter(standard_type__name='Collaborator', created_by=user.id).first()
-
-    if not cue:
-        send_missing_notification_cue_standard_email(user, 'Collaborator')
-        return []
-
-    elif cue.notification_cue_preference.create_when_modified:
-        for event in events_updated_yesterday:
-            # Create one notification per distinct updater (not including the creator)
-            # django_simple_history.history_type: + for create, ~ for update, and - for delete
-            event_updater_ids = list(set(
-                Event.history.filter(id=event.id, modified_date=yesterday
-                                     ).exclude(history_type='+', modified_by=event.created_by.id
-                                               ).values_list('modified_by', flat=True)))
-            # only create notifications if there were truly updates and not just creates (exclude history_type='+')
-            if event_updater_ids:
-                event_updaters = User.objects.filter(id__in=event_updater_ids)
-                for event_updater in event_updaters:
-                    updates = get_updates(event, event_updater.id, yesterday, 'user', cue.created_by)
-
-                    # only create notifications if there are update details (non-empty string)
-                    if updates:
-                        notifications.append(get_notification_details(cue, event, msg_tmp, updates, event_updater))
-
-    return notifications
-
-
-def get_event_notifications_all_new(events_created_yesterday, user):
-    notifications = []
-    msg_tmp = NotificationMessageTemplate.objects.filter(name='ALL Events').first()
-    cue = NotificationCueStandard.objects.filter(standard_type__name='All', created_by=user.id).first()
-
-    if not cue:
-        send_missing_notification_cue_standard_email(user, 'All')
-        return []
-
-    elif cue.notification_cue_preference.create_when_new:
-        for event in events_created_yesterday:
-            send_email = cue.notification_cue_preference.send_email
-            recipients = [cue.created_by.id, ]
-            email_to = [cue.created_by.email, ] if send_email else []
-
-            eventlocations = EventLocation.objects.filter(event=event.id)
-            all_evt_locs = ""
-            for evtloc in eventlocations:
-                evt_loc_name = ""
-                if evtloc.administrative_level_two:
-                    evt_loc_name += evtloc.administrative_level_two.name
-                evt_loc_name += ", " + evtloc.administrative_level_one.abbreviation
-                evt_loc_name += ", " + evtloc.country.abbreviation
-                all_evt_locs = evt_loc_name if len(all_evt_locs) == 0 else all_evt_locs + "; " + evt_loc_name
-            try:
-                subject = msg_tmp.subject_template.format(event_id=event.id)
-            except KeyError as e:
-                send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
-                subject = ""
-            try:
-                body = msg_tmp.body_template.format(
-                    event_id=event.id, organization=event.created_by.organization.name, event_location=all_evt_locs,
-                    event_date=event.created_date, new_updated="New", created_updated="created", updates="N/A")
-            except KeyError as e:
-                send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
-                body = ""
-            source = event.created_by.organization.name
-            org_name = source
-
-            notif_details = NotificationDetails(msg_tmp.id, recipients, source, event.id, 'event',
-                                                subject, body, send_email, email_to, org_name)
-            notifications.append(notif_details)
-
-    return notifications
-
-
-def get_event_notifications_all_updated(events_updated_yesterday, yesterday, user):
-    notifications = []
-    msg_tmp = NotificationMessageTemplate.objects.filter(name='ALL Events').first()
-    cue = NotificationCueStandard.objects.filter(standard_type__name='All', created_by=user.id,).first()
-
-    if not cue:
-        send_missing_notification_cue_standard_email(user, 'All')
-        return []
-
-    elif cue.notification_cue_preference.create_when_modified:
-        for event in events_updated_yesterday:
-            send_email = cue.notification_cue_preference.send_email
-            recipients = [cue.created_by.id, ]
-            email_to = [cue.created_by.email, ] if send_email else []
-            # Create one notification per distinct updater (not including the creator)
-            # django_simple_history.history_type: + for create, ~ for update, and - for delete
-            event_updaters = list(set(
-                Event.history.filter(id=event.id, modified_date=yesterday
-                                     ).exclude(history_type='+', modified_by=event.created_by.id
-                                               ).values_list('modified_by__organization__name',
-                                                             'modified_by__organization__id')))
-            # only create notifications if there were truly updates and not just creates (exclude history_type='+')
-            if event_updaters:
-                for event_updater in event_updaters:
-                    source = event_updater[0]
-                    source_id = event_updater[1]
-                    org_name = source
-                    updates = get_updates(event, source_id, yesterday, 'org', cue.created_by)
-
-                    # only create notifications if there are update details (non-empty string)
-                    if updates:
-                        eventlocations = EventLocation.objects.filter(event=event.id)
-                        all_evt_locs = ""
-                        for evtloc in eventlocations:
-                            evt_loc_name = ""
-                            if evtloc.administrative_level_two:
-                                evt_loc_name += evtloc.administrative_level_two.name
-                            evt_loc_name += ", " + evtloc.administrative_level_one.abbreviation
-                            evt_loc_name += ", " + evtloc.country.abbreviation
-                            all_evt_locs = evt_loc_name if len(
-                                all_evt_locs) == 0 else all_evt_locs + "; " + evt_loc_name
-
-                        try:
-                            subject = msg_tmp.subject_template.format(event_id=event.id)
-                        except KeyError as e:
-                            send_notification_template_message_keyerror_email(msg_tmp.name, e,
-                                                                              msg_tmp.message_variables)
-                            subject = ""
-                        try:
-                            body = msg_tmp.body_template.format(
-                                event_id=event.id, organization=source, event_location=all_evt_locs,
-                                event_date=event.modified_date, new_updated="Updated", created_updated="updated",
-                                updates=updates)
-                        except KeyError as e:
-                            send_notification_template_message_keyerror_email(msg_tmp.name, e,
-                                                                              msg_tmp.message_variables)
-                            body = ""
-
-                        notif_details = NotificationDetails(msg_tmp.id, recipients, source, event.id, 'event',
-                                                            subject, body, send_email, email_to, org_name)
-                        notifications.append(notif_details)
-
-    return notifications
-
-
-def send_unique_notifications(own_evts, org_evts, collab_evts, all_evts):
+def get_unique_notifications(own_evts, org_evts, collab_evts, all_evts):
+    unique_notifications = []
     unique_notification_details_user_source = []
     unique_notification_details_org_source = []
 
-    # send unique notifications (determined by combination of [source, event])
+    # keep unique notifications (determined by combination of [source, event])
     # that include source user info (the own, org, and collab notifications), preferring own over org over collab
     # also collect unique notifications using org (not user) source info to find unique 'All Event' notifications
     user_events_notif_details = own_evts + org_evts + collab_evts
@@ -837,138 +509,174 @@ def send_unique_notifications(own_evts, org_evts, collab_evts, all_evts):
             if (notif_details.org_name, notif_details.event_id) not in unique_notification_details_org_source:
                 unique_notification_details_org_source.append((notif_details.org_name, notif_details.event_id))
 
-            # remove the unnecessary 'org_name' property before generating the notification
-            del notif_details.org_name
-            # generate the notification
-            generate_notification.delay(**notif_details.__dict__)
+            unique_notifications.append(notif_details)
 
-    # then send unique 'ALL Event' notifications (which user org as source info)
-    all_events_notif_details = all_evts
-    for notif_details in all_events_notif_details:
+    # then keep unique 'ALL Event' notifications (which use org as source info)
+    for notif_details in all_evts:
         # find unique by (org, event ID)
         if (notif_details.org_name, notif_details.event_id) not in unique_notification_details_org_source:
             unique_notification_details_org_source.append((notif_details.org_name, notif_details.event_id))
-            # remove the unnecessary 'org_name' property (which here is a copy of source) before generating notification
-            del notif_details.org_name
-            # generate the notification
-            generate_notification.delay(**notif_details.__dict__)
-    return True
-
-
-@shared_task(soft_time_limit=595, time_limit=600)
-def standard_notifications_by_user(new_event_count, updated_event_count, yesterday, user_id):
-    user = User.objects.filter(id=user_id).first()
-
-    try:
-        # zero evaluates to False and any positive number evaluates to True
-        if new_event_count:
-            own_events = Event.objects.filter(created_date=yesterday, created_by=user_id)
-            own_notifs = get_event_notifications_own_new(own_events, user) if own_events else []
-
-            org_events = Event.objects.filter(created_date=yesterday).filter(
-                Q(created_by__organization__exact=user.organization.id)
-                | Q(created_by__organization__in=user.organization.child_organizations)
-            ).distinct()
-            org_notifs = get_event_notifications_organization_new(org_events, user) if org_events else []
-
-            collab_events = Event.objects.filter(created_date=yesterday).filter(
-                Q(read_collaborators__in=[user.id])
-                | Q(write_collaborators__in=[user.id])
-            ).distinct()
-            collab_notifs = get_event_notifications_collaborator_new(collab_events, user) if collab_events else []
-
-            # admin users can see all events regardless of public status or owner/org/collaborator status
-            if user.role.is_admin or user.role.is_superadmin:
-                all_events = Event.objects.filter(created_date=yesterday).distinct()
-
-            # for everyone else...
-            else:
-                # do not create notifications for private events for users who are not the event owner
-                #  or not in their org or are not event collaborators
-                all_events_public = Event.objects.filter(created_date=yesterday, public=True).distinct()
-                # Exclude events that were made public yesterday
-                exlude_ids = []
-                for event_public in all_events_public:
-                    # check if this event was not public yesterday, and if so exclude it, otherwise move on
-                    if Event.history.filter(public=False, id=event_public.id, history_date__date=yesterday):
-                        exlude_ids.append(event_public.id)
-                all_events_public = all_events_public.exclude(id__in=exlude_ids)
-                all_events_personal = Event.objects.filter(created_date=yesterday).filter(
-                    Q(created_by__exact=user.id) | Q(created_by__organization__exact=user.organization.id)
-                    | Q(created_by__organization__in=user.organization.child_organizations)
-                    | Q(read_collaborators__in=[user.id]) | Q(write_collaborators__in=[user.id])
-                ).distinct()
-                all_events = all_events_public | all_events_personal
-
-            all_notifs = get_event_notifications_all_new(all_events, user) if all_events else []
-
-            if own_notifs or org_notifs or collab_notifs or all_notifs:
-                send_unique_notifications(own_notifs, org_notifs, collab_notifs, all_notifs)
-
-        # zero evaluates to False and any positive number evaluates to True
-        if updated_event_count:
-            own_events = Event.objects.filter(modified_date=yesterday, created_by=user_id)
-            own_notifs = get_event_notifications_own_updated(own_events, yesterday, user) if own_events else []
-
-            org_events = Event.objects.filter(modified_date=yesterday).filter(
-                Q(created_by__organization__exact=user.organization.id)
-                | Q(created_by__organization__in=user.organization.child_organizations)
-            ).distinct()
-            org_notifs = get_event_notifications_organization_updated(org_events, yesterday, user) if org_events else []
-
-            collab_events = Event.objects.filter(modified_date=yesterday).filter(
-                Q(read_collaborators__in=[user.id])
-                | Q(write_collaborators__in=[user.id])
-            ).distinct()
-            collab_notifs = get_event_notifications_collaborator_updated(
-                collab_events, yesterday, user) if collab_events else []
-
-            # admin users can see all events regardless of public status or owner/org/collaborator status
-            if user.role.is_admin or user.role.is_superadmin:
-                all_events = Event.objects.filter(modified_date=yesterday).distinct()
-
-            # for everyone else...
+            unique_notifications.append(notif_details)
+    return unique_notifications
+
+
+def send_grouped_notifications(notifications):
+    # generate notifications with identical content with one task, which inserts them all at once,
+    # rather than with one task per recipient
+    groups = OrderedDict()
+    for notif_details in notifications:
+        key = (notif_details.template_id, notif_details.source, notif_details.event_id, notif_details.client_page,
+               notif_details.subject, notif_details.body)
+        if key not in groups:
+            template_id, source, event_id, client_page, subject, body = key
+            groups[key] = NotificationDetails(template_id, [], source, event_id, client_page, subject, body,
+                                              False, [], None)
+        group = groups[key]
+        group.recipients.extend(notif_details.recipients)
+        group.send_email = group.send_email or notif_details.send_email
+        group.email_to.extend(notif_details.email_to)
+    for group in groups.values():
+        # remove the unnecessary 'org_name' property before generating the notification
+        del group.org_name
+        generate_notification.delay(**group.__dict__)
+    return len(groups)
+
+
+# the name of the message template of the notifications of each standard notification cue type
+STANDARD_NOTIFICATION_TEMPLATES = OrderedDict([
+    ('Own', 'Your Events'),
+    ('Organization', 'Organization Events'),
+    ('Collaborator', 'Collaborator Events'),
+    ('All', 'ALL Events'),
+])
+
+
+def get_organization_and_parent_ids(organization_id, parent_organization_ids):
+    ids = []
+    while organization_id is not None and organization_id not in ids:
+        ids.append(organization_id)
+        organization_id = parent_organization_ids.get(organization_id)
+    return ids
+
+
+def get_standard_notification_audiences(events, users, yesterday):
+    # return the ids of the users who may be notified about each event, for each standard notification cue type:
+    #  the event owner, the users of the owner's organization or its parent organizations, the event collaborators,
+    #  and everyone who can see the event (admins can see all events, others only public events, unless they were
+    #  made public yesterday, and events they own, collaborate on, or that belong to their organization)
+    #  computed for all events at once, instead of checking every event for every user
+    event_ids = [event.id for event in events]
+    all_user_ids = set(users.keys())
+    admin_ids = set(user.id for user in users.values() if user.role.is_admin or user.role.is_superadmin)
+    organization_user_ids = defaultdict(set)
+    for user in users.values():
+        if user.organization_id is not None:
+            organization_user_ids[user.organization_id].add(user.id)
+    parent_organization_ids = dict(Organization.objects.values_list('id', 'parent_organization_id'))
+
+    collaborator_ids = defaultdict(set)
+    for through_model in [EventReadUser, EventWriteUser]:
+        for event_id, user_id in through_model.objects.filter(event__in=event_ids).values_list('event_id', 'user_id'):
+            if user_id in all_user_ids:
+                collaborator_ids[event_id].add(user_id)
+
+    public_event_ids = [event.id for event in events if event.public]
+    made_public_ids = set(Event.history.filter(
+        public=False, id__in=public_event_ids, history_date__date=yesterday).values_list('id', flat=True))
+
+    audiences = {}
+    for event in events:
+        own = {event.created_by_id} & all_user_ids
+        organization = set()
+        for organization_id in get_organization_and_parent_ids(
+                event.created_by.organization_id, parent_organization_ids):
+            organization |= organization_user_ids[organization_id]
+        collaborator = collaborator_ids[event.id]
+        if event.public and event.id not in made_public_ids:
+            everyone = all_user_ids
+        else:
+            everyone = admin_ids | own | organization | collaborator
+        audiences[event.id] = OrderedDict(
+            [('Own', own), ('Organization', organization), ('Collaborator', collaborator), ('All', everyone)])
+    return audiences
+
+
+def get_event_location_names(events):
+    # return the names of the locations of each event, e.g. "Dane, WI, USA; Sauk, WI, USA"
+    event_location_names = defaultdict(list)
+    eventlocations = EventLocation.objects.filter(event__in=[event.id for event in events]).select_related(
+        'administrative_level_two', 'administrative_level_one', 'country')
+    for evtloc in eventlocations:
+        evt_loc_name = ""
+        if evtloc.administrative_level_two:
+            evt_loc_name += evtloc.administrative_level_two.name
+        evt_loc_name += ", " + evtloc.administrative_level_one.abbreviation
+        evt_loc_name += ", " + evtloc.country.abbreviation
+        event_location_names[evtloc.event_id].append(evt_loc_name)
+    return {event.id: "; ".join(event_location_names[event.id]) for event in events}
+
+
+def get_event_standard_notifications(event, new, audiences, cues, subscriber_ids, missing_cue_user_ids, msg_tmps,
+                                     event_locations, event_changes, yesterday):
+    # return the unique standard notifications about a new (or updated) event to each user in its audiences,
+    #  and the users in its audiences missing a standard notification cue
+    user_notifications = defaultdict(
+        lambda: OrderedDict((cue_type, []) for cue_type in STANDARD_NOTIFICATION_TEMPLATES))
+    missing_cues = set()
+    for cue_type, audience in audiences.items():
+        missing_cues |= set((user_id, cue_type) for user_id in audience & missing_cue_user_ids[cue_type])
+
+    if not new:
+        # Create one notification per distinct updater (not including the creator)
+        # django_simple_history.history_type: + for create, ~ for update, and - for delete
+        event_updates = Event.history.filter(id=event.id, modified_date=yesterday).exclude(
+            history_type='+', modified_by=event.created_by.id)
+        event_updaters = list(User.objects.filter(id__in=set(event_updates.values_list('modified_by', flat=True))))
+        event_updater_orgs = list(set(event_updates.values_list(
+            'modified_by__organization__name', 'modified_by__organization__id')))
+        # only create notifications if there were truly updates and not just creates (exclude history_type='+')
+        if not event_updaters:
+            return [], missing_cues
+
+    for cue_type, audience in audiences.items():
+        msg_tmp = msg_tmps[STANDARD_NOTIFICATION_TEMPLATES[cue_type]]
+        # only consider the users who want these notifications, rather than everyone who can see the event
+        for user_id in audience & subscriber_ids[cue_type]:
+            cue = cues[(user_id, cue_type)]
+            notifications = user_notifications[user_id][cue_type]
+            if cue_type != 'All':
+                if new:
+                    updates = "N/A"
+                    notifications.append(get_notification_details(cue, event, msg_tmp, updates, event.created_by))
+                else:
+                    for event_updater in event_updaters:
+                        updates = event_changes.get_updates(event, event_updater.id, 'user', cue.created_by)
+                        # only create notifications if there are update details (non-empty string)
+                        if updates:
+                            notifications.append(
+                                get_notification_details(cue, event, msg_tmp, updates, event_updater))
             else:
-                # do not create notifications for private events for users who are not the event owner
-                #  or not in their org or are not event collaborators
-                all_events_public = Event.objects.filter(modified_date=yesterday, public=True).distinct()
-                # Exclude events that were made public yesterday
-                exlude_ids = []
-                for event_public in all_events_public:
-                    # check if this event was not public yesterday, and if so exclude it, otherwise move on
-                    if Event.history.filter(public=False, id=event_public.id, history_date__date=yesterday):
-                        exlude_ids.append(event_public.id)
-                all_events_public = all_events_public.exclude(id__in=exlude_ids)
-                all_events_personal = Event.objects.filter(modified_date=yesterday).filter(
-                    Q(created_by__exact=user.id) | Q(created_by__organization__exact=user.organization.id)
-                    | Q(created_by__organization__in=user.organization.child_organizations)
-                    | Q(read_collaborators__in=[user.id]) | Q(write_collaborators__in=[user.id])
-                ).distinct()
-                all_events = all_events_public | all_events_personal
-                # Calling distinct on the joined queryset should not be necessary, but doing it just in case
-                all_events = all_events.distinct()
-
-            all_notifs = get_event_notifications_all_updated(all_events, yesterday, user) if all_events else []
-
-            if own_notifs or org_notifs or collab_notifs or all_notifs:
-                send_unique_notifications(own_notifs, org_notifs, collab_notifs, all_notifs)
-
-    except SoftTimeLimitExceeded:
-        recip = get_whispers_email_address()
-        subject = "WHISPERS ADMIN: Timeout Encountered During standard_notifications_by_user_task"
-        body = "A timeout was encountered while generating standard notifications for user "
-        body += user.first_name + " " + user.last_name + " (username " + user.username + ", ID " + str(user.id) + ")."
-        body += " Timeout encountered at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S")
-        notif_email = construct_notification_email(recip, subject, body, False)
-        print(notif_email.__dict__)
+                if new:
+                    notifications.append(get_all_events_notification_details(
+                        cue, event, msg_tmp, "N/A", event.created_by.organization.name, event_locations))
+                else:
+                    for source, source_id in event_updater_orgs:
+                        updates = event_changes.get_updates(event, source_id, 'org', cue.created_by)
+                        # only create notifications if there are update details (non-empty string)
+                        if updates:
+                            notifications.append(get_all_events_notification_details(
+                                cue, event, msg_tmp, updates, source, event_locations))
 
-    return True
+    unique_notifications = []
+    for notifications in user_notifications.values():
+        unique_notifications.extend(get_unique_notifications(*notifications.values()))
+    return unique_notifications, missing_cues
 
 
 @shared_task(soft_time_limit=595, time_limit=600)
 def standard_notifications():
-    msg_tmp_names = ['Your Events', 'Organization Events', 'Collaborator Events', 'ALL Events']
-    msg_tmps = list(NotificationMessageTemplate.objects.filter(name__in=msg_tmp_names).values_list('name', flat=True))
+    msg_tmp_names = list(STANDARD_NOTIFICATION_TEMPLATES.values())
+    msg_tmps = {msg_tmp.name: msg_tmp for msg_tmp in NotificationMessageTemplate.objects.filter(name__in=msg_tmp_names)}
 
     if len(msg_tmps) < len(msg_tmp_names):
         for msg_tmp_name in msg_tmp_names:
@@ -978,39 +686,194 @@ def standard_notifications():
 
     try:
         yesterday = get_yesterday()
-        new_event_count = Event.objects.filter(created_date=yesterday).count()
-        updated_event_count = Event.objects.filter(modified_date=yesterday).count()
-        # zero evaluates to False and any positive number evaluates to True
-        if new_event_count or updated_event_count:
-            active_user_ids = list(User.objects.filter(is_active=True).exclude(role=7).values_list('id', flat=True))
-            for user_id in active_user_ids:
-                standard_notifications_by_user.delay(new_event_count, updated_event_count, yesterday, user_id)
+        yesterday_date = datetime.strptime(yesterday, '%Y-%m-%d').date()
+        events = list(Event.objects.filter(Q(created_date=yesterday) | Q(modified_date=yesterday)).select_related(
+            'created_by__organization').order_by('id'))
+        if events:
+            users = {user.id: user for user in User.objects.filter(is_active=True).exclude(role=7).select_related(
+                'role', 'organization')}
+
+            # the standard notification cue of each type of each user (preferring the oldest, if somehow duplicated),
+            #  the users who want notifications of new (True) or updated (False) events of each type,
+            #  and the users missing the cue of each type
+            cues = {}
+            for cue in NotificationCueStandard.objects.filter(created_by__in=users.keys()).select_related(
+                    'standard_type', 'notification_cue_preference', 'created_by__role', 'created_by__organization'
+            ).order_by('-id'):
+                cues[(cue.created_by_id, cue.standard_type.name)] = cue
+            subscriber_ids = {True: defaultdict(set), False: defaultdict(set)}
+            for (user_id, cue_type), cue in cues.items():
+                if cue.notification_cue_preference.create_when_new:
+                    subscriber_ids[True][cue_type].add(user_id)
+                if cue.notification_cue_preference.create_when_modified:
+                    subscriber_ids[False][cue_type].add(user_id)
+            missing_cue_user_ids = {cue_type: set(user_id for user_id in users if (user_id, cue_type) not in cues)
+                                    for cue_type in STANDARD_NOTIFICATION_TEMPLATES}
+
+            audiences = get_standard_notification_audiences(events, users, yesterday)
+            event_location_names = get_event_location_names(events)
+            event_changes = EventChanges(
+                [event for event in events if event.modified_date == yesterday_date], yesterday)
+
+            notifications = []
+            missing_cues = set()
+            for event in events:
+                # an event both created and updated yesterday gets notifications of both
+                for new in [True, False]:
+                    if event.created_date == yesterday_date if new else event.modified_date == yesterday_date:
+                        event_notifications, event_missing_cues = get_event_standard_notifications(
+                            event, new, audiences[event.id], cues, subscriber_ids[new], missing_cue_user_ids,
+                            msg_tmps, event_location_names[event.id], event_changes, yesterday)
+                        notifications.extend(event_notifications)
+                        missing_cues |= event_missing_cues
+
+            for user_id, cue_type in sorted(missing_cues):
+                send_missing_notification_cue_standard_email(users[user_id], cue_type)
+            send_grouped_notifications(notifications)
 
     except SoftTimeLimitExceeded:
         recip = get_whispers_email_address()
         subject = "WHISPERS ADMIN: Timeout Encountered During standard_notifications_task"
         body = "A timeout was encountered while generating standard notifications."
-        body += " Some notifications may have been created before the task timed out."
+        body += " No notifications were created before the task timed out."
         body += " Timeout encountered at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S")
-        notif_email = construct_notification_email(recip, subject, body, False)
-        print(notif_email.__dict__)
+        construct_notification_email(recip, subject, body, False)
     return True
 
 
+# the maximum age in days and number per user of notifications kept by purge_stale_notifications,
+# and the number of notifications it deletes per statement (and transaction), to keep each lock short
+NOTIFICATION_MAX_AGE = 90
+NOTIFICATION_MAX_PER_USER = 500
+NOTIFICATION_PURGE_CHUNK_SIZE = 1000
+
+
+def get_notification_ids_over_max_per_user():
+    # return the ids (in order) of all notifications beyond the newest NOTIFICATION_MAX_PER_USER of their recipient,
+    # ranked with a single window function over the notifications of only the recipients who have more than that
+    # (found with one grouped count) rather than over the whole table
+    table = Notification._meta.db_table
+    sql = "SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY recipient_id ORDER BY id DESC) AS row_number"
+    sql += " FROM " + table + " WHERE recipient_id IN (SELECT recipient_id FROM " + table
+    sql += " GROUP BY recipient_id HAVING COUNT(*) > %s)) AS ranked WHERE row_number > %s ORDER BY id"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [NOTIFICATION_MAX_PER_USER, NOTIFICATION_MAX_PER_USER])
+        return [row[0] for row in cursor.fetchall()]
+
+
 # purge old notifications, regardless whether they have been read: 90 days with 500 messages max
 @shared_task()
 def purge_stale_notifications():
     # 90 days purge (all notifications)
-    ninety_days_ago = datetime.strftime(datetime.now() - timedelta(days=90), '%Y-%m-%d')
-    Notification.objects.filter(created_date__lte=ninety_days_ago).delete()
+    cutoff_date = datetime.strftime(datetime.now() - timedelta(days=NOTIFICATION_MAX_AGE), '%Y-%m-%d')
+    stale_deleted = 0
+    while True:
+        ids = list(Notification.objects.filter(created_date__lte=cutoff_date).order_by('id').values_list(
+            'id', flat=True)[:NOTIFICATION_PURGE_CHUNK_SIZE])
+        if not ids:
+            break
+        stale_deleted += delete_notifications(Notification.objects.filter(id__in=ids))
+        logger.info("purge_stale_notifications: deleted %d notifications created on or before %s so far",
+                    stale_deleted, cutoff_date)
 
     # 500 max purge (notifications per user)
-    users_with_notifs_over_500 = Notification.objects.values('recipient').order_by().annotate(
-        user_notif_count=Count('recipient')).filter(user_notif_count__gt=500)
-    for user in users_with_notifs_over_500:
-        ids_over_500 = Notification.objects.filter(
-            recipient=user['recipient']).order_by("-pk").values_list("pk", flat=True)[500:]
-        Notification.objects.filter(pk__in=list(ids_over_500)).delete()
+    # (the excess notifications are ranked once and then deleted in chunks in id order; any notification created
+    #  meanwhile is newer than every excess one, so it can only push older notifications over the limit,
+    #  and those are purged by the next run)
+    excess_deleted = 0
+    excess_ids = get_notification_ids_over_max_per_user()
+    for start in range(0, len(excess_ids), NOTIFICATION_PURGE_CHUNK_SIZE):
+        ids = excess_ids[start:start + NOTIFICATION_PURGE_CHUNK_SIZE]
+        excess_deleted += delete_notifications(Notification.objects.filter(id__in=ids))
+        logger.info("purge_stale_notifications: deleted %d notifications beyond the newest %d per user so far",
+                    excess_deleted, NOTIFICATION_MAX_PER_USER)
+
+    logger.info("purge_stale_notifications: deleted %d stale and %d excess notifications",
+                stale_deleted, excess_deleted)
+    return {'stale_deleted': stale_deleted, 'excess_deleted': excess_deleted}
+
+
+# repair the stored notification counts of every user whose counts differ from their actual notifications
+@shared_task(soft_time_limit=595, time_limit=600)
+def reconcile_notification_counts():
+    actual_counts = count_notifications_by_recipient(Notification.objects.all())
+    stored_counts = {user_id: (total, unread) for user_id, total, unread in
+                     UserNotificationCount.objects.values_list('user_id', 'total', 'unread')}
+    user_ids = [user_id for user_id in set(actual_counts) | set(stored_counts)
+                if actual_counts.get(user_id, (0, 0)) != stored_counts.get(user_id, (0, 0))]
+    if user_ids:
+        with transaction.atomic():
+            # lock the counts before recounting, so that no notification created, read, or deleted in the meantime
+            # is counted twice or not at all
+            UserNotificationCount.objects.bulk_create(
+                [UserNotificationCount(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+            notification_counts = list(UserNotificationCount.objects.select_for_update().filter(user_id__in=user_ids))
+            actual_counts = count_notifications_by_recipient(Notification.objects.filter(recipient__in=user_ids))
+            for notification_count in notification_counts:
+                notification_count.total, notification_count.unread = actual_counts.get(
+                    notification_count.user_id, (0, 0))
+            UserNotificationCount.objects.bulk_update(notification_counts, ['total', 'unread'])
+    return True
+
+
+# send the emails queued in the outbox (see queue_email) in batches over a reused connection, without sending more than
+# EMAIL_MAX_PER_MINUTE emails in any minute; an email that could not be sent is retried with exponential backoff,
+# and the admins are alerted once it has failed EMAIL_MAX_ATTEMPTS times
+@shared_task(soft_time_limit=595, time_limit=600)
+def send_queued_emails():
+    now = datetime.now(timezone(settings.TIME_ZONE))
+    allowance = settings.EMAIL_MAX_PER_MINUTE - OutgoingEmail.objects.filter(
+        sent_date__gt=now - timedelta(minutes=1)).count()
+    while allowance > 0:
+        with transaction.atomic():
+            # lock the batch, so that overlapping runs of this task never send the same email twice
+            batch = list(OutgoingEmail.objects.select_for_update(skip_locked=True).filter(
+                Q(next_attempt__isnull=True) | Q(next_attempt__lte=now), status='pending'
+            ).order_by('id')[:min(allowance, EMAIL_BATCH_SIZE)])
+            if not batch:
+                break
+            send_outgoing_emails(batch, now)
+        allowance -= len(batch)
+
+    OutgoingEmail.objects.filter(status='sent', sent_date__lte=now - timedelta(days=30)).delete()
+    return True
+
+
+# send the queued admin alerts (see queue_admin_alert) to the admins in a single digest email,
+# at most once every ADMIN_ALERT_DIGEST_INTERVAL minutes however often this task is scheduled,
+# and purge alerts that were sent more than 30 days ago
+@shared_task(soft_time_limit=595, time_limit=600)
+def send_admin_alert_digest():
+    tz = timezone(settings.TIME_ZONE)
+    now = datetime.now(tz)
+    if AdminAlert.objects.filter(sent_date__gt=now - timedelta(minutes=ADMIN_ALERT_DIGEST_INTERVAL)).exists():
+        return True
+
+    alerts = list(AdminAlert.objects.filter(sent_date__isnull=True).order_by('id'))
+    if alerts:
+        # alerts of the same kind and key (queued at the same time by different processes) are reported together
+        digest_alerts = {}
+        for alert in alerts:
+            digest_alert = digest_alerts.setdefault((alert.kind, alert.key), alert)
+            if digest_alert is not alert:
+                digest_alert.occurrences += alert.occurrences
+                digest_alert.last_occurred = max(digest_alert.last_occurred, alert.last_occurred)
+
+        subject = "WHISPERS ADMIN: Alert Digest (" + str(len(digest_alerts)) + " alerts)"
+        body = "<p>The following problems were reported since the last alert digest.</p>"
+        for alert in list(digest_alerts.values())[:ADMIN_ALERT_DIGEST_MAX_ALERTS]:
+            body += "<h3>" + alert.subject + "</h3>"
+            body += "<p>" + alert.body.replace("\r\n", "<br />") + "</p>"
+            body += "<p>Reported " + str(alert.occurrences) + " time(s), first at "
+            body += alert.first_occurred.astimezone(tz).strftime("%m/%d/%Y %H:%M:%S") + " and last at "
+            body += alert.last_occurred.astimezone(tz).strftime("%m/%d/%Y %H:%M:%S") + ".</p>"
+        if len(digest_alerts) > ADMIN_ALERT_DIGEST_MAX_ALERTS:
+            body += "<p>" + str(len(digest_alerts) - ADMIN_ALERT_DIGEST_MAX_ALERTS) + " more alerts were not included."
+            body += " They can be found in the AdminAlert table.</p>"
+        construct_notification_email(get_whispers_email_address(), subject, body, False)
+        AdminAlert.objects.filter(id__in=[alert.id for alert in alerts]).update(sent_date=now)
+
+    AdminAlert.objects.filter(sent_date__lte=now - timedelta(days=30)).delete()
     return True
 
 
@@ -1021,51 +884,33 @@ def stale_event_notifications():
         send_missing_notification_template_message_email('standard_notifications', 'Stale Events')
         return True
 
-    stale_event_periods_record = Configuration.objects.filter(name='stale_event_periods').first()
-    if stale_event_periods_record:
-        STALE_EVENT_PERIODS = stale_event_periods_record.value
-    else:
-        STALE_EVENT_PERIODS = settings.STALE_EVENT_PERIODS
-        message = "Default periods were used (" + ', '.join([str(x) for x in STALE_EVENT_PERIODS]) + ")."
-        send_missing_configuration_value_email('stale_event_periods', message=message)
-    stale_event_periods_list = STALE_EVENT_PERIODS.split(',')
-    if all(x.strip().isdecimal() for x in stale_event_periods_list):
-        stale_event_periods_list_ints = [int(x) for x in stale_event_periods_list]
-        madison_epi_user_id_record = Configuration.objects.filter(name='madison_epi_user').first()
-        if madison_epi_user_id_record:
-            if madison_epi_user_id_record.value.isdecimal():
-                MADISON_EPI_USER_ID = madison_epi_user_id_record.value
-            else:
-                MADISON_EPI_USER_ID = settings.WHISPERS_ADMIN_USER_ID
-                encountered_type = type(madison_epi_user_id_record.value).__name__
-                send_wrong_type_configuration_value_email('madison_epi_user', encountered_type, 'int')
-        else:
-            MADISON_EPI_USER_ID = settings.WHISPERS_ADMIN_USER_ID
-            send_missing_configuration_value_email('madison_epi_user')
-        for period in stale_event_periods_list_ints:
-            period_date = datetime.strftime(datetime.now() - timedelta(days=period), '%Y-%m-%d')
-            all_stale_events = Event.objects.filter(complete=False, modified_date=period_date)
-            for event in all_stale_events:
-                # recipients: event owner and Epi staff
-                # email forwarding: Automatic, to event owner, nwhc-epi@usgs.gov
-                recipients = list(User.objects.filter(id=MADISON_EPI_USER_ID).values_list('id', flat=True))
-                email_to = list(User.objects.filter(id=MADISON_EPI_USER_ID).values_list('email', flat=True))
+    stale_event_periods_list_ints = get_stale_event_periods()
+    if isinstance(stale_event_periods_list_ints, list):
+        # recipients: event owner and Epi staff
+        # email forwarding: Automatic, to event owner, nwhc-epi@usgs.gov
+        epi_users = list(User.objects.filter(id=get_madison_epi_user_id()).values_list('id', 'email'))
+        period_dates = [(period, datetime.strftime(datetime.now() - timedelta(days=period), '%Y-%m-%d'))
+                        for period in stale_event_periods_list_ints]
+        # the stale events of all periods, read at once and grouped by their modified date
+        all_stale_events = list(Event.objects.filter(
+            complete=False, modified_date__in=set(period_date for period, period_date in period_dates)
+        ).select_related('created_by'))
+        stale_events_by_date = defaultdict(list)
+        for event in all_stale_events:
+            stale_events_by_date[event.modified_date.strftime('%Y-%m-%d')].append(event)
+        event_location_names = get_event_location_names(all_stale_events)
+
+        notifications = []
+        for period, period_date in period_dates:
+            for event in stale_events_by_date[period_date]:
+                recipients = [user_id for user_id, email in epi_users]
+                email_to = [email for user_id, email in epi_users]
 
                 # only notify the event owner if that user is still active
                 if event.created_by.is_active:
                     recipients += [event.created_by.id, ]
                     email_to += [event.created_by.email, ]
 
-                eventlocations = EventLocation.objects.filter(event=event.id)
-                all_evt_locs = ""
-                for evtloc in eventlocations:
-                    evt_loc_name = ""
-                    if evtloc.administrative_level_two:
-                        evt_loc_name += evtloc.administrative_level_two.name
-                    evt_loc_name += ", " + evtloc.administrative_level_one.abbreviation
-                    evt_loc_name += ", " + evtloc.country.abbreviation
-                    all_evt_locs = evt_loc_name if len(all_evt_locs) == 0 else all_evt_locs + "; " + evt_loc_name
-
                 try:
                     subject = msg_tmp.subject_template.format(event_id=event.id)
                 except KeyError as e:
@@ -1073,379 +918,233 @@ def stale_event_notifications():
                     subject = ""
                 try:
                     body = msg_tmp.body_template.format(
-                        event_id=event.id, event_location=all_evt_locs, event_date=event.created_date,
-                        stale_period=str(period))
+                        event_id=event.id, event_location=event_location_names[event.id],
+                        event_date=event.created_date, stale_period=str(period))
                 except KeyError as e:
                     send_notification_template_message_keyerror_email(msg_tmp.name, e,
                                                                       msg_tmp.message_variables)
                     body = ""
                 # source: system
                 source = 'system'
-                generate_notification.delay(msg_tmp.id, recipients, source, event.id, 'event', subject, body,
-                                            True, email_to)
+                notifications.append({
+                    'template_id': msg_tmp.id, 'recipients': recipients, 'source': source, 'event_id': event.id,
+                    'client_page': 'event', 'subject': subject, 'body': body, 'send_email': True,
+                    'email_to': email_to})
+        # generate all the notifications with a single task
+        if notifications:
+            generate_notifications.delay(notifications)
 
     else:
-        encountered_types = ''.join(list(set([type(x).__name__ for x in stale_event_periods_list])))
-        send_wrong_type_configuration_value_email('stale_event_periods', encountered_types, 'int',
+        # neither the configured nor the default periods are a list of integers
+        send_wrong_type_configuration_value_email('stale_event_periods', 'str', 'int',
                                                   "No notifications were created.")
 
     return True
 
 
-def build_custom_notifications_query(cue, base_queryset):
-    queryset = None
-    criteria = []
-
-    # event
-    if cue.event:
-        criteria.append(('Event', str(cue.event)))
-        if not queryset:
-            queryset = base_queryset
-        queryset = queryset.filter(id=cue.event)
-
-    # event_affected_count
-    if cue.event_affected_count:
-        operator = cue.event_affected_count_operator.upper()
-
-        # criteria
-        value = str(cue.event_affected_count)
-
-        # queryset
-        if not queryset:
-            queryset = base_queryset
-        if operator == "LTE":
-            queryset = queryset.filter(affected_count__lte=value)
-            criteria.append(('Affected Count', '<= ' + value))
-        else:
-            # default to GTE
-            queryset = queryset.filter(affected_count__gte=value)
-            criteria.append(('Affected Count', '>= ' + value))
-
-    # event_location_land_ownership
-    if cue.event_location_land_ownership:
-        values = cue.event_location_land_ownership['values']
-        if len(values) > 0:
-            operator = cue.event_location_land_ownership['operator'].upper()
-
-            # criteria
-            names_list = list(LandOwnership.objects.filter(id__in=values).values_list('name', flat=True))
-            if len(values) == 1:
-                names = names_list[0]
-            else:
-                names = (' ' + operator + ' ').join(names_list)
-            criteria.append(('Land Ownership', names))
-
-            # queryset
-            if not queryset:
-                queryset = base_queryset
-            if operator == "OR":
-                queries = [Q(eventlocations__land_ownership=value) for value in values]
-                query = queries.pop()
-                for item in queries:
-                    query |= item
-                queryset = queryset.filter(query)
-            else:
-                # default to AND
-                # figure out how to query if an event has a child with one of each
-                for value in values:
-                    queryset = queryset.filter(eventlocations__land_ownership=value)
-
-    # event_location_administrative_level_one
-    if cue.event_location_administrative_level_one:
-        values = cue.event_location_administrative_level_one['values']
-        if len(values) > 0:
-            operator = cue.event_location_administrative_level_one['operator'].upper()
-
-            # criteria
-            # use locality name when possible
-            ctry_ids = list(Country.objects.filter(
-                administrativelevelones__in=values).values_list('id', flat=True))
-            field_name = 'Administrative Level One'
-            if ctry_ids:
-                locality = AdministrativeLevelLocality.objects.filter(country=ctry_ids[0]).first()
-                if locality and locality.admin_level_one_name:
-                    field_name = locality.admin_level_one_name
-
-            names_list = list(AdministrativeLevelOne.objects.filter(id__in=values).values_list('name', flat=True))
-            if len(values) == 1:
-                names = names_list[0]
-            else:
-                names = (' ' + operator + ' ').join(names_list)
-            criteria.append((field_name, names))
-
-            # queryset
-            if not queryset:
-                queryset = base_queryset
-            queryset = queryset.prefetch_related('eventlocations__administrative_level_two').filter(
-                eventlocations__administrative_level_one__in=values).distinct()
-            if operator == 'AND':
-                # this _should_ be fairly straight forward with the postgresql ArrayAgg function,
-                # (which would offload the hard work to postgresql and make this whole operation faster)
-                # but that function is just throwing an error about a Serial data type,
-                # so the following is a work-around
-
-                # first, count the eventlocations for each returned event
-                # and only allow those with the same or greater count as the length of the query_param list
-                # NOTE: to avoid PostgreSQL Grouping Error in the queryset annotation,
-                # create a separate queryset that _ONLY_ selects 'id' column,
-                # then use those resulting IDs to filter the main queryset that selects all columns
-                queryset_and = queryset.annotate(
-                    count_evtlocs=Count('eventlocations')).filter(count_evtlocs__gte=len(values)).only('id')
-                admin_level_one_list_ints = [int(i) for i in values]
-                # next, find only the events that have _all_ the requested values, not just any of them
-                for item in queryset_and:
-                    evtlocs = EventLocation.objects.filter(event_id=item.id)
-                    all_a1s = [evtloc.administrative_level_one.id for evtloc in evtlocs]
-                    if not set(admin_level_one_list_ints).issubset(set(all_a1s)):
-                        queryset_and = queryset_and.exclude(pk=item.id)
-                # use the resulting IDs to filter the main queryset
-                ids = list(queryset_and.values_list('id', flat=True))
-                queryset = queryset.filter(id__in=ids)
-
-    # species
-    if cue.species:
-        values = cue.species['values']
-        if len(values) > 0:
-            operator = cue.species['operator'].upper()
-
-            # criteria
-            names_list = list(Species.objects.filter(id__in=values).values_list('name', flat=True))
-            if len(values) == 1:
-                names = names_list[0]
-            else:
-                names = (' ' + operator + ' ').join(names_list)
-            criteria.append(('Species', names))
-
-            # queryset
-            if not queryset:
-                queryset = base_queryset
-            queryset = queryset.prefetch_related('eventlocations__locationspecies__species').filter(
-                eventlocations__locationspecies__species__in=values).distinct()
-            if operator == "AND":
-                # first, count the species for each returned event
-                # and only allow those with the same or greater count as the length of the query_param list
-                # NOTE: to avoid PostgreSQL Grouping Error in the queryset annotation,
-                # create a separate queryset that _ONLY_ selects 'id' column,
-                # then use those resulting IDs to filter the main queryset that selects all columns
-                queryset_and = queryset.annotate(count_species=Count(
-                    'eventlocations__locationspecies__species')).filter(count_species__gte=len(values)).only('id')
-                species_list_ints = [int(i) for i in values]
-                # next, find only the events that have _all_ the requested values, not just any of them
-                for item in queryset_and:
-                    evtlocs = EventLocation.objects.filter(event_id=item.id)
-                    locspecs = LocationSpecies.objects.filter(event_location__in=evtlocs)
-                    all_species = [locspec.species.id for locspec in locspecs]
-                    if not set(species_list_ints).issubset(set(all_species)):
-                        queryset_and = queryset_and.exclude(pk=item.id)
-                # use the resulting IDs to filter then main queryset
-                ids = list(queryset_and.values_list('id', flat=True))
-                queryset = queryset.filter(id__in=ids)
-
-    # species_diagnosis_diagnosis
-    if cue.species_diagnosis_diagnosis:
-        values = cue.species_diagnosis_diagnosis['values']
-        if len(values) > 0:
-            operator = cue.species_diagnosis_diagnosis['operator'].upper()
-
-            # criteria
-            names_list = list(Diagnosis.objects.filter(id__in=values).values_list('name', flat=True))
-            if len(values) == 1:
-                names = names_list[0]
-            else:
-                names = (' ' + operator + ' ').join(names_list)
-            criteria.append(('Diagnosis', names))
-
-            # queryset
-            if not queryset:
-                queryset = base_queryset
-            queryset = queryset.prefetch_related('eventlocations__locationspecies__speciesdiagnoses__diagnosis').filter(
-                eventlocations__locationspecies__speciesdiagnoses__diagnosis__in=values).distinct()
-            if operator == "AND":
-                # first, count the species for each returned event
-                # and only allow those with the same or greater count as the length of the query_param list
-                # NOTE: to avoid PostgreSQL Grouping Error in the queryset annotation,
-                # create a separate queryset that _ONLY_ selects 'id' column,
-                # then use those resulting IDs to filter the main queryset that selects all columns
-                queryset_and = queryset.annotate(count_diagnoses=Count(
-                    'eventlocations__locationspecies__speciesdiagnoses__diagnosis', distinct=True)).filter(
-                    count_diagnoses__gte=len(values)).only('id')
-                diagnosis_list_ints = [int(i) for i in values]
-                # next, find only the events that have _all_ the requested values, not just any of them
-                for item in queryset_and:
-                    evtdiags = EventDiagnosis.objects.filter(event_id=item.id)
-                    all_diagnoses = [evtdiag.diagnosis.id for evtdiag in evtdiags]
-                    if not set(diagnosis_list_ints).issubset(set(all_diagnoses)):
-                        queryset_and = queryset_and.exclude(pk=item.id)
-                # use the resulting IDs to filter the main queryset
-                ids = list(queryset_and.values_list('id', flat=True))
-                queryset = queryset.filter(id__in=ids)
-
-    criteria_string = ''
-    for criterion in criteria:
-        criteria_string += criterion[0] + ": " + criterion[1] + "<br />"
-
-    if queryset is not None:
-        queryset = queryset.distinct()
-
-    return queryset, criteria_string
-
+# the list criteria of custom notification cues (each holding {"values": [], "operator": ""}), mapped to
+# the model of their values, their name in the notification criteria, and the operator used when none is given
+CUSTOM_NOTIFICATION_CUE_CRITERIA = OrderedDict([
+    ('event_location_land_ownership', (LandOwnership, 'Land Ownership', 'AND')),
+    ('event_location_administrative_level_one', (AdministrativeLevelOne, 'Administrative Level One', 'OR')),
+    ('species', (Species, 'Species', 'OR')),
+    ('species_diagnosis_diagnosis', (Diagnosis, 'Diagnosis', 'OR')),
+])
+
+
+class CustomNotificationCueMatcher:
+    """
+    A set of custom notification cues compiled into an index from the values of their criteria (event,
+    land ownership, administrative level one, species, and diagnosis) and their affected count thresholds
+    to the IDs of the cues naming them, so that each event is matched against every cue at once,
+    instead of querying the events matching each cue
+    """
+
+    def __init__(self, cues):
+        self.cues = {cue.id: cue for cue in cues}
+        # the number of criteria of each cue, all of which an event must meet to match it
+        self.criteria_counts = {}
+        # the IDs of the cues naming each event ID, and each value of each list criterion
+        self.event_index = defaultdict(set)
+        self.value_index = {field: defaultdict(set) for field in CUSTOM_NOTIFICATION_CUE_CRITERIA}
+        # the values of each list criterion of each cue, and whether an event must have all of them (AND),
+        #  or only one of them (OR)
+        self.cue_values = defaultdict(dict)
+        # the affected count thresholds of the cues matching events with counts at least (GTE) or at most (LTE) them,
+        #  sorted by threshold
+        gte_thresholds = []
+        lte_thresholds = []
+        for cue in cues:
+            criteria_count = 0
+            if cue.event:
+                self.event_index[cue.event].add(cue.id)
+                criteria_count += 1
+            if cue.event_affected_count:
+                if cue.event_affected_count_operator.upper() == "LTE":
+                    lte_thresholds.append((cue.event_affected_count, cue.id))
+                else:
+                    # default to GTE
+                    gte_thresholds.append((cue.event_affected_count, cue.id))
+                criteria_count += 1
+            for field, (model, name, default_operator) in CUSTOM_NOTIFICATION_CUE_CRITERIA.items():
+                criterion = getattr(cue, field)
+                values = set(int(value) for value in criterion['values']) if criterion else set()
+                if values:
+                    operator = criterion['operator'].upper()
+                    if operator not in ['AND', 'OR']:
+                        operator = default_operator
+                    self.cue_values[cue.id][field] = (values, operator == 'AND')
+                    for value in values:
+                        self.value_index[field][value].add(cue.id)
+                    criteria_count += 1
+            # cues without any criteria match no events
+            self.criteria_counts[cue.id] = criteria_count
+        gte_thresholds.sort()
+        lte_thresholds.sort()
+        self.gte_counts = [threshold for threshold, cue_id in gte_thresholds]
+        self.gte_cue_ids = [cue_id for threshold, cue_id in gte_thresholds]
+        self.lte_counts = [threshold for threshold, cue_id in lte_thresholds]
+        self.lte_cue_ids = [cue_id for threshold, cue_id in lte_thresholds]
+
+    def match(self, event, event_values):
+        # return the IDs of the cues matching an event, given the IDs of the values of each list criterion of the event
+        #  (see get_custom_notification_event_values)
+        criteria_met = defaultdict(int)
+        for cue_id in self.event_index.get(event.id, []):
+            criteria_met[cue_id] += 1
+        if event.affected_count is not None:
+            for cue_id in self.gte_cue_ids[:bisect_right(self.gte_counts, event.affected_count)]:
+                criteria_met[cue_id] += 1
+            for cue_id in self.lte_cue_ids[bisect_left(self.lte_counts, event.affected_count):]:
+                criteria_met[cue_id] += 1
+        for field, index in self.value_index.items():
+            values = event_values[field]
+            cue_ids = set()
+            for value in values:
+                cue_ids |= index.get(value, set())
+            for cue_id in cue_ids:
+                cue_values, match_all = self.cue_values[cue_id][field]
+                if match_all:
+                    if not cue_values <= values:
+                        continue
+                    # an event matching all of the diagnoses of its species must also have them as event diagnoses
+                    if field == 'species_diagnosis_diagnosis' and not cue_values <= event_values['event_diagnosis']:
+                        continue
+                criteria_met[cue_id] += 1
+        return sorted(cue_id for cue_id, count in criteria_met.items() if count == self.criteria_counts[cue_id])
+
+    def get_criteria(self):
+        # return the description of the criteria of each cue, e.g. "Species: Mallard OR Wood Duck<br />",
+        #  looking up the names of the values of all cues with one query per model
+        ids = defaultdict(set)
+        for cue_values in self.cue_values.values():
+            for field, (values, match_all) in cue_values.items():
+                ids[CUSTOM_NOTIFICATION_CUE_CRITERIA[field][0]] |= values
+        names = {model: dict(model.objects.filter(id__in=model_ids).values_list('id', 'name'))
+                 for model, model_ids in ids.items()}
+        # use the administrative level one locality name of the first country of the cue values when possible
+        admin_level_one_countries = dict(AdministrativeLevelOne.objects.filter(
+            id__in=ids[AdministrativeLevelOne]).values_list('id', 'country_id'))
+        localities = {}
+        for locality in AdministrativeLevelLocality.objects.filter(
+                country__in=set(admin_level_one_countries.values())).order_by('-id'):
+            localities[locality.country_id] = locality
+
+        criteria = {}
+        for cue_id, cue in self.cues.items():
+            cue_criteria = []
+            if cue.event:
+                cue_criteria.append(('Event', str(cue.event)))
+            if cue.event_affected_count:
+                value = str(cue.event_affected_count)
+                if cue.event_affected_count_operator.upper() == "LTE":
+                    cue_criteria.append(('Affected Count', '<= ' + value))
+                else:
+                    cue_criteria.append(('Affected Count', '>= ' + value))
+            for field, (model, field_name, default_operator) in CUSTOM_NOTIFICATION_CUE_CRITERIA.items():
+                if field not in self.cue_values[cue_id]:
+                    continue
+                values = self.cue_values[cue_id][field][0]
+                if model == AdministrativeLevelOne:
+                    country_ids = [admin_level_one_countries[x] for x in values if x in admin_level_one_countries]
+                    locality = localities.get(min(country_ids)) if country_ids else None
+                    if locality and locality.admin_level_one_name:
+                        field_name = locality.admin_level_one_name
+                operator = getattr(cue, field)['operator'].upper()
+                names_list = [names[model][x] for x in sorted(values) if x in names[model]]
+                cue_criteria.append((field_name, (' ' + operator + ' ').join(names_list)))
+            criteria[cue_id] = "".join(criterion[0] + ": " + criterion[1] + "<br />" for criterion in cue_criteria)
+        return criteria
+
+
+def get_custom_notification_event_values(events):
+    # return the IDs of the land ownerships and administrative level ones of the locations of each event,
+    #  of their species and the diagnoses of those species, and of the event diagnoses
+    event_values = {event.id: defaultdict(set) for event in events}
+    event_ids = list(event_values.keys())
+    for event_id, land_ownership_id, administrative_level_one_id in EventLocation.objects.filter(
+            event__in=event_ids).values_list('event_id', 'land_ownership_id', 'administrative_level_one_id'):
+        event_values[event_id]['event_location_land_ownership'].add(land_ownership_id)
+        event_values[event_id]['event_location_administrative_level_one'].add(administrative_level_one_id)
+    for event_id, species_id in LocationSpecies.objects.filter(
+            event_location__event__in=event_ids).values_list('event_location__event_id', 'species_id'):
+        event_values[event_id]['species'].add(species_id)
+    for event_id, diagnosis_id in SpeciesDiagnosis.objects.filter(
+            location_species__event_location__event__in=event_ids).values_list(
+            'location_species__event_location__event_id', 'diagnosis_id'):
+        event_values[event_id]['species_diagnosis_diagnosis'].add(diagnosis_id)
+    for event_id, diagnosis_id in EventDiagnosis.objects.filter(event__in=event_ids).values_list(
+            'event_id', 'diagnosis_id'):
+        event_values[event_id]['event_diagnosis'].add(diagnosis_id)
+    return event_values
+
+
+def get_event_updater_organizations(events, yesterday):
+    # return the (name, ID) of the organizations of the users who updated each event yesterday
+    #  (not including the creator)
+    # django_simple_history.history_type: + for create, ~ for update, and - for delete
+    event_creator_ids = {event.id: event.created_by_id for event in events}
+    event_updater_orgs = defaultdict(set)
+    for event_id, history_type, modified_by_id, organization_name, organization_id in Event.history.filter(
+            id__in=event_creator_ids.keys(), modified_date=yesterday).values_list(
+            'id', 'history_type', 'modified_by', 'modified_by__organization__name', 'modified_by__organization__id'):
+        if history_type != '+' or modified_by_id != event_creator_ids[event_id]:
+            event_updater_orgs[event_id].add((organization_name, organization_id))
+    return event_updater_orgs
+
+
+def get_custom_notification_details(cue, event, msg_tmp, criteria, updates, organization_name):
+    send_email = cue.notification_cue_preference.send_email
+    # recipients: users with this notification configured
+    recipients = [cue.created_by.id, ]
+    # email forwarding: Optional, set by user.
+    email_to = [cue.created_by.email, ] if send_email else []
 
-@shared_task(soft_time_limit=595, time_limit=600)
-def custom_notifications_by_user(yesterday, user_id):
-    user = User.objects.filter(id=user_id).first()
-    msg_tmp = NotificationMessageTemplate.objects.filter(name='Custom Notification').first()
+    if updates == "N/A":
+        new_updated = "New"
+        created_updated = 'created'
+        event_date = event.created_date
+    else:
+        new_updated = "Updated"
+        created_updated = 'updated'
+        event_date = event.modified_date
 
     try:
-        # An event with a number affected greater than or equal to the provided integer is created,
-        # OR an event location is added/updated that meets that criteria
-
-        custom_notification_cues_new = NotificationCueCustom.objects.filter(
-            notification_cue_preference__create_when_new=True, created_by=user.id)
-        if custom_notification_cues_new:
-            base_queryset = Event.objects.filter(created_date=yesterday)
-            for cue in custom_notification_cues_new:
-                queryset, criteria = build_custom_notifications_query(cue, base_queryset)
-
-                if queryset:
-                    for event in queryset:
-                        create_notif = False
-
-                        # admin users can see all events regardless of public status or owner/org/collaborator status
-                        if user.role.is_admin or user.role.is_superadmin:
-                            create_notif = True
-
-                        # for everyone else...
-                        else:
-                            # Exclude events that were made public yesterday
-                            include = True
-                            # check if this event was not public yesterday, and if so exclude it, otherwise move on
-                            if Event.history.filter(public=False, id=event.id, history_date__date=yesterday):
-                                include = False
-                            # do not create notifications for private events for users who are not the event owner
-                            #  or not in their org or are not event collaborators
-                            if include and event.public or (
-                                    user.id == event.created_by.id
-                                    or user.organization.id == event.created_by.organization.id
-                                    or user.organization.id in event.created_by.parent_organizations
-                                    or user.id in list(User.objects.filter(
-                                        Q(writeevents__in=[event.id]) | Q(readevents__in=[event.id])
-                                    ).values_list('id', flat=True))):
-                                create_notif = True
-
-                        if create_notif:
-                            send_email = cue.notification_cue_preference.send_email
-                            # recipients: users with this notification configured
-                            recipients = [cue.created_by.id, ]
-                            # email forwarding: Optional, set by user.
-                            email_to = [cue.created_by.email, ] if send_email else []
-
-                            try:
-                                subject = msg_tmp.subject_template.format(event_id=event.id)
-                            except KeyError as e:
-                                send_notification_template_message_keyerror_email(msg_tmp.name, e,
-                                                                                  msg_tmp.message_variables)
-                                subject = ""
-                            try:
-                                body = msg_tmp.body_template.format(new_updated="New", criteria=criteria,
-                                                                    organization=event.created_by.organization.name,
-                                                                    created_updated="created", event_id=event.id,
-                                                                    event_date=event.created_date, updates="N/A")
-                            except KeyError as e:
-                                send_notification_template_message_keyerror_email(msg_tmp.name, e,
-                                                                                  msg_tmp.message_variables)
-                                body = ""
-                            # source: any organization who creates or updates an event that meets the trigger criteria
-                            source = event.created_by.organization.name
-                            generate_notification.delay(msg_tmp.id, recipients, source, event.id, 'event', subject,
-                                                        body, send_email, email_to)
-
-        custom_notification_cues_updated = NotificationCueCustom.objects.filter(
-            notification_cue_preference__create_when_modified=True, created_by=user_id)
-        if custom_notification_cues_updated:
-            base_queryset = Event.objects.filter(modified_date=yesterday)
-            for cue in custom_notification_cues_updated:
-                queryset, criteria = build_custom_notifications_query(cue, base_queryset)
-
-                if queryset:
-                    for event in queryset:
-                        create_notif = False
-
-                        # admin users can see all events regardless of public status or owner/org/collaborator status
-                        if user.role.is_admin or user.role.is_superadmin:
-                            create_notif = True
-
-                        # for everyone else...
-                        else:
-                            # Exclude events that were made public yesterday
-                            include = True
-                            # check if this event was not public yesterday, and if so exclude it, otherwise move on
-                            if Event.history.filter(public=False, id=event.id, history_date__date=yesterday):
-                                include = False
-                            # do not create notifications for private events for users who are not the event owner
-                            #  or not in their org or are not event collaborators
-                            if include and event.public or (
-                                    user.id == event.created_by.id
-                                    or user.organization.id == event.created_by.organization.id
-                                    or user.organization.id in event.created_by.parent_organizations
-                                    or user.id in list(User.objects.filter(
-                                        Q(writeevents__in=[event.id]) | Q(readevents__in=[event.id])
-                                    ).values_list('id', flat=True))):
-                                create_notif = True
-
-                        if create_notif:
-                            # Create one notification per distinct updater (not including the creator)
-                            # django_simple_history.history_type: + for create, ~ for update, and - for delete
-                            event_updaters = list(set(
-                                Event.history.filter(id=event.id, modified_date=yesterday
-                                                     ).exclude(history_type='+', modified_by=event.created_by.id
-                                                               ).values_list('modified_by__organization__name',
-                                                                             'modified_by__organization__id')))
-                            # only create notifications if there were truly updates
-                            #  and not just creates (exclude history_type='+')
-                            if event_updaters:
-                                for event_updater in event_updaters:
-                                    send_email = cue.notification_cue_preference.send_email
-                                    # recipients: users with this notification configured
-                                    recipients = [cue.created_by.id, ]
-                                    # email forwarding: Optional, set by user.
-                                    email_to = [cue.created_by.email, ] if send_email else []
-
-                                    # source: any organization who creates or updates an event meeting trigger criteria
-                                    source = event_updater[0]
-                                    source_id = event_updater[1]
-                                    updates = get_updates(event, source_id, yesterday, 'org', cue.created_by)
-
-                                    # only create notifications if there are update details (non-empty string)
-                                    if updates:
-                                        try:
-                                            subject = msg_tmp.subject_template.format(event_id=event.id)
-                                        except KeyError as e:
-                                            send_notification_template_message_keyerror_email(msg_tmp.name, e,
-                                                                                              msg_tmp.message_variables)
-                                            subject = ""
-                                        try:
-                                            body = msg_tmp.body_template.format(
-                                                new_updated="Updated", criteria=criteria, organization=source,
-                                                created_updated="updated", event_id=event.id,
-                                                event_date=event.modified_date, updates=updates)
-                                        except KeyError as e:
-                                            send_notification_template_message_keyerror_email(msg_tmp.name, e,
-                                                                                              msg_tmp.message_variables)
-                                            body = ""
-
-                                        generate_notification.delay(msg_tmp.id, recipients, source, event.id, 'event',
-                                                                    subject, body, send_email, email_to)
-
-    except SoftTimeLimitExceeded:
-        recip = get_whispers_email_address()
-        subject = "WHISPERS ADMIN: Timeout Encountered During custom_notifications_by_user_task"
-        body = "A timeout was encountered while generating custom notifications for user "
-        body += user.first_name + " " + user.last_name + " (username " + user.username + ", ID " + str(user.id) + ")."
-        body += " Timeout encountered at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S")
-        notif_email = construct_notification_email(recip, subject, body, False)
-        print(notif_email.__dict__)
+        subject = msg_tmp.subject_template.format(event_id=event.id)
+    except KeyError as e:
+        send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
+        subject = ""
+    try:
+        body = msg_tmp.body_template.format(
+            new_updated=new_updated, criteria=criteria, organization=organization_name,
+            created_updated=created_updated, event_id=event.id, event_date=event_date, updates=updates)
+    except KeyError as e:
+        send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
+        body = ""
 
-    return True
+    # source: any organization who creates or updates an event that meets the trigger criteria
+    return NotificationDetails(msg_tmp.id, recipients, organization_name, event.id, 'event',
+                               subject, body, send_email, email_to, organization_name)
 
 
 @shared_task(soft_time_limit=595, time_limit=600)
@@ -1458,15 +1157,62 @@ def custom_notifications():
 
     try:
         yesterday = get_yesterday()
-        active_user_ids = list(User.objects.filter(is_active=True).values_list('id', flat=True))
-        for user_id in active_user_ids:
-            custom_notifications_by_user.delay(yesterday, user_id)
+        yesterday_date = datetime.strptime(yesterday, '%Y-%m-%d').date()
+        # the custom notification cues of active users wanting notifications of new or updated events
+        cues = list(NotificationCueCustom.objects.filter(created_by__is_active=True).filter(
+            Q(notification_cue_preference__create_when_new=True)
+            | Q(notification_cue_preference__create_when_modified=True)).select_related(
+            'notification_cue_preference', 'created_by__role', 'created_by__organization').order_by('id'))
+        events = list(Event.objects.filter(Q(created_date=yesterday) | Q(modified_date=yesterday)).select_related(
+            'created_by__organization').order_by('-id'))
+        if cues and events:
+            # evaluate each event against all cues once
+            matcher = CustomNotificationCueMatcher(cues)
+            event_values = get_custom_notification_event_values(events)
+            matches = OrderedDict()
+            for event in events:
+                cue_ids = matcher.match(event, event_values[event.id])
+                if cue_ids:
+                    matches[event] = cue_ids
+
+            if matches:
+                criteria = matcher.get_criteria()
+                users = {cue.created_by_id: cue.created_by for cue in cues}
+                # admin users can see all events regardless of public status or owner/org/collaborator status,
+                #  everyone else only public events (unless they were made public yesterday)
+                #  and the events they own, collaborate on, or that belong to their organization
+                audiences = get_standard_notification_audiences(list(matches.keys()), users, yesterday)
+                updated_events = [event for event in matches if event.modified_date == yesterday_date]
+                event_updater_orgs = get_event_updater_organizations(updated_events, yesterday)
+                event_changes = EventChanges(updated_events, yesterday)
+
+                notifications = []
+                for event, cue_ids in matches.items():
+                    for cue_id in cue_ids:
+                        cue = matcher.cues[cue_id]
+                        if cue.created_by_id not in audiences[event.id]['All']:
+                            continue
+                        # An event with a number affected greater than or equal to the provided integer is created,
+                        # OR an event location is added/updated that meets that criteria
+                        if event.created_date == yesterday_date and cue.notification_cue_preference.create_when_new:
+                            notifications.append(get_custom_notification_details(
+                                cue, event, msg_tmp, criteria[cue_id], "N/A", event.created_by.organization.name))
+                        if (event.modified_date == yesterday_date
+                                and cue.notification_cue_preference.create_when_modified):
+                            # Create one notification per distinct updater (not including the creator)
+                            #  only if there are update details (non-empty string)
+                            for source, source_id in event_updater_orgs[event.id]:
+                                updates = event_changes.get_updates(event, source_id, 'org', cue.created_by)
+                                if updates:
+                                    notifications.append(get_custom_notification_details(
+                                        cue, event, msg_tmp, criteria[cue_id], updates, source))
+                send_grouped_notifications(notifications)
+
     except SoftTimeLimitExceeded:
         recip = get_whispers_email_address()
         subject = "WHISPERS ADMIN: Timeout Encountered During custom_notifications_task"
         body = "A timeout was encountered while generating custom notifications."
-        body += " Some notifications may have been created before the task timed out."
+        body += " No notifications were created before the task timed out."
         body += " Timeout encountered at " + datetime.now().strftime("%m/%d/%Y %H:%M:%S")
-        notif_email = construct_notification_email(recip, subject, body, False)
-        print(notif_email.__dict__)
+        construct_notification_email(recip, subject, body, False)
     return True
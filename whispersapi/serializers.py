@@ -5,17 +5,24 @@ from urllib.parse import urlencode
 from operator import itemgetter
 from datetime import datetime, timedelta
 from django.apps import apps
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.mail import EmailMessage, EmailMultiAlternatives
-from django.db.models import F, Q, Sum
-from django.db.models.functions import Coalesce
+from django.db import transaction
+from django.db.models import Q, Sum
 from django.forms.models import model_to_dict
 from drf_recaptcha.fields import ReCaptchaV2Field
 from django.urls import reverse
 from rest_framework import serializers, validators
 from rest_framework.settings import api_settings
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
 from whispersapi.tokens import email_verification_token
 from whispersapi.models import *
 from whispersapi.immediate_tasks import *
+from whispersapi.geocoding import reverse_geocode, get_flyway_index, locate_flyway
+from whispersapi import http_client
+from whispersapi.configuration import (get_geonames_username, get_geonames_api, get_flyways_api,
+                                       get_whispers_admin_user_id, get_whispers_email_address, get_hfs_locations,
+                                       get_hfs_epi_user_id, get_madison_epi_user_id)
 from dry_rest_permissions.generics import DRYPermissionsField
 
 # TODO: implement required field validations for nested objects
@@ -24,112 +31,10 @@ from dry_rest_permissions.generics import DRYPermissionsField
 
 PK_REQUESTS = ['retrieve', 'update', 'partial_update', 'destroy']
 COMMENT_CONTENT_TYPES = ['event', 'eventgroup', 'eventlocation', 'servicerequest']
-
-
-def get_geonames_username():
-    geonames_username_record = Configuration.objects.filter(name='geonames_username').first()
-    if geonames_username_record:
-        GEONAMES_USERNAME = geonames_username_record.value
-    else:
-        GEONAMES_USERNAME = settings.GEONAMES_USERNAME
-        send_missing_configuration_value_email('geonames_username')
-    return GEONAMES_USERNAME
-
-
-def get_geonames_api():
-    geonames_api_url_record = Configuration.objects.filter(name='geonames_api_url').first()
-    if geonames_api_url_record:
-        GEONAMES_API = geonames_api_url_record.value
-    else:
-        GEONAMES_API = settings.GEONAMES_API
-        send_missing_configuration_value_email('geonames_api_url')
-    return GEONAMES_API
-
-
-def get_flyways_api():
-    flyways_api_url_record = Configuration.objects.filter(name='flyways_api_url').first()
-    if flyways_api_url_record:
-        FLYWAYS_API = flyways_api_url_record.value
-    else:
-        FLYWAYS_API = settings.FLYWAYS_API
-        send_missing_configuration_value_email('flyways_api_url')
-    return FLYWAYS_API
-
-
-def get_whispers_admin_user_id():
-    whispers_admin_user_record = Configuration.objects.filter(name='whispers_admin_user').first()
-    if whispers_admin_user_record:
-        if whispers_admin_user_record.value.isdecimal():
-            WHISPERS_ADMIN_USER_ID = int(whispers_admin_user_record.value)
-        else:
-            WHISPERS_ADMIN_USER_ID = settings.WHISPERS_ADMIN_USER_ID
-            encountered_type = type(whispers_admin_user_record.value).__name__
-            send_wrong_type_configuration_value_email('whispers_admin_user', encountered_type, 'int')
-    else:
-        WHISPERS_ADMIN_USER_ID = settings.WHISPERS_ADMIN_USER_ID
-        send_missing_configuration_value_email('whispers_admin_user')
-    return WHISPERS_ADMIN_USER_ID
-
-
-def get_whispers_email_address():
-    whispers_email_address = Configuration.objects.filter(name='whispers_email_address').first()
-    if whispers_email_address:
-        if whispers_email_address.value.count('@') == 1:
-            EMAIL_WHISPERS = whispers_email_address.value
-        else:
-            EMAIL_WHISPERS = settings.EMAIL_WHISPERS
-            encountered_type = type(whispers_email_address.value).__name__
-            send_wrong_type_configuration_value_email('whispers_email_address', encountered_type, 'email_address')
-    else:
-        EMAIL_WHISPERS = settings.EMAIL_WHISPERS
-        send_missing_configuration_value_email('whispers_email_address')
-    return EMAIL_WHISPERS
-
-
-def get_hfs_locations():
-    hfs_locations_record = Configuration.objects.filter(name='hfs_locations').first()
-    if hfs_locations_record:
-        hfs_locations_str = hfs_locations_record.value.split(',')
-        if all(x.strip().isdecimal() for x in hfs_locations_str):
-            HFS_LOCATIONS = [int(hfs_loc) for hfs_loc in hfs_locations_str]
-        else:
-            HFS_LOCATIONS = settings.HFS_LOCATIONS
-            encountered_types = ''.join(list(set([type(x).__name__ for x in hfs_locations_str])))
-            send_wrong_type_configuration_value_email('hfs_locations', encountered_types, 'int')
-    else:
-        HFS_LOCATIONS = settings.HFS_LOCATIONS
-        send_missing_configuration_value_email('hfs_locations')
-    return HFS_LOCATIONS
-
-
-def get_hfs_epi_user_id():
-    hfs_epi_user_id_record = Configuration.objects.filter(name='hfs_epi_user').first()
-    if hfs_epi_user_id_record:
-        if hfs_epi_user_id_record.value.isdecimal():
-            HFS_EPI_USER_ID = hfs_epi_user_id_record.value
-        else:
-            HFS_EPI_USER_ID = settings.WHISPERS_ADMIN_USER_ID
-            encountered_type = type(hfs_epi_user_id_record.value).__name__
-            send_wrong_type_configuration_value_email('hfs_epi_user', encountered_type, 'int')
-    else:
-        HFS_EPI_USER_ID = settings.WHISPERS_ADMIN_USER_ID
-        send_missing_configuration_value_email('hfs_epi_user')
-    return HFS_EPI_USER_ID
-
-
-def get_madison_epi_user_id():
-    madison_epi_user_id_record = Configuration.objects.filter(name='madison_epi_user').first()
-    if madison_epi_user_id_record:
-        if madison_epi_user_id_record.value.isdecimal():
-            MADISON_EPI_USER_ID = madison_epi_user_id_record.value
-        else:
-            MADISON_EPI_USER_ID = settings.WHISPERS_ADMIN_USER_ID
-            encountered_type = type(madison_epi_user_id_record.value).__name__
-            send_wrong_type_configuration_value_email('madison_epi_user', encountered_type, 'int')
-    else:
-        MADISON_EPI_USER_ID = settings.WHISPERS_ADMIN_USER_ID
-        send_missing_configuration_value_email('madison_epi_user')
-    return MADISON_EPI_USER_ID
+# US territories and minor outlying islands, which are not in a flyway
+FLYWAY_TERRITORIES = ['PR', 'VI', 'MP', 'AS', 'UM', 'NOPO', 'SOPO']
+# states that straddle two flyways, so the flyway cannot be determined without lat/lng or county info
+MULTIPLE_FLYWAY_STATES = ['MT', 'WY', 'CO', 'NM']
 
 
 def jsonify_errors(data):
@@ -188,7 +93,7 @@ def determine_permission_source(user, obj):
 
 
 def construct_email(subject, message):
-    # construct and send the email
+    # construct the email and queue it to be sent
     subject = subject
     body = message
     EMAIL_WHISPERS = get_whispers_email_address()
@@ -198,15 +103,16 @@ def construct_email(subject, message):
     reply_list = []
     headers = None
     email = EmailMessage(subject, body, from_address, to_list, bcc_list, reply_to=reply_list, headers=headers)
-    if settings.ENVIRONMENT in ['production', 'test']:
-        try:
-            email.send(fail_silently=False)
-        except TypeError:
-            message = "Send email failed, please contact the administrator."
-            raise serializers.ValidationError(jsonify_errors(message))
-    else:
-        print(email.__dict__)
-    return email
+    return queue_email(email)
+
+
+def update_sibling_priorities(model, siblings, user=None):
+    # write the new priorities of all sibling objects whose priority actually changed in a single bulk update,
+    # and create history records for only those siblings (also in bulk);
+    # this deliberately bypasses the model save method, which would otherwise update the parent event
+    # (and potentially create notifications) once for every sibling
+    if siblings:
+        bulk_update_with_history(siblings, model, ['priority'], default_user=user)
 
 
 def calculate_priority_event_organization(instance):
@@ -214,226 +120,140 @@ def calculate_priority_event_organization(instance):
     # calculate the priority value:
     # Sort by owner organization first, then by order of entry.
     priority = 1
+    changed_evt_orgs = []
     evt_orgs = EventOrganization.objects.filter(event=instance.event.id).order_by('created_by__organization__id', 'id')
     for evt_org in evt_orgs:
         if evt_org.id == instance.id:
             instance.priority = priority
-        else:
+        elif evt_org.priority != priority:
             evt_org.priority = priority
-            evt_org.save()
+            changed_evt_orgs.append(evt_org)
         priority += 1
+    update_sibling_priorities(EventOrganization, changed_evt_orgs, instance.modified_by)
 
     return instance.priority
 
 
-def calculate_priority_event_diagnosis(instance):
+# The ordering rules of the priorities of the children of an event, shared by the priority calculations of single
+# records (below) and the bulk event import (see EventBulkImportSerializer.prepare_event), so that an event gets the
+# same priorities however it is created. Each returns the key that the records are sorted by (ascending).
 
-    # calculate the priority value:
+def event_diagnosis_sort_key(diagnosis_name):
     # TODO: following rule cannot be applied because cause field does not exist on this model
     # Order event diagnoses by causal (cause of death first, then cause of sickness,
     # then incidental findings, then unknown) and within each causal category...
     # (TODO: NOTE following rule is valid and enforceable right now:)
     # ...by diagnosis name (alphabetical).
-    priority = 1
-    self_priority_updated = False
-    # get all event_diagnoses for the parent event except self, and sort by diagnosis name ascending
-    evtdiags = EventDiagnosis.objects.filter(
-        event=instance.event.id).exclude(id=instance.id).order_by('diagnosis__name')
-    for evtdiag in evtdiags:
-        # if self has not been updated and self diagnosis less than or equal to this evtdiag diagnosis name,
-        # first update self priority then update this evtdiag priority
-        if not self_priority_updated and instance.diagnosis.name <= evtdiag.diagnosis.name:
-            instance.priority = priority
-            priority += 1
-            self_priority_updated = True
-        evtdiag.priority = priority
-        evtdiag.save()
-        priority += 1
-
-    return instance.priority if self_priority_updated else priority
-
+    return diagnosis_name
 
-def calculate_priority_event_location(instance):
 
-    # calculate the priority value:
-    # Group by county first. Order counties by decreasing number of sick plus dead (for morbidity/mortality events)
-    # or number_positive (for surveillance). Order locations within counties similarly.
+def event_location_sort_key(county_name, affected_count):
+    # Group by county first (locations without a county last). Order counties by decreasing number of sick plus dead
+    # (for morbidity/mortality events) or number_positive (for surveillance). Order locations within counties similarly.
     # TODO: figure out the following rule:
     # If no numbers provided then order by country, state, and county (alphabetical).
-    priority = 1
-    self_priority_updated = False
-    # get all event_locations for the parent event except self, and sort by county name asc and affected count desc
-    evtlocs = EventLocation.objects.filter(
-        event=instance.event.id
-    ).exclude(
-        id=instance.id
-    ).annotate(
-        sick_ct=Sum('locationspecies__sick_count', filter=Q(event__event_type__exact=1))
-    ).annotate(
-        sick_ct_est=Sum('locationspecies__sick_count_estimated', filter=Q(event__event_type__exact=1))
-    ).annotate(
-        dead_ct=Sum('locationspecies__dead_count', filter=Q(event__event_type__exact=1))
-    ).annotate(
-        dead_ct_est=Sum('locationspecies__dead_count_estimated', filter=Q(event__event_type__exact=1))
-    ).annotate(
-        positive_ct=Sum('locationspecies__speciesdiagnoses__positive_count',
-                        filter=Q(event__event_type__exact=2))
-    ).annotate(
-        affected_count=(Coalesce(F('sick_ct'), 0) + Coalesce(F('sick_ct_est'), 0) + Coalesce(F('dead_ct'), 0)
-                        + Coalesce(F('dead_ct_est'), 0) + Coalesce(F('positive_ct'), 0))
-    ).values(
-        # use values function to avoid 'must appear in the GROUP BY clause or be used in an aggregate function' errors
-        'id', 'administrative_level_two__name', 'affected_count'
-    ).order_by('administrative_level_two__name', '-affected_count')
-    if not evtlocs:
-        instance.priority = priority
-    else:
-        location_species = LocationSpecies.objects.filter(event_location=instance.id)
-        sick_dead_counts = [max(spec.dead_count_estimated or 0, spec.dead_count or 0)
-                            + max(spec.sick_count_estimated or 0, spec.sick_count or 0)
-                            for spec in location_species]
-        self_sick_dead_count = sum(sick_dead_counts)
-        loc_species_ids = [spec.id for spec in location_species]
-        species_dx_positive_counts = SpeciesDiagnosis.objects.filter(
-            location_species_id__in=loc_species_ids).values_list(
-            'positive_count', flat=True).exclude(positive_count__isnull=True)
-        self_positive_count = sum(species_dx_positive_counts)
-        for evtloc in evtlocs:
-            # if self has not been updated,
-            # and self county name is less than or equal to this evtloc county name,
-            # and self affected count is greater than or equal to this evtloc affected count
-            # first update self priority then update this evtloc priority
-            if (not self_priority_updated
-                    and instance.administrative_level_two.name <= evtloc['administrative_level_two__name']):
-                if instance.event.event_type.id == 1:
-                    if self_sick_dead_count >= (evtloc['affected_count'] or 0):
-                        instance.priority = priority
-                        priority += 1
-                        self_priority_updated = True
-                elif instance.event.event_type.id == 2:
-                    if self_positive_count >= (evtloc['affected_count'] or 0):
-                        instance.priority = priority
-                        priority += 1
-                        self_priority_updated = True
-            # update the evtloc (must retrieve object since we're using dicts in previous lines)
-            el = EventLocation.objects.get(id=evtloc['id'])
-            el.priority = priority
-            el.save()
-            priority += 1
-
-    return instance.priority if self_priority_updated else priority
-
+    return county_name is None, county_name or '', -affected_count
 
-def calculate_priority_location_species(instance):
 
-    # calculate the priority value:
+def location_species_sort_key(affected_count, species_name):
     # Order species by decreasing number of sick plus dead (for morbidity/mortality events)
     # or number_positive (for surveillance).
     # If no numbers were provided then order by SpeciesName (alphabetical).
-    priority = 1
-    self_priority_updated = False
-    # get all location_species for the parent event_location except self, and sort by affected count desc
-    locspecs = LocationSpecies.objects.filter(
-        event_location=instance.event_location.id
-    ).exclude(
-        id=instance.id
-    ).annotate(
-        sick_dead_ct=(Coalesce(F('sick_count'), 0) + Coalesce(F('sick_count_estimated'), 0)
-                      + Coalesce(F('dead_count'), 0) + Coalesce(F('dead_count_estimated'), 0))
-    ).annotate(
-        positive_ct=Sum('speciesdiagnoses__positive_count', filter=Q(event_location__event__event_type__exact=2))
-    ).annotate(
-        affected_count=Coalesce(F('sick_dead_ct'), 0) + Coalesce(F('positive_ct'), 0)
-    ).values(
-        # use values function to avoid 'must appear in the GROUP BY clause or be used in an aggregate function' errors
-        'id', 'affected_count'
-    ).order_by('-affected_count', 'species__name')
-    if not locspecs:
-        instance.priority = priority
-    else:
-        self_sick_dead_count = (max(instance.dead_count_estimated or 0, instance.dead_count or 0)
-                                + max(instance.sick_count_estimated or 0, instance.sick_count or 0))
-        species_dx_positive_counts = SpeciesDiagnosis.objects.filter(
-            location_species_id__exact=instance.id).values_list(
-            'positive_count', flat=True).exclude(positive_count__isnull=True)
-        self_positive_count = sum(species_dx_positive_counts)
-        for locspec in locspecs:
-            # if self has not been updated,
-            # and self affected count is greater than or equal to this locspec affected count,
-            # first update self priority then update this locspec priority
-            if not self_priority_updated:
-                if instance.event_location.event.event_type.id == 1:
-                    if self_sick_dead_count >= (locspec['affected_count'] or 0):
-                        instance.priority = priority
-                        priority += 1
-                        self_priority_updated = True
-                elif instance.event_location.event.event_type.id == 2:
-                    if self_positive_count >= (locspec['affected_count'] or 0):
-                        instance.priority = priority
-                        priority += 1
-                        self_priority_updated = True
-            # update the locspec (must retrieve object since we're using dicts in previous lines)
-            ls = LocationSpecies.objects.get(id=locspec['id'])
-            ls.priority = priority
-            ls.save()
-            priority += 1
-
-    return instance.priority if self_priority_updated else priority
+    return -affected_count, species_name
 
 
-def calculate_priority_species_diagnosis(instance):
-
-    # calculate the priority value:
+def species_diagnosis_sort_key(cause_id, diagnosis_name):
     # TODO: the following...
     # Order species diagnoses by causal
     # (cause of death first, then cause of sickness, then incidental findings, then unknown)
     # and within each causal category by diagnosis name (alphabetical).
-    priority = 1
-    self_priority_updated = False
-    # get all species_diagnoses for the parent location_species except self, and sort by diagnosis cause then name
-    specdiags = SpeciesDiagnosis.objects.filter(
-        location_species=instance.location_species.id).exclude(
-        id=instance.id).order_by('cause__id', 'diagnosis__name')
-    for specdiag in specdiags:
-        # if self has not been updated and self diagnosis cause equal to or less than this specdiag diagnosis cause,
-        # and self diagnosis name equal to or less than this specdiag diagnosis name
-        # first update self priority then update this specdiag priority
-        if not self_priority_updated:
-            # first check if self diagnosis cause is equal to this specdiag diagnosis cause
-            if instance.cause and specdiag.cause and instance.cause.id == specdiag.cause.id:
-                if instance.diagnosis.name == specdiag.diagnosis.name:
-                    instance.priority = priority
-                    priority += 1
-                    self_priority_updated = True
-                elif instance.diagnosis.name < specdiag.diagnosis.name:
-                    instance.priority = priority
-                    priority += 1
-                    self_priority_updated = True
-            # else check if self diagnosis cause is less than this specdiag diagnosis cause
-            elif instance.cause and specdiag.cause and instance.cause.id < specdiag.cause.id:
-                if instance.diagnosis.name == specdiag.diagnosis.name:
-                    instance.priority = priority
-                    priority += 1
-                    self_priority_updated = True
-                elif instance.diagnosis.name < specdiag.diagnosis.name:
-                    instance.priority = priority
-                    priority += 1
-                    self_priority_updated = True
-                    # else check if both self diagnosis cause and this specdiag diagnosis cause are null
-            elif instance.cause is None and specdiag.cause is None:
-                if instance.diagnosis.name == specdiag.diagnosis.name:
-                    instance.priority = priority
-                    priority += 1
-                    self_priority_updated = True
-                elif instance.diagnosis.name < specdiag.diagnosis.name:
-                    instance.priority = priority
-                    priority += 1
-                    self_priority_updated = True
-        specdiag.priority = priority
-        specdiag.save()
-        priority += 1
+    # (for now, by cause ID, with species diagnoses without a cause last, then by diagnosis name)
+    return cause_id is None, cause_id or 0, diagnosis_name
+
+
+def priority_affected_count(event_type_id, sick_dead_count, positive_count):
+    # the affected count that event locations and location species are ordered by:
+    # the sum of Max(estimated_dead, dead) + Max(estimated_sick, sick) of the location species
+    # for morbidity/mortality events, or the sum of number_positive of the species diagnoses for surveillance events
+    return sick_dead_count if event_type_id == 1 else positive_count
+
+
+def assign_priorities(model, instance, records):
+    # number the sorted records (the instance and its siblings) in order,
+    # and write the siblings whose priority changed, returning the priority of the instance
+    changed_siblings = []
+    for priority, record in enumerate(records, start=1):
+        if record is instance:
+            instance.priority = priority
+        elif record.priority != priority:
+            record.priority = priority
+            changed_siblings.append(record)
+    update_sibling_priorities(model, changed_siblings, instance.modified_by)
+
+    return instance.priority
 
-    return instance.priority if self_priority_updated else priority
+
+def calculate_priority_event_diagnosis(instance):
+
+    # calculate the priority value (see event_diagnosis_sort_key)
+    # (the instance goes before any sibling it ties with, and tied siblings keep their current order)
+    evtdiags = [instance] + list(EventDiagnosis.objects.filter(
+        event=instance.event.id).exclude(id=instance.id).select_related('diagnosis').order_by('priority', 'id'))
+    evtdiags.sort(key=lambda evtdiag: event_diagnosis_sort_key(evtdiag.diagnosis.name))
+
+    return assign_priorities(EventDiagnosis, instance, evtdiags)
+
+
+def calculate_priority_event_location(instance):
+
+    # calculate the priority value (see event_location_sort_key)
+    # (the instance goes before any sibling it ties with, and tied siblings keep their current order)
+    evtlocs = [instance] + list(EventLocation.objects.filter(
+        event=instance.event.id).exclude(id=instance.id).select_related(
+        'administrative_level_two').order_by('priority', 'id'))
+    evtloc_ids = [evtloc.id for evtloc in evtlocs]
+    sick_dead_counts = dict(LocationSpecies.objects.filter(event_location__in=evtloc_ids).values(
+        'event_location').annotate(count=Sum(LOCATION_SPECIES_AFFECTED_COUNT)).values_list('event_location', 'count'))
+    positive_counts = dict(SpeciesDiagnosis.objects.filter(
+        location_species__event_location__in=evtloc_ids).values('location_species__event_location').annotate(
+        count=Sum('positive_count')).values_list('location_species__event_location', 'count'))
+    event_type_id = instance.event.event_type_id
+    evtlocs.sort(key=lambda evtloc: event_location_sort_key(
+        evtloc.administrative_level_two.name if evtloc.administrative_level_two else None,
+        priority_affected_count(event_type_id, sick_dead_counts.get(evtloc.id) or 0,
+                                positive_counts.get(evtloc.id) or 0)))
+
+    return assign_priorities(EventLocation, instance, evtlocs)
+
+
+def calculate_priority_location_species(instance):
+
+    # calculate the priority value (see location_species_sort_key)
+    # (the instance goes before any sibling it ties with, and tied siblings keep their current order)
+    locspecs = [instance] + list(LocationSpecies.objects.filter(
+        event_location=instance.event_location.id).exclude(id=instance.id).select_related(
+        'species').order_by('priority', 'id'))
+    positive_counts = dict(SpeciesDiagnosis.objects.filter(
+        location_species__in=[locspec.id for locspec in locspecs]).values('location_species').annotate(
+        count=Sum('positive_count')).values_list('location_species', 'count'))
+    event_type_id = instance.event_location.event.event_type_id
+    locspecs.sort(key=lambda locspec: location_species_sort_key(
+        priority_affected_count(event_type_id, locspec.affected_count, positive_counts.get(locspec.id) or 0),
+        locspec.species.name))
+
+    return assign_priorities(LocationSpecies, instance, locspecs)
+
+
+def calculate_priority_species_diagnosis(instance):
+
+    # calculate the priority value (see species_diagnosis_sort_key)
+    # (the instance goes before any sibling it ties with, and tied siblings keep their current order)
+    specdiags = [instance] + list(SpeciesDiagnosis.objects.filter(
+        location_species=instance.location_species.id).exclude(id=instance.id).select_related(
+        'diagnosis').order_by('priority', 'id'))
+    specdiags.sort(key=lambda specdiag: species_diagnosis_sort_key(specdiag.cause_id, specdiag.diagnosis.name))
+
+    return assign_priorities(SpeciesDiagnosis, instance, specdiags)
 
 
 ######
@@ -513,7 +333,7 @@ class CommentSerializer(serializers.ModelSerializer):
                         recipients.append(service_request.event.created_by.id)
                         email_to.append(service_request.event.created_by.email)
                     if recipients and email_to:
-                        generate_notification.delay(
+                        generate_notification_on_commit(
                             msg_tmp.id, recipients, source, event_id, 'event', subject, body, True, email_to)
                     else:
                         # No recipients are active users
@@ -580,8 +400,8 @@ class CommentSerializer(serializers.ModelSerializer):
                             recipients.append(service_request.event.created_by.id)
                             email_to.append(service_request.event.created_by.email)
                     source = comment.created_by.username
-                    generate_notification.delay(msg_tmp.id, recipients, source, event_id, 'event', subject, body,
-                                                True, email_to)
+                    generate_notification_on_commit(msg_tmp.id, recipients, source, event_id, 'event', subject, body,
+                                                    True, email_to)
 
         return comment
 
@@ -689,7 +509,6 @@ class EventSerializer(serializers.ModelSerializer):
                 latlng_matches_admin_l1 = True
                 latlng_matches_admin_21 = True
                 comments_is_valid = []
-                required_comment_types = ['site_description', 'history', 'environmental_factors', 'clinical_signs']
                 min_start_date = False
                 start_date_is_valid = True
                 end_date_is_valid = True
@@ -702,48 +521,36 @@ class EventSerializer(serializers.ModelSerializer):
                 specdiag_lab_is_valid = True
                 details = []
                 mortality_morbidity = EventType.objects.filter(name='Mortality/Morbidity').first()
+                lookups = get_nested_location_lookups(data['new_event_locations'])
                 for item in data['new_event_locations']:
-                    if [i for i in required_comment_types if i in item and item[i]]:
-                        comments_is_valid.append(True)
-                    else:
-                        comments_is_valid.append(False)
+                    comments_is_valid.append(location_has_required_comment(item))
                     if 'start_date' in item and item['start_date'] is not None:
                         try:
-                            datetime.strptime(item['start_date'], '%Y-%m-%d').date()
+                            start_date = datetime.strptime(item['start_date'], '%Y-%m-%d').date()
                         except ValueError:
+                            start_date = None
                             details.append("All start_date values must be valid dates in ISO format ('YYYY-MM-DD').")
                         min_start_date = True
-                        if (data['event_type'].id == mortality_morbidity.id
-                                and datetime.strptime(item['start_date'], '%Y-%m-%d').date() > date.today()):
+                        if not location_start_date_is_valid(
+                                start_date, data['event_type'].id == mortality_morbidity.id):
                             start_date_is_valid = False
-                        if ('end_date' in item and item['end_date'] is not None
-                                and item['end_date'] < item['start_date']):
-                            end_date_is_valid = False
-                    elif 'end_date' in item and item['end_date'] is not None:
+                    # (the submitted dates are ISO format strings, so they can be compared as they are)
+                    if not location_end_date_is_valid(item.get('start_date', None), item.get('end_date', None)):
                         end_date_is_valid = False
-                    if ('country' in item and item['country'] is not None and 'administrative_level_one' in item
-                            and item['administrative_level_one'] is not None):
-                        country = Country.objects.filter(id=item['country']).first()
-                        admin_l1 = AdministrativeLevelOne.objects.filter(id=item['administrative_level_one']).first()
-                        if country.id != admin_l1.country.id:
-                            country_admin_is_valid = False
-                        if 'administrative_level_two' in item and item['administrative_level_two'] is not None:
-                            admin_l2 = AdministrativeLevelTwo.objects.filter(
-                                id=item['administrative_level_two']).first()
-                            if admin_l1.id != admin_l2.administrative_level_one.id:
-                                country_admin_is_valid = False
+                    if not location_admin_levels_are_valid(
+                            get_bulk_import_id(item.get('country', None)),
+                            get_bulk_import_id(item.get('administrative_level_one', None)),
+                            get_bulk_import_id(item.get('administrative_level_two', None)),
+                            lookups['administrative_level_one'], lookups['administrative_level_two']):
+                        country_admin_is_valid = False
                     if (('country' not in item or item['country'] is None or 'administrative_level_one' not in item
                          or item['administrative_level_one'] is None)
                             and ('latitude' not in item or item['latitude'] is None
                                  or 'longitude' not in item and item['longitude'] is None)):
                         message = "country and administrative_level_one are required if latitude or longitude is null."
                         details.append(message)
-                    if ('latitude' in item and item['latitude'] is not None
-                            and not re.match(r"(-?)([\d]{1,2})(\.)(\d+)", str(item['latitude']))):
+                    if not location_coordinates_are_valid(item.get('latitude', None), item.get('longitude', None)):
                         latlng_is_valid = False
-                    if ('longitude' in item and item['longitude'] is not None
-                            and not re.match(r"(-?)([\d]{1,3})(\.)(\d+)", str(item['longitude']))):
-                                                latlng_is_valid = False
                     # NOTE: the following validations are also done in the EventLocation serializer,
                     #  so I'm commenting these to prevent two identical emails being sent to the admins
                     # geonames_endpoint = 'extendedFindNearbyJSON'
@@ -862,70 +669,36 @@ class EventSerializer(serializers.ModelSerializer):
                     if 'new_location_species' in item:
                         for spec in item['new_location_species']:
                             if 'species' in spec and spec['species'] is not None:
-                                if Species.objects.filter(id=spec['species']).first() is None:
+                                if get_bulk_import_id(spec['species']) not in lookups['species']:
                                     message = "A submitted species ID (" + str(spec['species'])
                                     message += ") in new_location_species was not found in the database."
                                     details.append(message)
                                 else:
                                     min_location_species = True
-                            if 'population_count' in spec and spec['population_count'] is not None:
-                                dead_count = 0
-                                sick_count = 0
-                                if 'dead_count_estimated' in spec or 'dead_count' in spec:
-                                    dead_count = max(spec.get('dead_count_estimated') or 0, spec.get('dead_count') or 0)
-                                if 'sick_count_estimated' in spec or 'sick_count' in spec:
-                                    sick_count = max(spec.get('sick_count_estimated') or 0, spec.get('sick_count') or 0)
-                                if spec['population_count'] >= dead_count + sick_count:
-                                    pop_is_valid.append(True)
-                                else:
-                                    pop_is_valid.append(False)
-                            if ('sick_count_estimated' in spec and spec['sick_count_estimated'] is not None
-                                    and 'sick_count' in spec and spec['sick_count'] is not None
-                                    and not spec['sick_count_estimated'] > spec['sick_count']):
+                            pop_is_valid.append(species_population_count_is_valid(spec))
+                            if not species_estimated_count_is_valid(spec, 'sick'):
                                 est_sick_is_valid = False
-                            if ('dead_count_estimated' in spec and spec['dead_count_estimated'] is not None
-                                    and 'dead_count' in spec and spec['dead_count'] is not None
-                                    and not spec['dead_count_estimated'] > spec['dead_count']):
+                            if not species_estimated_count_is_valid(spec, 'dead'):
                                 est_dead_is_valid = False
-                            if data['event_type'].id == mortality_morbidity.id:
-                                if ('dead_count_estimated' in spec and spec['dead_count_estimated'] is not None
-                                        and spec['dead_count_estimated'] > 0):
-                                    min_species_count = True
-                                elif ('dead_count' in spec and spec['dead_count'] is not None
-                                      and spec['dead_count'] > 0):
-                                    min_species_count = True
-                                elif ('sick_count_estimated' in spec and spec['sick_count_estimated'] is not None
-                                      and spec['sick_count_estimated'] > 0):
-                                    min_species_count = True
-                                elif ('sick_count' in spec and spec['sick_count'] is not None
-                                      and spec['sick_count'] > 0):
-                                    min_species_count = True
+                            if data['event_type'].id == mortality_morbidity.id and species_has_count(spec):
+                                min_species_count = True
                             if 'new_species_diagnoses' in spec and spec['new_species_diagnoses'] is not None:
                                 specdiag_labs = []
                                 for specdiag in spec['new_species_diagnoses']:
-                                    [specdiag_labs.append((specdiag['diagnosis'], specdiag_lab)) for specdiag_lab in
-                                     specdiag['new_species_diagnosis_organizations']]
-                                    if not specdiag['suspect']:
-                                        if specdiag['basis'] in [1, 2, 4]:
-                                            undetermined = list(Diagnosis.objects.filter(
-                                                name='Undetermined').values_list('id', flat=True))[0]
-                                            if specdiag['diagnosis'] != undetermined:
-                                                specdiag_nonsuspect_basis_is_valid = False
-                                        elif specdiag['basis'] == 3:
-                                            if ('new_species_diagnosis_organizations' in specdiag
-                                                    and specdiag['new_species_diagnosis_organizations'] is not None):
-                                                for org_id in specdiag['new_species_diagnosis_organizations']:
-                                                    org = Organization.objects.filter(id=org_id).first()
-                                                    if not org or not org.laboratory:
-                                                        specdiag_nonsuspect_basis_is_valid = False
-                                if len(specdiag_labs) != len(set(specdiag_labs)):
+                                    specdiag_orgs = specdiag.get('new_species_diagnosis_organizations', None) or []
+                                    specdiag_labs += [(specdiag['diagnosis'], org_id) for org_id in specdiag_orgs]
+                                    if not species_diagnosis_basis_is_valid(
+                                            specdiag['suspect'], specdiag['basis'], specdiag['diagnosis'],
+                                            specdiag_orgs, lookups['laboratory']):
+                                        specdiag_nonsuspect_basis_is_valid = False
+                                if not species_diagnosis_labs_are_unique(specdiag_labs):
                                     specdiag_lab_is_valid = False
                     if 'new_location_contacts' in item and item['new_location_contacts'] is not None:
                         for loc_contact in item['new_location_contacts']:
                             if 'contact' not in loc_contact or loc_contact['contact'] is None:
                                 message = "A required contact ID was not included in new_location_contacts."
                                 details.append(message)
-                            elif Contact.objects.filter(id=loc_contact['contact']).first() is None:
+                            elif get_bulk_import_id(loc_contact['contact']) not in lookups['contact']:
                                 message = "A submitted contact ID (" + str(loc_contact['contact'])
                                 message += ") in new_location_contacts was not found in the database."
                                 details.append(message)
@@ -1023,29 +796,12 @@ class EventSerializer(serializers.ModelSerializer):
                     else:
                         end_date_is_valid = False
                     for spec in item['new_location_species']:
-                        if ('sick_count_estimated' in spec and spec['sick_count_estimated'] is not None
-                                and 'sick_count' in spec and spec['sick_count'] is not None
-                                and not spec['sick_count_estimated'] > spec['sick_count']):
+                        if not species_estimated_count_is_valid(spec, 'sick'):
                             est_sick_is_valid = False
-                        if ('dead_count_estimated' in spec and spec['dead_count_estimated'] is not None
-                                and 'dead_count' in spec and spec['dead_count'] is not None
-                                and not spec['dead_count_estimated'] > spec['dead_count']):
+                        if not species_estimated_count_is_valid(spec, 'dead'):
                             est_dead_is_valid = False
                         if data['event_type'].id == mortality_morbidity.id:
-                            if ('dead_count_estimated' in spec and spec['dead_count_estimated'] is not None
-                                    and spec['dead_count_estimated'] > 0):
-                                species_count_is_valid.append(True)
-                            elif ('dead_count' in spec and spec['dead_count'] is not None
-                                  and spec['dead_count'] > 0):
-                                species_count_is_valid.append(True)
-                            elif ('sick_count_estimated' in spec and spec['sick_count_estimated'] is not None
-                                  and spec['sick_count_estimated'] > 0):
-                                species_count_is_valid.append(True)
-                            elif ('sick_count' in spec and spec['sick_count'] is not None
-                                  and spec['sick_count'] > 0):
-                                species_count_is_valid.append(True)
-                            else:
-                                species_count_is_valid.append(False)
+                            species_count_is_valid.append(species_has_count(spec))
                         if 'new_species_diagnoses' in spec and spec['new_species_diagnoses'] is not None:
                             for specdiag in spec['new_species_diagnoses']:
                                 if 'basis' not in specdiag or specdiag['basis'] is None:
@@ -1073,9 +829,12 @@ class EventSerializer(serializers.ModelSerializer):
                     raise serializers.ValidationError(details)
         return data
 
+    # create the event and all of its child objects in a single transaction,
+    # so that if there is an error somewhere in the chain, all objects created by this request before the error
+    # are rolled back (and no notifications are sent, since those are only queued once the transaction is committed)
+    @transaction.atomic
     def create(self, validated_data):
-        # set the FULL_EVENT_CHAIN_CREATE variable to True in case there is an error somewhere in the chain
-        # and all objects created by this request before the error need to be deleted
+        # set the FULL_EVENT_CHAIN_CREATE variable to True to let the child serializers know they are part of the chain
         FULL_EVENT_CHAIN_CREATE = True
 
         # pull out child event diagnoses list from the request
@@ -1136,9 +895,6 @@ class EventSerializer(serializers.ModelSerializer):
                 for item in valid_data:
                     item.save()
             else:
-                # delete this event (related collaborators, organizations, eventgroups, service requests,
-                # contacts, and comments will be cascade deleted automatically if any exist)
-                event.delete()
                 raise serializers.ValidationError(jsonify_errors(errors))
 
         user = get_user(self.context, self.initial_data)
@@ -1200,8 +956,8 @@ class EventSerializer(serializers.ModelSerializer):
 
         # remove Pending if in the list because it should never be submitted by the user
         # and remove Undetermined if in the list and the event already has an Undetermined
-        pending = list(Diagnosis.objects.filter(name='Pending').values_list('id', flat=True))[0]
-        undetermined = list(Diagnosis.objects.filter(name='Undetermined').values_list('id', flat=True))[0]
+        pending = get_system_diagnosis_id('Pending')
+        undetermined = get_system_diagnosis_id('Undetermined')
         existing_evt_diag_ids = list(EventDiagnosis.objects.filter(event=event.id).values_list('diagnosis', flat=True))
         if len(existing_evt_diag_ids) > 0 and undetermined in existing_evt_diag_ids:
             rm_dg = [pending, undetermined]
@@ -1232,9 +988,6 @@ class EventSerializer(serializers.ModelSerializer):
                 for item in valid_data:
                     item.save()
             else:
-                # delete this event (related collaborators, organizations, eventgroups, service requests,
-                # contacts, and comments will be cascade deleted automatically if any exist)
-                event.delete()
                 raise serializers.ValidationError(jsonify_errors(errors))
 
             # # Can only use diagnoses that are already used by this event's species diagnoses
@@ -1284,9 +1037,6 @@ class EventSerializer(serializers.ModelSerializer):
                 if service_request_serializer.is_valid():
                     service_request_serializer.save()
                 else:
-                    # delete this event (related collaborators, organizations, eventgroups, service requests,
-                    # contacts, and comments will be cascade deleted automatically if any exist)
-                    event.delete()
                     raise serializers.ValidationError(jsonify_errors(service_request_serializer.errors))
 
         return event
@@ -1505,29 +1255,7 @@ class EventSerializer(serializers.ModelSerializer):
             instance.legal_number = validated_data.get('legal_number', instance.legal_number)
 
         # affected_count
-        # If EventType = Morbidity/Mortality
-        # then Sum(Max(estimated_dead, dead) + Max(estimated_sick, sick)) from location_species table
-        # If Event Type = Surveillance then Sum(number_positive) from species_diagnosis table
-        event_type_id = instance.event_type.id
-        if event_type_id not in [1, 2]:
-            instance.affected_count = None
-        else:
-            locations = EventLocation.objects.filter(event=instance.id).values('id', 'start_date', 'end_date')
-            loc_ids = [loc['id'] for loc in locations]
-            loc_species = LocationSpecies.objects.filter(
-                event_location_id__in=loc_ids).values(
-                'id', 'dead_count_estimated', 'dead_count', 'sick_count_estimated', 'sick_count')
-            if event_type_id == 1:
-                affected_counts = [max(spec.get('dead_count_estimated') or 0, spec.get('dead_count') or 0)
-                                   + max(spec.get('sick_count_estimated') or 0, spec.get('sick_count') or 0)
-                                   for spec in loc_species]
-                instance.affected_count = sum(affected_counts)
-            elif event_type_id == 2:
-                loc_species_ids = [spec['id'] for spec in loc_species]
-                species_dx_positive_counts = SpeciesDiagnosis.objects.filter(
-                    location_species_id__in=loc_species_ids).values_list('positive_count', flat=True)
-                positive_counts = [dx or 0 for dx in species_dx_positive_counts]
-                instance.affected_count = sum(positive_counts)
+        # (the model save method recalculates the affected_count when the event_type changes)
 
         instance.save()
 
@@ -1591,6 +1319,731 @@ class EventSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+def get_nested_location_lookups(event_locations):
+    # collect every ID referenced by the submitted new event locations (and their nested location species,
+    # species diagnosis organizations, and location contacts) and resolve each related model with a single query,
+    # so that validating a submission takes a fixed number of queries no matter how many nested objects it contains
+    country_ids = set()
+    admin_l1_ids = set()
+    admin_l2_ids = set()
+    species_ids = set()
+    organization_ids = set()
+    contact_ids = set()
+    for item in event_locations:
+        country_ids.add(get_bulk_import_id(item.get('country')))
+        admin_l1_ids.add(get_bulk_import_id(item.get('administrative_level_one')))
+        admin_l2_ids.add(get_bulk_import_id(item.get('administrative_level_two')))
+        for spec in item.get('new_location_species') or []:
+            species_ids.add(get_bulk_import_id(spec.get('species')))
+            for specdiag in spec.get('new_species_diagnoses') or []:
+                for org_id in specdiag.get('new_species_diagnosis_organizations') or []:
+                    organization_ids.add(get_bulk_import_id(org_id))
+        for loc_contact in item.get('new_location_contacts') or []:
+            contact_ids.add(get_bulk_import_id(loc_contact.get('contact')))
+    return {
+        'country': set(Country.objects.filter(id__in=country_ids - {None}).values_list('id', flat=True)),
+        'administrative_level_one': dict(AdministrativeLevelOne.objects.filter(
+            id__in=admin_l1_ids - {None}).values_list('id', 'country_id')),
+        'administrative_level_two': dict(AdministrativeLevelTwo.objects.filter(
+            id__in=admin_l2_ids - {None}).values_list('id', 'administrative_level_one_id')),
+        'species': set(Species.objects.filter(id__in=species_ids - {None}).values_list('id', flat=True)),
+        'laboratory': set(Organization.objects.filter(
+            id__in=organization_ids - {None}, laboratory=True).values_list('id', flat=True)),
+        'contact': set(Contact.objects.filter(id__in=contact_ids - {None}).values_list('id', flat=True)),
+    }
+
+
+def get_bulk_import_id(value):
+    # convert a submitted ID to an integer, or None if it is not a valid ID
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def clean_bulk_import_fields(instance, details, label):
+    # validate (and convert to python types) the values of all non-relational fields of an unsaved instance
+    # without querying the database (the relational fields are validated with batched lookups instead)
+    exclude = [f.name for f in instance._meta.concrete_fields
+               if f.is_relation or (f.null and getattr(instance, f.attname) is None)]
+    for field in instance._meta.concrete_fields:
+        if field.name not in exclude and not field.primary_key and getattr(instance, field.attname) is None:
+            exclude.append(field.name)
+            details.append(label + " " + field.name + ": This field may not be null.")
+    try:
+        instance.clean_fields(exclude=exclude)
+    except DjangoValidationError as e:
+        for field_name, messages in e.message_dict.items():
+            details.append(label + " " + field_name + ": " + " ".join(messages))
+
+
+# The following validators implement the rules shared by the nested event create (EventSerializer and its nested
+# EventLocationSerializer and LocationSpeciesSerializer) and the EventBulkImportSerializer, so that both paths
+# accept and reject the same submissions. Each takes plain values (IDs, counts, dates) and returns whether they are
+# valid, leaving the error messages (and how they are collected) to the caller.
+
+# the comment types of which every new event location requires at least one
+LOCATION_REQUIRED_COMMENT_TYPES = ['site_description', 'history', 'environmental_factors', 'clinical_signs']
+
+# the boundary fields of an event location, from the least to the most specific
+LOCATION_BOUNDARY_FIELDS = ['country', 'administrative_level_one', 'administrative_level_two']
+
+# the count fields of a location species of which a Mortality/Morbidity event requires at least one
+SPECIES_COUNT_FIELDS = ['dead_count_estimated', 'dead_count', 'sick_count_estimated', 'sick_count']
+
+
+def location_has_required_comment(values):
+    # Every location needs at least one comment, which must be one of the following types:
+    #  Site description, History, Environmental factors, Clinical signs
+    return any(values.get(comment_type, None) for comment_type in LOCATION_REQUIRED_COMMENT_TYPES)
+
+
+def location_start_date_is_valid(start_date, mortality_morbidity):
+    # Location start date cannot be after today if event type is Mortality/Morbidity
+    return not (mortality_morbidity and start_date is not None and start_date > date.today())
+
+
+def location_end_date_is_valid(start_date, end_date):
+    # Location end date must be equal to or greater than start date (and so requires a start date)
+    return end_date is None or (start_date is not None and end_date >= start_date)
+
+
+def location_admin_levels_are_valid(country_id, admin_l1_id, admin_l2_id, admin_l1_countries, admin_l2_admin_l1s):
+    # Ensure admin level 2 actually belongs to admin level 1 which actually belongs to country,
+    #  given dicts of the country ID of each admin level 1 ID and the admin level 1 ID of each admin level 2 ID
+    #  (only checked when both the country and admin level 1 are submitted)
+    if country_id is None or admin_l1_id is None:
+        return True
+    if admin_l1_countries.get(admin_l1_id, None) != country_id:
+        return False
+    return admin_l2_id is None or admin_l2_admin_l1s.get(admin_l2_id, None) == admin_l1_id
+
+
+def location_coordinates_are_valid(latitude, longitude):
+    # Standardized lat/long format (decimal degrees)
+    return ((latitude is None or re.match(r"(-?)([\d]{1,2})(\.)(\d+)", str(latitude)) is not None)
+            and (longitude is None or re.match(r"(-?)([\d]{1,3})(\.)(\d+)", str(longitude)) is not None))
+
+
+def species_population_count_is_valid(counts):
+    # location_species Population >= max(estsick, knownsick) + max(estdead, knowndead)
+    if counts.get('population_count', None) is None:
+        return True
+    dead_count = max(counts.get('dead_count_estimated', None) or 0, counts.get('dead_count', None) or 0)
+    sick_count = max(counts.get('sick_count_estimated', None) or 0, counts.get('sick_count', None) or 0)
+    return counts['population_count'] >= dead_count + sick_count
+
+
+def species_estimated_count_is_valid(counts, count_type):
+    # If present, the estimated count must be higher than the known count (e.g., estimated_sick > sick),
+    #  where count_type is either 'sick' or 'dead'
+    estimated_count = counts.get(count_type + '_count_estimated', None)
+    known_count = counts.get(count_type + '_count', None)
+    return estimated_count is None or known_count is None or estimated_count > known_count
+
+
+def species_has_count(counts):
+    # at least one number between sick, dead, estimated_sick, and estimated_dead
+    return any((counts.get(count_field, None) or 0) > 0 for count_field in SPECIES_COUNT_FIELDS)
+
+
+def species_diagnosis_basis_is_valid(suspect, basis_id, diagnosis_id, organization_ids, laboratory_ids):
+    # Non-suspect diagnosis cannot have basis_of_dx = 1,2, or 4 (unless it is Undetermined).
+    #  If 3 is selected every organization must be a lab.
+    if suspect:
+        return True
+    if basis_id in [1, 2, 4]:
+        return diagnosis_id == get_system_diagnosis_id('Undetermined')
+    if basis_id == 3:
+        return all(get_bulk_import_id(org_id) in laboratory_ids for org_id in organization_ids)
+    return True
+
+
+def species_diagnosis_labs_are_unique(diagnosis_labs):
+    # A diagnosis can only be used once for a location-species-labID combination,
+    #  given a list of (diagnosis ID, lab ID) pairs of the diagnoses of one location species
+    return len(diagnosis_labs) == len(set(diagnosis_labs))
+
+
+class EventBulkImportSerializer(serializers.Serializer):
+    # Validates a list of complete event payloads (in the same shape as the payload of an EventSerializer create)
+    # with a fixed number of batched lookups, and then creates all of the events and their child records
+    # with one bulk insert per table in a single transaction.
+    # Locations submitted with coordinates but without a country or administrative level are located with the local
+    # boundary index. The flyway lookups (which require third party services) and the notifications are deferred
+    # to a background task.
+    events = serializers.ListField(child=serializers.DictField(), allow_empty=False, write_only=True)
+
+    event_fields = ['event_type', 'event_reference', 'complete', 'staff', 'event_status', 'legal_status',
+                    'legal_number', 'quality_check', 'public']
+    event_location_fields = ['name', 'start_date', 'end_date', 'country', 'administrative_level_one',
+                             'administrative_level_two', 'county_multiple', 'county_unknown', 'latitude', 'longitude',
+                             'land_ownership', 'gnis_name', 'gnis_id']
+    location_species_fields = ['species', 'population_count', 'sick_count', 'dead_count', 'sick_count_estimated',
+                               'dead_count_estimated', 'captive', 'age_bias', 'sex_bias']
+    species_diagnosis_fields = ['diagnosis', 'cause', 'basis', 'suspect', 'tested_count', 'diagnosis_count',
+                                'positive_count', 'suspect_count', 'pooled']
+    unsupported_fields = ['new_eventgroups', 'new_service_request', 'new_read_collaborators',
+                          'new_write_collaborators']
+    comment_types = {'site_description': 'Site description', 'history': 'History',
+                     'environmental_factors': 'Environmental factors', 'clinical_signs': 'Clinical signs',
+                     'comment': 'Other'}
+
+    @staticmethod
+    def build_instance(model, fields, item, **kwargs):
+        # relational fields are assigned by ID so that creating the instance does not query the database
+        for field_name in fields:
+            if field_name in item:
+                field = model._meta.get_field(field_name)
+                value = item[field_name]
+                if field.is_relation:
+                    kwargs[field.attname] = get_bulk_import_id(value) if value is not None else None
+                else:
+                    kwargs[field.attname] = value
+        return model(**kwargs)
+
+    def get_lookups(self, events):
+        # collect every related ID submitted in every event, then look up each related table only once
+        ids = {key: set() for key in ['event_type', 'staff', 'event_status', 'legal_status', 'organization',
+                                      'comment_type', 'country', 'administrative_level_one',
+                                      'administrative_level_two', 'land_ownership', 'species', 'age_bias',
+                                      'sex_bias', 'diagnosis', 'cause', 'basis', 'contact', 'contact_type']}
+
+        def collect(key, value):
+            value_id = get_bulk_import_id(value)
+            if value_id is not None:
+                ids[key].add(value_id)
+
+        for item in events:
+            for key in ['event_type', 'staff', 'event_status', 'legal_status']:
+                collect(key, item.get(key, Event._meta.get_field(key).get_default()))
+            for org_id in item.get('new_organizations', None) or []:
+                collect('organization', org_id)
+            for comment in item.get('new_comments', None) or []:
+                if isinstance(comment, dict):
+                    collect('comment_type', comment.get('comment_type', None))
+            for evt_diag in item.get('new_event_diagnoses', None) or []:
+                if isinstance(evt_diag, dict):
+                    collect('diagnosis', evt_diag.get('diagnosis', None))
+            for evt_loc in item.get('new_event_locations', None) or []:
+                if not isinstance(evt_loc, dict):
+                    continue
+                for key in ['country', 'administrative_level_one', 'administrative_level_two', 'land_ownership']:
+                    collect(key, evt_loc.get(key, None))
+                for loc_contact in evt_loc.get('new_location_contacts', None) or []:
+                    if isinstance(loc_contact, dict):
+                        collect('contact', loc_contact.get('contact', None))
+                        collect('contact_type', loc_contact.get('contact_type', None))
+                for loc_spec in evt_loc.get('new_location_species', None) or []:
+                    if not isinstance(loc_spec, dict):
+                        continue
+                    for key in ['species', 'age_bias', 'sex_bias']:
+                        collect(key, loc_spec.get(key, None))
+                    for spec_diag in loc_spec.get('new_species_diagnoses', None) or []:
+                        if not isinstance(spec_diag, dict):
+                            continue
+                        for key in ['diagnosis', 'cause', 'basis']:
+                            collect(key, spec_diag.get(key, None))
+                        for org_id in spec_diag.get('new_species_diagnosis_organizations', None) or []:
+                            collect('organization', org_id)
+
+        return {
+            'event_type': dict(EventType.objects.filter(id__in=ids['event_type']).values_list('id', 'name')),
+            'staff': set(Staff.objects.filter(id__in=ids['staff']).values_list('id', flat=True)),
+            'event_status': set(EventStatus.objects.filter(id__in=ids['event_status']).values_list('id', flat=True)),
+            'legal_status': set(LegalStatus.objects.filter(id__in=ids['legal_status']).values_list('id', flat=True)),
+            'organization': dict(Organization.objects.filter(
+                id__in=ids['organization']).values_list('id', 'laboratory')),
+            'comment_type': set(CommentType.objects.filter(id__in=ids['comment_type']).values_list('id', flat=True)),
+            'comment_type_name': dict(CommentType.objects.filter(
+                name__in=self.comment_types.values()).values_list('name', 'id')),
+            'country': set(Country.objects.filter(id__in=ids['country']).values_list('id', flat=True)),
+            'administrative_level_one': dict(AdministrativeLevelOne.objects.filter(
+                id__in=ids['administrative_level_one']).values_list('id', 'country')),
+            'administrative_level_two': dict(AdministrativeLevelTwo.objects.filter(
+                id__in=ids['administrative_level_two']).values_list('id', 'administrative_level_one')),
+            'administrative_level_two_name': dict(AdministrativeLevelTwo.objects.filter(
+                id__in=ids['administrative_level_two']).values_list('id', 'name')),
+            'land_ownership': set(LandOwnership.objects.filter(
+                id__in=ids['land_ownership']).values_list('id', flat=True)),
+            'species': dict(Species.objects.filter(id__in=ids['species']).values_list('id', 'name')),
+            'age_bias': set(AgeBias.objects.filter(id__in=ids['age_bias']).values_list('id', flat=True)),
+            'sex_bias': set(SexBias.objects.filter(id__in=ids['sex_bias']).values_list('id', flat=True)),
+            'diagnosis': dict(Diagnosis.objects.filter(id__in=ids['diagnosis']).values_list('id', 'name')),
+            'cause': set(DiagnosisCause.objects.filter(id__in=ids['cause']).values_list('id', flat=True)),
+            'basis': set(DiagnosisBasis.objects.filter(id__in=ids['basis']).values_list('id', flat=True)),
+            'contact': set(Contact.objects.filter(id__in=ids['contact']).values_list('id', flat=True)),
+            'contact_type': set(ContactType.objects.filter(
+                id__in=ids['contact_type']).values_list('id', flat=True)),
+        }
+
+    @staticmethod
+    def check_related_id(instance, field_name, valid_ids, details, label, required=False):
+        value_id = getattr(instance, field_name + '_id')
+        if value_id is None:
+            if required:
+                details.append(label + " " + field_name + " is a required field.")
+        elif value_id not in valid_ids:
+            details.append("A submitted " + field_name + " ID (" + str(value_id) + ") in " + label
+                           + " was not found in the database.")
+
+    def build_event(self, item, lookups, user):
+        # build the unsaved event and all of its unsaved child records, and validate them with the same rules
+        # as the EventSerializer (and its nested serializers), returning the built records and any error messages
+        details = []
+        unsupported = [key for key in self.unsupported_fields if item.get(key, None)]
+        if unsupported:
+            message = "The following fields are not supported by the bulk import: " + ", ".join(unsupported) + "."
+            message += " Create this event with the event create endpoint instead."
+            details.append(message)
+
+        event = self.build_instance(Event, self.event_fields, item, created_by=user, modified_by=user)
+        clean_bulk_import_fields(event, details, "event")
+        self.check_related_id(event, 'event_type', lookups['event_type'], details, "event", required=True)
+        self.check_related_id(event, 'staff', lookups['staff'], details, "event")
+        self.check_related_id(event, 'event_status', lookups['event_status'], details, "event")
+        self.check_related_id(event, 'legal_status', lookups['legal_status'], details, "event")
+        mortality_morbidity = lookups['event_type'].get(event.event_type_id, None) == 'Mortality/Morbidity'
+        laboratory_ids = {org_id for org_id, laboratory in lookups['organization'].items() if laboratory}
+        if not event.complete:
+            event.quality_check = None
+
+        built = {'event': event, 'organizations': [], 'comments': [], 'event_diagnoses': [], 'locations': []}
+
+        # only create unique records (silently ignore duplicates and unknown organizations, like the event create)
+        if item.get('new_organizations', None) is not None:
+            for org_id in item['new_organizations']:
+                org_id = get_bulk_import_id(org_id)
+                if org_id in lookups['organization'] and org_id not in built['organizations']:
+                    built['organizations'].append(org_id)
+        else:
+            built['organizations'].append(user.organization_id)
+
+        for comment in item.get('new_comments', None) or []:
+            if isinstance(comment, dict):
+                comment_type_id = get_bulk_import_id(comment.get('comment_type', None))
+                if comment_type_id in lookups['comment_type']:
+                    built['comments'].append(Comment(
+                        comment=comment.get('comment', ''), comment_type_id=comment_type_id,
+                        created_by=user, modified_by=user))
+
+        if not item.get('new_event_locations', None):
+            details.append("new_event_locations is a required field")
+            return built, details
+
+        min_start_date = False
+        min_location_species = False
+        min_species_count = False
+        for evt_loc_item in item['new_event_locations']:
+            if not isinstance(evt_loc_item, dict):
+                details.append("Each new_event_location must be an object.")
+                continue
+            evt_loc = self.build_instance(EventLocation, self.event_location_fields, evt_loc_item,
+                                          enrichment_status='pending', created_by=user, modified_by=user)
+            # if the event_location has no name value but does have a gnis_name value,
+            # then copy the value of gnis_name to name
+            if not evt_loc.name and evt_loc.gnis_name:
+                evt_loc.name = evt_loc.gnis_name
+            clean_bulk_import_fields(evt_loc, details, "new_event_location")
+            location = {'location': evt_loc, 'comments': [], 'contacts': [], 'species': []}
+            built['locations'].append(location)
+
+            if not location_has_required_comment(evt_loc_item):
+                message = "Each new_event_location requires at least one new_comment, which must be one of"
+                message += " the following types: Site description, History, Environmental factors, Clinical signs"
+                details.append(message)
+            for key, comment_type_name in self.comment_types.items():
+                comment_type_id = lookups['comment_type_name'].get(comment_type_name, None)
+                if evt_loc_item.get(key, None) and comment_type_id is not None:
+                    location['comments'].append(Comment(comment=evt_loc_item[key], comment_type_id=comment_type_id,
+                                                        created_by=user, modified_by=user))
+
+            # dates (already converted to python dates by clean_bulk_import_fields if they were valid)
+            start_date = evt_loc.start_date if isinstance(evt_loc.start_date, date) else None
+            end_date = evt_loc.end_date if isinstance(evt_loc.end_date, date) else None
+            if start_date is not None:
+                min_start_date = True
+            if not location_start_date_is_valid(start_date, mortality_morbidity):
+                message = "If event_type is 'Mortality/Morbidity'"
+                message += " start_date for a new event_location must be current date or earlier."
+                details.append(message)
+            if not location_end_date_is_valid(start_date, end_date):
+                details.append("end_date may not be before start_date.")
+            if event.complete and (start_date is None or end_date is None or end_date < start_date):
+                message = "The event may not be marked complete until all of its locations have an end date"
+                message += " and each location's end date is same as or after that location's start date."
+                details.append(message)
+
+            # country and administrative levels
+            # (any that were missing have already been filled in from the coordinates by locate_event_locations,
+            #  so a location still without them either has no coordinates or has coordinates outside every boundary)
+            if evt_loc.country_id is None or evt_loc.administrative_level_one_id is None:
+                if evt_loc_item.get('latitude', None) is None or evt_loc_item.get('longitude', None) is None:
+                    message = "country and administrative_level_one are required if latitude or longitude is null."
+                else:
+                    message = "A country matching the submitted latitude and longitude could not be found."
+                details.append(message)
+            self.check_related_id(evt_loc, 'country', lookups['country'], details, "new_event_locations")
+            self.check_related_id(evt_loc, 'administrative_level_one', lookups['administrative_level_one'],
+                                  details, "new_event_locations")
+            self.check_related_id(evt_loc, 'administrative_level_two', lookups['administrative_level_two'],
+                                  details, "new_event_locations")
+            self.check_related_id(evt_loc, 'land_ownership', lookups['land_ownership'], details,
+                                  "new_event_locations")
+            if not location_admin_levels_are_valid(
+                    evt_loc.country_id, evt_loc.administrative_level_one_id, evt_loc.administrative_level_two_id,
+                    lookups['administrative_level_one'], lookups['administrative_level_two']):
+                message = "administrative_level_one must belong to the submitted country,"
+                message += " and administrative_level_two must belong to the submitted administrative_level_one."
+                details.append(message)
+            if not location_coordinates_are_valid(evt_loc_item.get('latitude', None),
+                                                  evt_loc_item.get('longitude', None)):
+                message = "latitude and longitude must be in decimal degrees and represent a point in a country."
+                details.append(message)
+
+            for loc_contact in evt_loc_item.get('new_location_contacts', None) or []:
+                contact_id = get_bulk_import_id(loc_contact.get('contact', None)) if isinstance(
+                    loc_contact, dict) else None
+                if contact_id is None:
+                    details.append("A required contact ID was not included in new_location_contacts.")
+                elif contact_id not in lookups['contact']:
+                    message = "A submitted contact ID (" + str(contact_id)
+                    message += ") in new_location_contacts was not found in the database."
+                    details.append(message)
+                else:
+                    evt_loc_contact = self.build_instance(EventLocationContact, ['contact_type'], loc_contact,
+                                                          contact_id=contact_id, created_by=user, modified_by=user)
+                    self.check_related_id(evt_loc_contact, 'contact_type', lookups['contact_type'], details,
+                                          "new_location_contacts")
+                    location['contacts'].append(evt_loc_contact)
+
+            for loc_spec_item in evt_loc_item.get('new_location_species', None) or []:
+                if not isinstance(loc_spec_item, dict):
+                    details.append("Each new_location_species must be an object.")
+                    continue
+                loc_spec = self.build_instance(LocationSpecies, self.location_species_fields, loc_spec_item,
+                                               created_by=user, modified_by=user)
+                clean_bulk_import_fields(loc_spec, details, "new_location_species")
+                species = {'species': loc_spec, 'diagnoses': []}
+                location['species'].append(species)
+                if loc_spec.species_id is None:
+                    details.append("new_location_species species is a required field.")
+                elif loc_spec.species_id not in lookups['species']:
+                    message = "A submitted species ID (" + str(loc_spec.species_id)
+                    message += ") in new_location_species was not found in the database."
+                    details.append(message)
+                else:
+                    min_location_species = True
+                self.check_related_id(loc_spec, 'age_bias', lookups['age_bias'], details, "new_location_species")
+                self.check_related_id(loc_spec, 'sex_bias', lookups['sex_bias'], details, "new_location_species")
+
+                # the counts are only compared if they were valid integers
+                counts = {key: getattr(loc_spec, key) if isinstance(getattr(loc_spec, key), int) else None
+                          for key in ['population_count', 'sick_count', 'dead_count', 'sick_count_estimated',
+                                      'dead_count_estimated']}
+                if not species_population_count_is_valid(counts):
+                    message = "new_location_species population_count cannot be less than the sum of dead_count"
+                    message += " and sick_count (where those counts are the maximum of the estimated or known"
+                    message += " count)."
+                    details.append(message)
+                if not species_estimated_count_is_valid(counts, 'sick'):
+                    details.append("Estimated sick count must always be more than known sick count.")
+                if not species_estimated_count_is_valid(counts, 'dead'):
+                    details.append("Estimated dead count must always be more than known dead count.")
+                if mortality_morbidity:
+                    if species_has_count(counts):
+                        min_species_count = True
+                    elif event.complete:
+                        message = "Each new_location_species requires at least one species count in any of these"
+                        message += " fields: dead_count_estimated, dead_count, sick_count_estimated, sick_count."
+                        details.append(message)
+
+                spec_diag_items = loc_spec_item.get('new_species_diagnoses', None) or []
+                if event.complete and not spec_diag_items:
+                    details.append("Each new_location_species requires a basis of diagnosis")
+                    details.append("Each new_location_species requires a significance of diagnosis for species (cause)")
+                spec_diag_labs = []
+                for spec_diag_item in spec_diag_items:
+                    if not isinstance(spec_diag_item, dict):
+                        details.append("Each new_species_diagnosis must be an object.")
+                        continue
+                    spec_diag = self.build_instance(SpeciesDiagnosis, self.species_diagnosis_fields, spec_diag_item,
+                                                    created_by=user, modified_by=user)
+                    clean_bulk_import_fields(spec_diag, details, "new_species_diagnoses")
+                    self.check_related_id(spec_diag, 'diagnosis', lookups['diagnosis'], details,
+                                          "new_species_diagnoses", required=True)
+                    self.check_related_id(spec_diag, 'cause', lookups['cause'], details, "new_species_diagnoses")
+                    self.check_related_id(spec_diag, 'basis', lookups['basis'], details, "new_species_diagnoses")
+                    if event.complete and spec_diag.basis_id is None:
+                        details.append("Each new_location_species requires a basis of diagnosis")
+                    if event.complete and spec_diag.cause_id is None:
+                        details.append("Each new_location_species requires a significance of diagnosis for species (cause)")
+                    org_items = spec_diag_item.get('new_species_diagnosis_organizations', None) or []
+                    spec_diag_labs += [(spec_diag.diagnosis_id, org_id) for org_id in org_items]
+                    if not species_diagnosis_basis_is_valid(spec_diag.suspect, spec_diag.basis_id,
+                                                            spec_diag.diagnosis_id, org_items, laboratory_ids):
+                        message = "A non-suspect diagnosis can only have a basis of"
+                        message += " 'Necropsy and/or ancillary tests performed at a diagnostic laboratory'"
+                        message += " and only if that diagnosis has a related laboratory"
+                        details.append(message)
+                    # ensure this species diagnosis does not already exist (silently ignore duplicates)
+                    if spec_diag.diagnosis_id in [sd['diagnosis'].diagnosis_id for sd in species['diagnoses']]:
+                        continue
+                    org_ids = []
+                    for org_id in org_items:
+                        org_id = get_bulk_import_id(org_id)
+                        if org_id in lookups['organization'] and org_id not in org_ids:
+                            org_ids.append(org_id)
+                    species['diagnoses'].append({'diagnosis': spec_diag, 'organizations': org_ids})
+                if not species_diagnosis_labs_are_unique(spec_diag_labs):
+                    message = "A diagnosis can only be used once for any combination of a location, species, and lab."
+                    details.append(message)
+
+        if not min_start_date:
+            details.append("start_date is required for at least one new event_location.")
+        if not min_location_species:
+            details.append("Each new_event_location requires at least one new_location_species.")
+        if mortality_morbidity and not min_species_count:
+            message = "For Mortality/Morbidity events, at least one new_location_species requires"
+            message += " at least one species count in any of the following fields:"
+            message += " dead_count_estimated, dead_count, sick_count_estimated, sick_count."
+            details.append(message)
+
+        # event diagnoses
+        # remove Pending if in the list because it should never be submitted by the user
+        # and only allow diagnoses that are also used by this event's species diagnoses (or Undetermined)
+        spec_diag_ids = [sd['diagnosis'].diagnosis_id for loc in built['locations'] for spec in loc['species']
+                         for sd in spec['diagnoses']]
+        for evt_diag_item in item.get('new_event_diagnoses', None) or []:
+            if not isinstance(evt_diag_item, dict):
+                continue
+            diagnosis_id = get_bulk_import_id(evt_diag_item.get('diagnosis', None))
+            if diagnosis_id is None or diagnosis_id == get_system_diagnosis_id('Pending'):
+                continue
+            if diagnosis_id not in lookups['diagnosis']:
+                message = "A submitted diagnosis ID (" + str(diagnosis_id)
+                message += ") in new_event_diagnoses was not found in the database."
+                details.append(message)
+            elif diagnosis_id not in spec_diag_ids and diagnosis_id != get_system_diagnosis_id('Undetermined'):
+                message = "A diagnosis for Event Diagnosis must match a diagnosis of a Species Diagnosis of this event."
+                details.append(message)
+            elif diagnosis_id not in [ed.diagnosis_id for ed in built['event_diagnoses']]:
+                evt_diag = EventDiagnosis(diagnosis_id=diagnosis_id, created_by=user, modified_by=user,
+                                          suspect=evt_diag_item.get('suspect', True),
+                                          major=evt_diag_item.get('major', False))
+                clean_bulk_import_fields(evt_diag, details, "new_event_diagnoses")
+                built['event_diagnoses'].append(evt_diag)
+
+        # remove duplicate messages (but keep their order)
+        return built, list(dict.fromkeys(details))
+
+    @staticmethod
+    def locate_event_locations(item):
+        # return the submitted event with the missing country and administrative levels of each of its locations
+        # filled in from the location's coordinates, using the local boundary index so that no third party service
+        # is called during the import (any administrative level two that is still missing is looked up
+        # by the location enrichment task once the locations are inserted)
+        if not isinstance(item.get('new_event_locations', None), list):
+            return item
+        evt_loc_items = []
+        for evt_loc_item in item['new_event_locations']:
+            if (isinstance(evt_loc_item, dict) and evt_loc_item.get('latitude', None) is not None
+                    and evt_loc_item.get('longitude', None) is not None
+                    and None in [evt_loc_item.get(field, None) for field in LOCATION_BOUNDARY_FIELDS]):
+                try:
+                    local_location = reverse_geocode(evt_loc_item['latitude'], evt_loc_item['longitude'])
+                except (TypeError, ValueError):
+                    # invalid coordinates are reported by the validation of the location
+                    local_location = None
+                if local_location:
+                    evt_loc_item = dict(evt_loc_item)
+                    for field in LOCATION_BOUNDARY_FIELDS:
+                        if evt_loc_item.get(field, None) is None and local_location[field + '_id']:
+                            evt_loc_item[field] = local_location[field + '_id']
+            evt_loc_items.append(evt_loc_item)
+        return dict(item, new_event_locations=evt_loc_items)
+
+    def validate(self, data):
+        user = get_user(self.context, self.initial_data)
+        data['events'] = [self.locate_event_locations(item) for item in data['events']]
+        lookups = self.get_lookups(data['events'])
+        built_events = []
+        errors = {}
+        for index, item in enumerate(data['events']):
+            built, details = self.build_event(item, lookups, user)
+            if details:
+                errors[index] = details
+            built_events.append(built)
+        if errors:
+            # report the errors of every invalid event by its index in the submitted list
+            raise serializers.ValidationError(errors)
+        data['built_events'] = built_events
+        data['lookups'] = lookups
+        return data
+
+    @staticmethod
+    def prepare_event(built, lookups):
+        # fill in all of the values that the model save methods (and priority calculations) would otherwise set
+        # one record at a time: the event dates and affected_count, system diagnoses, suspect flags, and priorities
+        event = built['event']
+        user = event.created_by
+        diagnosis_names = lookups['diagnosis']
+        pending = get_system_diagnosis_id('Pending')
+        undetermined = get_system_diagnosis_id('Undetermined')
+        location_affected_counts = {}
+        confirmed_diagnosis_ids = set()
+
+        for location in built['locations']:
+            location_affected_count = 0
+            species_affected_counts = {}
+            for species in location['species']:
+                loc_spec = species['species']
+                for spec_diag in [sd['diagnosis'] for sd in species['diagnoses']]:
+                    # all "Pending" and "Undetermined" diagnosis must be confirmed (not suspect)
+                    if spec_diag.diagnosis_id in [pending, undetermined]:
+                        spec_diag.suspect = False
+                    # if pooled is selected, automatically list 1 for number_positive and number_suspect if zero or null
+                    if spec_diag.suspect and spec_diag.pooled:
+                        if not spec_diag.positive_count:
+                            spec_diag.positive_count = 1
+                        if not spec_diag.suspect_count:
+                            spec_diag.suspect_count = 1
+                    if not spec_diag.suspect:
+                        confirmed_diagnosis_ids.add(spec_diag.diagnosis_id)
+                # Order species diagnoses (see species_diagnosis_sort_key)
+                species['diagnoses'].sort(key=lambda sd: species_diagnosis_sort_key(
+                    sd['diagnosis'].cause_id, diagnosis_names[sd['diagnosis'].diagnosis_id]))
+                for priority, spec_diag in enumerate(species['diagnoses'], start=1):
+                    spec_diag['diagnosis'].priority = priority
+                species_affected_counts[id(species)] = priority_affected_count(
+                    event.event_type_id, loc_spec.affected_count,
+                    sum(sd['diagnosis'].positive_count or 0 for sd in species['diagnoses']))
+                location_affected_count += species_affected_counts[id(species)]
+            # Order species (see location_species_sort_key)
+            location['species'].sort(key=lambda spec: location_species_sort_key(
+                species_affected_counts[id(spec)], lookups['species'][spec['species'].species_id]))
+            for priority, species in enumerate(location['species'], start=1):
+                species['species'].priority = priority
+            location_affected_counts[id(location)] = location_affected_count
+
+        # Order locations (see event_location_sort_key)
+        county_names = {id(loc): lookups['administrative_level_two_name'].get(
+            loc['location'].administrative_level_two_id, None) for loc in built['locations']}
+        built['locations'].sort(key=lambda loc: event_location_sort_key(
+            county_names[id(loc)], location_affected_counts[id(loc)]))
+        for priority, location in enumerate(built['locations'], start=1):
+            location['location'].priority = priority
+
+        # Start date: Earliest date from locations to be used.
+        # End date: If 1 or more location end dates is null then leave blank, otherwise use latest date from locations.
+        start_dates = [loc['location'].start_date for loc in built['locations'] if loc['location'].start_date]
+        end_dates = [loc['location'].end_date for loc in built['locations']]
+        event.start_date = min(start_dates) if start_dates else None
+        event.end_date = None if not end_dates or None in end_dates else max(end_dates)
+        if event.event_type_id in [1, 2]:
+            event.affected_count = sum(location_affected_counts.values())
+        else:
+            event.affected_count = None
+
+        # an event diagnosis is confirmed if any species diagnosis with the same diagnosis is confirmed
+        # and there must always be at least one event diagnosis (Pending, or Undetermined if the event is complete)
+        for evt_diag in built['event_diagnoses']:
+            if evt_diag.diagnosis_id in confirmed_diagnosis_ids or evt_diag.diagnosis_id == undetermined:
+                evt_diag.suspect = False
+        if not built['event_diagnoses']:
+            built['event_diagnoses'].append(EventDiagnosis(
+                diagnosis_id=undetermined if event.complete else pending, suspect=False, created_by=user,
+                modified_by_id=get_system_admin_user_id()))
+            diagnosis_names.setdefault(built['event_diagnoses'][0].diagnosis_id, '')
+        # Order event diagnoses (see event_diagnosis_sort_key)
+        built['event_diagnoses'].sort(key=lambda ed: event_diagnosis_sort_key(diagnosis_names[ed.diagnosis_id]))
+        for priority, evt_diag in enumerate(built['event_diagnoses'], start=1):
+            evt_diag.priority = priority
+
+    def create(self, validated_data):
+        user = get_user(self.context, self.initial_data)
+        built_events = validated_data['built_events']
+        for built in built_events:
+            self.prepare_event(built, validated_data['lookups'])
+
+        with transaction.atomic():
+            # insert each table in bulk (with history), assigning the new parent IDs to the children in between
+            events = bulk_create_with_history(
+                [built['event'] for built in built_events], Event, default_user=user)
+
+            evt_orgs = []
+            evt_diags = []
+            comments = []
+            evt_locs = []
+            for built in built_events:
+                event_id = built['event'].id
+                for priority, org_id in enumerate(built['organizations'], start=1):
+                    evt_orgs.append(EventOrganization(event_id=event_id, organization_id=org_id, priority=priority,
+                                                      created_by=user, modified_by=user))
+                for evt_diag in built['event_diagnoses']:
+                    evt_diag.event_id = event_id
+                    evt_diags.append(evt_diag)
+                for comment in built['comments']:
+                    comment.content_type = ContentType.objects.get_for_model(Event)
+                    comment.object_id = event_id
+                    comments.append(comment)
+                for location in built['locations']:
+                    location['location'].event_id = event_id
+                    evt_locs.append(location['location'])
+            bulk_create_with_history(evt_orgs, EventOrganization, default_user=user)
+            bulk_create_with_history(evt_diags, EventDiagnosis, default_user=user)
+            bulk_create_with_history(evt_locs, EventLocation, default_user=user)
+
+            evt_loc_contacts = []
+            loc_specs = []
+            for built in built_events:
+                for location in built['locations']:
+                    evt_loc_id = location['location'].id
+                    for comment in location['comments']:
+                        comment.content_type = ContentType.objects.get_for_model(EventLocation)
+                        comment.object_id = evt_loc_id
+                        comments.append(comment)
+                    for evt_loc_contact in location['contacts']:
+                        evt_loc_contact.event_location_id = evt_loc_id
+                        evt_loc_contacts.append(evt_loc_contact)
+                    for species in location['species']:
+                        species['species'].event_location_id = evt_loc_id
+                        loc_specs.append(species['species'])
+            bulk_create_with_history(comments, Comment, default_user=user)
+            bulk_create_with_history(evt_loc_contacts, EventLocationContact, default_user=user)
+            bulk_create_with_history(loc_specs, LocationSpecies, default_user=user)
+
+            spec_diags = []
+            for built in built_events:
+                for location in built['locations']:
+                    for species in location['species']:
+                        for spec_diag in species['diagnoses']:
+                            spec_diag['diagnosis'].location_species_id = species['species'].id
+                            spec_diags.append(spec_diag['diagnosis'])
+            bulk_create_with_history(spec_diags, SpeciesDiagnosis, default_user=user)
+
+            spec_diag_orgs = []
+            for built in built_events:
+                for location in built['locations']:
+                    for species in location['species']:
+                        for spec_diag in species['diagnoses']:
+                            for org_id in spec_diag['organizations']:
+                                spec_diag_orgs.append(SpeciesDiagnosisOrganization(
+                                    species_diagnosis_id=spec_diag['diagnosis'].id, organization_id=org_id,
+                                    created_by=user, modified_by=user))
+            bulk_create_with_history(spec_diag_orgs, SpeciesDiagnosisOrganization, default_user=user)
+
+            # look up the flyways and send the notifications only once all of the records are committed
+            event_ids = [event.id for event in events]
+            evt_loc_ids = [evt_loc.id for evt_loc in evt_locs]
+            transaction.on_commit(lambda: enrich_event_locations.delay(evt_loc_ids, user.id))
+            transaction.on_commit(lambda: process_imported_events.delay(event_ids, user.id))
+
+        return events
+
+
 class EventEventGroupSerializer(serializers.ModelSerializer):
     created_by_string = serializers.StringRelatedField(source='created_by')
     modified_by_string = serializers.StringRelatedField(source='modified_by')
@@ -2009,14 +2462,9 @@ class EventLocationSerializer(serializers.ModelSerializer):
         lat = 'lat'
         geonames_params = {'name': adm1_name, 'featureCode': 'ADM1', 'country': country_code}
         geonames_params.update({'maxRows': 1, 'username': get_geonames_username()})
-        gr = requests.get(get_geonames_api() + geonames_endpoint, params=geonames_params)
         try:
-            try:
-                grj = gr.json()
-            except requests.exceptions.RequestException as e:
-                # email admins
-                send_third_party_service_exception_email('Geonames', get_geonames_api() + geonames_endpoint, e)
-                return None
+            gr = http_client.get('Geonames', get_geonames_api() + geonames_endpoint, params=geonames_params)
+            grj = gr.json()
             if gn in grj and len(grj[gn]) > 0 and lng in grj[gn][0] and lat in grj[gn][0]:
                 coords = {lng: grj[gn][0][lng], lat: grj[gn][0][lat]}
             return coords
@@ -2026,7 +2474,8 @@ class EventLocationSerializer(serializers.ModelSerializer):
             return None
 
     # find the centroid coordinates (lng/lat) for a county or equivalent
-    def search_geonames_adm2(self, adm2_name, adm1_name, adm1_code, country_code):
+    def search_geonames_adm2(self, adm2_name, adm1_code, country_code):
+        coords = None
         geonames_endpoint = 'searchJSON'
         gn = 'geonames'
         lng = 'lng'
@@ -2034,25 +2483,328 @@ class EventLocationSerializer(serializers.ModelSerializer):
         geonames_params = {'name': adm2_name, 'featureCode': 'ADM2'}
         geonames_params.update({'adminCode1': adm1_code, 'country': country_code})
         geonames_params.update({'maxRows': 1, 'username': get_geonames_username()})
-        gr = requests.get(get_geonames_api() + geonames_endpoint, params=geonames_params)
         try:
-            try:
-                grj = gr.json()
-            except requests.exceptions.RequestException as e:
-                # email admins
-                send_third_party_service_exception_email('Geonames', get_geonames_api() + geonames_endpoint, e)
-                return None
+            gr = http_client.get('Geonames', get_geonames_api() + geonames_endpoint, params=geonames_params)
+            grj = gr.json()
             if gn in grj and len(grj[gn]) > 0 and lng in grj[gn][0] and lat in grj[gn][0]:
                 coords = {lng: grj[gn][0][lng], lat: grj[gn][0][lat]}
-            else:
-                # adm2 search failed so look up the adm1 coordinates as a fallback
-                coords = self.search_geonames_adm1(adm1_name, country_code)
             return coords
         except Exception as e:
             # email admins
             send_third_party_service_exception_email('Geonames', get_geonames_api() + geonames_endpoint, e)
             return None
 
+    # find the centroid coordinates (lng/lat) for a state or equivalent, from its stored centroid if it has one,
+    # otherwise from Geonames, storing the result so that each state is only looked up once
+    def get_admin_l1_centroid(self, admin_l1, country):
+        if admin_l1.centroid_latitude is not None and admin_l1.centroid_longitude is not None:
+            return {'lng': admin_l1.centroid_longitude, 'lat': admin_l1.centroid_latitude}
+        coords = self.search_geonames_adm1(admin_l1.name, country.abbreviation)
+        if coords:
+            # written directly (without touching modified_date or creating history records),
+            # since the centroid is reference data rather than an edit by the user
+            AdministrativeLevelOne.objects.filter(id=admin_l1.id).update(
+                centroid_latitude=coords['lat'], centroid_longitude=coords['lng'])
+            admin_l1.centroid_latitude = coords['lat']
+            admin_l1.centroid_longitude = coords['lng']
+        return coords
+
+    # find the centroid coordinates (lng/lat) for a county or equivalent, from its stored centroid if it has one,
+    # otherwise from Geonames, storing the result so that each county is only looked up once
+    def get_admin_l2_centroid(self, admin_l2, admin_l1, country):
+        if admin_l2.centroid_latitude is not None and admin_l2.centroid_longitude is not None:
+            return {'lng': admin_l2.centroid_longitude, 'lat': admin_l2.centroid_latitude}
+        coords = self.search_geonames_adm2(admin_l2.name, admin_l1.abbreviation, country.abbreviation)
+        if coords:
+            AdministrativeLevelTwo.objects.filter(id=admin_l2.id).update(
+                centroid_latitude=coords['lat'], centroid_longitude=coords['lng'])
+            admin_l2.centroid_latitude = coords['lat']
+            admin_l2.centroid_longitude = coords['lng']
+        else:
+            # adm2 search failed so use the adm1 coordinates as a fallback
+            coords = self.get_admin_l1_centroid(admin_l1, country)
+        return coords
+
+    # find the flyway that contains a point, with the local flyway index if there is one,
+    # otherwise with the FWS flyway web service
+    def search_flyway(self, lng, lat):
+        if get_flyway_index() is not None:
+            flyway_id = locate_flyway(lat, lng)
+            return Flyway.objects.filter(id=flyway_id).first() if flyway_id else None
+        flyway = None
+        params = {'geometryType': 'esriGeometryPoint', 'returnGeometry': 'false',
+                  'outFields': 'NAME', 'f': 'json', 'spatialRel': 'esriSpatialRelIntersects'}
+        params.update({'geometry': str(lng) + ',' + str(lat)})
+        try:
+            r = http_client.get('FWS Flyways', get_flyways_api(), params=params)
+            rj = r.json()
+            if 'features' in rj and len(rj['features']) > 0:
+                flyway_name = rj['features'][0]['attributes']['NAME'].replace(' Flyway', '')
+                flyway = Flyway.objects.filter(name__contains=flyway_name).first()
+        except Exception as e:
+            # email admins
+            send_third_party_service_exception_email('FWS Flyways', get_flyways_api(), e)
+            # flyways is not a required field, the admins can populate it after investigating
+        return flyway
+
+    # determine the flyway of a location in the USA (exclude territories and minor outlying islands)
+    def determine_flyway(self, country, admin_l1, admin_l2, latitude, longitude):
+        flyway = None
+
+        # HI is not in a flyway, so assign to Pacific ("Include all of Hawaii in with Pacific Americas")
+        if admin_l1.abbreviation == 'HI':
+            flyway = Flyway.objects.filter(name__contains='Pacific').first()
+
+        elif country.abbreviation == 'USA' and admin_l1.abbreviation not in FLYWAY_TERRITORIES:
+            # counties and states that lie entirely inside one flyway are already mapped to it
+            # (by the map_admin_flyways management command), so no spatial overlay is needed
+            if admin_l2 is not None and admin_l2.flyway_id is not None:
+                flyway = Flyway.objects.filter(id=admin_l2.flyway_id).first()
+            elif admin_l1.flyway_id is not None:
+                flyway = Flyway.objects.filter(id=admin_l1.flyway_id).first()
+
+            # All others must be determined by spatial overlay
+            else:
+                coords = None
+                # if lat/lng is present, use it to get the intersecting flyway
+                if latitude is not None and longitude is not None:
+                    coords = {'lng': longitude, 'lat': latitude}
+                # otherwise if county is present,
+                # look up the county centroid and use it to get the intersecting flyway
+                elif admin_l2 is not None:
+                    coords = self.get_admin_l2_centroid(admin_l2, admin_l1, country)
+                # MT, WY, CO, and NM straddle two flyways, and without lat/lng or county info,
+                # flyway cannot be determined, otherwise look up the state centroid,
+                # then use it to get the intersecting flyway
+                elif admin_l1.abbreviation not in MULTIPLE_FLYWAY_STATES:
+                    coords = self.get_admin_l1_centroid(admin_l1, country)
+                if coords:
+                    flyway = self.search_flyway(coords['lng'], coords['lat'])
+
+        return flyway
+
+    # determine if a flyway can be found for a location at all (see determine_flyway), so that a location
+    # for which none is found is only retried and reported to the admins if one was expected
+    @staticmethod
+    def flyway_expected(country, admin_l1, admin_l2, latitude, longitude):
+        if admin_l1.abbreviation == 'HI':
+            return True
+        if country.abbreviation != 'USA' or admin_l1.abbreviation in FLYWAY_TERRITORIES:
+            return False
+        return ((latitude is not None and longitude is not None) or admin_l2 is not None
+                or admin_l1.flyway_id is not None or admin_l1.abbreviation not in MULTIPLE_FLYWAY_STATES)
+
+    # email admins that the local boundary index placed the submitted lat/lng in a different area than was submitted
+    def send_boundary_index_mismatch_email(self, data, field_name, label, model, located_id):
+        located = model.objects.filter(id=located_id).first()
+        message = f"The boundary index returned {label} ({located.name if located else located_id})"
+        message += " different from the one submitted by the user"
+        message += f" ({data[field_name].name}) when using the latitude"
+        message += " and longitude submitted by the user"
+        message += f" ({data['longitude']}, {data['latitude']})."
+        construct_email("WHISPERS ADMIN: Boundary Index Validation Warning", message)
+
+    # fill in the missing country and administrative levels of a location from its coordinates with Geonames,
+    # and return False if Geonames could not find an address (or a usable country code) for the coordinates
+    # (interactive is True when a user is waiting on the response, so that Geonames is not retried)
+    def geonames_reverse_geocode(self, data, interactive=False):
+        geonames_endpoint = 'extendedFindNearbyJSON'
+        GEONAMES_USERNAME = get_geonames_username()
+        GEONAMES_API = get_geonames_api()
+        address = None
+        payload = {'lat': data['latitude'], 'lng': data['longitude'], 'username': GEONAMES_USERNAME}
+        try:
+            try:
+                r = http_client.get('Geonames', GEONAMES_API + geonames_endpoint, params=payload,
+                                    interactive=interactive)
+                geonames_object_list = decode_json(r)
+            except requests.exceptions.RequestException as e:
+                # email admins
+                send_third_party_service_exception_email('Geonames', GEONAMES_API + geonames_endpoint, e)
+                geonames_object_list = []
+            if 'address' in geonames_object_list:
+                address = geonames_object_list['address']
+                address['adminName2'] = address['name']
+            elif 'geonames' in geonames_object_list:
+                gn_adm2 = [item for item in geonames_object_list['geonames'] if item['fcode'] == 'ADM2']
+                address = gn_adm2[0]
+        except Exception as e:
+            # email admins
+            send_third_party_service_exception_email('Geonames', GEONAMES_API + geonames_endpoint, e)
+        geonames_endpoint = 'countryInfoJSON'
+        if address:
+            if 'country' not in data or data['country'] is None:
+                country_code = address['countryCode']
+                if len(country_code) == 2:
+                    payload = {'country': country_code, 'username': GEONAMES_USERNAME}
+                    try:
+                        try:
+                            r = http_client.get('Geonames', GEONAMES_API + geonames_endpoint, params=payload,
+                                                interactive=interactive)
+                            content = decode_json(r)
+                        except requests.exceptions.RequestException as e:
+                            # email admins
+                            send_third_party_service_exception_email(
+                                'Geonames', GEONAMES_API + geonames_endpoint, e)
+                            content = []
+                        if ('geonames' in content and content['geonames'] is not None
+                                and len(content['geonames']) > 0 and 'isoAlpha3' in content['geonames'][0]):
+                            alpha3 = content['geonames'][0]['isoAlpha3']
+                            data['country'] = Country.objects.filter(abbreviation=alpha3).first()
+                    except Exception as e:
+                        # email admins
+                        send_third_party_service_exception_email(
+                            'Geonames', GEONAMES_API + geonames_endpoint, e)
+                elif len(country_code) == 3:
+                    data['country'] = Country.objects.filter(abbreviation=country_code).first()
+                else:
+                    return False
+            if 'administrative_level_one' not in data or data['administrative_level_one'] is None:
+                data['administrative_level_one'] = AdministrativeLevelOne.objects.filter(
+                    name=address['adminName1']).first()
+            if 'administrative_level_two' not in data or data['administrative_level_two'] is None:
+                admin2 = address['adminName2'] if 'adminName2' in address else address['name']
+                data['administrative_level_two'] = AdministrativeLevelTwo.objects.filter(name=admin2).first()
+        return address is not None
+
+    # check the submitted country and administrative levels against the submitted coordinates,
+    # emailing the admins about any mismatch (instead of causing a validation error, so the create can proceed)
+    def verify_coordinates(self, data):
+        latlng_submitted = ('latitude' in data and data['latitude'] is not None
+                            and 'longitude' in data and data['longitude'] is not None
+                            and 'country' in data and data['country'] is not None)
+        # locate the point offline with the local boundary index, and only fall back to Geonames if it cannot
+        local_location = reverse_geocode(data['latitude'], data['longitude']) if latlng_submitted else None
+        if local_location:
+            if data['country'].id != local_location['country_id']:
+                # Instead of causing a validation error, email admins and let the create proceed
+                self.send_boundary_index_mismatch_email(
+                    data, 'country', "a Country", Country, local_location['country_id'])
+            elif ('administrative_level_one' in data and data['administrative_level_one'] is not None
+                  and local_location['administrative_level_one_id']
+                  and data['administrative_level_one'].id != local_location['administrative_level_one_id']):
+                self.send_boundary_index_mismatch_email(
+                    data, 'administrative_level_one', "an Administrative Level One", AdministrativeLevelOne,
+                    local_location['administrative_level_one_id'])
+            elif ('administrative_level_two' in data and data['administrative_level_two'] is not None
+                  and local_location['administrative_level_two_id']
+                  and data['administrative_level_two'].id != local_location['administrative_level_two_id']):
+                self.send_boundary_index_mismatch_email(
+                    data, 'administrative_level_two', "an Administrative Level Two", AdministrativeLevelTwo,
+                    local_location['administrative_level_two_id'])
+        elif latlng_submitted:
+            geonames_endpoint = 'extendedFindNearbyJSON'
+            GEONAMES_USERNAME = get_geonames_username()
+            GEONAMES_API = get_geonames_api()
+            payload = {'lat': data['latitude'], 'lng': data['longitude'], 'username': GEONAMES_USERNAME}
+            geonames_latlng_url = requests.Request(
+                'GET', GEONAMES_API + geonames_endpoint, params=payload).prepare().url
+            try:
+                try:
+                    r = http_client.get('Geonames', GEONAMES_API + geonames_endpoint, params=payload)
+                    geonames_object_list = decode_json(r)
+                except requests.exceptions.RequestException as e:
+                    # email admins
+                    send_third_party_service_exception_email('Geonames', GEONAMES_API + geonames_endpoint, e)
+                    geonames_object_list = []
+                if 'address' in geonames_object_list:
+                    address = geonames_object_list['address']
+                    if 'name' in address:
+                        address['adminName2'] = address['name']
+                elif 'geonames' in geonames_object_list:
+                    gn_adm2 = [data for data in geonames_object_list['geonames'] if data['fcode'] == 'ADM2']
+                    # NOTE: some countries have fcode of PPL (city) instead of ADM2 immediately below ADM1,
+                    #  which are not in our database at this time, so skip over this
+                    address = gn_adm2[0] if gn_adm2 else None
+                else:
+                    # the response from the Geonames web service is in an unexpected format
+                    address = None
+            except Exception as e:
+                # email admins
+                send_third_party_service_exception_email('Geonames', GEONAMES_API + geonames_endpoint, e)
+                address = None
+            geonames_endpoint = 'countryInfoJSON'
+            if address:
+                country_code = address['countryCode']
+                country = None
+                if len(country_code) == 2:
+                    payload = {'country': country_code, 'username': GEONAMES_USERNAME}
+                    try:
+                        try:
+                            r = http_client.get('Geonames', GEONAMES_API + geonames_endpoint, params=payload)
+                            content = decode_json(r)
+                        except requests.exceptions.RequestException as e:
+                            # email admins
+                            send_third_party_service_exception_email(
+                                'Geonames', GEONAMES_API + geonames_endpoint, e)
+                            content = []
+                        if ('geonames' in content and content['geonames'] is not None
+                                and len(content['geonames']) > 0 and 'isoAlpha3' in content['geonames'][0]):
+                            alpha3 = content['geonames'][0]['isoAlpha3']
+                            country = Country.objects.filter(abbreviation=alpha3).first()
+                    except Exception as e:
+                        # email admins
+                        send_third_party_service_exception_email(
+                            'Geonames', GEONAMES_API + geonames_endpoint, e)
+                elif len(country_code) == 3:
+                    country = Country.objects.filter(abbreviation=country_code).first()
+                if not country:
+                    # Instead of causing a validation error, email admins and let the create proceed
+                    # latlng_country_found = False
+                    message = f"Geonames returned a Country ({country_code})"
+                    message += " that could not be found in the WHISPers database"
+                    message += f" when using the latitude and longitude submitted by the user"
+                    message += f" ({data['longitude']}, {data['latitude']})."
+                    message += f" The request made to Geonames was: {geonames_latlng_url}"
+                    construct_email("WHISPERS ADMIN: Third Party Service Validation Warning", message)
+                elif data['country'].id != country.id:
+                    # Instead of causing a validation error, email admins and let the create proceed
+                    # latlng_matches_country = False
+                    message = f"Geonames returned a Country ({country_code})"
+                    message += " different from the one submitted by the user"
+                    message += f" ({data['country'].name}) when using the latitude"
+                    message += " and longitude submitted by the user"
+                    message += f" ({data['longitude']}, {data['latitude']})."
+                    message += f" The request made to Geonames was: {geonames_latlng_url}"
+                    construct_email("WHISPERS ADMIN: Third Party Service Validation Warning", message)
+                # TODO: check submitted admin L1 and L2 against lat/lng, not just ids
+                elif ('administrative_level_one' in data
+                      and data['administrative_level_one'] is not None):
+                    admin_l1 = AdministrativeLevelOne.objects.filter(name=address['adminName1']).first()
+                    if not admin_l1 or data['administrative_level_one'].id != admin_l1.id:
+                        # Instead of causing a validation error, email admins and let the create proceed
+                        # latlng_matches_admin_l1 = False
+                        message = f"Geonames returned an Administrative Level One ({address['adminName1']})"
+                        message += " different from the one submitted by the user"
+                        message += f" ({data['administrative_level_one'].name}) when using the latitude"
+                        message += " and longitude submitted by the user"
+                        message += f" ({data['longitude']}, {data['latitude']})."
+                        message += f" The request made to Geonames was: {geonames_latlng_url}"
+                        construct_email("WHISPERS ADMIN: Third Party Service Validation Warning", message)
+                    elif ('administrative_level_two' in data
+                          and data['administrative_level_two'] is not None):
+                        admin_name2 = address['adminName2'] if 'adminName2' in address else address['name']
+                        admin_l2 = AdministrativeLevelTwo.objects.filter(
+                            name__icontains=admin_name2, administrative_level_one__id=admin_l1.id).first()
+                        if not admin_l2 or data['administrative_level_two'].id != admin_l2.id:
+                            # Instead of causing a validation error, email admins and let the create proceed
+                            # latlng_matches_admin_21 = False
+                            message = f"Geonames returned an Administrative Level Two ({admin_name2})"
+                            message += " different from the one submitted by the user"
+                            message += f" ({data['administrative_level_two'].name}) when using the latitude"
+                            message += " and longitude submitted by the user"
+                            message += f" ({data['longitude']}, {data['latitude']}).\r\n"
+                            message += f" The request made to Geonames was: {geonames_latlng_url}"
+                            construct_email("WHISPERS ADMIN: Third Party Service Validation Warning", message)
+            else:
+                # Instead of causing a validation error, email admins and let the create proceed
+                message = f"Geonames returned data in an unexpected format"
+                message += " that could not be validated against data in the WHISPers database"
+                message += f" when using the latitude and longitude submitted by the user"
+                message += f" ({data['longitude']}, {data['latitude']})."
+                message += f" The request made to Geonames was: {geonames_latlng_url}"
+                construct_email("WHISPERS ADMIN: Third Party Service Validation Warning", message)
+
     def validate(self, data):
 
         message_complete = "Locations from a complete event may not be changed"
@@ -2088,7 +2840,6 @@ class EventLocationSerializer(serializers.ModelSerializer):
                 latlng_matches_admin_l1 = True
                 latlng_matches_admin_21 = True
                 comments_is_valid = []
-                required_comment_types = ['site_description', 'history', 'environmental_factors', 'clinical_signs']
                 start_date_is_valid = True
                 end_date_is_valid = True
                 min_species_count = False
@@ -2099,217 +2850,62 @@ class EventLocationSerializer(serializers.ModelSerializer):
                 specdiag_lab_is_valid = True
                 details = []
                 mortality_morbidity = EventType.objects.filter(name='Mortality/Morbidity').first()
-                if [i for i in required_comment_types if i in data and data[i]]:
-                    comments_is_valid.append(True)
-                else:
-                    comments_is_valid.append(False)
-                if 'start_date' in data and data['start_date'] is not None:
-                    min_start_date = True
-                    if data['event'].event_type.id == mortality_morbidity.id and data['start_date'] > date.today():
-                        start_date_is_valid = False
-                    if 'end_date' in data and data['end_date'] is not None and data['end_date'] < data['start_date']:
-                        end_date_is_valid = False
-                elif 'end_date' in data and data['end_date'] is not None:
+                lookups = get_nested_location_lookups([data])
+                comments_is_valid.append(location_has_required_comment(data))
+                if not location_start_date_is_valid(data.get('start_date', None),
+                                                    data['event'].event_type.id == mortality_morbidity.id):
+                    start_date_is_valid = False
+                if not location_end_date_is_valid(data.get('start_date', None), data.get('end_date', None)):
                     end_date_is_valid = False
-                if ('country' in data and data['country'] is not None and 'administrative_level_one' in data
-                        and data['administrative_level_one'] is not None):
-                    admin_l1 = data['administrative_level_one']
-                    if data['country'].id != admin_l1.country.id:
-                        country_admin_is_valid = False
-                    if 'administrative_level_two' in data and data['administrative_level_two'] is not None:
-                        if admin_l1.id != data['administrative_level_two'].administrative_level_one.id:
-                            country_admin_is_valid = False
+                country = data.get('country', None)
+                admin_l1 = data.get('administrative_level_one', None)
+                admin_l2 = data.get('administrative_level_two', None)
+                if not location_admin_levels_are_valid(
+                        country.id if country else None, admin_l1.id if admin_l1 else None,
+                        admin_l2.id if admin_l2 else None, {admin_l1.id: admin_l1.country_id} if admin_l1 else {},
+                        {admin_l2.id: admin_l2.administrative_level_one_id} if admin_l2 else {}):
+                    country_admin_is_valid = False
                 if (('country' not in data or data['country'] is None or 'administrative_level_one' not in data
                      or data['administrative_level_one'] is None)
                         and ('latitude' not in data or data['latitude'] is None
                              or 'longitude' not in data and data['longitude'] is None)):
                     message = "country and administrative_level_one are required if latitude or longitude is null."
                     details.append(message)
-                if ('latitude' in data and data['latitude'] is not None
-                        and not re.match(r"(-?)([\d]{1,2})(\.)(\d+)", str(data['latitude']))):
-                    latlng_is_valid = False
-                if ('longitude' in data and data['longitude'] is not None
-                        and not re.match(r"(-?)([\d]{1,3})(\.)(\d+)", str(data['longitude']))):
+                if not location_coordinates_are_valid(data.get('latitude', None), data.get('longitude', None)):
                     latlng_is_valid = False
-                geonames_endpoint = 'extendedFindNearbyJSON'
-                GEONAMES_USERNAME = get_geonames_username()
-                GEONAMES_API = get_geonames_api()
-                if (latlng_is_valid
-                        and 'latitude' in data and data['latitude'] is not None
-                        and 'longitude' in data and data['longitude'] is not None
-                        and 'country' in data and data['country'] is not None):
-                    payload = {'lat': data['latitude'], 'lng': data['longitude'], 'username': GEONAMES_USERNAME}
-                    r = requests.get(GEONAMES_API + geonames_endpoint, params=payload, verify=settings.SSL_CERT)
-                    geonames_latlng_url = r.request.url
-                    try:
-                        try:
-                            geonames_object_list = decode_json(r)
-                        except requests.exceptions.RequestException as e:
-                            # email admins
-                            send_third_party_service_exception_email('Geonames', GEONAMES_API + geonames_endpoint, e)
-                            geonames_object_list = []
-                        if 'address' in geonames_object_list:
-                            address = geonames_object_list['address']
-                            if 'name' in address:
-                                address['adminName2'] = address['name']
-                        elif 'geonames' in geonames_object_list:
-                            gn_adm2 = [data for data in geonames_object_list['geonames'] if data['fcode'] == 'ADM2']
-                            # NOTE: some countries have fcode of PPL (city) instead of ADM2 immediately below ADM1,
-                            #  which are not in our database at this time, so skip over this
-                            address = gn_adm2[0] if gn_adm2 else None
-                        else:
-                            # the response from the Geonames web service is in an unexpected format
-                            address = None
-                    except Exception as e:
-                        # email admins
-                        send_third_party_service_exception_email('Geonames', GEONAMES_API + geonames_endpoint, e)
-                        address = None
-                    geonames_endpoint = 'countryInfoJSON'
-                    if address:
-                        country_code = address['countryCode']
-                        country = None
-                        if len(country_code) == 2:
-                            payload = {'country': country_code, 'username': GEONAMES_USERNAME}
-                            r = requests.get(GEONAMES_API + geonames_endpoint, params=payload, verify=settings.SSL_CERT)
-                            try:
-                                try:
-                                    content = decode_json(r)
-                                except requests.exceptions.RequestException as e:
-                                    # email admins
-                                    send_third_party_service_exception_email(
-                                        'Geonames', GEONAMES_API + geonames_endpoint, e)
-                                    content = []
-                                if ('geonames' in content and content['geonames'] is not None
-                                        and len(content['geonames']) > 0 and 'isoAlpha3' in content['geonames'][0]):
-                                    alpha3 = content['geonames'][0]['isoAlpha3']
-                                    country = Country.objects.filter(abbreviation=alpha3).first()
-                            except Exception as e:
-                                # email admins
-                                send_third_party_service_exception_email(
-                                    'Geonames', GEONAMES_API + geonames_endpoint, e)
-                        elif len(country_code) == 3:
-                            country = Country.objects.filter(abbreviation=country_code).first()
-                        if not country:
-                            # Instead of causing a validation error, email admins and let the create proceed
-                            # latlng_country_found = False
-                            message = f"Geonames returned a Country ({country_code})"
-                            message += " that could not be found in the WHISPers database"
-                            message += f" when using the latitude and longitude submitted by the user"
-                            message += f" ({data['longitude']}, {data['latitude']})."
-                            message += f" The request made to Geonames was: {geonames_latlng_url}"
-                            construct_email("WHISPERS ADMIN: Third Party Service Validation Warning", message)
-                        elif data['country'].id != country.id:
-                            # Instead of causing a validation error, email admins and let the create proceed
-                            # latlng_matches_country = False
-                            message = f"Geonames returned a Country ({country_code})"
-                            message += " different from the one submitted by the user"
-                            message += f" ({data['country'].name}) when using the latitude"
-                            message += " and longitude submitted by the user"
-                            message += f" ({data['longitude']}, {data['latitude']})."
-                            message += f" The request made to Geonames was: {geonames_latlng_url}"
-                            construct_email("WHISPERS ADMIN: Third Party Service Validation Warning", message)
-                        # TODO: check submitted admin L1 and L2 against lat/lng, not just ids
-                        elif ('administrative_level_one' in data
-                              and data['administrative_level_one'] is not None):
-                            admin_l1 = AdministrativeLevelOne.objects.filter(name=address['adminName1']).first()
-                            if not admin_l1 or data['administrative_level_one'].id != admin_l1.id:
-                                # Instead of causing a validation error, email admins and let the create proceed
-                                # latlng_matches_admin_l1 = False
-                                message = f"Geonames returned an Administrative Level One ({address['adminName1']})"
-                                message += " different from the one submitted by the user"
-                                message += f" ({data['administrative_level_one'].name}) when using the latitude"
-                                message += " and longitude submitted by the user"
-                                message += f" ({data['longitude']}, {data['latitude']})."
-                                message += f" The request made to Geonames was: {geonames_latlng_url}"
-                                construct_email("WHISPERS ADMIN: Third Party Service Validation Warning", message)
-                            elif ('administrative_level_two' in data
-                                  and data['administrative_level_two'] is not None):
-                                admin_name2 = address['adminName2'] if 'adminName2' in address else address['name']
-                                admin_l2 = AdministrativeLevelTwo.objects.filter(
-                                    name__icontains=admin_name2, administrative_level_one__id=admin_l1.id).first()
-                                if not admin_l2 or data['administrative_level_two'].id != admin_l2.id:
-                                    # Instead of causing a validation error, email admins and let the create proceed
-                                    # latlng_matches_admin_21 = False
-                                    message = f"Geonames returned an Administrative Level Two ({admin_name2})"
-                                    message += " different from the one submitted by the user"
-                                    message += f" ({data['administrative_level_two'].name}) when using the latitude"
-                                    message += " and longitude submitted by the user"
-                                    message += f" ({data['longitude']}, {data['latitude']}).\r\n"
-                                    message += f" The request made to Geonames was: {geonames_latlng_url}"
-                                    construct_email("WHISPERS ADMIN: Third Party Service Validation Warning", message)
-                    else:
-                        # Instead of causing a validation error, email admins and let the create proceed
-                        message = f"Geonames returned data in an unexpected format"
-                        message += " that could not be validated against data in the WHISPers database"
-                        message += f" when using the latitude and longitude submitted by the user"
-                        message += f" ({data['longitude']}, {data['latitude']})."
-                        message += f" The request made to Geonames was: {geonames_latlng_url}"
-                        construct_email("WHISPERS ADMIN: Third Party Service Validation Warning", message)
                 if 'new_location_species' in data:
                     for spec in data['new_location_species']:
                         if 'species' in spec and spec['species'] is not None:
-                            if Species.objects.filter(id=spec['species']).first() is None:
+                            if get_bulk_import_id(spec['species']) not in lookups['species']:
                                 message = "A submitted species ID (" + str(spec['species'])
                                 message += ") in new_location_species was not found in the database."
                                 details.append(message)
                             else:
                                 min_location_species = True
-                        if 'population_count' in spec and spec['population_count'] is not None:
-                            dead_count = 0
-                            sick_count = 0
-                            if 'dead_count_estimated' in spec or 'dead_count' in spec:
-                                dead_count = max(spec.get('dead_count_estimated') or 0, spec.get('dead_count') or 0)
-                            if 'sick_count_estimated' in spec or 'sick_count' in spec:
-                                sick_count = max(spec.get('sick_count_estimated') or 0, spec.get('sick_count') or 0)
-                            if spec['population_count'] >= dead_count + sick_count:
-                                pop_is_valid.append(True)
-                            else:
-                                pop_is_valid.append(False)
-                        if ('sick_count_estimated' in spec and spec['sick_count_estimated'] is not None
-                                and 'sick_count' in spec and spec['sick_count'] is not None
-                                and not spec['sick_count_estimated'] > spec['sick_count']):
+                        pop_is_valid.append(species_population_count_is_valid(spec))
+                        if not species_estimated_count_is_valid(spec, 'sick'):
                             est_sick_is_valid = False
-                        if ('dead_count_estimated' in spec and spec['dead_count_estimated'] is not None
-                                and 'dead_count' in spec and spec['dead_count'] is not None
-                                and not spec['dead_count_estimated'] > spec['dead_count']):
+                        if not species_estimated_count_is_valid(spec, 'dead'):
                             est_dead_is_valid = False
-                        if data['event'].event_type.id == mortality_morbidity.id:
-                            if ('dead_count_estimated' in spec and spec['dead_count_estimated'] is not None
-                                    and spec['dead_count_estimated'] > 0):
-                                min_species_count = True
-                            elif 'dead_count' in spec and spec['dead_count'] is not None and spec['dead_count'] > 0:
-                                min_species_count = True
-                            elif ('sick_count_estimated' in spec and spec['sick_count_estimated'] is not None
-                                  and spec['sick_count_estimated'] > 0):
-                                min_species_count = True
-                            elif 'sick_count' in spec and spec['sick_count'] is not None and spec['sick_count'] > 0:
-                                min_species_count = True
+                        if data['event'].event_type.id == mortality_morbidity.id and species_has_count(spec):
+                            min_species_count = True
                         if 'new_species_diagnoses' in spec and spec['new_species_diagnoses'] is not None:
                             specdiag_labs = []
                             for specdiag in spec['new_species_diagnoses']:
-                                [specdiag_labs.append((specdiag['diagnosis'], specdiag_lab)) for specdiag_lab in
-                                 specdiag['new_species_diagnosis_organizations']]
-                                if not specdiag['suspect']:
-                                    if specdiag['basis'] in [1, 2, 4]:
-                                        undetermined = list(Diagnosis.objects.filter(
-                                            name='Undetermined').values_list('id', flat=True))[0]
-                                        if specdiag['diagnosis'] != undetermined:
-                                            specdiag_nonsuspect_basis_is_valid = False
-                                    elif specdiag['basis'] == 3:
-                                        if ('new_species_diagnosis_organizations' in specdiag
-                                                and specdiag['new_species_diagnosis_organizations'] is not None):
-                                            for org_id in specdiag['new_species_diagnosis_organizations']:
-                                                org = Organization.objects.filter(id=org_id).first()
-                                                if not org or not org.laboratory:
-                                                    specdiag_nonsuspect_basis_is_valid = False
-                            if len(specdiag_labs) != len(set(specdiag_labs)):
+                                specdiag_orgs = specdiag.get('new_species_diagnosis_organizations', None) or []
+                                specdiag_labs += [(specdiag['diagnosis'], org_id) for org_id in specdiag_orgs]
+                                if not species_diagnosis_basis_is_valid(
+                                        specdiag['suspect'], specdiag['basis'], specdiag['diagnosis'],
+                                        specdiag_orgs, lookups['laboratory']):
+                                    specdiag_nonsuspect_basis_is_valid = False
+                            if not species_diagnosis_labs_are_unique(specdiag_labs):
                                 specdiag_lab_is_valid = False
                     if 'new_location_contacts' in data and data['new_location_contacts'] is not None:
                         for loc_contact in data['new_location_contacts']:
                             if 'contact' not in loc_contact or loc_contact['contact'] is None:
                                 message = "A required contact ID was not included in new_location_contacts."
                                 details.append(message)
-                            elif Contact.objects.filter(id=loc_contact['contact']).first() is None:
+                            elif get_bulk_import_id(loc_contact['contact']) not in lookups['contact']:
                                 message = "A submitted contact ID (" + str(loc_contact['contact'])
                                 message += ") in new_location_contacts was not found in the database."
                                 details.append(message)
@@ -2376,9 +2972,11 @@ class EventLocationSerializer(serializers.ModelSerializer):
 
         return data
 
+    # create the event location and all of its child objects in a single transaction (or savepoint, if this is part
+    # of a full event chain create), so that if there is an error in a child object, the whole create is rolled back
+    @transaction.atomic
     def create(self, validated_data):
         user = get_user(self.context, self.initial_data)
-        flyway = None
 
         comment_types = {'site_description': 'Site description', 'history': 'History',
                          'environmental_factors': 'Environmental factors', 'clinical_signs': 'Clinical signs',
@@ -2412,165 +3010,30 @@ class EventLocationSerializer(serializers.ModelSerializer):
                      or validated_data['administrative_level_one'] is None
                      or 'administrative_level_two' not in validated_data
                      or validated_data['administrative_level_two'] is None)):
-            geonames_endpoint = 'extendedFindNearbyJSON'
-            GEONAMES_USERNAME = get_geonames_username()
-            GEONAMES_API = get_geonames_api()
-            address = None
-            payload = {'lat': validated_data['latitude'], 'lng': validated_data['longitude'],
-                       'username': GEONAMES_USERNAME}
-            r = requests.get(GEONAMES_API + geonames_endpoint, params=payload, verify=settings.SSL_CERT)
-            try:
-                try:
-                    geonames_object_list = decode_json(r)
-                except requests.exceptions.RequestException as e:
-                    # email admins
-                    send_third_party_service_exception_email('Geonames', GEONAMES_API + geonames_endpoint, e)
-                    geonames_object_list = []
-                if 'address' in geonames_object_list:
-                    address = geonames_object_list['address']
-                    address['adminName2'] = address['name']
-                elif 'geonames' in geonames_object_list:
-                    gn_adm2 = [item for item in geonames_object_list['geonames'] if item['fcode'] == 'ADM2']
-                    address = gn_adm2[0]
-            except Exception as e:
-                # email admins
-                send_third_party_service_exception_email('Geonames', GEONAMES_API + geonames_endpoint, e)
-            geonames_endpoint = 'countryInfoJSON'
-            if address:
-                if 'country' not in validated_data or validated_data['country'] is None:
-                    country_code = address['countryCode']
-                    if len(country_code) == 2:
-                        payload = {'country': country_code, 'username': GEONAMES_USERNAME}
-                        r = requests.get(GEONAMES_API + geonames_endpoint, params=payload, verify=settings.SSL_CERT)
-                        try:
-                            try:
-                                content = decode_json(r)
-                            except requests.exceptions.RequestException as e:
-                                # email admins
-                                send_third_party_service_exception_email(
-                                    'Geonames', GEONAMES_API + geonames_endpoint, e)
-                                content = []
-                            if ('geonames' in content and content['geonames'] is not None
-                                    and len(content['geonames']) > 0 and 'isoAlpha3' in content['geonames'][0]):
-                                alpha3 = content['geonames'][0]['isoAlpha3']
-                                validated_data['country'] = Country.objects.filter(abbreviation=alpha3).first()
-                        except Exception as e:
-                            # email admins
-                            send_third_party_service_exception_email(
-                                'Geonames', GEONAMES_API + geonames_endpoint, e)
-                    elif len(country_code) == 3:
-                        validated_data['country'] = Country.objects.filter(abbreviation=country_code).first()
-                    else:
-                        # fail POST because country and admin levels one and two are required
-                        if self.initial_data['FULL_EVENT_CHAIN_CREATE']:
-                            # delete the parent event, which will also delete this event location thru a cascade
-                            validated_data['event'].delete()
-                        message = "A country matching the submitted latitude and longitude could not be found."
-                        raise serializers.ValidationError(message)
-                if ('administrative_level_one' not in validated_data
-                        or validated_data['administrative_level_one'] is None):
-                    validated_data['administrative_level_one'] = AdministrativeLevelOne.objects.filter(
-                        name=address['adminName1']).first()
-                if ('administrative_level_two' not in validated_data
-                        or validated_data['administrative_level_two'] is None):
-                    admin2 = address['adminName2'] if 'adminName2' in address else address['name']
-                    validated_data['administrative_level_two'] = AdministrativeLevelTwo.objects.filter(
-                        name=admin2).first()
-            else:
-                # fail POST because country and admin levels one and two are required
-                if self.initial_data['FULL_EVENT_CHAIN_CREATE']:
-                    # delete the parent event, which will also delete this event location thru a cascade
-                    validated_data['event'].delete()
-                message = "A country matching the submitted latitude and longitude could not be found."
-                raise serializers.ValidationError(message)
+            # locate the point offline with the local boundary index
+            local_location = reverse_geocode(validated_data['latitude'], validated_data['longitude'])
+            if local_location:
+                location_fields = {'country': Country, 'administrative_level_one': AdministrativeLevelOne,
+                                   'administrative_level_two': AdministrativeLevelTwo}
+                for field, model in location_fields.items():
+                    if validated_data.get(field) is None and local_location[field + '_id']:
+                        validated_data[field] = model.objects.filter(id=local_location[field + '_id']).first()
+            # the country and administrative level one are required to save the location, so if the boundary index
+            # could not find them, fall back to Geonames now (whereas a missing administrative level two is looked up
+            # by the location enrichment task once the location is saved)
+            if validated_data.get('country') is None or validated_data.get('administrative_level_one') is None:
+                if not self.geonames_reverse_geocode(validated_data, interactive=True):
+                    # fail POST because country and admin levels one and two are required
+                    message = "A country matching the submitted latitude and longitude could not be found."
+                    raise serializers.ValidationError(message)
 
         # create the event_location and return object for use in child objects
+        validated_data['enrichment_status'] = 'pending'
         evt_location = EventLocation.objects.create(**validated_data)
 
-        # auto-assign flyway for locations in the USA (exclude territories and minor outlying islands)
-
-        # HI is not in a flyway, so assign to Pacific ("Include all of Hawaii in with Pacific Americas")
-        if validated_data['administrative_level_one'].abbreviation == 'HI':
-            flyway = Flyway.objects.filter(name__contains='Pacific').first()
-
-        # All others must be determined by spatial overlay
-        else:
-            # first test the FWS flyway web service to confirm it is working
-            test_params = {'geometryType': 'esriGeometryPoint', 'returnGeometry': 'false'}
-            test_params.update({'outFields': 'NAME', 'f': 'json', 'spatialRel': 'esriSpatialRelIntersects'})
-            test_params.update({'geometry': '-90.0,45.0'})
-            r = requests.get(get_flyways_api(), params=test_params, verify=settings.SSL_CERT)
-            try:
-                try:
-                    rj = r.json()
-                except requests.exceptions.RequestException as e:
-                    # email admins
-                    send_third_party_service_exception_email('FWS Flyways', get_flyways_api(), e)
-                    # flyways is not a required field, the admins can populate it after investigating
-                    pass
-                if 'features' in r.json():
-                    territories = ['PR', 'VI', 'MP', 'AS', 'UM', 'NOPO', 'SOPO']
-                    country = validated_data['country']
-                    admin_l1 = validated_data['administrative_level_one']
-                    admin_l2 = validated_data['administrative_level_two']
-                    if (country.id == Country.objects.filter(abbreviation='USA').first().id
-                            and admin_l1.abbreviation not in territories):
-                        params = {'geometryType': 'esriGeometryPoint', 'returnGeometry': 'false',
-                                  'outFields': 'NAME', 'f': 'json', 'spatialRel': 'esriSpatialRelIntersects'}
-                        # if lat/lng is present, use it to get the intersecting flyway
-                        if ('latitude' in validated_data and validated_data['latitude'] is not None
-                                and 'longitude' in validated_data and validated_data['longitude'] is not None):
-                            geom = str(validated_data['longitude']) + ',' + str(validated_data['latitude'])
-                            params.update({'geometry': geom})
-                        # otherwise if county is present,
-                        # look up the county centroid and use it to get the intersecting flyway
-                        elif admin_l2 is not None:
-                            coords = self.search_geonames_adm2(
-                                admin_l2.name, admin_l1.name, admin_l1.abbreviation, country.abbreviation)
-                            if coords:
-                                params.update({'geometry': coords['lng'] + ',' + coords['lat']})
-                        # MT, WY, CO, and NM straddle two flyways, and without lat/lng or county info,
-                        # flyway cannot be determined, otherwise look up the state centroid,
-                        # then use it to get the intersecting flyway
-                        elif admin_l1.abbreviation not in ['MT', 'WY', 'CO', 'NM', 'HI']:
-                            coords = self.search_geonames_adm1(admin_l1.name, country.abbreviation)
-                            if coords:
-                                params.update({'geometry': coords['lng'] + ',' + coords['lat']})
-                        # Look up the flyway from the FWS flyway web service
-                        if 'geometry' in params:
-                            r = requests.get(get_flyways_api(), params=params, verify=settings.SSL_CERT)
-                            try:
-                                try:
-                                    rj = r.json()
-                                except requests.exceptions.RequestException as e:
-                                    # email admins
-                                    send_third_party_service_exception_email('FWS Flyways', get_flyways_api(), e)
-                                    # flyways is not a required field, the admins can populate it after investigating
-                                    pass
-                                if 'features' in rj and len(rj['features']) > 0:
-                                    flyway_name = rj['features'][0]['attributes']['NAME'].replace(' Flyway', '')
-                                    flyway = Flyway.objects.filter(name__contains=flyway_name).first()
-                            except Exception as e:
-                                # email admins
-                                send_third_party_service_exception_email('FWS Flyways', get_flyways_api(), e)
-                                # flyways is not a required field, the admins can populate it after investigating
-                                pass
-            except Exception as e:
-                # email admins
-                send_third_party_service_exception_email('FWS Flyways', get_flyways_api(), e)
-                # flyways is not a required field, the admins can populate it after investigating
-                pass
-
-        if flyway is not None:
-            EventLocationFlyway.objects.create(event_location=evt_location, flyway=flyway,
-                                               created_by=user, modified_by=user)
-        else:
-            # No flyway can be determined
-            # Instead of causing a validation error, email admins and let the create proceed
-            message = f"No flyway could be determined from the data submitted by the user"
-            message += f" for Event Location {evt_location.name} (ID {evt_location.id})"
-            message += f" in Event {evt_location.event.event_reference} (ID {evt_location.event.id})."
-            construct_email("WHISPERS ADMIN: No Flyway Validation Warning", message)
+        # look up the flyway (and any missing administrative level two) and check the coordinates in the background
+        # once the location is committed, so that the request does not wait on any third party services
+        transaction.on_commit(lambda: enrich_event_locations.delay([evt_location.id], user.id))
 
         # Create EventLocationSpecies
         if new_location_species is not None:
@@ -2595,13 +3058,6 @@ class EventLocationSerializer(serializers.ModelSerializer):
                 for item in valid_data:
                     item.save()
             else:
-                if self.initial_data['FULL_EVENT_CHAIN_CREATE']:
-                    # delete the parent event, which will also delete this event location thru a cascade
-                    evt_location.event.delete()
-                else:
-                    # delete this event location
-                    # (related contacts and comments will be cascade deleted automatically if any exist)
-                    evt_location.delete()
                 raise serializers.ValidationError(jsonify_errors(errors))
 
         for key, value in comment_types.items():
@@ -2696,10 +3152,10 @@ class EventLocationSerializer(serializers.ModelSerializer):
         private_fields = ('id', 'name', 'event', 'start_date', 'end_date', 'country', 'country_string',
                           'administrative_level_one', 'administrative_level_one_string', 'administrative_level_two',
                           'administrative_level_two_string', 'county_multiple', 'county_unknown', 'latitude', 'longitude',
-                          'priority', 'land_ownership', 'flyways', 'contacts', 'gnis_name', 'gnis_id', 'comments',
-                          'site_description', 'history', 'environmental_factors', 'clinical_signs', 'comment',
-                          'new_location_contacts', 'new_location_species', 'created_date', 'created_by',
-                          'created_by_string', 'modified_date', 'modified_by', 'modified_by_string',)
+                          'priority', 'land_ownership', 'flyways', 'enrichment_status', 'contacts', 'gnis_name',
+                          'gnis_id', 'comments', 'site_description', 'history', 'environmental_factors',
+                          'clinical_signs', 'comment', 'new_location_contacts', 'new_location_species', 'created_date',
+                          'created_by', 'created_by_string', 'modified_date', 'modified_by', 'modified_by_string',)
 
         if action == 'create' or (user and user.is_authenticated):
             if action == 'create' or user.role.is_superadmin or user.role.is_admin:
@@ -2732,7 +3188,8 @@ class EventLocationSerializer(serializers.ModelSerializer):
         fields = '__all__'
         extra_kwargs = {
             'country': {'required': False},
-            'administrative_level_one': {'required': False}
+            'administrative_level_one': {'required': False},
+            'enrichment_status': {'read_only': True}
         }
 
 
@@ -2781,7 +3238,7 @@ class AdministrativeLevelOneSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = AdministrativeLevelOne
-        fields = ('id', 'name', 'country', 'country_string', 'abbreviation',
+        fields = ('id', 'name', 'country', 'country_string', 'abbreviation', 'centroid_latitude', 'centroid_longitude',
                   'created_date', 'created_by', 'created_by_string',
                   'modified_date', 'modified_by', 'modified_by_string',)
 
@@ -2907,25 +3364,11 @@ class LocationSpeciesSerializer(serializers.ModelSerializer):
                 est_dead_is_valid = True
                 details = []
 
-                if 'population_count' in data and data['population_count'] is not None:
-                    if data['population_count'] == 0:
-                        pop_is_valid = False
-                    else:
-                        dead_count = 0
-                        sick_count = 0
-                        if 'dead_count_estimated' in data or 'dead_count' in data:
-                            dead_count = max(data.get('dead_count_estimated') or 0, data.get('dead_count') or 0)
-                        if 'sick_count_estimated' in data or 'sick_count' in data:
-                            sick_count = max(data.get('sick_count_estimated') or 0, data.get('sick_count') or 0)
-                        if data['population_count'] < dead_count + sick_count:
-                            pop_is_valid = False
-                if ('sick_count_estimated' in data and data['sick_count_estimated'] is not None
-                        and 'sick_count' in data and data['sick_count'] is not None
-                        and data['sick_count_estimated'] <= data['sick_count']):
+                if data.get('population_count', None) == 0 or not species_population_count_is_valid(data):
+                    pop_is_valid = False
+                if not species_estimated_count_is_valid(data, 'sick'):
                     est_sick_is_valid = False
-                if ('dead_count_estimated' in data and data['dead_count_estimated'] is not None
-                        and 'dead_count' in data and data['dead_count'] is not None
-                        and data['dead_count_estimated'] <= data['dead_count']):
+                if not species_estimated_count_is_valid(data, 'dead'):
                     est_dead_is_valid = False
                 mm = EventType.objects.filter(name='Mortality/Morbidity').first()
                 mm_lsps = None
@@ -2933,16 +3376,7 @@ class LocationSpeciesSerializer(serializers.ModelSerializer):
                     locspecs = LocationSpecies.objects.filter(event_location=data['event_location'].id)
                     mm_lsps = [locspec for locspec in locspecs if locspec.event_location.event.event_type.id == mm.id]
                     if mm_lsps is None:
-                        if ('dead_count_estimated' in data and data['dead_count_estimated'] is not None
-                                and data['dead_count_estimated'] > 0):
-                            min_species_count = True
-                        elif 'dead_count' in data and data['dead_count'] is not None and data['dead_count'] > 0:
-                            min_species_count = True
-                        elif ('sick_count_estimated' in data and data['sick_count_estimated'] is not None
-                              and data['sick_count_estimated'] > 0):
-                            min_species_count = True
-                        elif 'sick_count' in data and data['sick_count'] is not None and data['sick_count'] > 0:
-                            min_species_count = True
+                        min_species_count = species_has_count(data)
 
                 if not pop_is_valid:
                     message = "New location_species population_count cannot be less than the sum of dead_count"
@@ -3043,6 +3477,9 @@ class LocationSpeciesSerializer(serializers.ModelSerializer):
 
         return data
 
+    # create the location species and all of its child objects in a single transaction (or savepoint, if this is part
+    # of a full event chain create), so that if there is an error in a child object, the whole create is rolled back
+    @transaction.atomic
     def create(self, validated_data):
         new_species_diagnoses = validated_data.pop('new_species_diagnoses', None)
 
@@ -3075,14 +3512,6 @@ class LocationSpeciesSerializer(serializers.ModelSerializer):
                 for item in valid_data:
                     item.save()
             else:
-                if self.initial_data['FULL_EVENT_CHAIN_CREATE']:
-                    # delete the parent event, which will also delete this location species thru a cascade
-                    location_species.event_location.event.delete()
-                    # content_type = ContentType.objects.get_for_model(self.Meta.model).model
-                    # cascade_delete_event_chain(content_type, location_species.event_location.event.id)
-                else:
-                    # delete this location species
-                    location_species.delete()
                 raise serializers.ValidationError(jsonify_errors(errors))
 
         # calculate the priority value:
@@ -3822,8 +4251,8 @@ class ServiceRequestSerializer(serializers.ModelSerializer):
             except KeyError as e:
                 send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
                 body = ""
-            generate_notification.delay(msg_tmp.id, recipients, source, event_id, 'event', subject, body,
-                                        True, email_to)
+            generate_notification_on_commit(msg_tmp.id, recipients, source, event_id, 'event', subject, body,
+                                            True, email_to)
 
         return service_request
 
@@ -3898,9 +4327,13 @@ class NotificationSerializer(serializers.ModelSerializer):
     modified_by_string = serializers.StringRelatedField(source='modified_by')
 
     def update(self, instance, validated_data):
-        # only the 'read' field can be updated
+        # only the 'read' field can be updated (adjusting the recipient's unread notification count if it changed)
+        was_read = instance.read
         instance.read = validated_data.get('read', instance.read)
-        instance.save()
+        with transaction.atomic():
+            instance.save()
+            if instance.read != was_read:
+                adjust_notification_counts({instance.recipient_id: (0, -1 if instance.read else 1)})
         return instance
 
     class Meta:
@@ -4334,8 +4767,8 @@ class UserSerializer(serializers.ModelSerializer):
                 last_name=user.last_name,
                 verification_link=verification_link)
             event = None
-            generate_notification.delay(msg_tmp.id, recipients, source, event, 'homepage', subject, body,
-                                        True, email_to)
+            generate_notification_on_commit(msg_tmp.id, recipients, source, event, 'homepage', subject, body,
+                                            True, email_to)
 
     def update(self, instance, validated_data):
         requesting_user = get_user(self.context, self.initial_data)
@@ -4586,8 +5019,8 @@ class UserChangeRequestSerializer(serializers.ModelSerializer):
             email_to = list(User.objects.exclude(is_active=False).filter(
                 Q(id=1) | Q(role=3, organization=ucr.organization_requested.id) | Q(role=3, organization__in=org_list)
             ).values_list('email', flat=True))
-            generate_notification.delay(msg_tmp.id, recipients, source, event, 'userdashboard', subject, body,
-                                        True, email_to)
+            generate_notification_on_commit(msg_tmp.id, recipients, source, event, 'userdashboard', subject, body,
+                                            True, email_to)
 
         # also create a 'User Change Request Response Pending' notification
         msg_tmp = NotificationMessageTemplate.objects.filter(name='User Change Request Response Pending').first()
@@ -4604,8 +5037,8 @@ class UserChangeRequestSerializer(serializers.ModelSerializer):
             recipients = [ucr.created_by.id, ]
             # email forwarding: Automatic to the user's email
             email_to = [ucr.created_by.email, ]
-            generate_notification.delay(msg_tmp.id, recipients, source, event, 'userdashboard', subject, body,
-                                        True, email_to)
+            generate_notification_on_commit(msg_tmp.id, recipients, source, event, 'userdashboard', subject, body,
+                                            True, email_to)
 
         return ucr
 
@@ -4674,8 +5107,8 @@ class UserChangeRequestSerializer(serializers.ModelSerializer):
                         role__in=[1, 2]).values_list('id', flat=True)) + [instance.requester.id, ]
                     # email forwarding: Automatic, to user's email and to whispers@usgs.gov
                     email_to = [User.objects.filter(id=1).values('email').first()['email'], instance.requester.email, ]
-                    generate_notification.delay(msg_tmp.id, recipients, source, event, 'homepage', subject, body,
-                                                True, email_to)
+                    generate_notification_on_commit(msg_tmp.id, recipients, source, event, 'homepage', subject, body,
+                                                    True, email_to)
             elif instance.request_response.name == 'No':
                 msg_tmp = NotificationMessageTemplate.objects.filter(name='User Change Request Response No').first()
                 if not msg_tmp:
@@ -4692,8 +5125,8 @@ class UserChangeRequestSerializer(serializers.ModelSerializer):
                         role__in=[1, 2]).values_list('id', flat=True)) + [instance.requester.id, ]
                     # email forwarding: Automatic, to user's email and to whispers@usgs.gov
                     email_to = [User.objects.filter(id=1).values('email').first()['email'], instance.requester.email, ]
-                    generate_notification.delay(msg_tmp.id, recipients, source, event, 'homepage', subject, body,
-                                                True, email_to)
+                    generate_notification_on_commit(msg_tmp.id, recipients, source, event, 'homepage', subject, body,
+                                                    True, email_to)
 
         return instance
 
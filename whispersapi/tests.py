@@ -1,3 +1,767 @@
-from django.test import TestCase
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from unittest import mock
+from pytz import timezone
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from whispersapi import geocoding, scheduled_tasks
+from whispersapi.geocoding import BoundaryIndex, reverse_geocode
+from whispersapi.immediate_tasks import generate_notification, generate_notifications
+from whispersapi.models import *
+from whispersapi.serializers import (EventBulkImportSerializer, calculate_priority_event_diagnosis,
+                                     calculate_priority_event_location, calculate_priority_location_species,
+                                     calculate_priority_species_diagnosis, location_admin_levels_are_valid,
+                                     location_end_date_is_valid, species_estimated_count_is_valid,
+                                     species_population_count_is_valid)
+from whispersapi.scheduled_tasks import (STANDARD_NOTIFICATION_TEMPLATES, CustomNotificationCueMatcher, EventChanges,
+                                         get_standard_notification_audiences)
 
-# Create your tests here.
+
+class HistoryModelSaveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.get_or_create(name='Partner')[0]
+        cls.user = User.objects.create(username='saver', email='saver@example.org', role=role)
+        cls.other_user = User.objects.create(username='toucher', email='toucher@example.org', role=role)
+        cls.last_week = date.today() - timedelta(days=7)
+        # insert the event directly, skipping the Event save method and its recalculations
+        event_type = EventType.objects.get_or_create(name='Mortality/Morbidity')[0]
+        Event.objects.bulk_create([Event(
+            event_type=event_type, event_reference='original', affected_count=0, created_by=cls.user,
+            modified_by=cls.user, created_date=cls.last_week)])
+        cls.event_id = Event.objects.get(event_reference='original').id
+        # (modified_date is set automatically when inserted, so backdate it afterwards)
+        Event.objects.filter(id=cls.event_id).update(modified_date=cls.last_week)
+
+    def test_no_op_save_writes_nothing(self):
+        land_ownership = LandOwnership.objects.create(name='Test Land Ownership', created_by=self.user, modified_by=self.user)
+        LandOwnership.objects.filter(id=land_ownership.id).update(modified_date=self.last_week)
+        land_ownership = LandOwnership.objects.get(id=land_ownership.id)
+        history_count = land_ownership.history.count()
+
+        land_ownership.save()
+
+        self.assertEqual(land_ownership.history.count(), history_count)
+        self.assertEqual(LandOwnership.objects.get(id=land_ownership.id).modified_date, self.last_week)
+
+    def test_partial_save_writes_only_changed_fields(self):
+        land_ownership = LandOwnership.objects.create(name='Test Land Ownership', created_by=self.user, modified_by=self.user)
+        LandOwnership.objects.filter(id=land_ownership.id).update(modified_date=self.last_week)
+        land_ownership = LandOwnership.objects.get(id=land_ownership.id)
+        history_count = land_ownership.history.count()
+        # a change made to the database behind the back of the loaded instance
+        LandOwnership.objects.filter(id=land_ownership.id).update(modified_by=self.other_user)
+
+        land_ownership.name = 'Renamed Land Ownership'
+        land_ownership.save()
+
+        saved = LandOwnership.objects.get(id=land_ownership.id)
+        self.assertEqual(saved.name, 'Renamed Land Ownership')
+        self.assertEqual(saved.modified_by_id, self.other_user.id)
+        self.assertEqual(saved.modified_date, date.today())
+        self.assertEqual(land_ownership.history.count(), history_count + 1)
+
+    def test_update_fields_save_keeps_requested_modified_date(self):
+        land_ownership = LandOwnership.objects.create(name='Test Land Ownership', created_by=self.user, modified_by=self.user)
+        LandOwnership.objects.filter(id=land_ownership.id).update(modified_date=self.last_week)
+        land_ownership = LandOwnership.objects.get(id=land_ownership.id)
+
+        land_ownership.name = 'Renamed Land Ownership'
+        land_ownership.save(update_fields=['name', 'modified_date'])
+
+        self.assertEqual(LandOwnership.objects.get(id=land_ownership.id).modified_date, date.today())
+
+    def test_touch_moves_modified_date_to_today(self):
+        event = Event.objects.get(id=self.event_id)
+        history_count = event.history.count()
+
+        # the modified_date passed in equals the stored one, as when touched by a child modified on the same date
+        event.touch(self.other_user, self.last_week)
+
+        touched = Event.objects.get(id=self.event_id)
+        self.assertEqual(touched.modified_by_id, self.other_user.id)
+        self.assertEqual(touched.modified_date, date.today())
+        self.assertEqual(touched.event_reference, 'original')
+        self.assertEqual(event.history.count(), history_count + 1)
+
+    def test_touch_without_changes_writes_nothing(self):
+        event = Event.objects.get(id=self.event_id)
+        history_count = event.history.count()
+
+        event.touch(self.user, self.last_week)
+
+        self.assertEqual(Event.objects.get(id=self.event_id).modified_date, self.last_week)
+        self.assertEqual(event.history.count(), history_count)
+
+
+class SystemRecordsCacheTests(TestCase):
+
+    def setUp(self):
+        clear_system_records_cache()
+        self.addCleanup(clear_system_records_cache)
+        diagnosis_type = DiagnosisType.objects.get_or_create(name='Other')[0]
+        self.pending_id = Diagnosis.objects.get_or_create(
+            name='Pending', defaults={'diagnosis_type': diagnosis_type})[0].id
+
+    def test_changes_made_by_other_processes_are_read_once_the_cache_expires(self):
+        self.assertEqual(get_system_diagnosis_id('Pending'), self.pending_id)
+        # a change that does not reach this process's receivers, as when made by another process
+        Diagnosis.objects.filter(id=self.pending_id).update(name='Renamed Pending')
+        self.assertEqual(get_system_diagnosis_id('Pending'), self.pending_id)
+
+        with mock.patch('whispersapi.models.time.monotonic',
+                        return_value=time.monotonic() + SYSTEM_RECORDS_CACHE_TIMEOUT):
+            self.assertIsNone(get_system_diagnosis_id('Pending'))
+
+    def test_saving_a_diagnosis_clears_the_cache(self):
+        self.assertEqual(get_system_diagnosis_id('Pending'), self.pending_id)
+        diagnosis = Diagnosis.objects.get(id=self.pending_id)
+        diagnosis.name = 'Renamed Pending'
+        diagnosis.save()
+
+        self.assertIsNone(get_system_diagnosis_id('Pending'))
+
+
+class EventAffectedCountTests(TransactionTestCase):
+
+    def setUp(self):
+        # the tables are emptied after each test, so forget any system records cached by earlier tests
+        clear_system_records_cache()
+        role = Role.objects.get_or_create(name='Partner')[0]
+        self.user = User.objects.create(username='test_counter', email='test_counter@example.org', role=role)
+        # the Mortality/Morbidity event type and the default event and legal statuses are referred to by ID
+        event_type = EventType.objects.get_or_create(id=1, defaults={'name': 'Mortality/Morbidity'})[0]
+        EventStatus.objects.get_or_create(id=1, defaults={'name': 'Draft'})
+        LegalStatus.objects.get_or_create(id=1, defaults={'name': 'N/A'})
+        country = Country.objects.create(name='Test Country', abbreviation='TC')
+        admin_level_one = AdministrativeLevelOne.objects.create(name='Test State', country=country)
+        species = Species.objects.create(name='Test Species')
+        # insert the event and its children directly, skipping their save methods, with an affected_count of 0
+        Event.objects.bulk_create([Event(event_type=event_type, event_reference='counted', affected_count=0,
+                                         created_by=self.user, modified_by=self.user)])
+        self.event_id = Event.objects.get(event_reference='counted').id
+        EventLocation.objects.bulk_create([EventLocation(
+            event_id=self.event_id, name='Test Location', country=country, administrative_level_one=admin_level_one,
+            created_by=self.user, modified_by=self.user)])
+        event_location = EventLocation.objects.get(event_id=self.event_id)
+        LocationSpecies.objects.bulk_create([LocationSpecies(
+            event_location=event_location, species=species, priority=priority, created_by=self.user,
+            modified_by=self.user) for priority in [1, 2]])
+
+    def get_location_species(self):
+        return list(LocationSpecies.objects.filter(event_location__event_id=self.event_id).order_by('priority'))
+
+    def assertAffectedCount(self, expected_count):
+        affected_count = Event.objects.get(id=self.event_id).affected_count
+        self.assertEqual(affected_count, calculate_event_affected_count(self.event_id, 1))
+        self.assertEqual(affected_count, expected_count)
+
+    def test_changes_of_children_adjust_the_affected_count(self):
+        first, second = self.get_location_species()
+
+        first.dead_count = 5
+        first.save()
+        second.sick_count_estimated = 3
+        second.save()
+        first.dead_count_estimated = 8
+        first.save()
+        self.assertAffectedCount(11)
+
+        second.delete()
+        self.assertAffectedCount(8)
+
+    def test_concurrent_changes_of_children_keep_the_affected_count(self):
+        # both children are loaded before either changes
+        first, second = self.get_location_species()
+
+        def save_second():
+            try:
+                second.dead_count = 7
+                second.save()
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=save_second)
+        with transaction.atomic():
+            first.dead_count = 5
+            first.save()
+            thread.start()
+            # the second save waits for this transaction to commit before reading the event's count
+            thread.join(timeout=1)
+            self.assertTrue(thread.is_alive())
+        thread.join()
+
+        self.assertAffectedCount(12)
+
+
+class ChildPriorityTests(TestCase):
+
+    def setUp(self):
+        role = Role.objects.get_or_create(name='Partner')[0]
+        self.user = User.objects.create(username='test_prioritizer', email='test_prioritizer@example.org', role=role)
+        self.event_type = EventType.objects.get_or_create(id=1, defaults={'name': 'Mortality/Morbidity'})[0]
+        EventStatus.objects.get_or_create(id=1, defaults={'name': 'Draft'})
+        LegalStatus.objects.get_or_create(id=1, defaults={'name': 'N/A'})
+        country = Country.objects.create(name='Test Country', abbreviation='TC')
+        admin_level_one = AdministrativeLevelOne.objects.create(name='Test State', country=country)
+        self.counties = {name: AdministrativeLevelTwo.objects.create(
+            name=name, administrative_level_one=admin_level_one) for name in ['Adams', 'Baker']}
+        self.species = {name: Species.objects.get_or_create(name=name)[0] for name in ['Duck', 'Goose']}
+        diagnosis_type = DiagnosisType.objects.get_or_create(name='Other')[0]
+        self.diagnoses = {name: Diagnosis.objects.get_or_create(
+            name=name, defaults={'diagnosis_type': diagnosis_type})[0] for name in ['Avian Cholera', 'Botulism']}
+        self.cause = DiagnosisCause.objects.get_or_create(name='Cause of Death')[0]
+        self.country = country
+        self.admin_level_one = admin_level_one
+        # each location: (name, county name, [(species name, dead, estimated dead, [(diagnosis name, has cause)])]);
+        # the Baker Big Duck (5 dead) outranks the Goose (2 dead, 4 estimated), because the larger of the two counts
+        # is used, not their sum, and the location without a county goes last despite having the most dead
+        self.locations = [
+            ('No County', None, [('Duck', 50, None, [])]),
+            ('Baker Small', 'Baker', [('Duck', 1, None, [])]),
+            ('Baker Big', 'Baker', [('Goose', 2, 4, []),
+                                    ('Duck', 5, None, [('Avian Cholera', False), ('Botulism', True)])]),
+            ('Adams', 'Adams', [('Duck', 1, None, [])]),
+        ]
+        self.event_diagnoses = ['Botulism', 'Avian Cholera']
+        self.expected_priorities = {
+            'Adams': 1, 'Baker Big': 2, 'Baker Small': 3, 'No County': 4,
+            ('Baker Big', 'Duck'): 1, ('Baker Big', 'Goose'): 2,
+            ('Baker Big', 'Duck', 'Botulism'): 1, ('Baker Big', 'Duck', 'Avian Cholera'): 2,
+            'Avian Cholera': 1, 'Botulism': 2,
+        }
+
+    def new_location(self, name, county_name, **kwargs):
+        county = self.counties[county_name] if county_name else None
+        return EventLocation(name=name, country=self.country, administrative_level_one=self.admin_level_one,
+                             administrative_level_two=county, created_by=self.user, modified_by=self.user, **kwargs)
+
+    def new_location_species(self, species_name, dead, dead_estimated, **kwargs):
+        return LocationSpecies(species=self.species[species_name], dead_count=dead, dead_count_estimated=dead_estimated,
+                               created_by=self.user, modified_by=self.user, **kwargs)
+
+    def new_species_diagnosis(self, diagnosis_name, has_cause, **kwargs):
+        return SpeciesDiagnosis(diagnosis=self.diagnoses[diagnosis_name], cause=self.cause if has_cause else None,
+                                suspect=False, created_by=self.user, modified_by=self.user, **kwargs)
+
+    def get_expected(self, priorities):
+        return {key: priority for key, priority in priorities.items() if key in self.expected_priorities}
+
+    def test_single_records_are_prioritized_by_the_shared_rules(self):
+        # insert the event and its children directly, skipping their save methods, without priorities
+        Event.objects.bulk_create([Event(event_type=self.event_type, event_reference='prioritized',
+                                         created_by=self.user, modified_by=self.user)])
+        event = Event.objects.get(event_reference='prioritized')
+        records = {}
+        for location_name, county_name, species_items in self.locations:
+            location = self.new_location(location_name, county_name, event=event)
+            EventLocation.objects.bulk_create([location])
+            records[location_name] = location = EventLocation.objects.get(event=event, name=location_name)
+            for species_name, dead, dead_estimated, diagnosis_items in species_items:
+                LocationSpecies.objects.bulk_create([self.new_location_species(
+                    species_name, dead, dead_estimated, event_location=location)])
+                records[(location_name, species_name)] = loc_spec = LocationSpecies.objects.get(
+                    event_location=location, species=self.species[species_name])
+                for diagnosis_name, has_cause in diagnosis_items:
+                    SpeciesDiagnosis.objects.bulk_create([self.new_species_diagnosis(
+                        diagnosis_name, has_cause, location_species=loc_spec)])
+                    records[(location_name, species_name, diagnosis_name)] = SpeciesDiagnosis.objects.get(
+                        location_species=loc_spec, diagnosis=self.diagnoses[diagnosis_name])
+        for diagnosis_name in self.event_diagnoses:
+            EventDiagnosis.objects.bulk_create([EventDiagnosis(
+                event=event, diagnosis=self.diagnoses[diagnosis_name], created_by=self.user, modified_by=self.user)])
+            records[diagnosis_name] = EventDiagnosis.objects.get(event=event, diagnosis=self.diagnoses[diagnosis_name])
+
+        # calculating the priority of one record of each group also renumbers its siblings
+        calculate_priorities = [
+            ('No County', calculate_priority_event_location),
+            (('Baker Big', 'Goose'), calculate_priority_location_species),
+            (('Baker Big', 'Duck', 'Avian Cholera'), calculate_priority_species_diagnosis),
+            ('Botulism', calculate_priority_event_diagnosis),
+        ]
+        for key, calculate_priority in calculate_priorities:
+            record = records[key]
+            type(record).objects.filter(id=record.id).update(priority=calculate_priority(record))
+
+        priorities = {key: type(record).objects.get(id=record.id).priority for key, record in records.items()}
+        self.assertEqual(self.get_expected(priorities), self.expected_priorities)
+
+    def test_bulk_imported_records_are_prioritized_by_the_shared_rules(self):
+        built = {'event': Event(event_type=self.event_type, created_by=self.user, modified_by=self.user),
+                 'locations': [], 'event_diagnoses': []}
+        records = {}
+        for location_name, county_name, species_items in self.locations:
+            location = {'location': self.new_location(location_name, county_name), 'species': []}
+            built['locations'].append(location)
+            records[location_name] = location['location']
+            for species_name, dead, dead_estimated, diagnosis_items in species_items:
+                species = {'species': self.new_location_species(species_name, dead, dead_estimated), 'diagnoses': []}
+                location['species'].append(species)
+                records[(location_name, species_name)] = species['species']
+                for diagnosis_name, has_cause in diagnosis_items:
+                    species['diagnoses'].append({'diagnosis': self.new_species_diagnosis(diagnosis_name, has_cause)})
+                    records[(location_name, species_name, diagnosis_name)] = species['diagnoses'][-1]['diagnosis']
+        for diagnosis_name in self.event_diagnoses:
+            built['event_diagnoses'].append(EventDiagnosis(
+                diagnosis=self.diagnoses[diagnosis_name], created_by=self.user, modified_by=self.user))
+            records[diagnosis_name] = built['event_diagnoses'][-1]
+        lookups = {
+            'diagnosis': {diagnosis.id: name for name, diagnosis in self.diagnoses.items()},
+            'species': {species.id: name for name, species in self.species.items()},
+            'administrative_level_two_name': {county.id: name for name, county in self.counties.items()},
+        }
+
+        EventBulkImportSerializer.prepare_event(built, lookups)
+
+        priorities = {key: record.priority for key, record in records.items()}
+        self.assertEqual(self.get_expected(priorities), self.expected_priorities)
+
+
+class EventBulkImportLocationTests(SimpleTestCase):
+
+    def setUp(self):
+        index = geocoding.BoundaryIndex()
+        index.add({'country_id': 1, 'administrative_level_one_id': 10, 'administrative_level_two_id': 100},
+                  [[[(-91, 44), (-89, 44), (-89, 46), (-91, 46), (-91, 44)]]])
+        self.saved_indexes = dict(geocoding._indexes)
+        geocoding._indexes['BOUNDARIES_FILE'] = index
+
+    def tearDown(self):
+        geocoding._indexes.clear()
+        geocoding._indexes.update(self.saved_indexes)
+
+    def test_locations_with_only_coordinates_are_located(self):
+        item = {'new_event_locations': [{'name': 'a', 'latitude': 45.5, 'longitude': -90.5}]}
+
+        located = EventBulkImportSerializer.locate_event_locations(item)
+
+        self.assertEqual(located['new_event_locations'][0], {
+            'name': 'a', 'latitude': 45.5, 'longitude': -90.5, 'country': 1, 'administrative_level_one': 10,
+            'administrative_level_two': 100})
+        # the submitted event is not changed
+        self.assertNotIn('country', item['new_event_locations'][0])
+
+    def test_submitted_boundaries_are_kept(self):
+        item = {'new_event_locations': [{'latitude': 45.5, 'longitude': -90.5, 'country': 2,
+                                         'administrative_level_one': 20}]}
+
+        located = EventBulkImportSerializer.locate_event_locations(item)
+
+        self.assertEqual(located['new_event_locations'][0]['country'], 2)
+        self.assertEqual(located['new_event_locations'][0]['administrative_level_one'], 20)
+        self.assertEqual(located['new_event_locations'][0]['administrative_level_two'], 100)
+
+    def test_locations_outside_every_boundary_or_with_invalid_coordinates_are_unchanged(self):
+        evt_loc_items = [{'latitude': 10.5, 'longitude': 10.5}, {'latitude': 'abc', 'longitude': -90.5}, {}]
+
+        located = EventBulkImportSerializer.locate_event_locations({'new_event_locations': evt_loc_items})
+
+        self.assertEqual(located['new_event_locations'], evt_loc_items)
+
+
+class SharedValidatorTests(SimpleTestCase):
+
+    def test_location_end_date(self):
+        self.assertTrue(location_end_date_is_valid(date(2020, 1, 1), None))
+        self.assertTrue(location_end_date_is_valid(date(2020, 1, 1), date(2020, 1, 1)))
+        self.assertFalse(location_end_date_is_valid(date(2020, 1, 2), date(2020, 1, 1)))
+        self.assertFalse(location_end_date_is_valid(None, date(2020, 1, 1)))
+
+    def test_location_admin_levels(self):
+        admin_l1_countries = {10: 1}
+        admin_l2_admin_l1s = {100: 10}
+        self.assertTrue(location_admin_levels_are_valid(1, 10, 100, admin_l1_countries, admin_l2_admin_l1s))
+        self.assertTrue(location_admin_levels_are_valid(1, None, None, admin_l1_countries, admin_l2_admin_l1s))
+        self.assertFalse(location_admin_levels_are_valid(2, 10, None, admin_l1_countries, admin_l2_admin_l1s))
+        self.assertFalse(location_admin_levels_are_valid(1, 10, 200, admin_l1_countries, admin_l2_admin_l1s))
+
+    def test_species_counts(self):
+        self.assertTrue(species_population_count_is_valid({'population_count': 10, 'dead_count': 3,
+                                                           'dead_count_estimated': 5, 'sick_count': 5}))
+        self.assertFalse(species_population_count_is_valid({'population_count': 10, 'dead_count_estimated': 6,
+                                                            'sick_count': 5}))
+        self.assertTrue(species_estimated_count_is_valid({'sick_count_estimated': 5, 'sick_count': None}, 'sick'))
+        self.assertFalse(species_estimated_count_is_valid({'dead_count_estimated': 5, 'dead_count': 5}, 'dead'))
+
+
+class BoundaryIndexTests(SimpleTestCase):
+
+    @staticmethod
+    def square(west, south, east, north):
+        return [(west, south), (east, south), (east, north), (west, north), (west, south)]
+
+    def setUp(self):
+        state = {'country_id': 1, 'administrative_level_one_id': 10, 'administrative_level_two_id': None}
+        county = {'country_id': 1, 'administrative_level_one_id': 10, 'administrative_level_two_id': 100}
+        lake_county = {'country_id': 1, 'administrative_level_one_id': 10, 'administrative_level_two_id': 101}
+        islands = {'country_id': 2, 'administrative_level_one_id': 20, 'administrative_level_two_id': None}
+        self.geojson = {'type': 'FeatureCollection', 'features': [
+            # a state spanning several grid cells, with a county inside it
+            {'type': 'Feature', 'properties': state,
+             'geometry': {'type': 'Polygon', 'coordinates': [self.square(-94, 40, -88, 46)]}},
+            {'type': 'Feature', 'properties': county,
+             'geometry': {'type': 'Polygon', 'coordinates': [self.square(-91, 43, -89, 45)]}},
+            # a county with a lake (a hole) in it
+            {'type': 'Feature', 'properties': lake_county,
+             'geometry': {'type': 'Polygon', 'coordinates': [self.square(-94, 40, -92, 42),
+                                                             self.square(-93.5, 40.5, -92.5, 41.5)]}},
+            # a state made of two islands
+            {'type': 'Feature', 'properties': islands,
+             'geometry': {'type': 'MultiPolygon', 'coordinates': [[self.square(10.2, 10.2, 10.8, 10.8)],
+                                                                  [self.square(12.2, 10.2, 12.8, 10.8)]]}},
+            # features without a country are skipped
+            {'type': 'Feature', 'properties': {'country_id': None},
+             'geometry': {'type': 'Polygon', 'coordinates': [self.square(-180, -90, 180, 90)]}},
+        ]}
+        self.index = BoundaryIndex.from_geojson(self.geojson)
+
+    def test_point_in_county_matches_county_over_state(self):
+        self.assertEqual(self.index.locate(44.5, -90.5)['administrative_level_two_id'], 100)
+        self.assertEqual(self.index.locate(45.5, -90.5)['administrative_level_two_id'], None)
+        self.assertEqual(self.index.locate(45.5, -90.5)['administrative_level_one_id'], 10)
+
+    def test_most_specific_match_does_not_depend_on_feature_order(self):
+        self.geojson['features'].reverse()
+        index = BoundaryIndex.from_geojson(self.geojson)
+
+        self.assertEqual(index.locate(44.5, -90.5)['administrative_level_two_id'], 100)
+
+    def test_point_in_hole_matches_surrounding_boundary(self):
+        self.assertEqual(self.index.locate(40.25, -93.75)['administrative_level_two_id'], 101)
+        # the hole is not part of the county, so only the state contains the point
+        self.assertEqual(self.index.locate(41, -93)['administrative_level_two_id'], None)
+        self.assertEqual(self.index.locate(41, -93)['administrative_level_one_id'], 10)
+
+    def test_multipolygon_matches_every_part(self):
+        self.assertEqual(self.index.locate(10.5, 10.5)['administrative_level_one_id'], 20)
+        self.assertEqual(self.index.locate(10.5, 12.5)['administrative_level_one_id'], 20)
+        # between the islands
+        self.assertIsNone(self.index.locate(10.5, 11.5))
+
+    def test_points_on_grid_cell_edges(self):
+        # the grid cells are one degree, so these points lie on cell edges and corners
+        self.assertEqual(self.index.locate(44, -90)['administrative_level_two_id'], 100)
+        self.assertEqual(self.index.locate(44, -90.5)['administrative_level_two_id'], 100)
+        self.assertEqual(self.index.locate(44.5, -90)['administrative_level_two_id'], 100)
+        self.assertEqual(self.index.locate(42, -89)['administrative_level_one_id'], 10)
+        for cell_size in [0.5, 2.0, 10.0]:
+            index = BoundaryIndex.from_geojson(self.geojson, cell_size=cell_size)
+            self.assertEqual(index.locate(44, -90)['administrative_level_two_id'], 100)
+            self.assertEqual(index.locate('10.5', '12.5')['administrative_level_one_id'], 20)
+
+    def test_point_outside_every_boundary(self):
+        self.assertIsNone(self.index.locate(0, 0))
+        self.assertIsNone(self.index.locate(47, -90))
+        self.assertIsNone(self.index.locate(-44.5, 90.5))
+
+    def test_reverse_geocode_uses_the_loaded_index(self):
+        saved_indexes = dict(geocoding._indexes)
+        try:
+            geocoding._indexes['BOUNDARIES_FILE'] = self.index
+            self.assertEqual(reverse_geocode(44.5, -90.5)['administrative_level_two_id'], 100)
+            # no boundary file could be loaded
+            geocoding._indexes['BOUNDARIES_FILE'] = None
+            self.assertIsNone(reverse_geocode(44.5, -90.5))
+        finally:
+            geocoding._indexes.clear()
+            geocoding._indexes.update(saved_indexes)
+
+
+class StandardNotificationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.yesterday = scheduled_tasks.get_yesterday()
+        yesterday_noon = timezone(settings.TIME_ZONE).localize(
+            datetime.strptime(cls.yesterday, '%Y-%m-%d') + timedelta(hours=12))
+        for cue_type, template_name in STANDARD_NOTIFICATION_TEMPLATES.items():
+            NotificationCueStandardType.objects.get_or_create(name=cue_type)
+            # the first word of each body names the cue type of the notification
+            NotificationMessageTemplate.objects.update_or_create(name=template_name, defaults={
+                'subject_template': 'Event {event_id}', 'body_template': cue_type + ' {event_id}',
+                'message_variables': []})
+        parent = Organization.objects.create(name='Test Parent Organization')
+        child = Organization.objects.create(name='Test Child Organization', parent_organization=parent)
+        other = Organization.objects.create(name='Test Other Organization')
+        cls.users = {}
+        for username, role_name, organization in [
+                ('owner', 'PartnerManager', child), ('parent_member', 'Partner', parent),
+                ('collaborator', 'Partner', other), ('outsider', 'Partner', other), ('admin', 'Admin', other)]:
+            cls.users[username] = User.objects.create(
+                username='test_' + username, email='test_' + username + '@example.org',
+                role=Role.objects.get_or_create(name=role_name)[0], organization=organization)
+        NotificationCuePreference.objects.filter(created_by__in=cls.users.values()).update(
+            create_when_new=True, create_when_modified=True, send_email=False)
+
+        # events created yesterday (so without any updates), and one made public yesterday
+        event_type = EventType.objects.get_or_create(name='Mortality/Morbidity')[0]
+        owner = cls.users['owner']
+        Event.objects.bulk_create([Event(event_type=event_type, event_reference=reference, public=public,
+                                         affected_count=0, created_by=owner, modified_by=owner)
+                                   for reference, public in [('private', False), ('public', True),
+                                                             ('made public', True)]])
+        events = Event.objects.filter(event_reference__in=['private', 'public', 'made public'])
+        events.update(created_date=cls.yesterday, modified_date=cls.yesterday)
+        cls.event_ids = dict(events.values_list('event_reference', 'id'))
+        EventReadUser.objects.bulk_create([EventReadUser(
+            event_id=cls.event_ids['private'], user=cls.users['collaborator'], created_by=owner, modified_by=owner)])
+        made_public = Event.objects.get(id=cls.event_ids['made public'])
+        Event.history.model.objects.create(
+            history_date=yesterday_noon, history_type='~', history_user=owner,
+            **dict({field.attname: getattr(made_public, field.attname) for field in Event._meta.fields},
+                   public=False))
+
+    def get_audiences(self):
+        users = {user.id: user for user in User.objects.filter(
+            id__in=[user.id for user in self.users.values()]).select_related('role', 'organization')}
+        events = list(Event.objects.filter(id__in=self.event_ids.values()).select_related('created_by'))
+        audiences = get_standard_notification_audiences(events, users, self.yesterday)
+        return {reference: audiences[event_id] for reference, event_id in self.event_ids.items()}
+
+    def get_user_ids(self, *usernames):
+        return set(self.users[username].id for username in usernames)
+
+    def get_notifications(self):
+        # return the cue types of the notifications about each test event to each test user
+        with mock.patch.object(scheduled_tasks.generate_notification, 'delay') as delay, mock.patch.object(
+                scheduled_tasks, 'send_missing_notification_cue_standard_email') as missing_cue_email:
+            scheduled_tasks.standard_notifications()
+        self.missing_cues = [(user.id, cue_type) for (user, cue_type), kwargs in missing_cue_email.call_args_list]
+        user_ids = {user.id: username for username, user in self.users.items()}
+        event_references = {event_id: reference for reference, event_id in self.event_ids.items()}
+        notifications = defaultdict(list)
+        for args, kwargs in delay.call_args_list:
+            if kwargs['event_id'] in event_references:
+                for recipient in kwargs['recipients']:
+                    if recipient in user_ids:
+                        notifications[(event_references[kwargs['event_id']], user_ids[recipient])].append(
+                            kwargs['body'].split()[0])
+        return notifications
+
+    def test_organization_audience_includes_parent_organizations(self):
+        audiences = self.get_audiences()['private']
+
+        self.assertEqual(audiences['Own'], self.get_user_ids('owner'))
+        self.assertEqual(audiences['Organization'], self.get_user_ids('owner', 'parent_member'))
+        self.assertEqual(audiences['Collaborator'], self.get_user_ids('collaborator'))
+
+    def test_all_audience_of_private_and_public_events(self):
+        audiences = self.get_audiences()
+
+        self.assertEqual(audiences['private']['All'],
+                         self.get_user_ids('owner', 'parent_member', 'collaborator', 'admin'))
+        self.assertEqual(audiences['public']['All'], set(user.id for user in self.users.values()))
+        # an event made public yesterday is still announced only to those who could see it before
+        self.assertEqual(audiences['made public']['All'], self.get_user_ids('owner', 'parent_member', 'admin'))
+
+    def test_each_user_gets_one_notification_of_the_most_specific_type(self):
+        notifications = self.get_notifications()
+
+        self.assertEqual(notifications[('private', 'owner')], ['Own'])
+        self.assertEqual(notifications[('private', 'parent_member')], ['Organization'])
+        self.assertEqual(notifications[('private', 'collaborator')], ['Collaborator'])
+        self.assertEqual(notifications[('private', 'admin')], ['All'])
+        self.assertNotIn(('private', 'outsider'), notifications)
+        self.assertEqual(notifications[('public', 'outsider')], ['All'])
+        self.assertNotIn(('made public', 'outsider'), notifications)
+
+    def test_users_not_wanting_a_type_get_the_next_most_specific_type(self):
+        NotificationCuePreference.objects.filter(
+            notificationcuestandard__created_by=self.users['owner'],
+            notificationcuestandard__standard_type__name='Own').update(create_when_new=False)
+        NotificationCueStandard.objects.filter(
+            created_by=self.users['parent_member'], standard_type__name='Organization').delete()
+
+        notifications = self.get_notifications()
+
+        self.assertEqual(notifications[('private', 'owner')], ['Organization'])
+        self.assertEqual(notifications[('private', 'parent_member')], ['All'])
+        self.assertIn((self.users['parent_member'].id, 'Organization'), self.missing_cues)
+        self.assertNotIn((self.users['owner'].id, 'Own'), self.missing_cues)
+
+
+class EventChangesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.yesterday = scheduled_tasks.get_yesterday()
+        yesterday_morning = timezone(settings.TIME_ZONE).localize(
+            datetime.strptime(cls.yesterday, '%Y-%m-%d') + timedelta(hours=9))
+        parent = Organization.objects.create(name='Test Parent Organization')
+        child = Organization.objects.create(name='Test Child Organization', parent_organization=parent)
+        other = Organization.objects.create(name='Test Other Organization')
+        cls.nwhc = Organization.objects.create(name='Test NWHC Organization')
+        cls.users = {}
+        for username, role_name, organization in [
+                ('creator', 'Partner', child), ('parent_member', 'Partner', parent),
+                ('collaborator', 'Partner', other), ('outsider', 'Partner', other), ('admin', 'Admin', other),
+                ('nwhc_member', 'Partner', cls.nwhc)]:
+            cls.users[username] = User.objects.create(
+                username='test_' + username, email='test_' + username + '@example.org',
+                role=Role.objects.get_or_create(name=role_name)[0], organization=organization)
+
+        creator = cls.users['creator']
+        old_type = EventType.objects.get_or_create(name='Mortality/Morbidity')[0]
+        new_type = EventType.objects.get_or_create(name='Surveillance')[0]
+        Event.objects.bulk_create([Event(event_type=old_type, event_reference='original', affected_count=0,
+                                         created_by=creator, modified_by=creator)])
+        Event.objects.filter(event_reference='original').update(created_date=cls.yesterday,
+                                                                modified_date=cls.yesterday)
+        event = Event.objects.get(event_reference='original')
+        cls.event_id = event.id
+        EventReadUser.objects.bulk_create([EventReadUser(
+            event=event, user=cls.users['collaborator'], created_by=creator, modified_by=creator)])
+
+        # the event was created yesterday morning and changed that afternoon: a change visible to everyone,
+        #  one visible to privileged users only, and one visible to NWHC users only
+        event_values = {field.attname: getattr(event, field.attname) for field in Event._meta.fields}
+        Event.history.model.objects.create(history_date=yesterday_morning, history_type='+', history_user=creator,
+                                           **event_values)
+        Event.history.model.objects.create(
+            history_date=yesterday_morning + timedelta(hours=6), history_type='~', history_user=creator,
+            **dict(event_values, event_type_id=new_type.id, event_reference='changed', legal_number='LN-1'))
+        # a comment, visible to admins and privileged users only
+        Comment.history.model.objects.create(
+            id=1, comment='A new comment', comment_type=CommentType.objects.get_or_create(name='Other')[0],
+            content_type=ContentType.objects.get_for_model(Event), object_id=event.id, created_by=creator,
+            modified_by=creator, created_date=event.created_date, modified_date=event.modified_date,
+            history_date=yesterday_morning + timedelta(hours=7), history_type='+', history_user=creator)
+
+    def get_updates(self, source_id, source_type, username):
+        with mock.patch.object(scheduled_tasks, 'get_nwhc_org_id', return_value=self.nwhc.id):
+            event_changes = EventChanges([Event.objects.get(id=self.event_id)], self.yesterday)
+        return event_changes.get_updates(Event.objects.get(id=self.event_id), source_id, source_type,
+                                         self.users[username])
+
+    def assertUpdates(self, username, *expected_changes):
+        # the event type change is visible to everyone, and the other changes only to those expected to see them
+        updates = self.get_updates(self.users['creator'].id, 'user', username)
+        self.assertIn('Event event type changed from Mortality/Morbidity to Surveillance', updates)
+        for change in ['Event event reference changed', 'Event legal number changed', 'An Event Comment was created']:
+            if change in expected_changes:
+                self.assertIn(change, updates)
+            else:
+                self.assertNotIn(change, updates)
+
+    def test_privileged_changes_are_visible_to_the_creator_organizations_and_collaborators(self):
+        self.assertUpdates('creator', 'Event event reference changed', 'An Event Comment was created')
+        self.assertUpdates('parent_member', 'Event event reference changed', 'An Event Comment was created')
+        self.assertUpdates('collaborator', 'Event event reference changed', 'An Event Comment was created')
+
+    def test_admins_see_privileged_records_but_not_privileged_fields(self):
+        self.assertUpdates('admin', 'An Event Comment was created')
+
+    def test_nwhc_changes_are_visible_to_nwhc_users_only(self):
+        self.assertUpdates('nwhc_member', 'Event legal number changed')
+        self.assertUpdates('outsider')
+
+    def test_updates_are_filtered_by_source(self):
+        self.assertEqual(self.get_updates(self.users['outsider'].id, 'user', 'creator'), '')
+        self.assertIn('Event event type changed', self.get_updates(
+            self.users['creator'].organization_id, 'org', 'outsider'))
+        self.assertEqual(self.get_updates(self.users['outsider'].organization_id, 'org', 'creator'), '')
+
+
+class CustomNotificationCueMatcherTests(SimpleTestCase):
+
+    @staticmethod
+    def get_matches(cues, event, **event_values):
+        values = defaultdict(set, {field: set(ids) for field, ids in event_values.items()})
+        return CustomNotificationCueMatcher(cues).match(event, values)
+
+    def test_and_requires_every_value(self):
+        cue = NotificationCueCustom(id=1, species={'values': ['1', '2'], 'operator': 'AND'})
+
+        self.assertEqual(self.get_matches([cue], Event(id=10), species=[1, 2, 3]), [1])
+        self.assertEqual(self.get_matches([cue], Event(id=10), species=[1]), [])
+
+    def test_or_requires_any_value(self):
+        cue = NotificationCueCustom(id=1, species={'values': [1, 2], 'operator': 'or'})
+
+        self.assertEqual(self.get_matches([cue], Event(id=10), species=[2]), [1])
+        self.assertEqual(self.get_matches([cue], Event(id=10), species=[3]), [])
+
+    def test_default_operators(self):
+        # land ownerships default to AND, and administrative level ones to OR
+        land_ownership_cue = NotificationCueCustom(
+            id=1, event_location_land_ownership={'values': [1, 2], 'operator': ''})
+        admin_level_one_cue = NotificationCueCustom(
+            id=2, event_location_administrative_level_one={'values': [1, 2], 'operator': ''})
+        cues = [land_ownership_cue, admin_level_one_cue]
+
+        self.assertEqual(self.get_matches(cues, Event(id=10), event_location_land_ownership=[1],
+                                          event_location_administrative_level_one=[1]), [2])
+        self.assertEqual(self.get_matches(cues, Event(id=10), event_location_land_ownership=[1, 2],
+                                          event_location_administrative_level_one=[3]), [1])
+
+    def test_and_diagnoses_must_also_be_event_diagnoses(self):
+        and_cue = NotificationCueCustom(id=1, species_diagnosis_diagnosis={'values': [1, 2], 'operator': 'AND'})
+        or_cue = NotificationCueCustom(id=2, species_diagnosis_diagnosis={'values': [1, 2], 'operator': 'OR'})
+
+        self.assertEqual(self.get_matches([and_cue, or_cue], Event(id=10), species_diagnosis_diagnosis=[1, 2],
+                                          event_diagnosis=[1]), [2])
+        self.assertEqual(self.get_matches([and_cue, or_cue], Event(id=10), species_diagnosis_diagnosis=[1, 2],
+                                          event_diagnosis=[1, 2]), [1, 2])
+
+    def test_affected_count_thresholds_are_inclusive(self):
+        cues = [NotificationCueCustom(id=1, event_affected_count=5, event_affected_count_operator='GTE'),
+                NotificationCueCustom(id=2, event_affected_count=5, event_affected_count_operator='lte'),
+                NotificationCueCustom(id=3, event_affected_count=5)]
+
+        self.assertEqual(self.get_matches(cues, Event(id=10, affected_count=4)), [2])
+        self.assertEqual(self.get_matches(cues, Event(id=10, affected_count=5)), [1, 2, 3])
+        self.assertEqual(self.get_matches(cues, Event(id=10, affected_count=6)), [1, 3])
+        self.assertEqual(self.get_matches(cues, Event(id=10, affected_count=None)), [])
+
+    def test_every_criterion_must_be_met(self):
+        cue = NotificationCueCustom(id=1, event=10, event_affected_count=5, species={'values': [1], 'operator': ''})
+
+        self.assertEqual(self.get_matches([cue], Event(id=10, affected_count=5), species=[1]), [1])
+        self.assertEqual(self.get_matches([cue], Event(id=10, affected_count=4), species=[1]), [])
+        self.assertEqual(self.get_matches([cue], Event(id=11, affected_count=5), species=[1]), [])
+        self.assertEqual(self.get_matches([cue], Event(id=10, affected_count=5), species=[2]), [])
+
+    def test_cues_without_criteria_match_nothing(self):
+        cue = NotificationCueCustom(id=1)
+
+        self.assertEqual(self.get_matches([cue], Event(id=10, affected_count=5), species=[1]), [])
+
+
+class GenerateNotificationsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.get_or_create(name='Partner')[0]
+        cls.user = User.objects.create(username='test_recipient', email='test_recipient@example.org', role=role)
+        cls.template = NotificationMessageTemplate.objects.create(
+            name='Test Notification', subject_template='Test', body_template='Test', message_variables=[])
+
+    def get_notification(self, subject):
+        return {'template_id': self.template.id, 'recipients': [self.user.id, self.user.id], 'source': 'system',
+                'event_id': None, 'client_page': 'home', 'subject': subject, 'body': 'Test body',
+                'send_email': True, 'email_to': [self.user.email]}
+
+    def get_subjects(self):
+        return sorted(Notification.objects.filter(recipient=self.user).values_list('subject', flat=True))
+
+    def test_notification_that_cannot_be_saved_does_not_lose_the_others(self):
+        # the subject of the second is too long for the subject field
+        generate_notifications([self.get_notification('First'), self.get_notification('x' * 200),
+                                self.get_notification('Third')])
+
+        self.assertEqual(self.get_subjects(), ['First', 'Third'])
+        self.assertEqual(OutgoingEmail.objects.filter(to=[self.user.email]).count(), 2)
+        self.assertTrue(OutgoingEmail.objects.filter(
+            subject__contains='Problem Encountered During generate_notification_task',
+            body__contains='the subject length was greater than').exists())
+
+    def test_generate_notification_generates_one_notification_per_recipient(self):
+        generate_notification(**self.get_notification('Single'))
+
+        self.assertEqual(self.get_subjects(), ['Single'])
+        self.assertEqual(OutgoingEmail.objects.filter(to=[self.user.email]).count(), 1)
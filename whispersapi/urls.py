@@ -67,6 +67,8 @@ router.register(r'contacttypes', views.ContactTypeViewSet, 'contacttypes')
 router.register(r'searches', views.SearchViewSet, 'searches')
 
 urlpatterns = [
+    # before the router urls, which would otherwise take 'since' for a notification id
+    url(r'^notifications/since/$', views.NotificationSinceView.as_view(), name='notifications-since'),
     url(r'^', include(router.urls)),
     url(r'^whispersapi-auth/', include('rest_framework.urls', namespace='rest_framework')),
     url(r'^login/$', auth_views.LoginView.as_view(template_name='rest_framework/login.html'), name='login'),
@@ -76,4 +78,6 @@ urlpatterns = [
     path('docs/', TemplateView.as_view(template_name='swagger-ui.html', extra_context={'schema_url': 'openapi-schema'}),
          name='swagger-ui'),
     url(r'^auth/$', views.AuthView.as_view(), name='authenticate'),
+    url(r'^thirdpartyservicemetrics/$', views.ThirdPartyServiceMetricsView.as_view(),
+        name='thirdpartyservicemetrics'),
 ] # + static(settings.STATIC_URL)
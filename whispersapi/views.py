@@ -1,8 +1,10 @@
 import re
+import json
 from datetime import date
 from datetime import datetime as dt
 from collections import OrderedDict
 from django.core.mail import EmailMessage
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from django.db import transaction
 from django.db.models import Count, Q
@@ -14,11 +16,13 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.exceptions import PermissionDenied, NotFound
 from rest_framework.settings import api_settings
 from rest_framework.schemas.openapi import AutoSchema
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework_csv import renderers as csv_renderers
+from whispersapi import http_client
 from whispersapi.tokens import email_verification_token
 from whispersapi.serializers import *
 from whispersapi.models import *
@@ -27,6 +31,7 @@ from whispersapi.permissions import *
 from whispersapi.pagination import *
 from whispersapi.authentication import *
 from whispersapi.immediate_tasks import *
+from whispersapi.configuration import get_whispers_email_address, get_nwhc_org_id
 from dry_rest_permissions.generics import DRYPermissions
 from django.shortcuts import get_object_or_404
 User = get_user_model()
@@ -63,33 +68,6 @@ class PlainTextParser(BaseParser):
 PK_REQUESTS = ['retrieve', 'update', 'partial_update', 'destroy']
 LIST_DELIMITER = ','
 
-def get_whispers_email_address():
-    whispers_email_address = Configuration.objects.filter(name='whispers_email_address').first()
-    if whispers_email_address:
-        if whispers_email_address.value.count('@') == 1:
-            EMAIL_WHISPERS = whispers_email_address.value
-        else:
-            EMAIL_WHISPERS = settings.EMAIL_WHISPERS
-            encountered_type = type(whispers_email_address.value).__name__
-            send_wrong_type_configuration_value_email('whispers_email_address', encountered_type, 'email_address')
-    else:
-        EMAIL_WHISPERS = settings.EMAIL_WHISPERS
-        send_missing_configuration_value_email('whispers_email_address')
-
-def get_nhwc_org_id():
-    nwhc_org_record = Configuration.objects.filter(name='nwhc_organization').first()
-    if nwhc_org_record:
-        if nwhc_org_record.value.isdecimal():
-            NWHC_ORG_ID = int(nwhc_org_record.value)
-        else:
-            NWHC_ORG_ID = settings.NWHC_ORG_ID
-            encountered_type = type(nwhc_org_record.value).__name__
-            send_wrong_type_configuration_value_email('nwhc_organization', encountered_type, 'int')
-    else:
-        NWHC_ORG_ID = settings.NWHC_ORG_ID
-        send_missing_configuration_value_email('nwhc_organization')
-    return NWHC_ORG_ID
-
 
 def update_modified_fields(obj, request):
     # update the modified fields so that the model is aware of who performed this delete,
@@ -107,7 +85,7 @@ def get_request_user(request):
 
 
 def construct_email(request_data, requester_email, message):
-    # construct and send the request email
+    # construct the request email and queue it to be sent
     subject = "Assistance Request"
     body = "A person (" + requester_email + ") has requested assistance:\r\n\r\n"
     body += message + "\r\n\r\n"
@@ -119,14 +97,8 @@ def construct_email(request_data, requester_email, message):
     reply_list = [requester_email, ]
     headers = None  # {'Message-ID': 'foo'}
     email = EmailMessage(subject, body, from_address, to_list, bcc_list, reply_to=reply_list, headers=headers)
-    if settings.ENVIRONMENT in ['production', 'test']:
-        try:
-            email.send(fail_silently=False)
-            return Response({"status": 'email sent'}, status=200)
-        except TypeError:
-            return Response({"status": "send email failed, please contact the administrator."}, status=500)
-    else:
-        return Response(email.__dict__, status=200)
+    queue_email(email)
+    return Response({"status": 'email queued'}, status=200)
 
 
 def generate_notification_request_new(lookup_table, request):
@@ -155,7 +127,8 @@ def generate_notification_request_new(lookup_table, request):
         recipients = list(User.objects.filter(role__in=[1, 2]).exclude(is_active=False).values_list('id', flat=True))
         # email forwarding: Automatic, to whispers@usgs.gov
         email_to = [User.objects.filter(id=1).values('email').first()['email'], ]
-        generate_notification.delay(msg_tmp.id, recipients, source, event, 'userdashboard', subject, body, True, email_to)
+        generate_notification_on_commit(msg_tmp.id, recipients, source, event, 'userdashboard', subject, body,
+                                        True, email_to)
     return Response({"status": 'email sent'}, status=200)
 
 
@@ -258,6 +231,9 @@ class EventViewSet(HistoryViewSet):
 
     request_collaboration:
     Sends a notification to the event owner and their superiors asking for the requester to become a collaborator on this event
+
+    bulk_import:
+    Creates many new events (each in the same format as an event create request) in a single request
     """
 
     queryset = Event.objects.all()
@@ -347,8 +323,8 @@ class EventViewSet(HistoryViewSet):
             except KeyError as e:
                 send_notification_template_message_keyerror_email(msg_tmp.name, e, msg_tmp.message_variables)
                 body = ""
-            generate_notification.delay(msg_tmp.id, recipient_ids, source, event.id, 'event', subject, body,
-                                        True, email_to)
+            generate_notification_on_commit(msg_tmp.id, recipient_ids, source, event.id, 'event', subject, body,
+                                            True, email_to)
 
         # Collaborator alert is also logged as an event-level comment.
         comment += "\r\nAlert sent to: " + recipient_names
@@ -400,9 +376,20 @@ class EventViewSet(HistoryViewSet):
                 Q(id=event_owner.id) | Q(role__in=[3, 4], organization=event_owner.organization.id) | Q(
                     role__in=[3, 4], organization__in=event_owner.parent_organizations)
             ).values_list('email', flat=True))
-            generate_notification.delay(msg_tmp.id, recipients, source, event.id, 'event', subject, body, True, email_to)
+            generate_notification_on_commit(msg_tmp.id, recipients, source, event.id, 'event', subject, body,
+                                            True, email_to)
         return Response({"status": 'email sent'}, status=200)
 
+    @action(detail=False, methods=['post'])
+    def bulk_import(self, request):
+        # expected JSON: a list/array of event objects (or an object with a field named "events" containing that list)
+        # no events are created unless every event is valid, otherwise the errors are returned by list index
+        events = request.data.get('events', None) if isinstance(request.data, dict) else request.data
+        serializer = EventBulkImportSerializer(data={'events': events}, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        events = serializer.save()
+        return Response({"status": 'events created', "event_ids": [event.id for event in events]}, status=201)
+
     def destroy(self, request, *args, **kwargs):
         # if the event is complete, it cannot be deleted
         if self.get_object().complete:
@@ -511,7 +498,7 @@ class EventEventGroupViewSet(HistoryViewSet):
         if not user or not user.is_authenticated:
             return EventEventGroup.objects.filter(eventgroup__category__name='Biologically Equivalent (Public)')
         # admins have access to all records
-        NWHC_ORG_ID = get_nhwc_org_id()
+        NWHC_ORG_ID = get_nwhc_org_id()
         if user.role.is_superadmin or user.role.is_admin or user.organization.id == NWHC_ORG_ID:
             return EventEventGroup.objects.all()
         else:
@@ -548,7 +535,7 @@ class EventGroupViewSet(HistoryViewSet):
         if not user or not user.is_authenticated:
             return EventGroup.objects.filter(category__name='Biologically Equivalent (Public)')
         # admins have access to all records
-        NWHC_ORG_ID = get_nhwc_org_id()
+        NWHC_ORG_ID = get_nwhc_org_id()
         if user.role.is_superadmin or user.role.is_admin or user.organization.id == NWHC_ORG_ID:
             return EventGroup.objects.all()
         else:
@@ -585,7 +572,7 @@ class EventGroupCategoryViewSet(HistoryViewSet):
         if not user or not user.is_authenticated:
             return EventGroupCategory.objects.filter(name='Biologically Equivalent (Public)')
         # admins have access to all records
-        NWHC_ORG_ID = get_nhwc_org_id()
+        NWHC_ORG_ID = get_nwhc_org_id()
         if user.role.is_superadmin or user.role.is_admin or user.organization.id == NWHC_ORG_ID:
             return EventGroupCategory.objects.all()
         else:
@@ -1738,7 +1725,10 @@ class NotificationViewSet(HistoryViewSet):
     Deletes a notification.
 
     bulk_update:
-    Updates multiple notifications.
+    Updates (sets read or unread) or deletes multiple notifications, either by id or by filter.
+
+    counts:
+    Returns the number of notifications and unread notifications of the requesting user.
     """
     serializer_class = NotificationSerializer
     filterset_class = NotificationFilter
@@ -1747,44 +1737,160 @@ class NotificationViewSet(HistoryViewSet):
         self.kwargs['action'] = getattr(self, 'action', None)
         return self.filter_queryset(Notification.objects.all())
 
+    def perform_destroy(self, instance):
+        delete_notifications(Notification.objects.filter(id=instance.id))
+
+    @action(methods=['get'], detail=False)
+    def counts(self, request):
+        # return the number of notifications (and unread notifications) of the requesting user from their stored counts,
+        # which is much cheaper than filtering and paginating their notifications
+        user = get_request_user(self.request)
+        total = unread = 0
+        if user and user.is_authenticated and not user.role.is_public:
+            notification_count = UserNotificationCount.objects.filter(user_id=user.id).first()
+            if notification_count:
+                total = notification_count.total
+                unread = notification_count.unread
+        return Response({"total": total, "unread": unread}, status=200)
+
     @action(methods=['post'], detail=False)
     def bulk_update(self, request):
+        # the notifications to update are either listed by id ("ids"), or described by a filter ("filter") of the
+        # requesting user's own notifications, e.g. {"unread": true}, {"created_before": "2020-01-01"}, {"event": 123},
+        # or {"all": true} for all of them, so that clients do not have to fetch the ids of every notification
+        # they want to update (an empty filter is rejected, so that all notifications are never updated by mistake)
         user = get_request_user(self.request)
 
         is_valid = True
         response_errors = []
         item = request.data
+        notifications = None
         if 'action' not in item or item['action'] not in ['delete', 'set_read', 'set_unread']:
             message = 'action is a required field (accepted values are "delete", "set_read", "set_unread")'
             response_errors.append(message)
-        if 'ids' not in item or not isinstance(item['ids'], list) or not (
-                all(isinstance(x, int) for x in item['ids']) or all(x.isdecimal() for x in item['ids'])):
-            # recipients_message = "A field named \"ids\" containing a list/array of notification IDs"
-            # recipients_message += " is required to bulk update notifications."
-            # raise serializers.ValidationError(recipients_message)
-            response_errors.append("ids is a required field")
+        if ('ids' in item) == ('filter' in item):
+            response_errors.append("either ids or filter is a required field (but not both)")
+        elif 'ids' in item:
+            if not isinstance(item['ids'], list) or not (
+                    all(isinstance(x, int) for x in item['ids'])
+                    or all(isinstance(x, str) and x.isdecimal() for x in item['ids'])):
+                response_errors.append("ids must be a list of notification IDs")
+            else:
+                ids = set(int(x) for x in item['ids'])
+                notifications = Notification.objects.filter(id__in=ids)
+                if not (user.role.is_superadmin or user.role.is_admin):
+                    # count the submitted ids the user owns rather than loading all of the user's notification ids
+                    if notifications.filter(recipient__id=user.id).count() != len(ids):
+                        message = "the requesting user must be the recipient of all notifications for all submitted ids"
+                        response_errors.append(message)
         else:
-            if user.role.id not in [1,2]:
-                user_notifications = list(
-                    Notification.objects.filter(recipient__id=user.id).values_list('id', flat=True))
-                if not all(x in user_notifications for x in item['ids']):
-                    message = "the requesting user must be the recipient of all notifications for all submitted ids"
+            target = item['filter']
+            if not isinstance(target, dict):
+                response_errors.append("filter must be an object")
+            else:
+                notifications = Notification.objects.filter(recipient__id=user.id)
+                unknown_keys = set(target.keys()) - {'all', 'unread', 'created_before', 'event'}
+                if unknown_keys:
+                    message = "filter accepts only the keys all, unread, created_before, event (not "
+                    message += ", ".join(sorted(unknown_keys)) + ")"
                     response_errors.append(message)
+                if 'all' in target and target['all'] is not True:
+                    response_errors.append("filter all must be true")
+                elif not target:
+                    response_errors.append('filter requires at least one key (use {"all": true} for all notifications)')
+                if 'unread' in target:
+                    if not isinstance(target['unread'], bool):
+                        response_errors.append("filter unread must be a boolean")
+                    else:
+                        notifications = notifications.filter(read=not target['unread'])
+                if 'created_before' in target:
+                    try:
+                        created_before = dt.strptime(str(target['created_before']), '%Y-%m-%d').date()
+                        notifications = notifications.filter(created_date__lt=created_before)
+                    except ValueError:
+                        response_errors.append('filter created_before must be a date in "YYYY-MM-DD" format')
+                if 'event' in target:
+                    if not str(target['event']).isdecimal():
+                        response_errors.append("filter event must be an event ID")
+                    else:
+                        notifications = notifications.filter(event__id=int(target['event']))
         if len(response_errors) > 0:
             is_valid = False
 
         if is_valid:
             if item['action'] == 'delete':
-                Notification.objects.filter(id__in=(item['ids'])).delete()
+                count = delete_notifications(notifications)
             elif item['action'] == 'set_read':
-                Notification.objects.filter(id__in=(item['ids'])).update(read=True)
-            elif item['action'] == 'set_unread':
-                Notification.objects.filter(id__in=(item['ids'])).update(read=False)
-            return Response({"status": 'update completed'}, status=200)
+                count = set_notifications_read(notifications, True)
+            else:
+                count = set_notifications_read(notifications, False)
+            return Response({"status": 'update completed', "count": count}, status=200)
         else:
             return Response({"non-field errors": response_errors}, status=400)
 
 
+class EventStreamRenderer(BaseRenderer):
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # renders the new notifications (with the number of milliseconds the browser waits before reconnecting)
+        # as server-sent events, or an error (e.g., an authentication failure) as an error event
+        if renderer_context and renderer_context['response'].status_code == 200 and 'notifications' in data:
+            text = 'retry: {}\n\n'.format(NOTIFICATION_POLL_RETRY_AFTER * 1000)
+            for notification in data['notifications']:
+                text += 'id: {}\nevent: notification\ndata: {}\n\n'.format(
+                    notification['id'], json.dumps(notification, cls=DjangoJSONEncoder))
+            return text.encode(self.charset)
+        return 'event: error\ndata: {}\n\n'.format(json.dumps(data)).encode(self.charset)
+
+
+# the number of seconds a client should wait before checking for new notifications again,
+# and the maximum number of notifications returned at once
+NOTIFICATION_POLL_RETRY_AFTER = 10
+NOTIFICATION_POLL_MAX_RESULTS = 100
+
+
+class NotificationSinceView(views.APIView):
+    """
+    list:
+    Returns the notifications of the requesting user with an id greater than the "since" query parameter,
+    or no content (204) if there are none yet, with a "Retry-After" header of the number of seconds to wait
+    before asking again.
+    When requested with "Accept: text/event-stream", instead returns the new notifications as server-sent events
+    (resuming after the id in the "Last-Event-ID" header when the browser reconnects) with a retry interval.
+    """
+
+    # this view answers at once rather than waiting for a new notification (so it never ties up a web server thread),
+    # does not update the user's last_login (unlike the viewsets), and checks for new notifications with
+    # a single indexed query of the user's notifications, so that polling while idle costs next to nothing
+    permission_classes = (IsAuthenticated,)
+    renderer_classes = (JSONRenderer, EventStreamRenderer)
+
+    def get(self, request):
+        user = get_request_user(request)
+        since = request.META.get('HTTP_LAST_EVENT_ID') or request.query_params.get('since', None)
+        if since is None or not since.isdecimal():
+            return Response({"non-field errors": ["since is a required field (a notification ID)"]}, status=400)
+        since = int(since)
+
+        # public users cannot see any notifications
+        notifications = Notification.objects.none() if user.role.is_public else Notification.objects.filter(
+            recipient__id=user.id, id__gt=since)
+
+        # only load the notifications themselves once there is something to return
+        # (except for server-sent events, since browsers stop reconnecting to an event stream that has no content)
+        if not notifications.exists() and request.accepted_renderer.format != 'event-stream':
+            return Response(status=204, headers={'Retry-After': str(NOTIFICATION_POLL_RETRY_AFTER)})
+        new_notifications = list(notifications.select_related('created_by', 'modified_by').order_by(
+            'id')[:NOTIFICATION_POLL_MAX_RESULTS])
+        data = NotificationSerializer(new_notifications, many=True, context={'request': request}).data
+        latest_id = new_notifications[-1].id if new_notifications else since
+        headers = {'Retry-After': str(NOTIFICATION_POLL_RETRY_AFTER), 'Cache-Control': 'no-cache'}
+        return Response({"latest_id": latest_id, "notifications": data}, status=200, headers=headers)
+
+
 class NotificationCuePreferenceViewSet(HistoryViewSet):
     """
     list:
@@ -2164,8 +2270,8 @@ class UserViewSet(HistoryViewSet):
                     last_name=user.last_name,
                     password_reset_link=password_reset_link)
                 event = None
-                generate_notification.delay(msg_tmp.id, recipients, source, event, 'homepage', subject, body,
-                                            True, email_to)
+                generate_notification_on_commit(msg_tmp.id, recipients, source, event, 'homepage', subject, body,
+                                                True, email_to)
             return Response({"status": "Password reset request processed."})
         else:
             raise serializers.ValidationError("Request must include an username.")
@@ -2228,7 +2334,8 @@ class UserViewSet(HistoryViewSet):
             ) + [user.id, ]
             # email forwarding: Automatic, to user's email and to whispers@usgs.gov
             email_to = [User.objects.filter(id=1).values('email').first()['email'], user.email, ]
-            generate_notification.delay(msg_tmp.id, recipients, source, event, 'homepage', subject, body, True, email_to)
+            generate_notification_on_commit(msg_tmp.id, recipients, source, event, 'homepage', subject, body,
+                                            True, email_to)
 
 
 class AuthView(views.APIView):
@@ -2248,6 +2355,25 @@ class AuthView(views.APIView):
         return Response(self.serializer_class(user, context={'request': request, 'view_name': 'auth'}).data)
 
 
+class ThirdPartyServiceMetricsView(views.APIView):
+    """
+    list:
+    Returns the number of requests, number of errors, and average and maximum response times (in seconds)
+    of each third party service endpoint requested by the web server process that handles this request
+    (since that process started). Only available to administrators.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        user = get_request_user(request)
+        if not (user.role.is_superadmin or user.role.is_admin):
+            raise PermissionDenied
+        metrics = [dict(metrics, service=service, path=path)
+                   for (service, path), metrics in sorted(http_client.get_metrics().items())]
+        return Response(metrics, status=200)
+
+
 class UserChangeRequestViewSet(HistoryViewSet):
     """
     list:
@@ -113,6 +113,11 @@ EMAIL_USE_SSL = CONFIG.get('email', 'EMAIL_USE_SSL')
 #  the alternative is EMAIL_USE_TLS which does explicit TLS, typically for port 587
 #  the USGS SMTP Relay documentation says to use prefer port 465 over 25 or 587, so I went with EMAIL_USE_SSL here
 EMAIL_TIMEOUT = CONFIG.get('email', 'EMAIL_TIMEOUT')
+# the most emails the outbox worker sends per minute (to stay within the throughput allowed by the USGS SMTP Relay),
+# and the directory (relative to this directory) it writes emails to, instead of sending them,
+# outside of the production and test environments
+EMAIL_MAX_PER_MINUTE = int(CONFIG.get('email', 'EMAIL_MAX_PER_MINUTE', fallback='60'))
+EMAIL_FILE_PATH = os.path.join(SETTINGS_DIR, CONFIG.get('email', 'EMAIL_FILE_PATH', fallback='sent_emails'))
 DEFAULT_FROM_EMAIL = CONFIG.get('email', 'DEFAULT_FROM_EMAIL')
 
 # Database
@@ -198,6 +203,11 @@ HFS_LOCATIONS = CONFIG.get('whispers', 'HFS_LOCATIONS')
 GEONAMES_USERNAME = CONFIG.get('whispers', 'GEONAMES_USERNAME')
 GEONAMES_API = CONFIG.get('whispers', 'GEONAMES_API')
 FLYWAYS_API = CONFIG.get('whispers', 'FLYWAYS_API')
+# GeoJSON file of administrative boundaries for offline reverse geocoding (relative to this directory),
+# without which locations are reverse geocoded by Geonames
+BOUNDARIES_FILE = CONFIG.get('whispers', 'BOUNDARIES_FILE', fallback='')
+# GeoJSON file of flyway boundaries (relative to this directory), without which flyways are found by the FWS service
+FLYWAYS_FILE = CONFIG.get('whispers', 'FLYWAYS_FILE', fallback='')
 
 # How to generate a reCAPTCHA secret key for local development:
 # 1. Register for an API key pair: http://www.google.com/recaptcha/admin